@@ -24,7 +24,30 @@
 import sys
 import os
 import re
-from bitstring import BitArray, BitStream
+import mmap
+import marshal
+import array
+import bisect
+import hashlib
+import binascii
+import struct
+import argparse
+import csv
+import io
+import json
+import collections
+import difflib
+import concurrent.futures
+import socket
+import sqlite3
+import stat
+import asyncio
+import time
+import tempfile
+
+
+START_CODE = b'\x00\x00\x01'
+EMULATION_PREVENTION = b'\x00\x00\x03'
 
 
 class NalUnitType:
@@ -78,550 +101,6350 @@ class NalUnitType:
    NAL_UNIT_UNSPEC_30 = 30
    NAL_UNIT_UNSPEC_31 = 31   
 
-class nal_unit_header(object):
-   def __init__(self, s):
-      self.forbidden_zero_bit  = s.read('uint:1')
-      self.nuh_reserved_zero_bit = s.read('uint:1')
-      self.nuh_layer_id = s.read('uint:6')
-      self.nal_unit_type = s.read('uint:5')
-      self.nuh_temporal_id_plus1 = s.read('uint:3')
+def _ue_table():
+   # next 8 bits -> (length << 8) | codeNum for every ue(v) codeword of at
+   # most 8 bits, 0 where leadingZeroBits is too large to decide from 8 bits
+   table = []
+   for w in range(256):
+      leadingZeroBits = 8 - w.bit_length()
+      length = 2 * leadingZeroBits + 1
+      if w and length <= 8:
+         table.append((length << 8) | ((w >> (8 - length)) - 1))
+      else:
+         table.append(0)
+   return tuple(table)
 
-   def show(self):
-      print('  forbidden_zero_bit', self.forbidden_zero_bit)
-      print('  nuh_reserved_zero_bit', self.nuh_reserved_zero_bit)
-      print('  nuh_layer_id', self.nuh_layer_id)
-      print('  nal_unit_type', self.nal_unit_type)
-      print('  nuh_temporal_id_plus1', self.nuh_temporal_id_plus1)
+_UE_TABLE = _ue_table()
 
-class video_parameter_set_rbsp(object):
-   def __init__(self, s):
+
+def ceil_log2(x):
+   """
+   Ceil( Log2( x ) ) for the u(v) lengths of the syntax tables
+   """
+   return (x - 1).bit_length() if x > 1 else 0
+
+
+class BitReader(object):
+   """
+   7.2 / 9.2 read_bits( n ), ue(v), se(v) and the helper functions of the
+   syntax tables, over an RBSP held in bytes. pos counts bits.
+   """
+   __slots__ = ('data', 'pos', 'end', 'rbsp_end')
+
+   def __init__(self, data, pos=0):
+      self.data = bytes(data)
+      self.pos = pos
+      self.end = len(self.data) << 3
+      self.rbsp_end = None
+
+   def u(self, n):
+      pos = self.pos
+      end = pos + n
+      if end > self.end:
+         raise EOFError('read of {0:d} bits at bit {1:d} past end of RBSP ({2:d} bits)'.format(n, pos, self.end))
+      self.pos = end
+      bit = pos & 7
+      if bit + n <= 8:
+         return (self.data[pos >> 3] >> (8 - bit - n)) & ((1 << n) - 1)
+      first = pos >> 3
+      last = (end + 7) >> 3
+      return (int.from_bytes(self.data[first:last], 'big') >> ((last << 3) - end)) & ((1 << n) - 1)
+
+   f = u
+
+   def peek(self, n):
       """
-      7.3.2.3 Video parameter set RBSP syntax
-      """
-      self.t = '\t'
-      self.vps_video_parameter_set_id = s.read('uint:4')
-      self.vps_max_layers_minus1 = s.read('uint:6')
-      self.vps_max_sublayers_minus1 = s.read('uint:3')
-      if self.vps_max_layers_minus1 > 0 & self.vps_max_sublayers_minus1 > 0:
-         self.vps_default_ptl_dpb_hrd_max_tid_flag = s.read('uint:1')
-      if self.vps_max_layers_minus1 > 0:
-         self.vps_all_independent_layers_flag = s.read('uint:1')
-      for i in range(self.vps_max_layers_minus1):
-         self.vps_layer_id[i] = s.read('uint:6')
-         if i > 0 & self.vps_all_independent_layers_flag == 0:
-            self.vps_max_tid_ref_present_flag[i] = s.read('uint:1')
-            for j in range(i):
-               self.vps_direct_ref_layer_flag[i][j] = s.read('uint:1')
-               if self.vps_max_tid_ref_present_flag[i] & self.vps_direct_ref_layer_flag[i][j]:
-                  self.vps_max_tid_il_ref_pics_plus1[i][j] = s.read('uint:3')
-      if self.vps_max_layers_minus1 > 0:
-         if self.vps_all_independent_layers_flag:
-            self.vps_each_layer_is_an_ols_flag = s.read('uint:1')
-         if self.vps_each_layer_is_an_ols_flag == 0:
-            if self.vps_all_independent_layers_flag == 0:
-               self.vps_ols_mode_idc = s.read('uint:2')
-            if self.vps_ols_mode_idc == 2 :
-               self.vps_num_output_layer_sets_minus2 = s.read('uint:8')
-               for i in range(self.vps_num_output_layer_sets_minus2 ):
-                  for j in range(self.vps_max_layers_minus1):
-                     self.vps_ols_output_layer_flag[ i ][ j ] = s.read('uint:1')
-               self.vps_num_ptls_minus1 = s.read('uint:8')
-            for i in range(self.vps_num_ptls_minus1):
-               if i > 0:
-                  self.vps_pt_present_flag[i] = s.read('uint:1')
-               if( vps_default_ptl_dpb_hrd_max_tid_flag  == 0):
-                  self.vps_ptl_max_tid[ i ] = s.read('uint:3')
-            while not byte_alined():
-               self.vps_ptl_alignment_zero_bit = s.read('uint:1') #equal to 0 */
-            for i in range(self.vps_num_ptls_minus1):
-               self.profile_tier_level( vps_pt_present_flag[ i ], vps_ptl_max_tid[ i ] )
-            for i in range(self.TotalNumOlss):
-               if self.vps_num_ptls_minus1 > 0 & self.vps_num_ptls_minus1 + 1 != self.TotalNumOlss:
-                  self.vps_ols_ptl_idx[ i ] = s.read('uint:8')
-            if not self.vps_each_layer_is_an_ols_flag:
-               self.vps_num_dpb_params_minus1 = s.read('ue')
-               if self.vps_max_sublayers_minus1 > 0:
-                  self.vps_sublayer_dpb_params_present_flag = s.read('uint:1')
-               for i in range (self.VpsNumDpbParams) :
-                  if not self.vps_default_ptl_dpb_hrd_max_tid_flag:
-                     self.vps_dpb_max_tid[i] = s.read('uint:3')
-                  self.dpb_parameters( vps_dpb_max_tid[ i ], vps_sublayer_dpb_params_present_flag )
-               for i in range(self.NumMultiLayerOlss):
-                  self.vps_ols_dpb_pic_width[ i ] = s.read('ue')
-                  self.vps_ols_dpb_pic_height[ i ] = s.read('ue')
-                  self.vps_ols_dpb_chroma_format[ i ] = s.read('uint:2')
-                  self.vps_ols_dpb_bitdepth_minus8[ i ] = s.read('ue')
-                  if self.VpsNumDpbParams > 1 & self.VpsNumDpbParams == 1 != self.NumMultiLayerOlss:
-                     self.vps_ols_dpb_params_idx[ i ] = s.read('ue')
-                     
-
-
-class seq_parameter_set_rbsp(object):
-   def __init__(self, s):
+      next_bits( n ); bits past the end of the RBSP read as 0
       """
-      7.3.2.4 sequence parameter set RBSP syntax
+      pos = self.pos
+      first = pos >> 3
+      last = (pos + n + 7) >> 3
+      chunk = self.data[first:last]
+      v = int.from_bytes(chunk, 'big') << ((last - first - len(chunk)) << 3)
+      return (v >> ((last << 3) - pos - n)) & ((1 << n) - 1)
+
+   def ue(self):
+      pos = self.pos
+      code = _UE_TABLE[self.peek(8)]
+      if code and pos + (code >> 8) <= self.end:
+         self.pos = pos + (code >> 8)
+         return code & 0xff
+      w = self.peek(32)
+      if w == 0:
+         raise ValueError('ue(v) with more than 31 leading zero bits at bit {0:d}'.format(pos))
+      leadingZeroBits = 32 - w.bit_length()
+      self.pos = pos + leadingZeroBits + 1
+      return (1 << leadingZeroBits) - 1 + self.u(leadingZeroBits)
+
+   def se(self):
+      k = self.ue()
+      return (k + 1) >> 1 if k & 1 else -(k >> 1)
+
+   def skip(self, n):
+      self.pos += n
+
+   def byte_aligned(self):
+      return not self.pos & 7
+
+   def byte_alignment(self):
       """
-      self.t = '\t'
-      self.sps_seq_parameter_set_id = s.read('uint:4')
-      self.sps_video_parameter_set_id = s.read('uint:4')
-      self.sps_max_sublayers_minus1 = s.read('uint:3')
-      self.sps_chroma_format_idc  = s.read('uint:2')
-      self.sps_log2_ctu_size_minus5 = s.read('uint:2')
-      self.sps_ptl_dpb_hrd_params_present_flag  = s.read('uint:1')
-      if self.sps_ptl_dpb_hrd_params_present_flag :
-         pass
-         #self.profile_tier_level( 1, self.sps_max_sublayers_minus1 )
-      self.sps_gdr_enabled_flag = s.read('uint:1')
-      self.sps_ref_pic_resampling_enabled_flag  = s.read('uint:1')
-      if self.sps_ref_pic_resampling_enabled_flag:
-         self.sps_res_change_in_clvs_allowed_flag = s.read('uint:1')
-      self.sps_pic_width_max_in_luma_samples = s.read('ue')
-      self.sps_pic_height_max_in_luma_samples = s.read('ue')
-      self.sps_conformance_window_flag = s.read('uint:1')
-      if self.sps_conformance_window_flag:
-         self.sps_conf_win_left_offset = s.read('ue')
-         self.sps_conf_win_right_offset = s.read('ue')
-         self.sps_conf_win_top_offset = s.read('ue')
-         self.sps_conf_win_bottom_offset = s.read('ue')
-      self.sps_subpic_info_present_flag = s.read('uint:1')
-      if self.sps_subpic_info_present_flag:
-         self.sps_num_subpics_minus1 = s.read('ue')
-         if self.sps_num_subpics_minus1 > 0:
-            self.sps_independent_subpics_flag  = s.read('uint:1')
-            self.sps_subpic_same_size_flag  = s.read('uint:1')
-         for i in range(self.sps_num_subpics_minus1):
-            if not self.sps_subpic_same_size_flag or i ==  0:
-               if i > 0 & self.sps_pic_width_max_in_luma_samples > CtbSizeY:
-                  self.sps_subpic_ctu_top_left_x[ i ] = s.read('ue')
-               if i > 0 & self.sps_pic_height_max_in_luma_samples > CtbSizeY:
-                  self.sps_subpic_ctu_top_left_y[ i ] = s.read('ue')
-               if i < self.sps_num_subpics_minus1 & self.sps_pic_width_max_in_luma_samples > CtbSizeY:
-                  self.sps_subpic_width_minus1[ i ] = s.read('ue')
-               if i < self.sps_num_subpics_minus1 & self.sps_pic_height_max_in_luma_samples > CtbSizeY:
-                  self.sps_subpic_height_minus1[ i ] = s.read('ue')
-            if not sps_independent_subpics_flag:
-               self.sps_subpic_treated_as_pic_flag[ i ]  = s.read('uint:1')
-               self.sps_loop_filter_across_subpic_enabled_flag[ i ]  = s.read('uint:1')
-         self.sps_subpic_id_len_minus1  = s.read('ue')
-         self.sps_subpic_id_mapping_explicitly_signalled_flag  = s.read('uint:1')
-         if self.sps_subpic_id_mapping_explicitly_signalled_flag:
-            self.sps_subpic_id_mapping_present_flag = s.read('uint:1')
-            if self.sps_subpic_id_mapping_present_flag:
-               for i in  i <= self.sps_num_subpics_minus1:
-                  self.sps_subpic_id[ i ]  = s.read('ue')
-         self.sps_bitdepth_minus8  = s.read('ue')
-         self.sps_entropy_coding_sync_enabled_flag = s.read('uint:1')
-         self.sps_entry_point_offsets_present_flag = s.read('uint:1')
-         self.sps_log2_max_pic_order_cnt_lsb_minus4 = s.read('uint:4')
-         self.sps_poc_msb_cycle_flag = s.read('uint:1')
-         if self.sps_poc_msb_cycle_flag:
-            self.sps_poc_msb_cycle_len_minus1 = s.read('ue')
-         self.sps_num_extra_ph_bytes = s.read('uint:2')
-         for i in range(self.sps_num_extra_ph_bytes * 8 ):
-            self.sps_extra_ph_bit_present_flag[ i ] = s.read('uint:1')
-         self.sps_num_extra_sh_bytes = s.read('uint:2')
-         for i in range(self.sps_num_extra_sh_bytes * 8):
-            self.sps_extra_sh_bit_present_flag[ i ] = s.read('uint:1')
-         if self.sps_ptl_dpb_hrd_params_present_flag :
-            if( self.sps_max_sublayers_minus1 > 0 ):
-               self.sps_sublayer_dpb_params_flag = s.read('uint:1')
-            dpb_parameters( self.sps_max_sublayers_minus1, self.sps_sublayer_dpb_params_flag )
-         self.sps_log2_min_luma_coding_block_size_minus2 = s.read('ue')
-         self.sps_partition_constraints_override_enabled_flag = s.read('uint:1')
-         self.sps_log2_diff_min_qt_min_cb_intra_slice_luma = s.read('ue')
-         self.sps_max_mtt_hierarchy_depth_intra_slice_luma = s.read('ue')
-         if sps_max_mtt_hierarchy_depth_intra_slice_luma != 0:
-            self.sps_log2_diff_max_bt_min_qt_intra_slice_luma = s.read('ue')
-            self.sps_log2_diff_max_tt_min_qt_intra_slice_luma = s.read('ue')
-         if self.sps_chroma_format_idc != 0:
-            self.sps_qtbtt_dual_tree_intra_flag = s.read('uint:1')
-         if self.sps_qtbtt_dual_tree_intra_flag:
-            self.sps_log2_diff_min_qt_min_cb_intra_slice_chroma = s.read('ue')
-            self.sps_max_mtt_hierarchy_depth_intra_slice_chroma = s.read('ue')
-         if self.sps_max_mtt_hierarchy_depth_intra_slice_chroma != 0:
-            self.sps_log2_diff_max_bt_min_qt_intra_slice_chroma = s.read('ue')
-            self.sps_log2_diff_max_tt_min_qt_intra_slice_chroma = s.read('ue')
-      if self.CtbSizeY > 32:
-         self.sps_max_luma_transform_size_64_flag  = s.read('uint:1') 
-      self.sps_transform_skip_enabled_flag = s.read('uint:1')
-      if self.sps_transform_skip_enabled_flag: 
-         self.sps_log2_transform_skip_max_size_minus2 = s.read('ue')
-         self.sps_bdpcm_enabled_flag = s.read('uint:1')
-         self.sps_mts_enabled_flag = s.read('uint:1')
-         if self.sps_mts_enabled_flag :
-            self.sps_explicit_mts_intra_enabled_flag = s.read('uint:1')
-            self.sps_explicit_mts_inter_enabled_flag = s.read('uint:1')
-         self.sps_lfnst_enabled_flag = s.read('uint:1')
-         if self.sps_chroma_format_idc != 0:
-            self.sps_joint_cbcr_enabled_flag = s.read('uint:1')
-            self.sps_same_qp_table_for_chroma_flag = s.read('uint:1')
-         #numQpTables = self.sps_same_qp_table_for_chroma_flag ? 1 : ( self.sps_joint_cbcr_enabled_flag ? 3 : 2 )
-         numQpTables = 1 if self.sps_same_qp_table_for_chroma_flag else 3 if self.sps_joint_cbcr_enabled_flag else 2 
-         for i in i < numQpTables:
-            self.sps_qp_table_start_minus26[ i ] = s.read('se')
-            self.sps_num_points_in_qp_table_minus1[ i ] = s.read('ue')
-            for j in j <= sps_num_points_in_qp_table_minus1[ i ]:
-               self.sps_delta_qp_in_val_minus1[ i ][ j ] = s.read('ue')
-               self.sps_delta_qp_diff_val[ i ][ j ] = s.read('ue')
-      self.sps_sao_enabled_flag = s.read('uint:1')
-      self.sps_alf_enabled_flag = s.read('uint:1')
-      if self.sps_alf_enabled_flag & self.sps_chroma_format_idc != 0:
-         self.sps_ccalf_enabled_flag = s.read('uint:1')
-      self.sps_lmcs_enabled_flag = s.read('uint:1')
-      self.sps_weighted_pred_flag = s.read('uint:1')
-      self.sps_weighted_bipred_flag = s.read('uint:1')
-      self.sps_long_term_ref_pics_flag = s.read('uint:1')
-      if self.sps_video_parameter_set_id > 0:
-         self.sps_inter_layer_prediction_enabled_flag = s.read('uint:1')
-      self.sps_idr_rpl_present_flag = s.read('uint:1')
-      self.sps_rpl1_same_as_rpl0_flag = s.read('uint:1')
-      #for i in i <  self.sps_rpl1_same_as_rpl0_flag ? 1 : 2:
-      for i in i <  1 if self.sps_rpl1_same_as_rpl0_flag else  2:
-         self.sps_num_ref_pic_lists[ i ] = s.read('ue')
-         for j in j < sps_num_ref_pic_lists[ i ]:
-            pass
-            ref_pic_list_struct( i, j )
-      self.sps_ref_wraparound_enabled_flag = s.read('uint:1')
-      self.sps_temporal_mvp_enabled_flag = s.read('uint:1')
-      if self.sps_temporal_mvp_enabled_flag:
-         self.sps_sbtmvp_enabled_flag = s.read('uint:1')
-      self.sps_amvr_enabled_flag  = s.read('uint:1')
-      self.sps_bdof_enabled_flag = s.read('uint:1')
-      if self.sps_bdof_enabled_flag:
-         self.sps_bdof_control_present_in_ph_flag = s.read('uint:1')
-      self.sps_smvd_enabled_flag = s.read('uint:1')
-      self.sps_dmvr_enabled_flag = s.read('uint:1')
-      if self.sps_dmvr_enabled_flag:
-         self.sps_dmvr_control_present_in_ph_flag = s.read('uint:1')
-      self.sps_mmvd_enabled_flag = s.read('uint:1')
-      if self.sps_mmvd_enabled_flag:
-         self.sps_mmvd_fullpel_only_enabled_flag = s.read('uint:1')
-      self.sps_six_minus_max_num_merge_cand = s.read('ue')
-      self.sps_sbt_enabled_flag = s.read('uint:1')
-      self.sps_affine_enabled_flag = s.read('uint:1')
-      if self.sps_affine_enabled_flag :
-         self.sps_five_minus_max_num_subblock_merge_cand = s.read('ue')
-         self.sps_6param_affine_enabled_flag = s.read('uint:1')
-         if self.sps_amvr_enabled_flag:
-            self.sps_affine_amvr_enabled_flag = s.read('uint:1')
-         self.sps_affine_prof_enabled_flag = s.read('uint:1')
-         if self.sps_affine_prof_enabled_flag:
-            self.sps_prof_control_present_in_ph_flag = s.read('uint:1')
-      self.sps_bcw_enabled_flag = s.read('uint:1')
-      self.sps_ciip_enabled_flag = s.read('uint:1')
-      if self.MaxNumMergeCand >= 2:
-         self.sps_gpm_enabled_flag = s.read('uint:1')
-      if self.sps_gpm_enabled_flag & self.MaxNumMergeCand >= 3:
-         self.sps_max_num_merge_cand_minus_max_num_gpm_cand = s.read('ue')
-      self.sps_log2_parallel_merge_level_minus2 = s.read('ue')
-      self.sps_isp_enabled_flag = s.read('uint:1')
-      self.sps_mrl_enabled_flag = s.read('uint:1')
-      self.sps_mip_enabled_flag = s.read('uint:1')
-      if self.sps_chroma_format_idc != 0:
-         self.sps_cclm_enabled_flag = s.read('uint:1')
-      if self.sps_chroma_format_idc == 1:
-         self.sps_chroma_horizontal_collocated_flag = s.read('uint:1')
-         self.sps_chroma_vertical_collocated_flag = s.read('uint:1')
-      self.sps_palette_enabled_flag = s.read('uint:1')
-      if self.sps_chroma_format_idc == 3 != self.sps_max_luma_transform_size_64_flag:
-         self.sps_act_enabled_flag = s.read('uint:1')
-      if self.sps_transform_skip_enabled_flag or self.sps_palette_enabled_flag:
-         self.sps_min_qp_prime_ts = s.read('ue')
-      self.sps_ibc_enabled_flag = s.read('uint:1')
-      if self.sps_ibc_enabled_flag:
-         self.sps_six_minus_max_num_ibc_merge_cand = s.read('ue')
-      self.sps_ladf_enabled_flag = s.read('uint:1')
-      if self.sps_ladf_enabled_flag:
-         self.sps_num_ladf_intervals_minus2 = s.read('uint:1')
-         self.sps_ladf_lowest_interval_qp_offset = s.read('se')
-         for i in i < self.sps_num_ladf_intervals_minus2 + 1:
-            self.sps_ladf_qp_offset[ i ] = s.read('se')
-            self.sps_ladf_delta_threshold_minus1[ i ] = s.read('ue')
-      self.sps_explicit_scaling_list_enabled_flag = s.read('uint:1')
-      if self.sps_lfnst_enabled_flag & self.sps_explicit_scaling_list_enabled_flag:
-         self.sps_scaling_matrix_for_lfnst_disabled_flag = s.read('uint:1')
-      if self.sps_act_enabled_flag & self.sps_explicit_scaling_list_enabled_flag:
-         self.sps_scaling_matrix_for_alternative_colour_space_disabled_flag = s.read('uint:1')
-      if self.sps_scaling_matrix_for_alternative_colour_space_disabled_flag:
-         self.sps_scaling_matrix_designated_colour_space_flag = s.read('uint:1')
-      self.sps_dep_quant_enabled_flag = s.read('uint:1')
-      self.sps_sign_data_hiding_enabled_flag = s.read('uint:1')
-      self.sps_virtual_boundaries_enabled_flag = s.read('uint:1')
-      if self.sps_virtual_boundaries_enabled_flag:
-         self.sps_virtual_boundaries_present_flag = s.read('uint:1')
-      if self.sps_virtual_boundaries_present_flag:
-            self.sps_num_ver_virtual_boundaries = s.read('ue')
-            for i in i < self.sps_num_ver_virtual_boundaries:
-               self.sps_virtual_boundary_pos_x_minus1[ i ] = s.read('ue')
-      self.sps_num_hor_virtual_boundaries = s.read('ue') 
-      for i in i < sps_num_hor_virtual_boundaries:
-         self.sps_virtual_boundary_pos_y_minus1[ i ] = s.read('ue')
-      if self.sps_ptl_dpb_hrd_params_present_flag:
-         self.sps_timing_hrd_params_present_flag = s.read('uint:1')
-         if self.sps_timing_hrd_params_present_flag:
-            pass
-            general_timing_hrd_parameters( )
-         if self.sps_max_sublayers_minus1 > 0:
-            self.sps_sublayer_cpb_params_present_flag = s.read('uint:1')
-            firstSubLayer = 0 if self.sps_sublayer_cpb_params_present_flag else self.sps_max_sublayers_minus1
-            pass
-            ols_timing_hrd_parameters( firstSubLayer, sps_max_sublayers_minus1 )
-      self.sps_field_seq_flag = s.read('uint:1')
-      self.sps_vui_parameters_present_flag = s.read('uint:1')
-      if self.sps_vui_parameters_present_flag:
-         self.sps_vui_payload_size_minus1 = s.read('ue')
-         while( not byte_aligned( ) ):
-            self.sps_vui_alignment_zero_bit
-            pass
-            vui_payload( sps_vui_payload_size_minus1 + 1 )
-      self.sps_extension_flag = s.read('uint:1')
-      if( self.sps_extension_flag ):
-         while( more_rbsp_data( ) ):
-            self.sps_extension_data_flag = s.read('uint:1')
-      self.rbsp_trailing_bits( )
+      7.3.2.22 Byte alignment syntax
+      """
+      self.f(1)   # alignment_bit_equal_to_one
+      self.pos = (self.pos + 7) & ~7
+
+   def more_rbsp_data(self):
+      if self.rbsp_end is None:
+         data = self.data
+         i = len(data)
+         while i and not data[i - 1]:
+            i -= 1
+         # position of rbsp_stop_one_bit, the last 1 bit of the RBSP
+         self.rbsp_end = (i << 3) - (data[i - 1] & -data[i - 1]).bit_length() if i else 0
+      return self.pos < self.rbsp_end
+
+   def rbsp_trailing_bits(self):
+      """
+      7.3.2.21 RBSP trailing bits syntax
+      """
+      if self.pos < self.end:
+         self.f(1)   # rbsp_stop_one_bit
+         self.pos = min((self.pos + 7) & ~7, self.end)
+
 
+class BitWriter(object):
+   """
+   The inverse of BitReader: write_bits( ), ue(v), se(v) and the helper
+   functions of the syntax tables, appending to an RBSP. Bits collect in
+   an integer and go out a few bytes at a time. pos counts bits.
+   """
+   __slots__ = ('data', 'acc', 'n')
 
-class dpb_parameters(MaxSubLayersMinus1, subLayerInfoFlag):
    def __init__(self):
+      self.data = bytearray()
+      self.acc = 0
+      self.n = 0
+
+   @property
+   def pos(self):
+      return (len(self.data) << 3) + self.n
+
+   def u(self, n, value):
+      if value >> n:
+         raise ValueError('{0!r} does not fit in {1:d} bits'.format(value, n))
+      self.acc = (self.acc << n) | value
+      self.n += n
+      if self.n >= 64:
+         k = self.n & ~7
+         self.n -= k
+         self.data += (self.acc >> self.n).to_bytes(k >> 3, 'big')
+         self.acc &= (1 << self.n) - 1
+
+   f = u
+
+   def ue(self, value):
+      if value < 0:
+         raise ValueError('ue(v) of {0:d}'.format(value))
+      value += 1
+      self.u(2 * value.bit_length() - 1, value)
+
+   def se(self, value):
+      self.ue(2 * value - 1 if value > 0 else -2 * value)
+
+   def skip(self, n):
+      # zero bits, as the reserved and skipped elements read back
+      while n > 0:
+         self.u(min(n, 64), 0)
+         n -= 64
+
+   def byte_aligned(self):
+      return self.n & 7 == 0
+
+   def byte_alignment(self):
       """
-      7.3.4 DPB parameters syntax
+      7.3.2.22 Byte alignment syntax
       """
-      v = 0 if self.subLayerInfoFlag else self.MaxSubLayersMinus1
-      for v in range(MaxSubLayersMinus1):
-         self.dpb_max_dec_pic_buffering_minus1[ i ] = s.read('ue')
-         self.dpb_max_num_reorder_pics[ i ] = s.read('ue')
-         self.dpb_max_latency_increase_plus1[ i ] = s.read('ue')
-   def show(self):
-      pass
+      self.f(1, 1)   # alignment_bit_equal_to_one
+      self.f(-self.n & 7, 0)
+
+   def more_rbsp_data(self):
+      # extension data is never written
+      return False
+
+   def rbsp_trailing_bits(self):
+      """
+      7.3.2.21 RBSP trailing bits syntax
+      """
+      self.f(1, 1)   # rbsp_stop_one_bit
+      self.f(-self.n & 7, 0)
+
+   def getvalue(self):
+      """
+      The bytes written so far, which must end byte aligned
+      """
+      if self.n & 7:
+         raise ValueError('RBSP not byte aligned ({0:d} bits)'.format(self.pos))
+      return bytes(self.data) + self.acc.to_bytes(self.n >> 3, 'big')
+
+
+class syntax_structure(object):
+   """
+   Base of the parsed syntax structures. as_dict() collects every syntax
+   element and derived variable in the order it was set; show() prints
+   them.
+   """
+   __slots__ = ()
+   t = '\t'
+
+   def as_dict(self):
+      return dict((name, _as_value(value)) for name, value in vars(self).items())
+
+   def show(self, indent=''):
+      sys.stdout.write(format_record(self.as_dict(), indent, self.t))
+
+
+def _as_value(value):
+   if isinstance(value, syntax_structure):
+      return value.as_dict()
+   if isinstance(value, list):
+      return [_as_value(v) for v in value]
+   if isinstance(value, array.array):
+      return value.tolist()
+   return value
+
+
+class CompactRecord(syntax_structure):
+   """
+   A parsed syntax structure kept in __slots__ instead of an instance
+   dict, made by compact(). There is one record type per structure and
+   set of elements present, so as_dict() is unchanged. structure is the
+   syntax structure class.
+   """
+   __slots__ = ()
+   structure = None
+
+   def as_dict(self):
+      return dict((name, _as_value(getattr(self, name))) for name in self.__slots__)
+
+   def __reduce__(self):
+      return _compact_record, (self.structure, self.__slots__, tuple(getattr(self, name) for name in self.__slots__))
+
+
+_compact_types = {}
+
+
+def compact_type(structure, names):
+   """
+   The CompactRecord type for the syntax structure class structure with
+   the elements names, in order
+   """
+   key = structure, names
+   cls = _compact_types.get(key)
+   if cls is None:
+      cls = _compact_types[key] = type(structure.__name__, (CompactRecord,), {
+         '__slots__': names, '__module__': __name__, 'structure': structure})
+   return cls
+
+
+def _compact_record(structure, names, values):
+   cls = compact_type(structure, names)
+   r = cls.__new__(cls)
+   for name, value in zip(names, values):
+      setattr(r, name, value)
+   return r
+
+
+def _int_array(values):
+   # flags and small counts fit array('b'); u(32) elements may need 'q'
+   lo, hi = min(values), max(values)
+   for typecode, bits in (('b', 7), ('h', 15), ('i', 31), ('q', 63)):
+      if -(1 << bits) <= lo and hi < 1 << bits:
+         return array.array(typecode, values)
+   return values
+
+
+def compact(value):
+   """
+   value, a syntax structure, with every structure in it made a
+   CompactRecord and every list of integers an array
+   """
+   if isinstance(value, CompactRecord):
+      return value
+   if isinstance(value, syntax_structure):
+      values = vars(value)
+      cls = compact_type(type(value), tuple(values))
+      r = cls.__new__(cls)
+      for name, v in values.items():
+         setattr(r, name, compact(v))
+      return r
+   if isinstance(value, list) and value:
+      if all(type(v) is int for v in value):
+         return _int_array(value)
+      return [compact(v) for v in value]
+   return value
+
+
+def format_record(record, indent='', t='\t'):
+   """
+   The text show() prints for record, a dict from as_dict(): one line per
+   syntax element, nested structures indented below their name
+   """
+   lines = []
+   _format_lines(lines, record, indent, t)
+   return ''.join(lines)
+
+
+def _format_lines(lines, record, indent, t):
+   for name, value in record.items():
+      if isinstance(value, dict):
+         lines.append(indent + t + name + '\n')
+         _format_lines(lines, value, indent + t, t)
+      elif isinstance(value, list) and value and isinstance(value[0], (dict, list)) and \
+         any(isinstance(v, dict) for v in _flatten(value)):
+         for i, v in enumerate(_flatten(value)):
+            lines.append(indent + t + '{0}[ {1:d} ]\n'.format(name, i))
+            if v is not None:
+               _format_lines(lines, v, indent + t, t)
+      else:
+         lines.append('{0} {1}\n'.format(indent + t + name, value))
 
 
+def _flatten(value):
+   for v in value:
+      if isinstance(v, list):
+         for w in _flatten(v):
+            yield w
+      else:
+         yield v
+
 
-class pic_parameter_set_rbsp(object):
+class nal_unit_header(syntax_structure):
    def __init__(self, s):
+      self.forbidden_zero_bit  = s.u(1)
+      self.nuh_reserved_zero_bit = s.u(1)
+      self.nuh_layer_id = s.u(6)
+      self.nal_unit_type = s.u(5)
+      self.nuh_temporal_id_plus1 = s.u(3)
+
+   def show(self, indent=''):
+      sys.stdout.write(format_record(self.as_dict(), indent, '  '))
+
+
+class TableStructure(syntax_structure):
+   """
+   Base of the syntax structures parsed by the generated parser of their
+   SYNTAX_TABLES entry: cls(s, *args) is what it reads from the BitReader
+   s. Without arguments, as unpickling and copying call it, an empty
+   instance.
+   """
+   __slots__ = ()
+
+   def __new__(cls, *args):
+      if not args:
+         return object.__new__(cls)
+      return syntax_parser(cls.__name__)(*args)
+
+
+class general_constraints_info(TableStructure):
+   """
+   7.3.3.2 General constraints information syntax
+   """
+   FLAGS = (
+      ('gci_intra_only_constraint_flag', 1),
+      ('gci_all_layers_independent_constraint_flag', 1),
+      ('gci_one_au_only_constraint_flag', 1),
+      ('gci_sixteen_minus_max_bitdepth_constraint_idc', 4),
+      ('gci_three_minus_max_chroma_format_constraint_idc', 2),
+      ('gci_no_mixed_nalu_types_in_pic_constraint_flag', 1),
+      ('gci_no_trail_constraint_flag', 1),
+      ('gci_no_stsa_constraint_flag', 1),
+      ('gci_no_rasl_constraint_flag', 1),
+      ('gci_no_radl_constraint_flag', 1),
+      ('gci_no_idr_constraint_flag', 1),
+      ('gci_no_cra_constraint_flag', 1),
+      ('gci_no_gdr_constraint_flag', 1),
+      ('gci_no_aps_constraint_flag', 1),
+      ('gci_no_idr_rpl_constraint_flag', 1),
+      ('gci_one_tile_per_pic_constraint_flag', 1),
+      ('gci_pic_header_in_slice_header_constraint_flag', 1),
+      ('gci_one_slice_per_pic_constraint_flag', 1),
+      ('gci_no_rectangular_slice_constraint_flag', 1),
+      ('gci_one_slice_per_subpic_constraint_flag', 1),
+      ('gci_no_subpic_info_constraint_flag', 1),
+      ('gci_three_minus_max_log2_ctu_size_constraint_idc', 2),
+      ('gci_no_partition_constraints_override_constraint_flag', 1),
+      ('gci_no_mtt_constraint_flag', 1),
+      ('gci_no_qtbtt_dual_tree_intra_constraint_flag', 1),
+      ('gci_no_palette_constraint_flag', 1),
+      ('gci_no_ibc_constraint_flag', 1),
+      ('gci_no_isp_constraint_flag', 1),
+      ('gci_no_mrl_constraint_flag', 1),
+      ('gci_no_mip_constraint_flag', 1),
+      ('gci_no_cclm_constraint_flag', 1),
+      ('gci_no_ref_pic_resampling_constraint_flag', 1),
+      ('gci_no_res_change_in_clvs_constraint_flag', 1),
+      ('gci_no_weighted_prediction_constraint_flag', 1),
+      ('gci_no_ref_wraparound_constraint_flag', 1),
+      ('gci_no_temporal_mvp_constraint_flag', 1),
+      ('gci_no_sbtmvp_constraint_flag', 1),
+      ('gci_no_amvr_constraint_flag', 1),
+      ('gci_no_bdof_constraint_flag', 1),
+      ('gci_no_smvd_constraint_flag', 1),
+      ('gci_no_dmvr_constraint_flag', 1),
+      ('gci_no_mmvd_constraint_flag', 1),
+      ('gci_no_affine_motion_constraint_flag', 1),
+      ('gci_no_prof_constraint_flag', 1),
+      ('gci_no_bcw_constraint_flag', 1),
+      ('gci_no_ciip_constraint_flag', 1),
+      ('gci_no_gpm_constraint_flag', 1),
+      ('gci_no_luma_transform_size_64_constraint_flag', 1),
+      ('gci_no_transform_skip_constraint_flag', 1),
+      ('gci_no_bdpcm_constraint_flag', 1),
+      ('gci_no_mts_constraint_flag', 1),
+      ('gci_no_lfnst_constraint_flag', 1),
+      ('gci_no_joint_cbcr_constraint_flag', 1),
+      ('gci_no_sbt_constraint_flag', 1),
+      ('gci_no_act_constraint_flag', 1),
+      ('gci_no_explicit_scaling_list_constraint_flag', 1),
+      ('gci_no_dep_quant_constraint_flag', 1),
+      ('gci_no_sign_data_hiding_constraint_flag', 1),
+      ('gci_no_cu_qp_delta_constraint_flag', 1),
+      ('gci_no_chroma_qp_offset_constraint_flag', 1),
+      ('gci_no_sao_constraint_flag', 1),
+      ('gci_no_alf_constraint_flag', 1),
+      ('gci_no_ccalf_constraint_flag', 1),
+      ('gci_no_lmcs_constraint_flag', 1),
+      ('gci_no_ladf_constraint_flag', 1),
+      ('gci_no_virtual_boundaries_constraint_flag', 1),
+   )
+
+
+class profile_tier_level(TableStructure):
+   """
+   7.3.3.1 General profile, tier, and level syntax
+   """
+
+
+class dpb_parameters(TableStructure):
+   """
+   7.3.4 DPB parameters syntax
+   """
+
+
+class general_timing_hrd_parameters(TableStructure):
+   """
+   7.3.5.1 General timing and HRD parameters syntax
+   """
+
+
+class sublayer_hrd_parameters(TableStructure):
+   """
+   7.3.5.3 Sublayer HRD parameters syntax
+   """
+
+
+class ols_timing_hrd_parameters(TableStructure):
+   """
+   7.3.5.2 OLS timing and HRD parameters syntax
+   """
+
+
+class ref_pic_list_struct(TableStructure):
+   """
+   7.3.10 Reference picture list structure syntax
+   """
+
+
+class video_parameter_set_rbsp(TableStructure):
+   """
+   7.3.2.3 Video parameter set RBSP syntax
+   """
+
+   def derive_output_layer_sets(self):
       """
-      7.3.2.5 picture parameter set RBSP syntax
-      """
-      self.t = '\t'
-      self.pps_pic_parametaer_set_id = s.read('uint:6')
-      self.pps_seq_parameter_set_id = s.read('uint:4')
-      self.pps_mixed_nalu_types_in_pic_flag = s.read('uint:1')
-      self.pps_pic_width_in_luma_samples = s.read('ue')
-      self.pps_pic_height_in_luma_samples = s.read('ue')
-      self.pps_conformance_window_flag = s.read('uint:1')
-      if( self.pps_conformance_window_flag ):
-         self.pps_conf_win_left_offset = s.read('ue')
-         self.pps_conf_win_right_offset =s.read('ue')
-         self.pps_conf_win_top_offset =s.read('ue')
-         self.pps_conf_win_bottom_offset = s.read('ue')
-      pps_scaling_window_explicit_signalling_flag = s.read('uint:1')
-      if( self.pps_scaling_window_explicit_signalling_flag):
-         self.pps_scaling_win_left_offset = s.read('se')
-         self.pps_scaling_win_right_offset = s.read('se')
-         self.pps_scaling_win_top_offset = s.read('se')
-         self.pps_scaling_win_bottom_offset = s.read('se')
-      self.pps_output_flag_present_flag = s.read('uint:1')
-      self.pps_no_pic_partition_flag = s.read('uint:1')
-      self.pps_subpic_id_mapping_present_flag = s.read('uint:1')
-      if( self.pps_subpic_id_mapping_present_flag ):
-         if( not self.pps_no_pic_partition_flag ):
-            self.pps_num_subpics_minus1 = s.read('ue')
-            self.pps_subpic_id_len_minus1 = s.read('ue')
-            for i in int(self.pps_num_subpics_minus1):
-               self.pps_subpic_id[ i ] = s.read('uv')
-      if( not self.pps_no_pic_partition_flag ):
-         self.pps_log2_ctu_size_minus5 = s.read('uint:2')
-         self.pps_num_exp_tile_columns_minus1 = s.read('ue')
-         self.pps_num_exp_tile_rows_minus1 = s.read('ue')
-         for i in self.pps_num_exp_tile_columns_minus1:
-            self.pps_tile_column_width_minus1[ i ] = s.read('ue')
-         for i in  self.pps_num_exp_tile_rows_minus1:
-            self.pps_tile_row_height_minus1[ i ] = s.read('ue')
-         if( self.NumTilesInPic > 1 ):
-            self.pps_loop_filter_across_tiles_enabled_flag = s.read('uint:1')
-            self.pps_rect_slice_flag =s.read('uint:1') 
-         if( self.pps_rect_slice_flag ):
-            self.pps_single_slice_per_subpic_flag = s.read('uint:1')
-         if( self.pps_rect_slice_flag != self.pps_single_slice_per_subpic_flag ):
-            self.pps_num_slices_in_pic_minus1 = s.read('ue')
-            if( self.pps_num_slices_in_pic_minus1 > 1 ):
-               self.pps_tile_idx_delta_present_flag =s.read('uint:1')
-            for i in self.pps_num_slices_in_pic_minus1: 
-               if( int(self.SliceTopLeftTileIdx[ i ] % self.NumTileColumns) != (int(self.NumTileColumns) - int(1)) ):
-                  self.pps_slice_width_in_tiles_minus1[ i ] = s.read('ue')
-               if( self.SliceTopLeftTileIdx[ i ] / self.NumTileColumns != self.NumTileRows - 1 & ( self.pps_tile_idx_delta_present_flag or self.SliceTopLeftTileIdx[ i ] % self.NumTileColumns == 0 ) ):
-                  self.pps_slice_height_in_tiles_minus1[ i ] = s.read('ue')
-               if( self.pps_slice_width_in_tiles_minus1[ i ] ==  0 & self.pps_slice_height_in_tiles_minus1[ i ] == 0 & self.RowHeightVal[ self.SliceTopLeftTileIdx[ i ] / self.NumTileColumns ] > 1 ):
-                     self.pps_num_exp_slices_in_tile[ i ] = s.read('ue')
-               for j in  self.pps_num_exp_slices_in_tile[ i ]:
-                  self.pps_exp_slice_height_in_ctus_minus1[ i ][ j ] = s.read('ue')
-               i += NumSlicesInTile[ i ] - 1
-               if( self.pps_tile_idx_delta_present_flag & i < self.pps_num_slices_in_pic_minus1 ):
-                  self.pps_tile_idx_delta_val[ i ] = s.read('se')
-         if(  not self.pps_rect_slice_flag or  self.pps_single_slice_per_subpic_flag or self.pps_num_slices_in_pic_minus1 > 0 ):
-            self.pps_loop_filter_across_slices_enabled_flag = s.read('uint:1')
-      self.pps_cabac_init_present_flag = s.read('uint:1')
-      for i in 1:
-            self.pps_num_ref_idx_default_active_minus1[ i ] = s.read('ue')
-            self.pps_rpl1_idx_present_flag = s.read('uint:1')
-            self.pps_weighted_pred_flag = s.read('uint:1') 
-      self.pps_weighted_bipred_flag = s.read('uint:1')
-      self.pps_ref_wraparound_enabled_flag = s.read('uint:1')
-      if( self.pps_ref_wraparound_enabled_flag ):
-         self.pps_pic_width_minus_wraparound_offset = s.read('ue')
-      self.pps_init_qp_minus26 = s.read('se')
-      self.pps_cu_qp_delta_enabled_flag = s.read('uint:1')
-      self.pps_chroma_tool_offsets_present_flag = s.read('uint:1')
-      if( self.pps_chroma_tool_offsets_present_flag ):
-         self.pps_cb_qp_offset = s.read('se')
-         self.pps_cr_qp_offset = s.read('se')
-         self.pps_joint_cbcr_qp_offset_present_flag = s.read('uint:1')
-      if( self.pps_joint_cbcr_qp_offset_present_flag ):
-         self.pps_joint_cbcr_qp_offset_value = s.read('se')
-      self.pps_slice_chroma_qp_offsets_present_flag = s.read('uint:1')
-      self.pps_cu_chroma_qp_offset_list_enabled_flag = s.read("uint:1")
-      if( self.pps_cu_chroma_qp_offset_list_enabled_flag ):
-         self.pps_chroma_qp_offset_list_len_minus1 = s.read('ue')
-         for i in self.pps_chroma_qp_offset_list_len_minus1:
-            self.pps_cb_qp_offset_list[ i ] = s.read('se')
-            self.pps_cr_qp_offset_list[ i ] = s.read('se')
-         if( self.pps_joint_cbcr_qp_offset_present_flag ):
-               self.pps_joint_cbcr_qp_offset_list[ i ] = s.read('se')
-      self.pps_deblocking_filter_control_present_flag = s.read('uint:1')
-      if( pps_deblocking_filter_control_present_flag ):
-         self.pps_deblocking_filter_override_enabled_flag = s.read('uint:1')
-         self.pps_deblocking_filter_disabled_flag = s.read('uint:1')
-         if not self.pps_no_pic_partition_flag &  self.pps_deblocking_filter_override_enabled_flag:
-            self.pps_dbf_info_in_ph_flag = s.read('uint:1')
-         if( not self.pps_deblocking_filter_disabled_flag ):
-            self.pps_luma_beta_offset_div2 = s.read('se')
-         self.pps_luma_tc_offset_div2 = s.read('se')
-         if( self.pps_chroma_tool_offsets_present_flag ):
-            self.pps_cb_beta_offset_div2 = s.read('se')
-            self.pps_cb_tc_offset_div2 = s.read('se')
-            self.pps_cr_beta_offset_div2 = s.read('se')
-            self.pps_cr_tc_offset_div2 = s.read('se')
-      if(  not self.pps_no_pic_partition_flag ):
-         self.pps_rpl_info_in_ph_flag = s.read('uint:1')
-         self.pps_sao_info_in_ph_flag = s.read('uint:1')
-         self.pps_alf_info_in_ph_flag = s.read('uint:1')
-         if( ( self.pps_weighted_pred_flag or self.pps_weighted_bipred_flag ) & self.pps_rpl_info_in_ph_flag ):
-            self.pps_wp_info_in_ph_flag = s.read('uint:1')
-         self.pps_qp_delta_info_in_ph_flag = s.read('uint:1')
-      self.pps_picture_header_extension_present_flag = s.read('uint:1')
-      self.pps_slice_header_extension_present_flag = s.read('uint:1')
-      self.pps_extension_flag = s.read('uint:1')
-      if( pps_extension_flag ):
-         while( more_rbsp_data( )):
-            self.pps_extension_data_flag = s.read('uint:1')
-
-
-
-def read_nal_unit(s, i, NumBytesInNalUnit):
-
-   # Advance pointer and skip 24 bits, i.e. 0x000001
-   s.pos = i + 24
-   
-   n = nal_unit_header(s)
-   n.show()
+      7.4.3.3 TotalNumOlss, NumLayersInOls[ i ] and NumMultiLayerOlss
+      """
+      L = self.vps_max_layers_minus1 + 1
+      # dependencyFlag[ i ][ j ]: layer j is a direct or indirect reference of layer i
+      dependencyFlag = [row[:] for row in self.vps_direct_ref_layer_flag]
+      for i in range(L):
+         for j in range(L):
+            for k in range(i):
+               if self.vps_direct_ref_layer_flag[ i ][ k ] and dependencyFlag[ k ][ j ]:
+                  dependencyFlag[ i ][ j ] = 1
 
-   NumBytesInRbsp = 0
-   rbsp_byte = BitStream()
-   for i in range(NumBytesInNalUnit - 3):
-      if i + 2 < NumBytesInNalUnit and s.peek(24) == '0x000003':
-         rbsp_byte.append(s.read('bits:8'))
-         rbsp_byte.append(s.read('bits:8'))
-         i =+ 2
-         # emulation_prevention_three_byte # equal to 0x03
+      if self.vps_max_layers_minus1 == 0:
+         self.TotalNumOlss = 1
+      elif self.vps_each_layer_is_an_ols_flag or self.vps_ols_mode_idc in (0, 1):
+         self.TotalNumOlss = L
       else:
-         rbsp_byte.append(s.read('bits:8'))
+         self.TotalNumOlss = self.vps_num_output_layer_sets_minus2 + 2
 
-   NumBytesInRbsp = len(rbsp_byte)
-   s = rbsp_byte
+      self.NumLayersInOls = [1] * self.TotalNumOlss
+      for i in range(1, self.TotalNumOlss):
+         if self.vps_each_layer_is_an_ols_flag:
+            self.NumLayersInOls[ i ] = 1
+         elif self.vps_ols_mode_idc in (0, 1):
+            self.NumLayersInOls[ i ] = i + 1
+         else:
+            included = [0] * L
+            for k in range(L):
+               if self.vps_ols_output_layer_flag[ i ][ k ]:
+                  included[ k ] = 1
+                  for j in range(L):
+                     if dependencyFlag[ k ][ j ]:
+                        included[ j ] = 1
+            self.NumLayersInOls[ i ] = sum(included)
+      self.NumMultiLayerOlss = sum(1 for n in self.NumLayersInOls if n > 1)
 
-   nal_unit_type = n.nal_unit_type
 
-   if nal_unit_type == NalUnitType.NAL_UNIT_TRAIL_NUT or \
-      nal_unit_type == NalUnitType.NAL_UNIT_STSA_NUT:
-         #slice_layer_rbsp()
-         pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_RADL_NUT or \
-      nal_unit_type == NalUnitType.NAL_UNIT_RASL_NUT:
-         # slice_layer_rbsp()
-         pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_VCL_4 or \
-      nal_unit_type == NalUnitType.NAL_UNIT_VCL_5 or \
-      nal_unit_type == NalUnitType.NAL_UNIT_VCL_6 :
-         pass
-   elif  nal_unit_type == NalUnitType.NAL_UNIT_IDR_W_RADL or \
-      nal_unit_type == NalUnitType.NAL_UNIT_N_LP:
-         #slice_layer_rbsp()
-         pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_CRA_NUT or \
-      nal_unit_type == NalUnitType.NAL_UNIT_GDR_NUT:
-         #slice_layer_rbsp()
-         pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_RSV_IRAP_11:
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_OPI_NUT:
-      #operating_point_information_rbsp()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_DCI_NUT:
-      #decoding_capability_information_rbsp()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_VPS_NUT:
-      # video_parameter_set_rbsp()
-      video_parameter_set_rbsp(s).show()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_SPS_NUT:
-      # seq_parameter_set_rbsp()
-      seq_parameter_set_rbsp(s).show()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_PPS_NUT:
-      # pic_parameter_set_rbsp()
-      pic_parameter_set_rbsp(s).show()      
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_PREFIX_APS_NUT or \
-      nal_unit_type == NalUnitType.NAL_UNIT_SUFFIX_APS_NUT:
-         pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_PH_NUT:
-      # picture_header_rbsp()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_AUD_NUT:
-      # access_unit_delimiter_rbsp()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_EOS_NUT:
-      # end_of_seq_rbsp()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_EOB_NUT:
-      # end_of_bitstream_rbsp()
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_PREFIX_SEI_NUT or \
-      nal_unit_type == NalUnitType.NAL_UNIT_SUFFIX_SEI_NUT:
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_FD_NUT:
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_RSV_NVCL_26 or \
-      nal_unit_type == NalUnitType.NAL_UNIT_NVCL_27:
-      pass
-   elif nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_28 or \
-      nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_29 or \
-      nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_30 or \
-      nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_31:
-      pass
+class seq_parameter_set_rbsp(TableStructure):
+   """
+   7.3.2.4 Sequence parameter set RBSP syntax
+   """
 
-def main():
-   
-   F = 'out.vvc'
-   s = BitStream(filename=F)
-   
-   nals = list(s.findall('0x000001', bytealigned=True))
-   size = [y - x for x,y in zip(nals,nals[1:])]
 
-   for i, n in zip(nals, size):
-      print()
-      print("!! Found NAL @ offset {0:d} ({0:#x})".format(int((i+24)/8)))
-      read_nal_unit(s, i, int(n/8)) # bits to bytes   
-   
+class pic_parameter_set_rbsp(TableStructure):
+   """
+   7.3.2.5 Picture parameter set RBSP syntax
+   """
+
+   def derive_tiles(self):
+      """
+      6.5.1 ColWidthVal[ i ], RowHeightVal[ j ], NumTileColumns and NumTileRows
+      """
+      CtbSizeY = 1 << (self.pps_log2_ctu_size_minus5 + 5)
+      self.PicWidthInCtbsY = (self.pps_pic_width_in_luma_samples + CtbSizeY - 1) // CtbSizeY
+      self.PicHeightInCtbsY = (self.pps_pic_height_in_luma_samples + CtbSizeY - 1) // CtbSizeY
+      self.ColWidthVal = _tile_sizes(self.PicWidthInCtbsY, self.pps_tile_column_width_minus1)
+      self.RowHeightVal = _tile_sizes(self.PicHeightInCtbsY, self.pps_tile_row_height_minus1)
+      self.NumTileColumns = len(self.ColWidthVal)
+      self.NumTileRows = len(self.RowHeightVal)
+      self.NumTilesInPic = self.NumTileColumns * self.NumTileRows
+
+   def parse_rect_slices(self, s):
+      """
+      The rectangular slice loop of 7.3.2.5, with SliceTopLeftTileIdx[ i ]
+      and NumSlicesInTile[ i ] of 6.5.1 derived as the loop goes
+      """
+      n = self.pps_num_slices_in_pic_minus1 + 1
+      self.pps_slice_width_in_tiles_minus1 = [0] * n
+      self.pps_slice_height_in_tiles_minus1 = [0] * n
+      self.pps_num_exp_slices_in_tile = [0] * n
+      self.pps_exp_slice_height_in_ctus_minus1 = [[] for i in range(n)]
+      self.pps_tile_idx_delta_val = [0] * n
+      self.SliceTopLeftTileIdx = [0] * n
+      self.NumSlicesInTile = [1] * n
+      self.SliceHeightInCtus = [0] * n
+      NumTileColumns = self.NumTileColumns
+      tileIdx = 0
+      i = 0
+      while i < n - 1:
+         self.SliceTopLeftTileIdx[ i ] = tileIdx
+         tileX = tileIdx % NumTileColumns
+         tileY = tileIdx // NumTileColumns
+         if( tileX != NumTileColumns - 1 ):
+            self.pps_slice_width_in_tiles_minus1[ i ] = s.ue()
+         if( tileY != self.NumTileRows - 1 and ( self.pps_tile_idx_delta_present_flag or tileX == 0 ) ):
+            self.pps_slice_height_in_tiles_minus1[ i ] = s.ue()
+         elif tileY != self.NumTileRows - 1 and i > 0:
+            self.pps_slice_height_in_tiles_minus1[ i ] = self.pps_slice_height_in_tiles_minus1[ i - 1 ]
+         if( self.pps_slice_width_in_tiles_minus1[ i ] == 0 and self.pps_slice_height_in_tiles_minus1[ i ] == 0 and
+             self.RowHeightVal[ tileY ] > 1 ):
+            self.pps_num_exp_slices_in_tile[ i ] = s.ue()
+            heights = [s.ue() + 1 for j in range(self.pps_num_exp_slices_in_tile[ i ])]
+            if heights:
+               remainingHeightInCtbsY = self.RowHeightVal[ tileY ] - sum(heights)
+               uniformSliceHeight = heights[ -1 ]
+               while remainingHeightInCtbsY >= uniformSliceHeight:
+                  heights.append(uniformSliceHeight)
+                  remainingHeightInCtbsY -= uniformSliceHeight
+               if remainingHeightInCtbsY > 0:
+                  heights.append(remainingHeightInCtbsY)
+               self.pps_exp_slice_height_in_ctus_minus1[ i ] = [h - 1 for h in heights[ :self.pps_num_exp_slices_in_tile[ i ] ]]
+               self.NumSlicesInTile[ i ] = len(heights)
+               for j, h in enumerate(heights):
+                  if i + j < n:
+                     self.SliceTopLeftTileIdx[ i + j ] = tileIdx
+                     self.SliceHeightInCtus[ i + j ] = h
+               i += self.NumSlicesInTile[ i ] - 1
+         if( self.pps_tile_idx_delta_present_flag and i < n - 1 ):
+            self.pps_tile_idx_delta_val[ i ] = s.se()
+         if self.pps_tile_idx_delta_present_flag:
+            tileIdx += self.pps_tile_idx_delta_val[ i ]
+         else:
+            tileIdx += self.pps_slice_width_in_tiles_minus1[ i ] + 1
+            if tileIdx % NumTileColumns == 0:
+               tileIdx += self.pps_slice_height_in_tiles_minus1[ i ] * NumTileColumns
+         i += 1
+      if i == n - 1:
+         self.SliceTopLeftTileIdx[ i ] = tileIdx
+
+   def write_rect_slices(self, s):
+      """
+      parse_rect_slices( ) writing the elements to the BitWriter s
+      """
+      n = self.pps_num_slices_in_pic_minus1 + 1
+      NumTileColumns = self.NumTileColumns
+      tileIdx = 0
+      i = 0
+      while i < n - 1:
+         tileX = tileIdx % NumTileColumns
+         tileY = tileIdx // NumTileColumns
+         if( tileX != NumTileColumns - 1 ):
+            s.ue(self.pps_slice_width_in_tiles_minus1[ i ])
+         if( tileY != self.NumTileRows - 1 and ( self.pps_tile_idx_delta_present_flag or tileX == 0 ) ):
+            s.ue(self.pps_slice_height_in_tiles_minus1[ i ])
+         if( self.pps_slice_width_in_tiles_minus1[ i ] == 0 and self.pps_slice_height_in_tiles_minus1[ i ] == 0 and
+             self.RowHeightVal[ tileY ] > 1 ):
+            s.ue(self.pps_num_exp_slices_in_tile[ i ])
+            heights = [h + 1 for h in self.pps_exp_slice_height_in_ctus_minus1[ i ]]
+            for h in heights:
+               s.ue(h - 1)
+            if heights:
+               # NumSlicesInTile[ i ]: the rest of the tile in slices of the last height
+               remainingHeightInCtbsY = self.RowHeightVal[ tileY ] - sum(heights)
+               i += len(heights) + -(-remainingHeightInCtbsY // heights[ -1 ]) - 1
+         if( self.pps_tile_idx_delta_present_flag and i < n - 1 ):
+            s.se(self.pps_tile_idx_delta_val[ i ])
+         if self.pps_tile_idx_delta_present_flag:
+            tileIdx += self.pps_tile_idx_delta_val[ i ]
+         else:
+            tileIdx += self.pps_slice_width_in_tiles_minus1[ i ] + 1
+            if tileIdx % NumTileColumns == 0:
+               tileIdx += self.pps_slice_height_in_tiles_minus1[ i ] * NumTileColumns
+         i += 1
+
+
+def _tile_sizes(total, explicit_minus1):
+   """
+   6.5.1 (6-1)/(6-2): explicit tile column widths (row heights) followed by
+   uniform ones of the last explicit size and a remainder
+   """
+   sizes = []
+   remaining = total
+   for v in explicit_minus1:
+      sizes.append(v + 1)
+      remaining -= v + 1
+   uniform = explicit_minus1[ -1 ] + 1
+   while remaining >= uniform:
+      sizes.append(uniform)
+      remaining -= uniform
+   if remaining > 0:
+      sizes.append(remaining)
+   return sizes
+
+
+def _boundaries(sizes):
+   bd = [0]
+   for size in sizes:
+      bd.append(bd[ -1 ] + size)
+   return bd
+
+
+class PictureLayout(object):
+   """
+   The CTU maps of 6.5.1 for pictures with the SPS sps and the PPS pps,
+   for planning parallel decoding. tile_of_ctu, slice_of_ctu and
+   subpic_of_ctu hold the tile, rectangular slice and subpicture index of
+   every CTU in picture raster scan. CtbAddrInSlice[ i ] holds the raster
+   scan addresses of the CTUs of slice i in decoding order, and
+   ctb_addr_in_tile_scan those of the whole picture in tile scan. Raster
+   scan slices only get their extent from slice headers, so for them
+   slice_of_ctu is None and CtbAddrInSlice empty.
+
+   The maps are array.array: numpy.frombuffer() views them without a copy.
+   """
+
+   def __init__(self, sps, pps):
+      CtbSizeY = 1 << (sps.sps_log2_ctu_size_minus5 + 5)
+      W = self.PicWidthInCtbsY = (pps.pps_pic_width_in_luma_samples + CtbSizeY - 1) // CtbSizeY
+      H = self.PicHeightInCtbsY = (pps.pps_pic_height_in_luma_samples + CtbSizeY - 1) // CtbSizeY
+      self.PicSizeInCtbsY = W * H
+      if pps.pps_no_pic_partition_flag:
+         self.ColWidthVal = [W]
+         self.RowHeightVal = [H]
+      else:
+         self.ColWidthVal = list(pps.ColWidthVal)
+         self.RowHeightVal = list(pps.RowHeightVal)
+      self.NumTileColumns = len(self.ColWidthVal)
+      self.NumTileRows = len(self.RowHeightVal)
+      self.NumTilesInPic = self.NumTileColumns * self.NumTileRows
+      self.ColBd = _boundaries(self.ColWidthVal)
+      self.RowBd = _boundaries(self.RowHeightVal)
+
+      # one row of CTUs per row of tiles, repeated over its height
+      self.tile_of_ctu = array.array('H')
+      for j, height in enumerate(self.RowHeightVal):
+         row = array.array('H')
+         for i, width in enumerate(self.ColWidthVal):
+            row += array.array('H', [j * self.NumTileColumns + i]) * width
+         self.tile_of_ctu += row * height
+      self.ctb_addr_in_tile_scan = array.array('I')
+      for j in range(self.NumTileRows):
+         for i in range(self.NumTileColumns):
+            for y in range(self.RowBd[ j ], self.RowBd[ j + 1 ]):
+               self.ctb_addr_in_tile_scan.extend(range(y * W + self.ColBd[ i ], y * W + self.ColBd[ i + 1 ]))
+
+      # subpictures as (x0, x1, y0, y1) CTU rectangles, cut to the picture
+      self.subpics = []
+      self.subpic_of_ctu = array.array('H', bytes(2 * W * H))
+      for i in range(sps.sps_num_subpics_minus1 + 1 if sps.sps_subpic_info_present_flag else 1):
+         if sps.sps_subpic_info_present_flag:
+            x0 = sps.sps_subpic_ctu_top_left_x[ i ]
+            y0 = sps.sps_subpic_ctu_top_left_y[ i ]
+            rect = (x0, min(x0 + sps.sps_subpic_width_minus1[ i ] + 1, W),
+                    y0, min(y0 + sps.sps_subpic_height_minus1[ i ] + 1, H))
+         else:
+            rect = (0, W, 0, H)
+         self.subpics.append(rect)
+         fill = array.array('H', [i]) * (rect[1] - rect[0])
+         for y in range(rect[2], rect[3]):
+            self.subpic_of_ctu[y * W + rect[0]:y * W + rect[1]] = fill
+
+      self.CtbAddrInSlice = []
+      self.slice_of_ctu = None
+      if pps.pps_rect_slice_flag:
+         self.slice_of_ctu = array.array('H', bytes(2 * W * H))
+         self.derive_slices(sps, pps)
+      self.NumCtusInSlice = [len(ctbs) for ctbs in self.CtbAddrInSlice]
+      self.SubpicIdxForSlice = [self.subpic_of_ctu[ ctbs[ 0 ] ] for ctbs in self.CtbAddrInSlice]
+      self.NumSlicesInSubpic = [0] * len(self.subpics)
+      self.SubpicLevelSliceIdx = []
+      for i in self.SubpicIdxForSlice:
+         self.SubpicLevelSliceIdx.append(self.NumSlicesInSubpic[ i ])
+         self.NumSlicesInSubpic[ i ] += 1
+
+   def add_ctus_to_slice(self, sliceIdx, startX, stopX, startY, stopY):
+      """
+      AddCtbsToSlice( ) of 6.5.1
+      """
+      W = self.PicWidthInCtbsY
+      while len(self.CtbAddrInSlice) <= sliceIdx:
+         self.CtbAddrInSlice.append(array.array('I'))
+      ctbs = self.CtbAddrInSlice[ sliceIdx ]
+      fill = array.array('H', [sliceIdx]) * (stopX - startX)
+      for ctbY in range(startY, stopY):
+         ctbs.extend(range(ctbY * W + startX, ctbY * W + stopX))
+         self.slice_of_ctu[ctbY * W + startX:ctbY * W + stopX] = fill
+
+   def add_tiles_to_slice(self, sliceIdx, x0, x1, y0, y1):
+      # the tiles overlapping a CTU rectangle, each cut to it, in tile scan
+      ColBd, RowBd = self.ColBd, self.RowBd
+      for j in range(bisect.bisect_right(RowBd, y0) - 1, bisect.bisect_left(RowBd, y1)):
+         for i in range(bisect.bisect_right(ColBd, x0) - 1, bisect.bisect_left(ColBd, x1)):
+            self.add_ctus_to_slice(sliceIdx, max(ColBd[ i ], x0), min(ColBd[ i + 1 ], x1),
+                                   max(RowBd[ j ], y0), min(RowBd[ j + 1 ], y1))
+
+   def derive_slices(self, sps, pps):
+      """
+      CtbAddrInSlice of the rectangular slices of 6.5.1
+      """
+      if pps.pps_no_pic_partition_flag or pps.pps_single_slice_per_subpic_flag:
+         # a slice per subpicture, or one for the whole picture
+         for i, rect in enumerate(self.subpics):
+            self.add_tiles_to_slice(i, *rect)
+         return
+      n = pps.pps_num_slices_in_pic_minus1 + 1
+      ColBd, RowBd = self.ColBd, self.RowBd
+      i = 0
+      while i < n:
+         tileX = pps.SliceTopLeftTileIdx[ i ] % self.NumTileColumns
+         tileY = pps.SliceTopLeftTileIdx[ i ] // self.NumTileColumns
+         if i < n - 1:
+            sliceWidthInTiles = pps.pps_slice_width_in_tiles_minus1[ i ] + 1
+            sliceHeightInTiles = pps.pps_slice_height_in_tiles_minus1[ i ] + 1
+            NumSlicesInTile = pps.NumSlicesInTile[ i ]
+         else:
+            sliceWidthInTiles = self.NumTileColumns - tileX
+            sliceHeightInTiles = self.NumTileRows - tileY
+            NumSlicesInTile = 1
+         if sliceWidthInTiles == 1 and sliceHeightInTiles == 1 and NumSlicesInTile > 1:
+            # slices made of CTU rows of one tile
+            ctbY = RowBd[ tileY ]
+            for j in range(min(NumSlicesInTile, n - i)):
+               height = pps.SliceHeightInCtus[ i + j ]
+               self.add_ctus_to_slice(i + j, ColBd[ tileX ], ColBd[ tileX + 1 ], ctbY, ctbY + height)
+               ctbY += height
+            i += NumSlicesInTile
+         else:
+            self.add_tiles_to_slice(i, ColBd[ tileX ], ColBd[ tileX + sliceWidthInTiles ],
+                                    RowBd[ tileY ], RowBd[ tileY + sliceHeightInTiles ])
+            i += 1
+
+   def ctus_per_tile(self):
+      """
+      The number of CTUs of each tile, in tile raster scan
+      """
+      return [height * width for height in self.RowHeightVal for width in self.ColWidthVal]
+
+   def ctus_per_slice(self):
+      return self.NumCtusInSlice
+
+   def entry_points_per_slice(self, wpp=0):
+      """
+      NumEntryPoints of each rectangular slice, counted as 7.4.8 does:
+      one per change of tile between CTUs in decoding order, and with wpp
+      (sps_entropy_coding_sync_enabled_flag) per change of CTU row too
+      """
+      W = self.PicWidthInCtbsY
+      tile_of_ctu = self.tile_of_ctu
+      counts = []
+      for ctbs in self.CtbAddrInSlice:
+         NumEntryPoints = 0
+         for i in range(1, len(ctbs)):
+            if tile_of_ctu[ ctbs[ i ] ] != tile_of_ctu[ ctbs[ i - 1 ] ] or \
+               (wpp and ctbs[ i ] // W != ctbs[ i - 1 ] // W):
+               NumEntryPoints += 1
+         counts.append(NumEntryPoints)
+      return counts
+
+   def ctus_per_subpic(self):
+      return [(x1 - x0) * (y1 - y0) for x0, x1, y0, y1 in self.subpics]
+
+   def tiles_per_subpic(self):
+      """
+      The tile indices each subpicture overlaps, in tile raster scan
+      """
+      ColBd, RowBd = self.ColBd, self.RowBd
+      tiles = []
+      for x0, x1, y0, y1 in self.subpics:
+         columns = range(bisect.bisect_right(ColBd, x0) - 1, bisect.bisect_left(ColBd, x1))
+         tiles.append([j * self.NumTileColumns + i
+                       for j in range(bisect.bisect_right(RowBd, y0) - 1, bisect.bisect_left(RowBd, y1))
+                       for i in columns])
+      return tiles
+
+   def slices_per_subpic(self):
+      """
+      The slice indices of each subpicture, in decoding order
+      """
+      slices = [[] for rect in self.subpics]
+      for i, subpic in enumerate(self.SubpicIdxForSlice):
+         slices[ subpic ].append(i)
+      return slices
+
+
+class LazyParameterSet(object):
+   """
+   A parameter set parsed only as far as the attributes read so far need.
+   The RBSP is kept, and reading an attribute not set yet runs the
+   generated parsers of the next stages of the syntax table of cls (see
+   syntax_stages()) until it is; later reads resume from there. A table
+   without ('stage', ...) entries is one stage, parsed whole on first
+   access.
+   """
+   __slots__ = ('ps', 's', 'stages')
+
+   def __init__(self, cls, rbsp):
+      self.ps = cls.__new__(cls)
+      self.s = BitReader(rbsp)
+      self.stages = syntax_stages(cls.__name__)
+
+   @classmethod
+   def from_nal(cls, nal):
+      """
+      Lazy VPS, SPS or PPS of the NAL unit nal
+      """
+      parse = {
+         NalUnitType.NAL_UNIT_VPS_NUT: video_parameter_set_rbsp,
+         NalUnitType.NAL_UNIT_SPS_NUT: seq_parameter_set_rbsp,
+         NalUnitType.NAL_UNIT_PPS_NUT: pic_parameter_set_rbsp,
+      }[nal[1] >> 3]
+      return cls(parse, nal_unit_rbsp(nal)[0])
+
+   def __getattr__(self, name):
+      ps = self.ps
+      if hasattr(type(ps), name):
+         return getattr(ps, name)
+      values = vars(ps)
+      while name not in values and self.stages:
+         self.stages.pop(0)(self.s, ps)
+      return getattr(ps, name)
+
+   def parse(self):
+      """
+      The fully parsed syntax structure
+      """
+      while self.stages:
+         self.stages.pop(0)(self.s, self.ps)
+      return self.ps
+
+   def as_dict(self):
+      return self.parse().as_dict()
+
+   def show(self, indent=''):
+      self.parse().show(indent)
+
+
+class SyntaxCompiler(object):
+   """
+   Turns a syntax table into a flat Python function that parses the
+   structure. A table is a list of entries as the spec writes them:
+
+      ('u(4)', target)               descriptor u(n), ue(v), se(v), f(n)
+      ('u(v)', target, 'bits')       u(v) with the number of bits
+      ('=', target, 'expr')          derived or inferred value
+      ('let', name, 'expr')          temporary, not a field of the result
+      ('if', 'cond', [then], [else])
+      ('for', name, 'range(...)', [body])
+      ('while', 'cond', [body])
+      ('do', 'statement', (names,))  statement; names are read back from self
+      ('stage', name)                LazyParameterSet may stop before this
+
+   Targets are syntax element names, optionally subscripted. Expressions
+   name the elements and the structure's parameters as local variables,
+   s is the BitReader and self the structure being built, brought up to
+   date before any entry that uses it. A call to another compiled
+   structure calls its generated parser instead of the class.
+
+   The generated function reads bits inline from a window of the RBSP
+   held as one integer (see _rbsp_window()) instead of calling
+   BitReader.u( ) and ue( ): _q counts the bits left in the window, and
+   the reader is only synchronised around entries that use s. Between
+   two checks that move the window on, at the top of loops that read and
+   wherever the bits read since the last one could exceed MARGIN, the
+   code reads at most MARGIN bits. Every element is a local, stored on an
+   instance of cls in the order the table first assigns it.
+
+   With earlier, the fields stages before this one have assigned, the
+   function parses one stage of a table into the structure r it is given
+   after s, and reads those fields from r.
+   """
+   DESCRIPTOR = re.compile(r'(u|ue|se|f)\((\d+|v)\)$')
+   NAME = re.compile(r'(?<![.\w])([A-Za-z_]\w*)\b(?!\s*\()')
+   SELF = re.compile(r'\bself\b')
+   READER = re.compile(r'(?<![.\w])(s|u|ue|se|f)\b')
+   SKIP = re.compile(r'( *)_q -= (\d+)$')
+   READ = re.compile(r'( *)(.+) = \(_B >> _q\) & (\d+)$')
+   # bits read past the end of the RBSP before the shifts go negative
+   PADDING = 64
+   # bits read at most between two window checks, and for one ue(v) or
+   # se(v) (32 leading zero bits) or u(v) element
+   MARGIN = 1024
+   UE_BITS = 65
+   UV_BITS = 32
+   CHECK = 'if _q < _L: _B, _E, _L, _q = _rbsp_window(s, _E - _q)'
+
+   def __init__(self, name, params, table, cls, namespace, compiled=(), earlier=None):
+      self.name = name
+      self.params = params
+      self.cls = cls
+      self.earlier = earlier
+      self.fields = []
+      self.collect(table)
+      # elements named like a syntax structure class are renamed locally
+      self.local = dict((f, f + '_' if f in namespace else f) for f in self.fields)
+      # fields of earlier stages this one assigns again start from r
+      self.resumed = [f for f in self.fields if f in (earlier or ())]
+      for f in earlier or ():
+         self.local.setdefault(f, 'r.' + f)
+      self.call = re.compile(r'(?<![.\w])({0})(?=\s*\()'.format('|'.join(compiled))) if compiled else None
+      self.lines = []
+      # some element assigned since self was last brought up to date
+      self.dirty = True
+      # number of fields, in table order, that may have been assigned
+      self.seen = 0
+      # fields assigned whichever way the conditions went
+      self.definite = set()
+      # fields assigned somewhere so far, and those first assigned for sure
+      self.maybe = set()
+      self.initial = set()
+      # fields self has whatever the conditions, and those assigned after
+      self.stored = set()
+      self.since = set()
+      self.definite.update(self.resumed)
+      self.initial.update(self.resumed)
+      # most bits the code may have read since the last window check
+      self.budget = 0
+      self.emit(table, '   ')
+
+   @staticmethod
+   def stages(table):
+      """
+      table split at its ('stage', name) entries into (name, entries)
+      pairs; entries before the first one are the stage 'start'
+      """
+      stages = [('start', [])]
+      for entry in table:
+         if entry[0] == 'stage':
+            stages.append((entry[1], []))
+         else:
+            stages[-1][1].append(entry)
+      return [stage for stage in stages if stage[1]]
+
+   def collect(self, table, fields=None):
+      fields = self.fields if fields is None else fields
+      for entry in table:
+         kind = entry[0]
+         if kind in ('if', 'for', 'while'):
+            for body in entry[2 + (kind == 'for'):]:
+               self.collect(body, fields)
+         elif kind not in ('let', 'do', 'stage') and entry[1] is not None:
+            field = entry[1].split('[')[0].strip()
+            if field not in fields:
+               fields.append(field)
+      return fields
+
+   def reach(self, table):
+      # fields up to the last one table assigns can be set from here on
+      for field in self.collect(table, []):
+         self.seen = max(self.seen, self.fields.index(field) + 1)
+
+   def expr(self, text):
+      text = self.inline(text)
+      text = self.NAME.sub(lambda m: self.local.get(m.group(1), m.group(1)), text)
+      if self.call:
+         text = self.call.sub(r'parse_\1', text)
+      return self.SELF.sub('r', text)
+
+   def uses_self(self, entry):
+      return any(self.SELF.search(e) if isinstance(e, str) else
+                 isinstance(e, list) and any(self.uses_self(x) for x in e) for e in entry[1:])
+
+   def assigns(self, table):
+      for entry in table:
+         kind = entry[0]
+         if kind in ('if', 'for', 'while'):
+            if any(self.assigns(body) for body in entry[2 + (kind == 'for'):]):
+               return True
+         elif kind == 'do' and len(entry) > 2 and entry[2] or \
+            kind not in ('let', 'do', 'stage') and entry[1] is not None:
+            return True
+      return False
+
+   def inline(self, text):
+      # byte_aligned( ) needs no reader: _E is a multiple of 8
+      return text.replace('s.byte_aligned()', '(_q & 7 == 0)')
+
+   def store(self, indent, n=None, fields=None):
+      fields = self.fields[:n] if fields is None else fields
+      if indent == '   ':
+         self.stored.update(fields)
+         self.since = set()
+      self.lines.append(indent + '_d.update({{{0}}})'.format(
+         ', '.join('{0!r}: {1}'.format(f, self.local[f]) for f in fields)))
+      for f in fields:
+         if f not in self.definite:
+            self.lines.append(indent + 'if {0} is _ABSENT: del _d[{1!r}]'.format(self.local[f], f))
+
+   def emit(self, table, indent):
+      for entry in table:
+         kind = entry[0]
+         if kind == 'stage':
+            continue
+         texts = [self.inline(e) for e in entry[1:] if isinstance(e, str)]
+         # loops bring self up to date once, before the first iteration
+         if self.dirty and kind != 'if' and self.uses_self(entry):
+            self.store(indent, self.seen)
+            self.dirty = False
+         if kind not in ('if', 'for', 'while'):
+            self.reach([entry])
+         sync = kind != 'while' and any(self.READER.search(e) for e in texts[kind != 'do':])
+         if sync:
+            self.lines.append(indent + 's.pos = _E - _q')
+         m = self.DESCRIPTOR.match(kind)
+         if m:
+            read, n = m.groups()
+            target = self.expr(entry[1]) if entry[1] is not None else None
+            if n == 'v' and entry[1] is None:
+               # bits skipped are not read: the window only has to catch up
+               self.lines.append(indent + '_q -= {0}'.format(self.expr(entry[2])))
+               self.check(indent)
+            elif read in ('ue', 'se'):
+               self.need(indent, self.UE_BITS)
+               self.read_ue(indent, target, read == 'se')
+            elif n == 'v':
+               self.need(indent, self.UV_BITS)
+               self.lines.append(indent + '_n = {0}'.format(self.expr(entry[2])))
+               self.lines.append(indent + '_q -= _n')
+               self.lines.append(indent + '{0} = (_B >> _q) & ((1 << _n) - 1)'.format(target))
+            else:
+               self.need(indent, int(n))
+               self.lines.append(indent + '_q -= {0}'.format(n))
+               if entry[1] is not None:
+                  self.lines.append(indent + '{0} = (_B >> _q) & {1:d}'.format(target, (1 << int(n)) - 1))
+         elif kind in ('=', 'let'):
+            self.lines.append(indent + '{0} = {1}'.format(self.expr(entry[1]), self.expr(entry[2])))
+         elif kind == 'if':
+            dirty, budget = self.dirty, self.budget
+            self.lines.append(indent + 'if {0}:'.format(self.expr(entry[1])))
+            self.body(entry[2], indent)
+            if len(entry) > 3:
+               dirty, self.dirty = self.dirty, dirty
+               budget, self.budget = self.budget, budget
+               self.lines.append(indent + 'else:')
+               self.body(entry[3], indent)
+            self.dirty = self.dirty or dirty
+            self.budget = max(self.budget, budget)
+         elif kind == 'for':
+            self.lines.append(indent + 'for {0} in {1}:'.format(entry[1], self.expr(entry[2])))
+            self.loop(entry[3], indent)
+         elif kind == 'while':
+            cond = self.inline(entry[1])
+            if self.READER.search(cond):
+               # the condition asks the reader: keep it in step every iteration
+               self.lines.append(indent + 's.pos = _E - _q')
+               self.lines.append(indent + 'while {0}:'.format(self.expr(cond)))
+               self.loop(entry[2], indent)
+               self.lines.append(indent + '   s.pos = _E - _q')
+            else:
+               self.lines.append(indent + 'while {0}:'.format(self.expr(cond)))
+               self.loop(entry[2], indent)
+         elif kind == 'do':
+            self.lines.append(indent + self.expr(entry[1]))
+            for name in (entry[2] if len(entry) > 2 else ()):
+               self.lines.append(indent + '{0} = r.{1}'.format(self.local.get(name, name), name))
+         else:
+            raise ValueError('{0}: unknown syntax table entry {1!r}'.format(self.name, entry))
+         if sync:
+            self.lines.append(indent + '_q = _E - s.pos')
+            self.check(indent)
+         if m and entry[1] is not None or kind == '=':
+            self.dirty = True
+         if m and entry[1] is not None or kind in ('=', 'do'):
+            assigned = set(f.split('[')[0].strip() for f in (entry[1:2] if kind != 'do' else entry[2:3] and entry[2]))
+            if indent == '   ':
+               self.definite.update(assigned)
+               self.initial.update(assigned - self.maybe)
+            self.maybe.update(assigned)
+            self.since.update(assigned)
+
+   def read_ue(self, indent, target, signed):
+      # codewords of up to 8 bits through _UE_TABLE, as BitReader.ue( ), longer
+      # ones from the leading zero bits
+      k = '_k' if signed else target
+      self.lines.extend(indent + line for line in (
+         '_c = _UE_TABLE[(_B >> (_q - 8)) & 255]',
+         'if _c:',
+         '   _q -= _c >> 8',
+         '   {0} = _c & 255'.format(k),
+         'else:',
+         '   _z = _q - (_B & ((1 << _q) - 1)).bit_length()',
+         '   _q -= _z + _z + 1',
+         '   {0} = ((_B >> _q) & ((2 << _z) - 1)) - 1'.format(k),
+      ))
+      if signed:
+         self.lines.append(indent + '{0} = (_k + 1) >> 1 if _k & 1 else -(_k >> 1)'.format(target))
+
+   def loop(self, table, indent):
+      # an iteration starts with whatever the one before it assigned, and
+      # with a window check when it reads
+      dirty = self.dirty = self.dirty or self.assigns(table)
+      budget = self.budget
+      self.reach(table)
+      self.body(table, indent, self.reads(table))
+      self.dirty = self.dirty or dirty
+      self.budget = max(self.budget, budget)
+
+   def body(self, table, indent, check=False):
+      n = len(self.lines)
+      if check:
+         self.check(indent + '   ')
+      self.emit(table, indent + '   ')
+      if len(self.lines) == n:
+         self.lines.append(indent + '   pass')
+
+   def reads(self, table):
+      return any(self.DESCRIPTOR.match(entry[0]) or entry[0] in ('if', 'for', 'while') and
+                 any(self.reads(body) for body in entry[2 + (entry[0] == 'for'):]) for entry in table)
+
+   def check(self, indent):
+      self.lines.append(indent + self.CHECK)
+      self.budget = 0
+
+   def need(self, indent, bits):
+      # a window check first if the bits read since the last one could
+      # exceed MARGIN with these
+      if self.budget + bits > self.MARGIN:
+         self.check(indent)
+      self.budget += bits
+
+   def merge_reads(self, lines):
+      # a run of fixed length reads becomes one shift of _B, which is as
+      # long as the window, and shifts of the small word that gives
+      out = []
+      i = 0
+      while i < len(lines):
+         run = []
+         j = i
+         while j < len(lines):
+            m = self.SKIP.match(lines[j])
+            if not m or run and m.group(1) != run[0][0]:
+               break
+            r = self.READ.match(lines[j + 1]) if j + 1 < len(lines) else None
+            target = r.group(2) if r and r.group(1) == m.group(1) else None
+            run.append((m.group(1), int(m.group(2)), target))
+            j += 2 if target else 1
+         if len(run) < 2:
+            out.append(lines[i])
+            i += 1
+            continue
+         indent = run[0][0]
+         total = sum(n for _, n, _ in run)
+         out.append(indent + '_q -= {0:d}'.format(total))
+         out.append(indent + '_w = (_B >> _q) & {0:d}'.format((1 << total) - 1))
+         shift = total
+         for _, n, target in run:
+            shift -= n
+            if target:
+               out.append(indent + '{0} = {1}{2:d}'.format(
+                  target, '_w >> {0:d} & '.format(shift) if shift else '_w & ', (1 << n) - 1))
+         i = j
+      return out
+
+   def source(self):
+      # only elements that may be read before they are assigned start absent
+      fields = [self.local[f] for f in self.fields if f not in self.initial]
+      lines, self.lines = self.merge_reads(self.lines), []
+      self.store('   ', fields=[f for f in self.fields if f not in self.stored or f in self.since])
+      code = '\n'.join(lines)
+      readers = [name for name in ('u', 'ue', 'se', 'f') if re.search(r'(?<![.\w]){0}\('.format(name), code)]
+      if self.earlier is None:
+         params, into = ('s',) + self.params, ''
+         new = ['   r = object.__new__({0})'.format(self.cls.__name__)]
+      else:
+         params, into, new = ('s', 'r') + self.params, ' into r', []
+      return '\n'.join([
+         'def parse_{0}({1}):'.format(self.name, ', '.join(params)),
+         '   """',
+         '   {0} from a BitReader{1}, generated from its syntax table'.format(self.name, into),
+         '   """',
+      ] + new + [
+         '   _d = r.__dict__',
+      ] + ['   {0} = s.{0}'.format(name) for name in readers] + [
+         '   _B, _E, _L, _q = _rbsp_window(s, s.pos)',
+      ] + ['   {0} = r.{1}'.format(self.local[f], f) for f in self.resumed] + \
+         ['   {0} = _ABSENT'.format(' = '.join(fields[i:i + 8])) for i in range(0, len(fields), 8)] + [
+         '   try:',
+      ] + ['   ' + line for line in lines] + [
+         '   except ValueError:',
+         '      # negative shift: a read ran more than the padding past the end',
+         '      if _q >= 0:',
+         '         raise',
+         '      _q = -1',
+         '   s.pos = _E - _q',
+         '   if s.pos > s.end:',
+         '      raise EOFError("{0} read past end of RBSP ({{0:d}} bits)".format(s.end))'.format(self.name),
+      ] + self.lines + [
+         '   return r',
+         '',
+      ])
+
+
+# value of the syntax elements a generated parser has not assigned
+_ABSENT = object()
+
+# bytes of the RBSP a generated parser holds in _B at a time
+RBSP_WINDOW = 256
+
+
+def _rbsp_window(s, pos):
+   """
+   (_B, _E, _L, _q) for a generated parser reading the BitReader s from
+   bit pos: _B holds RBSP_WINDOW bytes from the one of pos, followed by
+   SyntaxCompiler.PADDING zero bits, _E is the bit position of s just
+   past them and _q the bits from pos to there. Below _L bits left the
+   parser moves the window on, so shifts of _B cost the same however
+   long the RBSP; the last window of the RBSP is never moved on.
+   """
+   start = pos >> 3
+   end = start + RBSP_WINDOW
+   padding = SyntaxCompiler.PADDING
+   if end << 3 >= s.end:
+      stop = s.end + padding
+      return int.from_bytes(s.data[start:], 'big') << padding, stop, -1 << 62, stop - pos
+   stop = (end << 3) + padding
+   return int.from_bytes(s.data[start:end], 'big') << padding, stop, padding + SyntaxCompiler.MARGIN, stop - pos
+
+
+# 7.3.3.2 General constraints information syntax
+GENERAL_CONSTRAINTS_INFO_SYNTAX = [
+   ('u(1)', 'gci_present_flag'),
+   ('if', 'gci_present_flag', [('u({0:d})'.format(n), name) for name, n in general_constraints_info.FLAGS] + [
+      ('u(8)', 'gci_num_reserved_bits'),
+      ('u(v)', None, 'gci_num_reserved_bits')]),   # gci_reserved_zero_bit[ i ]
+   ('while', 'not s.byte_aligned()', [
+      ('f(1)', None)]),   # gci_alignment_zero_bit
+]
+
+# 7.3.3.1 General profile, tier, and level syntax
+PROFILE_TIER_LEVEL_SYNTAX = [
+   ('if', 'profileTierPresentFlag', [
+      ('u(7)', 'general_profile_idc'),
+      ('u(1)', 'general_tier_flag')]),
+   ('u(8)', 'general_level_idc'),
+   ('u(1)', 'ptl_frame_only_constraint_flag'),
+   ('u(1)', 'ptl_multilayer_enabled_flag'),
+   ('if', 'profileTierPresentFlag', [
+      ('=', 'general_constraints_info', 'general_constraints_info(s)')]),
+   ('=', 'ptl_sublayer_level_present_flag', '[0] * MaxNumSubLayersMinus1'),
+   ('for', 'i', 'range(MaxNumSubLayersMinus1 - 1, -1, -1)', [
+      ('u(1)', 'ptl_sublayer_level_present_flag[ i ]')]),
+   ('while', 'not s.byte_aligned()', [
+      ('f(1)', None)]),   # ptl_reserved_zero_bit
+   ('=', 'sublayer_level_idc', '[0] * (MaxNumSubLayersMinus1 + 1)'),
+   ('=', 'sublayer_level_idc[ MaxNumSubLayersMinus1 ]', 'general_level_idc'),
+   ('for', 'i', 'range(MaxNumSubLayersMinus1 - 1, -1, -1)', [
+      ('if', 'ptl_sublayer_level_present_flag[ i ]', [
+         ('u(8)', 'sublayer_level_idc[ i ]')], [
+         ('=', 'sublayer_level_idc[ i ]', 'sublayer_level_idc[ i + 1 ]')])]),
+   ('if', 'profileTierPresentFlag', [
+      ('u(8)', 'ptl_num_sub_profiles'),
+      ('=', 'general_sub_profile_idc', '[0] * ptl_num_sub_profiles'),
+      ('for', 'i', 'range(ptl_num_sub_profiles)', [
+         ('u(32)', 'general_sub_profile_idc[ i ]')])]),
+]
+
+# 7.3.4 DPB parameters syntax
+DPB_PARAMETERS_SYNTAX = [
+   ('=', 'dpb_max_dec_pic_buffering_minus1', '[0] * (MaxSubLayersMinus1 + 1)'),
+   ('=', 'dpb_max_num_reorder_pics', '[0] * (MaxSubLayersMinus1 + 1)'),
+   ('=', 'dpb_max_latency_increase_plus1', '[0] * (MaxSubLayersMinus1 + 1)'),
+   ('for', 'i', 'range(0 if subLayerInfoFlag else MaxSubLayersMinus1, MaxSubLayersMinus1 + 1)', [
+      ('ue(v)', 'dpb_max_dec_pic_buffering_minus1[ i ]'),
+      ('ue(v)', 'dpb_max_num_reorder_pics[ i ]'),
+      ('ue(v)', 'dpb_max_latency_increase_plus1[ i ]')]),
+   ('if', 'not subLayerInfoFlag', [
+      ('for', 'i', 'range(MaxSubLayersMinus1)', [
+         ('=', 'dpb_max_dec_pic_buffering_minus1[ i ]', 'dpb_max_dec_pic_buffering_minus1[ MaxSubLayersMinus1 ]'),
+         ('=', 'dpb_max_num_reorder_pics[ i ]', 'dpb_max_num_reorder_pics[ MaxSubLayersMinus1 ]'),
+         ('=', 'dpb_max_latency_increase_plus1[ i ]', 'dpb_max_latency_increase_plus1[ MaxSubLayersMinus1 ]')])]),
+]
+
+# 7.3.5.1 General timing and HRD parameters syntax
+GENERAL_TIMING_HRD_PARAMETERS_SYNTAX = [
+   ('u(32)', 'num_units_in_tick'),
+   ('u(32)', 'time_scale'),
+   ('u(1)', 'general_nal_hrd_params_present_flag'),
+   ('u(1)', 'general_vcl_hrd_params_present_flag'),
+   ('=', 'general_same_pic_timing_in_all_ols_flag', '0'),
+   ('=', 'general_du_hrd_params_present_flag', '0'),
+   ('=', 'hrd_cpb_cnt_minus1', '0'),
+   ('if', 'general_nal_hrd_params_present_flag or general_vcl_hrd_params_present_flag', [
+      ('u(1)', 'general_same_pic_timing_in_all_ols_flag'),
+      ('u(1)', 'general_du_hrd_params_present_flag'),
+      ('if', 'general_du_hrd_params_present_flag', [
+         ('u(8)', 'tick_divisor_minus2')]),
+      ('u(4)', 'bit_rate_scale'),
+      ('u(4)', 'cpb_size_scale'),
+      ('if', 'general_du_hrd_params_present_flag', [
+         ('u(4)', 'cpb_size_du_scale')]),
+      ('ue(v)', 'hrd_cpb_cnt_minus1')]),
+]
+
+# 7.3.5.3 Sublayer HRD parameters syntax
+SUBLAYER_HRD_PARAMETERS_SYNTAX = [
+   ('let', 'n', 'hrd.hrd_cpb_cnt_minus1 + 1'),
+   ('=', 'bit_rate_value_minus1', '[0] * n'),
+   ('=', 'cpb_size_value_minus1', '[0] * n'),
+   ('if', 'hrd.general_du_hrd_params_present_flag', [
+      ('=', 'cpb_size_du_value_minus1', '[0] * n'),
+      ('=', 'bit_rate_du_value_minus1', '[0] * n')]),
+   ('=', 'cbr_flag', '[0] * n'),
+   ('for', 'j', 'range(n)', [
+      ('ue(v)', 'bit_rate_value_minus1[ j ]'),
+      ('ue(v)', 'cpb_size_value_minus1[ j ]'),
+      ('if', 'hrd.general_du_hrd_params_present_flag', [
+         ('ue(v)', 'cpb_size_du_value_minus1[ j ]'),
+         ('ue(v)', 'bit_rate_du_value_minus1[ j ]')]),
+      ('u(1)', 'cbr_flag[ j ]')]),
+]
+
+# 7.3.5.2 OLS timing and HRD parameters syntax
+OLS_TIMING_HRD_PARAMETERS_SYNTAX = [
+   ('let', 'n', 'MaxSubLayersMinus1 + 1'),
+   ('=', 'fixed_pic_rate_general_flag', '[0] * n'),
+   ('=', 'fixed_pic_rate_within_cvs_flag', '[0] * n'),
+   ('=', 'elemental_duration_in_tc_minus1', '[0] * n'),
+   ('=', 'low_delay_hrd_flag', '[0] * n'),
+   ('=', 'nal_sublayer_hrd_parameters', '[None] * n'),
+   ('=', 'vcl_sublayer_hrd_parameters', '[None] * n'),
+   ('for', 'i', 'range(firstSubLayer, n)', [
+      ('u(1)', 'fixed_pic_rate_general_flag[ i ]'),
+      ('if', 'not fixed_pic_rate_general_flag[ i ]', [
+         ('u(1)', 'fixed_pic_rate_within_cvs_flag[ i ]')], [
+         ('=', 'fixed_pic_rate_within_cvs_flag[ i ]', '1')]),
+      ('if', 'fixed_pic_rate_within_cvs_flag[ i ]', [
+         ('ue(v)', 'elemental_duration_in_tc_minus1[ i ]')], [
+         ('if', '(hrd.general_nal_hrd_params_present_flag or hrd.general_vcl_hrd_params_present_flag) and '
+                'hrd.hrd_cpb_cnt_minus1 == 0', [
+            ('u(1)', 'low_delay_hrd_flag[ i ]')])]),
+      ('if', 'hrd.general_nal_hrd_params_present_flag', [
+         ('=', 'nal_sublayer_hrd_parameters[ i ]', 'sublayer_hrd_parameters(s, hrd)')]),
+      ('if', 'hrd.general_vcl_hrd_params_present_flag', [
+         ('=', 'vcl_sublayer_hrd_parameters[ i ]', 'sublayer_hrd_parameters(s, hrd)')])]),
+]
+
+# 7.3.10 Reference picture list structure syntax
+REF_PIC_LIST_STRUCT_SYNTAX = [
+   ('ue(v)', 'num_ref_entries'),
+   ('let', 'n', 'num_ref_entries'),
+   ('=', 'ltrp_in_header_flag', '1 if rplsIdx == sps.sps_num_ref_pic_lists[ listIdx ] else 0'),
+   ('if', 'sps.sps_long_term_ref_pics_flag and rplsIdx < sps.sps_num_ref_pic_lists[ listIdx ] and n > 0', [
+      ('u(1)', 'ltrp_in_header_flag')]),
+   ('=', 'inter_layer_ref_pic_flag', '[0] * n'),
+   ('=', 'st_ref_pic_flag', '[1] * n'),
+   ('=', 'abs_delta_poc_st', '[0] * n'),
+   ('=', 'strp_entry_sign_flag', '[0] * n'),
+   ('=', 'rpls_poc_lsb_lt', '[0] * n'),
+   ('=', 'ilrp_idx', '[0] * n'),
+   ('=', 'NumLtrpEntries', '0'),
+   ('let', 'j', '0'),
+   ('for', 'i', 'range(n)', [
+      ('if', 'sps.sps_inter_layer_prediction_enabled_flag', [
+         ('u(1)', 'inter_layer_ref_pic_flag[ i ]')]),
+      ('if', 'not inter_layer_ref_pic_flag[ i ]', [
+         ('if', 'sps.sps_long_term_ref_pics_flag', [
+            ('u(1)', 'st_ref_pic_flag[ i ]')]),
+         ('if', 'st_ref_pic_flag[ i ]', [
+            ('ue(v)', 'abs_delta_poc_st[ i ]'),
+            ('if', '(sps.sps_weighted_pred_flag or sps.sps_weighted_bipred_flag) and i != 0', [
+               ('let', 'AbsDeltaPocSt', 'abs_delta_poc_st[ i ]')], [
+               ('let', 'AbsDeltaPocSt', 'abs_delta_poc_st[ i ] + 1')]),
+            ('if', 'AbsDeltaPocSt > 0', [
+               ('u(1)', 'strp_entry_sign_flag[ i ]')])], [
+            ('=', 'NumLtrpEntries', 'NumLtrpEntries + 1'),
+            ('if', 'not ltrp_in_header_flag', [
+               ('u(v)', 'rpls_poc_lsb_lt[ j ]', 'sps.sps_log2_max_pic_order_cnt_lsb_minus4 + 4'),
+               ('let', 'j', 'j + 1')])])], [
+         ('ue(v)', 'ilrp_idx[ i ]')])]),
+]
+
+# 7.3.2.3 Video parameter set RBSP syntax
+VPS_SYNTAX = [
+   ('u(4)', 'vps_video_parameter_set_id'),
+   ('u(6)', 'vps_max_layers_minus1'),
+   ('u(3)', 'vps_max_sublayers_minus1'),
+   ('let', 'L', 'vps_max_layers_minus1 + 1'),
+   ('=', 'vps_default_ptl_dpb_hrd_max_tid_flag', '1'),
+   ('if', 'vps_max_layers_minus1 > 0 and vps_max_sublayers_minus1 > 0', [
+      ('u(1)', 'vps_default_ptl_dpb_hrd_max_tid_flag')]),
+   ('=', 'vps_all_independent_layers_flag', '1'),
+   ('if', 'vps_max_layers_minus1 > 0', [
+      ('u(1)', 'vps_all_independent_layers_flag')]),
+   ('=', 'vps_layer_id', '[0] * L'),
+   ('=', 'vps_independent_layer_flag', '[1] * L'),
+   ('=', 'vps_max_tid_ref_present_flag', '[0] * L'),
+   ('=', 'vps_direct_ref_layer_flag', '[[0] * L for i in range(L)]'),
+   ('=', 'vps_max_tid_il_ref_pics_plus1', '[[0] * L for i in range(L)]'),
+   ('for', 'i', 'range(L)', [
+      ('u(6)', 'vps_layer_id[ i ]'),
+      ('if', 'i > 0 and not vps_all_independent_layers_flag', [
+         ('u(1)', 'vps_independent_layer_flag[ i ]'),
+         ('if', 'not vps_independent_layer_flag[ i ]', [
+            ('u(1)', 'vps_max_tid_ref_present_flag[ i ]'),
+            ('for', 'j', 'range(i)', [
+               ('u(1)', 'vps_direct_ref_layer_flag[ i ][ j ]'),
+               ('if', 'vps_max_tid_ref_present_flag[ i ] and vps_direct_ref_layer_flag[ i ][ j ]', [
+                  ('u(3)', 'vps_max_tid_il_ref_pics_plus1[ i ][ j ]')])])])])]),
+   ('=', 'vps_each_layer_is_an_ols_flag', '1 if vps_max_layers_minus1 == 0 else 0'),
+   ('=', 'vps_ols_mode_idc', '2 if vps_all_independent_layers_flag else 0'),
+   ('=', 'vps_num_output_layer_sets_minus2', '0'),
+   ('=', 'vps_ols_output_layer_flag', '[]'),
+   ('=', 'vps_num_ptls_minus1', '0'),
+   ('if', 'vps_max_layers_minus1 > 0', [
+      ('if', 'vps_all_independent_layers_flag', [
+         ('u(1)', 'vps_each_layer_is_an_ols_flag')]),
+      ('if', 'not vps_each_layer_is_an_ols_flag', [
+         ('if', 'not vps_all_independent_layers_flag', [
+            ('u(2)', 'vps_ols_mode_idc')]),
+         ('if', 'vps_ols_mode_idc == 2', [
+            ('u(8)', 'vps_num_output_layer_sets_minus2'),
+            ('=', 'vps_ols_output_layer_flag', '[[0] * L for i in range(vps_num_output_layer_sets_minus2 + 2)]'),
+            ('for', 'i', 'range(1, vps_num_output_layer_sets_minus2 + 2)', [
+               ('for', 'j', 'range(L)', [
+                  ('u(1)', 'vps_ols_output_layer_flag[ i ][ j ]')])])])]),
+      ('u(8)', 'vps_num_ptls_minus1')]),
+   ('do', 'self.derive_output_layer_sets()', ('TotalNumOlss', 'NumMultiLayerOlss')),
+   ('let', 'P', 'vps_num_ptls_minus1 + 1'),
+   ('=', 'vps_pt_present_flag', '[1] * P'),
+   ('=', 'vps_ptl_max_tid', '[vps_max_sublayers_minus1] * P'),
+   ('for', 'i', 'range(P)', [
+      ('if', 'i > 0', [
+         ('u(1)', 'vps_pt_present_flag[ i ]')]),
+      ('if', 'not vps_default_ptl_dpb_hrd_max_tid_flag', [
+         ('u(3)', 'vps_ptl_max_tid[ i ]')])]),
+   ('while', 'not s.byte_aligned()', [
+      ('f(1)', None)]),   # vps_ptl_alignment_zero_bit
+   ('=', 'profile_tier_level', '[None] * P'),
+   ('for', 'i', 'range(P)', [
+      ('=', 'profile_tier_level[ i ]', 'profile_tier_level(s, vps_pt_present_flag[ i ], vps_ptl_max_tid[ i ])')]),
+   ('=', 'vps_ols_ptl_idx', '[0] * TotalNumOlss'),
+   ('for', 'i', 'range(TotalNumOlss)', [
+      ('if', 'vps_num_ptls_minus1 > 0 and vps_num_ptls_minus1 + 1 != TotalNumOlss', [
+         ('u(8)', 'vps_ols_ptl_idx[ i ]')], [
+         ('if', 'vps_num_ptls_minus1 + 1 == TotalNumOlss', [
+            ('=', 'vps_ols_ptl_idx[ i ]', 'i')])])]),
+   ('=', 'vps_timing_hrd_params_present_flag', '0'),
+   ('if', 'not vps_each_layer_is_an_ols_flag', [
+      ('ue(v)', 'vps_num_dpb_params_minus1'),
+      ('=', 'VpsNumDpbParams', 'vps_num_dpb_params_minus1 + 1'),
+      ('=', 'vps_sublayer_dpb_params_present_flag', '0'),
+      ('if', 'vps_max_sublayers_minus1 > 0', [
+         ('u(1)', 'vps_sublayer_dpb_params_present_flag')]),
+      ('=', 'vps_dpb_max_tid', '[vps_max_sublayers_minus1] * VpsNumDpbParams'),
+      ('=', 'dpb_parameters', '[None] * VpsNumDpbParams'),
+      ('for', 'i', 'range(VpsNumDpbParams)', [
+         ('if', 'not vps_default_ptl_dpb_hrd_max_tid_flag', [
+            ('u(3)', 'vps_dpb_max_tid[ i ]')]),
+         ('=', 'dpb_parameters[ i ]', 'dpb_parameters(s, vps_dpb_max_tid[ i ], vps_sublayer_dpb_params_present_flag)')]),
+      ('let', 'M', 'NumMultiLayerOlss'),
+      ('=', 'vps_ols_dpb_pic_width', '[0] * M'),
+      ('=', 'vps_ols_dpb_pic_height', '[0] * M'),
+      ('=', 'vps_ols_dpb_chroma_format', '[0] * M'),
+      ('=', 'vps_ols_dpb_bitdepth_minus8', '[0] * M'),
+      ('=', 'vps_ols_dpb_params_idx', '[0] * M'),
+      ('for', 'i', 'range(M)', [
+         ('ue(v)', 'vps_ols_dpb_pic_width[ i ]'),
+         ('ue(v)', 'vps_ols_dpb_pic_height[ i ]'),
+         ('u(2)', 'vps_ols_dpb_chroma_format[ i ]'),
+         ('ue(v)', 'vps_ols_dpb_bitdepth_minus8[ i ]'),
+         ('if', 'VpsNumDpbParams > 1 and VpsNumDpbParams != M', [
+            ('ue(v)', 'vps_ols_dpb_params_idx[ i ]')], [
+            ('if', 'VpsNumDpbParams == M', [
+               ('=', 'vps_ols_dpb_params_idx[ i ]', 'i')])])]),
+      ('u(1)', 'vps_timing_hrd_params_present_flag'),
+      ('if', 'vps_timing_hrd_params_present_flag', [
+         ('=', 'general_timing_hrd_parameters', 'general_timing_hrd_parameters(s)'),
+         ('=', 'vps_sublayer_cpb_params_present_flag', '0'),
+         ('if', 'vps_max_sublayers_minus1 > 0', [
+            ('u(1)', 'vps_sublayer_cpb_params_present_flag')]),
+         ('ue(v)', 'vps_num_ols_timing_hrd_params_minus1'),
+         ('let', 'H', 'vps_num_ols_timing_hrd_params_minus1 + 1'),
+         ('=', 'vps_hrd_max_tid', '[vps_max_sublayers_minus1] * H'),
+         ('=', 'ols_timing_hrd_parameters', '[None] * H'),
+         ('for', 'i', 'range(H)', [
+            ('if', 'not vps_default_ptl_dpb_hrd_max_tid_flag', [
+               ('u(3)', 'vps_hrd_max_tid[ i ]')]),
+            ('let', 'firstSubLayer', '0 if vps_sublayer_cpb_params_present_flag else vps_hrd_max_tid[ i ]'),
+            ('=', 'ols_timing_hrd_parameters[ i ]', 'ols_timing_hrd_parameters('
+             's, firstSubLayer, vps_hrd_max_tid[ i ], general_timing_hrd_parameters)')]),
+         ('=', 'vps_ols_timing_hrd_idx', '[0] * M'),
+         ('if', 'vps_num_ols_timing_hrd_params_minus1 > 0 and H != M', [
+            ('for', 'i', 'range(M)', [
+               ('ue(v)', 'vps_ols_timing_hrd_idx[ i ]')])], [
+            ('if', 'H == M', [
+               ('=', 'vps_ols_timing_hrd_idx', 'list(range(M))')])])])]),
+   ('u(1)', 'vps_extension_flag'),
+   ('if', 'vps_extension_flag', [
+      ('while', 's.more_rbsp_data()', [
+         ('u(1)', None)])]),   # vps_extension_data_flag
+   ('do', 's.rbsp_trailing_bits()'),
+]
+
+# 7.3.2.4 Sequence parameter set RBSP syntax
+SPS_SYNTAX = [
+   ('u(4)', 'sps_seq_parameter_set_id'),
+   ('u(4)', 'sps_video_parameter_set_id'),
+   ('u(3)', 'sps_max_sublayers_minus1'),
+   ('u(2)', 'sps_chroma_format_idc'),
+   ('u(2)', 'sps_log2_ctu_size_minus5'),
+   ('=', 'CtbLog2SizeY', 'sps_log2_ctu_size_minus5 + 5'),
+   ('=', 'CtbSizeY', '1 << CtbLog2SizeY'),
+   ('u(1)', 'sps_ptl_dpb_hrd_params_present_flag'),
+   ('if', 'sps_ptl_dpb_hrd_params_present_flag', [
+      ('=', 'profile_tier_level', 'profile_tier_level(s, 1, sps_max_sublayers_minus1)')]),
+   ('stage', 'picture_size'),
+   ('u(1)', 'sps_gdr_enabled_flag'),
+   ('u(1)', 'sps_ref_pic_resampling_enabled_flag'),
+   ('=', 'sps_res_change_in_clvs_allowed_flag', '0'),
+   ('if', 'sps_ref_pic_resampling_enabled_flag', [
+      ('u(1)', 'sps_res_change_in_clvs_allowed_flag')]),
+   ('ue(v)', 'sps_pic_width_max_in_luma_samples'),
+   ('ue(v)', 'sps_pic_height_max_in_luma_samples'),
+   ('u(1)', 'sps_conformance_window_flag'),
+   ('=', 'sps_conf_win_left_offset', '0'),
+   ('=', 'sps_conf_win_right_offset', '0'),
+   ('=', 'sps_conf_win_top_offset', '0'),
+   ('=', 'sps_conf_win_bottom_offset', '0'),
+   ('if', 'sps_conformance_window_flag', [
+      ('ue(v)', 'sps_conf_win_left_offset'),
+      ('ue(v)', 'sps_conf_win_right_offset'),
+      ('ue(v)', 'sps_conf_win_top_offset'),
+      ('ue(v)', 'sps_conf_win_bottom_offset')]),
+   ('stage', 'subpictures'),
+   ('let', 'tmpWidthVal', '(sps_pic_width_max_in_luma_samples + CtbSizeY - 1) // CtbSizeY'),
+   ('let', 'tmpHeightVal', '(sps_pic_height_max_in_luma_samples + CtbSizeY - 1) // CtbSizeY'),
+   ('u(1)', 'sps_subpic_info_present_flag'),
+   ('=', 'sps_num_subpics_minus1', '0'),
+   ('=', 'sps_independent_subpics_flag', '1'),
+   ('=', 'sps_subpic_same_size_flag', '0'),
+   ('=', 'sps_subpic_id_len_minus1', '0'),
+   ('=', 'sps_subpic_id_mapping_explicitly_signalled_flag', '0'),
+   ('=', 'sps_subpic_id_mapping_present_flag', '0'),
+   ('if', 'sps_subpic_info_present_flag', [
+      ('ue(v)', 'sps_num_subpics_minus1'),
+      ('if', 'sps_num_subpics_minus1 > 0', [
+         ('u(1)', 'sps_independent_subpics_flag'),
+         ('u(1)', 'sps_subpic_same_size_flag')])]),
+   ('let', 'N', 'sps_num_subpics_minus1 + 1'),
+   ('=', 'sps_subpic_ctu_top_left_x', '[0] * N'),
+   ('=', 'sps_subpic_ctu_top_left_y', '[0] * N'),
+   ('=', 'sps_subpic_width_minus1', '[0] * N'),
+   ('=', 'sps_subpic_height_minus1', '[0] * N'),
+   ('=', 'sps_subpic_treated_as_pic_flag', '[1] * N'),
+   ('=', 'sps_loop_filter_across_subpic_enabled_flag', '[0] * N'),
+   ('=', 'sps_subpic_id', 'list(range(N))'),
+   ('let', 'wbits', 'ceil_log2(tmpWidthVal)'),
+   ('let', 'hbits', 'ceil_log2(tmpHeightVal)'),
+   ('for', 'i', 'range(N)', [
+      ('if', 'sps_num_subpics_minus1 > 0 and (not sps_subpic_same_size_flag or i == 0)', [
+         ('if', 'i > 0 and sps_pic_width_max_in_luma_samples > CtbSizeY', [
+            ('u(v)', 'sps_subpic_ctu_top_left_x[ i ]', 'wbits')]),
+         ('if', 'i > 0 and sps_pic_height_max_in_luma_samples > CtbSizeY', [
+            ('u(v)', 'sps_subpic_ctu_top_left_y[ i ]', 'hbits')]),
+         ('if', 'i < sps_num_subpics_minus1 and sps_pic_width_max_in_luma_samples > CtbSizeY', [
+            ('u(v)', 'sps_subpic_width_minus1[ i ]', 'wbits')], [
+            ('=', 'sps_subpic_width_minus1[ i ]', 'tmpWidthVal - sps_subpic_ctu_top_left_x[ i ] - 1')]),
+         ('if', 'i < sps_num_subpics_minus1 and sps_pic_height_max_in_luma_samples > CtbSizeY', [
+            ('u(v)', 'sps_subpic_height_minus1[ i ]', 'hbits')], [
+            ('=', 'sps_subpic_height_minus1[ i ]', 'tmpHeightVal - sps_subpic_ctu_top_left_y[ i ] - 1')])], [
+         ('if', 'i == 0', [
+            ('=', 'sps_subpic_width_minus1[ i ]', 'tmpWidthVal - 1'),
+            ('=', 'sps_subpic_height_minus1[ i ]', 'tmpHeightVal - 1')], [
+            # sps_subpic_same_size_flag: a grid of subpictures the size of the first
+            ('let', 'numSubpicCols', 'tmpWidthVal // (sps_subpic_width_minus1[ 0 ] + 1)'),
+            ('=', 'sps_subpic_ctu_top_left_x[ i ]', '(i % numSubpicCols) * (sps_subpic_width_minus1[ 0 ] + 1)'),
+            ('=', 'sps_subpic_ctu_top_left_y[ i ]', '(i // numSubpicCols) * (sps_subpic_height_minus1[ 0 ] + 1)'),
+            ('=', 'sps_subpic_width_minus1[ i ]', 'sps_subpic_width_minus1[ 0 ]'),
+            ('=', 'sps_subpic_height_minus1[ i ]', 'sps_subpic_height_minus1[ 0 ]')])]),
+      ('if', 'sps_num_subpics_minus1 > 0 and not sps_independent_subpics_flag', [
+         ('u(1)', 'sps_subpic_treated_as_pic_flag[ i ]'),
+         ('u(1)', 'sps_loop_filter_across_subpic_enabled_flag[ i ]')])]),
+   ('if', 'sps_subpic_info_present_flag', [
+      ('ue(v)', 'sps_subpic_id_len_minus1'),
+      ('u(1)', 'sps_subpic_id_mapping_explicitly_signalled_flag'),
+      ('if', 'sps_subpic_id_mapping_explicitly_signalled_flag', [
+         ('u(1)', 'sps_subpic_id_mapping_present_flag'),
+         ('if', 'sps_subpic_id_mapping_present_flag', [
+            ('for', 'i', 'range(N)', [
+               ('u(v)', 'sps_subpic_id[ i ]', 'sps_subpic_id_len_minus1 + 1')])])])]),
+   ('stage', 'format'),
+   ('ue(v)', 'sps_bitdepth_minus8'),
+   ('=', 'BitDepth', '8 + sps_bitdepth_minus8'),
+   ('u(1)', 'sps_entropy_coding_sync_enabled_flag'),
+   ('u(1)', 'sps_entry_point_offsets_present_flag'),
+   ('u(4)', 'sps_log2_max_pic_order_cnt_lsb_minus4'),
+   ('u(1)', 'sps_poc_msb_cycle_flag'),
+   ('if', 'sps_poc_msb_cycle_flag', [
+      ('ue(v)', 'sps_poc_msb_cycle_len_minus1')]),
+   ('u(2)', 'sps_num_extra_ph_bytes'),
+   ('=', 'sps_extra_ph_bit_present_flag', '[0] * (sps_num_extra_ph_bytes * 8)'),
+   ('for', 'i', 'range(sps_num_extra_ph_bytes * 8)', [
+      ('u(1)', 'sps_extra_ph_bit_present_flag[ i ]')]),
+   ('u(2)', 'sps_num_extra_sh_bytes'),
+   ('=', 'sps_extra_sh_bit_present_flag', '[0] * (sps_num_extra_sh_bytes * 8)'),
+   ('for', 'i', 'range(sps_num_extra_sh_bytes * 8)', [
+      ('u(1)', 'sps_extra_sh_bit_present_flag[ i ]')]),
+   ('if', 'sps_ptl_dpb_hrd_params_present_flag', [
+      ('=', 'sps_sublayer_dpb_params_flag', '0'),
+      ('if', 'sps_max_sublayers_minus1 > 0', [
+         ('u(1)', 'sps_sublayer_dpb_params_flag')]),
+      ('=', 'dpb_parameters', 'dpb_parameters(s, sps_max_sublayers_minus1, sps_sublayer_dpb_params_flag)')]),
+   ('stage', 'tools'),
+   ('ue(v)', 'sps_log2_min_luma_coding_block_size_minus2'),
+   ('u(1)', 'sps_partition_constraints_override_enabled_flag'),
+   ('ue(v)', 'sps_log2_diff_min_qt_min_cb_intra_slice_luma'),
+   ('ue(v)', 'sps_max_mtt_hierarchy_depth_intra_slice_luma'),
+   ('if', 'sps_max_mtt_hierarchy_depth_intra_slice_luma != 0', [
+      ('ue(v)', 'sps_log2_diff_max_bt_min_qt_intra_slice_luma'),
+      ('ue(v)', 'sps_log2_diff_max_tt_min_qt_intra_slice_luma')]),
+   ('=', 'sps_qtbtt_dual_tree_intra_flag', '0'),
+   ('if', 'sps_chroma_format_idc != 0', [
+      ('u(1)', 'sps_qtbtt_dual_tree_intra_flag')]),
+   ('if', 'sps_qtbtt_dual_tree_intra_flag', [
+      ('ue(v)', 'sps_log2_diff_min_qt_min_cb_intra_slice_chroma'),
+      ('ue(v)', 'sps_max_mtt_hierarchy_depth_intra_slice_chroma'),
+      ('if', 'sps_max_mtt_hierarchy_depth_intra_slice_chroma != 0', [
+         ('ue(v)', 'sps_log2_diff_max_bt_min_qt_intra_slice_chroma'),
+         ('ue(v)', 'sps_log2_diff_max_tt_min_qt_intra_slice_chroma')])]),
+   ('ue(v)', 'sps_log2_diff_min_qt_min_cb_inter_slice'),
+   ('ue(v)', 'sps_max_mtt_hierarchy_depth_inter_slice'),
+   ('if', 'sps_max_mtt_hierarchy_depth_inter_slice != 0', [
+      ('ue(v)', 'sps_log2_diff_max_bt_min_qt_inter_slice'),
+      ('ue(v)', 'sps_log2_diff_max_tt_min_qt_inter_slice')]),
+   ('=', 'sps_max_luma_transform_size_64_flag', '0'),
+   ('if', 'CtbSizeY > 32', [
+      ('u(1)', 'sps_max_luma_transform_size_64_flag')]),
+   ('u(1)', 'sps_transform_skip_enabled_flag'),
+   ('if', 'sps_transform_skip_enabled_flag', [
+      ('ue(v)', 'sps_log2_transform_skip_max_size_minus2'),
+      ('u(1)', 'sps_bdpcm_enabled_flag')]),
+   ('u(1)', 'sps_mts_enabled_flag'),
+   ('if', 'sps_mts_enabled_flag', [
+      ('u(1)', 'sps_explicit_mts_intra_enabled_flag'),
+      ('u(1)', 'sps_explicit_mts_inter_enabled_flag')]),
+   ('u(1)', 'sps_lfnst_enabled_flag'),
+   ('=', 'sps_joint_cbcr_enabled_flag', '0'),
+   ('=', 'sps_same_qp_table_for_chroma_flag', '0'),
+   ('=', 'sps_qp_table_start_minus26', '[]'),
+   ('=', 'sps_num_points_in_qp_table_minus1', '[]'),
+   ('=', 'sps_delta_qp_in_val_minus1', '[]'),
+   ('=', 'sps_delta_qp_diff_val', '[]'),
+   ('if', 'sps_chroma_format_idc != 0', [
+      ('u(1)', 'sps_joint_cbcr_enabled_flag'),
+      ('u(1)', 'sps_same_qp_table_for_chroma_flag'),
+      ('let', 'numQpTables', '1 if sps_same_qp_table_for_chroma_flag else 3 if sps_joint_cbcr_enabled_flag else 2'),
+      ('=', 'sps_qp_table_start_minus26', '[0] * numQpTables'),
+      ('=', 'sps_num_points_in_qp_table_minus1', '[0] * numQpTables'),
+      ('=', 'sps_delta_qp_in_val_minus1', '[None] * numQpTables'),
+      ('=', 'sps_delta_qp_diff_val', '[None] * numQpTables'),
+      ('for', 'i', 'range(numQpTables)', [
+         ('se(v)', 'sps_qp_table_start_minus26[ i ]'),
+         ('ue(v)', 'sps_num_points_in_qp_table_minus1[ i ]'),
+         ('let', 'n', 'sps_num_points_in_qp_table_minus1[ i ] + 1'),
+         ('=', 'sps_delta_qp_in_val_minus1[ i ]', '[0] * n'),
+         ('=', 'sps_delta_qp_diff_val[ i ]', '[0] * n'),
+         ('for', 'j', 'range(n)', [
+            ('ue(v)', 'sps_delta_qp_in_val_minus1[ i ][ j ]'),
+            ('ue(v)', 'sps_delta_qp_diff_val[ i ][ j ]')])])]),
+   ('u(1)', 'sps_sao_enabled_flag'),
+   ('u(1)', 'sps_alf_enabled_flag'),
+   ('=', 'sps_ccalf_enabled_flag', '0'),
+   ('if', 'sps_alf_enabled_flag and sps_chroma_format_idc != 0', [
+      ('u(1)', 'sps_ccalf_enabled_flag')]),
+   ('u(1)', 'sps_lmcs_enabled_flag'),
+   ('u(1)', 'sps_weighted_pred_flag'),
+   ('u(1)', 'sps_weighted_bipred_flag'),
+   ('u(1)', 'sps_long_term_ref_pics_flag'),
+   ('=', 'sps_inter_layer_prediction_enabled_flag', '0'),
+   ('if', 'sps_video_parameter_set_id > 0', [
+      ('u(1)', 'sps_inter_layer_prediction_enabled_flag')]),
+   ('u(1)', 'sps_idr_rpl_present_flag'),
+   ('u(1)', 'sps_rpl1_same_as_rpl0_flag'),
+   ('=', 'sps_num_ref_pic_lists', '[0, 0]'),
+   ('=', 'ref_pic_list_struct', '[[], []]'),
+   ('for', 'i', 'range(1 if sps_rpl1_same_as_rpl0_flag else 2)', [
+      ('ue(v)', 'sps_num_ref_pic_lists[ i ]'),
+      ('for', 'j', 'range(sps_num_ref_pic_lists[ i ])', [
+         ('do', 'ref_pic_list_struct[ i ].append(ref_pic_list_struct(s, i, j, self))')])]),
+   ('if', 'sps_rpl1_same_as_rpl0_flag', [
+      ('=', 'sps_num_ref_pic_lists[ 1 ]', 'sps_num_ref_pic_lists[ 0 ]'),
+      ('=', 'ref_pic_list_struct[ 1 ]', 'ref_pic_list_struct[ 0 ]')]),
+   ('u(1)', 'sps_ref_wraparound_enabled_flag'),
+   ('u(1)', 'sps_temporal_mvp_enabled_flag'),
+   ('=', 'sps_sbtmvp_enabled_flag', '0'),
+   ('if', 'sps_temporal_mvp_enabled_flag', [
+      ('u(1)', 'sps_sbtmvp_enabled_flag')]),
+   ('u(1)', 'sps_amvr_enabled_flag'),
+   ('u(1)', 'sps_bdof_enabled_flag'),
+   ('=', 'sps_bdof_control_present_in_ph_flag', '0'),
+   ('if', 'sps_bdof_enabled_flag', [
+      ('u(1)', 'sps_bdof_control_present_in_ph_flag')]),
+   ('u(1)', 'sps_smvd_enabled_flag'),
+   ('u(1)', 'sps_dmvr_enabled_flag'),
+   ('=', 'sps_dmvr_control_present_in_ph_flag', '0'),
+   ('if', 'sps_dmvr_enabled_flag', [
+      ('u(1)', 'sps_dmvr_control_present_in_ph_flag')]),
+   ('u(1)', 'sps_mmvd_enabled_flag'),
+   ('if', 'sps_mmvd_enabled_flag', [
+      ('u(1)', 'sps_mmvd_fullpel_only_enabled_flag')]),
+   ('ue(v)', 'sps_six_minus_max_num_merge_cand'),
+   ('=', 'MaxNumMergeCand', '6 - sps_six_minus_max_num_merge_cand'),
+   ('u(1)', 'sps_sbt_enabled_flag'),
+   ('u(1)', 'sps_affine_enabled_flag'),
+   ('=', 'sps_prof_control_present_in_ph_flag', '0'),
+   ('if', 'sps_affine_enabled_flag', [
+      ('ue(v)', 'sps_five_minus_max_num_subblock_merge_cand'),
+      ('u(1)', 'sps_6param_affine_enabled_flag'),
+      ('if', 'sps_amvr_enabled_flag', [
+         ('u(1)', 'sps_affine_amvr_enabled_flag')]),
+      ('u(1)', 'sps_affine_prof_enabled_flag'),
+      ('if', 'sps_affine_prof_enabled_flag', [
+         ('u(1)', 'sps_prof_control_present_in_ph_flag')])]),
+   ('u(1)', 'sps_bcw_enabled_flag'),
+   ('u(1)', 'sps_ciip_enabled_flag'),
+   ('=', 'sps_gpm_enabled_flag', '0'),
+   ('if', 'MaxNumMergeCand >= 2', [
+      ('u(1)', 'sps_gpm_enabled_flag'),
+      ('if', 'sps_gpm_enabled_flag and MaxNumMergeCand >= 3', [
+         ('ue(v)', 'sps_max_num_merge_cand_minus_max_num_gpm_cand')])]),
+   ('ue(v)', 'sps_log2_parallel_merge_level_minus2'),
+   ('u(1)', 'sps_isp_enabled_flag'),
+   ('u(1)', 'sps_mrl_enabled_flag'),
+   ('u(1)', 'sps_mip_enabled_flag'),
+   ('if', 'sps_chroma_format_idc != 0', [
+      ('u(1)', 'sps_cclm_enabled_flag')]),
+   ('if', 'sps_chroma_format_idc == 1', [
+      ('u(1)', 'sps_chroma_horizontal_collocated_flag'),
+      ('u(1)', 'sps_chroma_vertical_collocated_flag')]),
+   ('u(1)', 'sps_palette_enabled_flag'),
+   ('=', 'sps_act_enabled_flag', '0'),
+   ('if', 'sps_chroma_format_idc == 3 and not sps_max_luma_transform_size_64_flag', [
+      ('u(1)', 'sps_act_enabled_flag')]),
+   ('if', 'sps_transform_skip_enabled_flag or sps_palette_enabled_flag', [
+      ('ue(v)', 'sps_min_qp_prime_ts')]),
+   ('u(1)', 'sps_ibc_enabled_flag'),
+   ('if', 'sps_ibc_enabled_flag', [
+      ('ue(v)', 'sps_six_minus_max_num_ibc_merge_cand')]),
+   ('u(1)', 'sps_ladf_enabled_flag'),
+   ('if', 'sps_ladf_enabled_flag', [
+      ('u(2)', 'sps_num_ladf_intervals_minus2'),
+      ('se(v)', 'sps_ladf_lowest_interval_qp_offset'),
+      ('let', 'n', 'sps_num_ladf_intervals_minus2 + 1'),
+      ('=', 'sps_ladf_qp_offset', '[0] * n'),
+      ('=', 'sps_ladf_delta_threshold_minus1', '[0] * n'),
+      ('for', 'i', 'range(n)', [
+         ('se(v)', 'sps_ladf_qp_offset[ i ]'),
+         ('ue(v)', 'sps_ladf_delta_threshold_minus1[ i ]')])]),
+   ('u(1)', 'sps_explicit_scaling_list_enabled_flag'),
+   ('if', 'sps_lfnst_enabled_flag and sps_explicit_scaling_list_enabled_flag', [
+      ('u(1)', 'sps_scaling_matrix_for_lfnst_disabled_flag')]),
+   ('=', 'sps_scaling_matrix_for_alternative_colour_space_disabled_flag', '0'),
+   ('if', 'sps_act_enabled_flag and sps_explicit_scaling_list_enabled_flag', [
+      ('u(1)', 'sps_scaling_matrix_for_alternative_colour_space_disabled_flag')]),
+   ('if', 'sps_scaling_matrix_for_alternative_colour_space_disabled_flag', [
+      ('u(1)', 'sps_scaling_matrix_designated_colour_space_flag')]),
+   ('u(1)', 'sps_dep_quant_enabled_flag'),
+   ('u(1)', 'sps_sign_data_hiding_enabled_flag'),
+   ('u(1)', 'sps_virtual_boundaries_enabled_flag'),
+   ('=', 'sps_virtual_boundaries_present_flag', '0'),
+   ('=', 'sps_num_ver_virtual_boundaries', '0'),
+   ('=', 'sps_num_hor_virtual_boundaries', '0'),
+   ('=', 'sps_virtual_boundary_pos_x_minus1', '[]'),
+   ('=', 'sps_virtual_boundary_pos_y_minus1', '[]'),
+   ('if', 'sps_virtual_boundaries_enabled_flag', [
+      ('u(1)', 'sps_virtual_boundaries_present_flag'),
+      ('if', 'sps_virtual_boundaries_present_flag', [
+         ('ue(v)', 'sps_num_ver_virtual_boundaries'),
+         ('=', 'sps_virtual_boundary_pos_x_minus1', '[ue() for i in range(sps_num_ver_virtual_boundaries)]'),
+         ('ue(v)', 'sps_num_hor_virtual_boundaries'),
+         ('=', 'sps_virtual_boundary_pos_y_minus1', '[ue() for i in range(sps_num_hor_virtual_boundaries)]')])]),
+   ('=', 'sps_timing_hrd_params_present_flag', '0'),
+   ('if', 'sps_ptl_dpb_hrd_params_present_flag', [
+      ('u(1)', 'sps_timing_hrd_params_present_flag'),
+      ('if', 'sps_timing_hrd_params_present_flag', [
+         ('=', 'general_timing_hrd_parameters', 'general_timing_hrd_parameters(s)'),
+         ('=', 'sps_sublayer_cpb_params_present_flag', '0'),
+         ('if', 'sps_max_sublayers_minus1 > 0', [
+            ('u(1)', 'sps_sublayer_cpb_params_present_flag')]),
+         ('let', 'firstSubLayer', '0 if sps_sublayer_cpb_params_present_flag else sps_max_sublayers_minus1'),
+         ('=', 'ols_timing_hrd_parameters', 'ols_timing_hrd_parameters('
+          's, firstSubLayer, sps_max_sublayers_minus1, general_timing_hrd_parameters)')])]),
+   ('u(1)', 'sps_field_seq_flag'),
+   ('u(1)', 'sps_vui_parameters_present_flag'),
+   ('if', 'sps_vui_parameters_present_flag', [
+      ('ue(v)', 'sps_vui_payload_size_minus1'),
+      ('while', 'not s.byte_aligned()', [
+         ('f(1)', None)]),   # sps_vui_alignment_zero_bit
+      # vui_payload( ) (Rec. ITU-T H.274) is skipped
+      ('do', 's.skip((sps_vui_payload_size_minus1 + 1) * 8)')]),
+   ('u(1)', 'sps_extension_flag'),
+   ('if', 'sps_extension_flag', [
+      ('while', 's.more_rbsp_data()', [
+         ('u(1)', None)])]),   # sps_extension_data_flag
+   ('do', 's.rbsp_trailing_bits()'),
+]
+
+# 7.3.2.5 Picture parameter set RBSP syntax
+PPS_SYNTAX = [
+   ('u(6)', 'pps_pic_parameter_set_id'),
+   ('u(4)', 'pps_seq_parameter_set_id'),
+   ('u(1)', 'pps_mixed_nalu_types_in_pic_flag'),
+   ('ue(v)', 'pps_pic_width_in_luma_samples'),
+   ('ue(v)', 'pps_pic_height_in_luma_samples'),
+   ('u(1)', 'pps_conformance_window_flag'),
+   ('=', 'pps_conf_win_left_offset', '0'),
+   ('=', 'pps_conf_win_right_offset', '0'),
+   ('=', 'pps_conf_win_top_offset', '0'),
+   ('=', 'pps_conf_win_bottom_offset', '0'),
+   ('if', 'pps_conformance_window_flag', [
+      ('ue(v)', 'pps_conf_win_left_offset'),
+      ('ue(v)', 'pps_conf_win_right_offset'),
+      ('ue(v)', 'pps_conf_win_top_offset'),
+      ('ue(v)', 'pps_conf_win_bottom_offset')]),
+   ('stage', 'subpictures'),
+   ('u(1)', 'pps_scaling_window_explicit_signalling_flag'),
+   ('if', 'pps_scaling_window_explicit_signalling_flag', [
+      ('se(v)', 'pps_scaling_win_left_offset'),
+      ('se(v)', 'pps_scaling_win_right_offset'),
+      ('se(v)', 'pps_scaling_win_top_offset'),
+      ('se(v)', 'pps_scaling_win_bottom_offset')]),
+   ('u(1)', 'pps_output_flag_present_flag'),
+   ('u(1)', 'pps_no_pic_partition_flag'),
+   ('u(1)', 'pps_subpic_id_mapping_present_flag'),
+   ('=', 'pps_num_subpics_minus1', '0'),
+   ('if', 'pps_subpic_id_mapping_present_flag', [
+      ('if', 'not pps_no_pic_partition_flag', [
+         ('ue(v)', 'pps_num_subpics_minus1')]),
+      ('ue(v)', 'pps_subpic_id_len_minus1'),
+      ('=', 'pps_subpic_id', '[0] * (pps_num_subpics_minus1 + 1)'),
+      ('for', 'i', 'range(pps_num_subpics_minus1 + 1)', [
+         ('u(v)', 'pps_subpic_id[ i ]', 'pps_subpic_id_len_minus1 + 1')])]),
+   ('stage', 'partitioning'),
+   ('=', 'pps_log2_ctu_size_minus5', 'None'),   # equal to sps_log2_ctu_size_minus5 when absent
+   ('=', 'pps_num_exp_tile_columns_minus1', '0'),
+   ('=', 'pps_num_exp_tile_rows_minus1', '0'),
+   ('=', 'pps_tile_column_width_minus1', '[]'),
+   ('=', 'pps_tile_row_height_minus1', '[]'),
+   ('=', 'pps_loop_filter_across_tiles_enabled_flag', '0'),
+   ('=', 'pps_rect_slice_flag', '1'),
+   ('=', 'pps_single_slice_per_subpic_flag', '0'),
+   ('=', 'pps_num_slices_in_pic_minus1', '0'),
+   ('=', 'pps_tile_idx_delta_present_flag', '0'),
+   ('=', 'pps_loop_filter_across_slices_enabled_flag', '0'),
+   ('=', 'NumTileColumns', '1'),
+   ('=', 'NumTileRows', '1'),
+   ('=', 'NumTilesInPic', '1'),
+   ('if', 'not pps_no_pic_partition_flag', [
+      ('u(2)', 'pps_log2_ctu_size_minus5'),
+      ('ue(v)', 'pps_num_exp_tile_columns_minus1'),
+      ('ue(v)', 'pps_num_exp_tile_rows_minus1'),
+      ('=', 'pps_tile_column_width_minus1', '[ue() for i in range(pps_num_exp_tile_columns_minus1 + 1)]'),
+      ('=', 'pps_tile_row_height_minus1', '[ue() for i in range(pps_num_exp_tile_rows_minus1 + 1)]'),
+      ('do', 'self.derive_tiles()', ('NumTileColumns', 'NumTileRows', 'NumTilesInPic')),
+      ('if', 'NumTilesInPic > 1', [
+         ('u(1)', 'pps_loop_filter_across_tiles_enabled_flag'),
+         ('u(1)', 'pps_rect_slice_flag')]),
+      ('if', 'pps_rect_slice_flag', [
+         ('u(1)', 'pps_single_slice_per_subpic_flag')]),
+      ('if', 'pps_rect_slice_flag and not pps_single_slice_per_subpic_flag', [
+         ('ue(v)', 'pps_num_slices_in_pic_minus1'),
+         ('if', 'pps_num_slices_in_pic_minus1 > 1', [
+            ('u(1)', 'pps_tile_idx_delta_present_flag')]),
+         ('do', 'self.parse_rect_slices(s)')]),
+      ('if', 'not pps_rect_slice_flag or pps_single_slice_per_subpic_flag or pps_num_slices_in_pic_minus1 > 0', [
+         ('u(1)', 'pps_loop_filter_across_slices_enabled_flag')])]),
+   ('stage', 'tools'),
+   ('u(1)', 'pps_cabac_init_present_flag'),
+   ('=', 'pps_num_ref_idx_default_active_minus1', '[0, 0]'),
+   ('for', 'i', 'range(2)', [
+      ('ue(v)', 'pps_num_ref_idx_default_active_minus1[ i ]')]),
+   ('u(1)', 'pps_rpl1_idx_present_flag'),
+   ('u(1)', 'pps_weighted_pred_flag'),
+   ('u(1)', 'pps_weighted_bipred_flag'),
+   ('u(1)', 'pps_ref_wraparound_enabled_flag'),
+   ('if', 'pps_ref_wraparound_enabled_flag', [
+      ('ue(v)', 'pps_pic_width_minus_wraparound_offset')]),
+   ('se(v)', 'pps_init_qp_minus26'),
+   ('u(1)', 'pps_cu_qp_delta_enabled_flag'),
+   ('u(1)', 'pps_chroma_tool_offsets_present_flag'),
+   ('=', 'pps_cb_qp_offset', '0'),
+   ('=', 'pps_cr_qp_offset', '0'),
+   ('=', 'pps_joint_cbcr_qp_offset_present_flag', '0'),
+   ('=', 'pps_slice_chroma_qp_offsets_present_flag', '0'),
+   ('=', 'pps_cu_chroma_qp_offset_list_enabled_flag', '0'),
+   ('if', 'pps_chroma_tool_offsets_present_flag', [
+      ('se(v)', 'pps_cb_qp_offset'),
+      ('se(v)', 'pps_cr_qp_offset'),
+      ('u(1)', 'pps_joint_cbcr_qp_offset_present_flag'),
+      ('if', 'pps_joint_cbcr_qp_offset_present_flag', [
+         ('se(v)', 'pps_joint_cbcr_qp_offset_value')]),
+      ('u(1)', 'pps_slice_chroma_qp_offsets_present_flag'),
+      ('u(1)', 'pps_cu_chroma_qp_offset_list_enabled_flag'),
+      ('if', 'pps_cu_chroma_qp_offset_list_enabled_flag', [
+         ('ue(v)', 'pps_chroma_qp_offset_list_len_minus1'),
+         ('let', 'n', 'pps_chroma_qp_offset_list_len_minus1 + 1'),
+         ('=', 'pps_cb_qp_offset_list', '[0] * n'),
+         ('=', 'pps_cr_qp_offset_list', '[0] * n'),
+         ('=', 'pps_joint_cbcr_qp_offset_list', '[0] * n'),
+         ('for', 'i', 'range(n)', [
+            ('se(v)', 'pps_cb_qp_offset_list[ i ]'),
+            ('se(v)', 'pps_cr_qp_offset_list[ i ]'),
+            ('if', 'pps_joint_cbcr_qp_offset_present_flag', [
+               ('se(v)', 'pps_joint_cbcr_qp_offset_list[ i ]')])])])]),
+   ('u(1)', 'pps_deblocking_filter_control_present_flag'),
+   ('=', 'pps_deblocking_filter_override_enabled_flag', '0'),
+   ('=', 'pps_deblocking_filter_disabled_flag', '0'),
+   ('=', 'pps_dbf_info_in_ph_flag', '0'),
+   ('=', 'pps_luma_beta_offset_div2', '0'),
+   ('=', 'pps_luma_tc_offset_div2', '0'),
+   ('if', 'pps_deblocking_filter_control_present_flag', [
+      ('u(1)', 'pps_deblocking_filter_override_enabled_flag'),
+      ('u(1)', 'pps_deblocking_filter_disabled_flag'),
+      ('if', 'not pps_no_pic_partition_flag and pps_deblocking_filter_override_enabled_flag', [
+         ('u(1)', 'pps_dbf_info_in_ph_flag')]),
+      ('if', 'not pps_deblocking_filter_disabled_flag', [
+         ('se(v)', 'pps_luma_beta_offset_div2'),
+         ('se(v)', 'pps_luma_tc_offset_div2'),
+         ('if', 'pps_chroma_tool_offsets_present_flag', [
+            ('se(v)', 'pps_cb_beta_offset_div2'),
+            ('se(v)', 'pps_cb_tc_offset_div2'),
+            ('se(v)', 'pps_cr_beta_offset_div2'),
+            ('se(v)', 'pps_cr_tc_offset_div2')])])]),
+   ('=', 'pps_rpl_info_in_ph_flag', '0'),
+   ('=', 'pps_sao_info_in_ph_flag', '0'),
+   ('=', 'pps_alf_info_in_ph_flag', '0'),
+   ('=', 'pps_wp_info_in_ph_flag', '0'),
+   ('=', 'pps_qp_delta_info_in_ph_flag', '0'),
+   ('if', 'not pps_no_pic_partition_flag', [
+      ('u(1)', 'pps_rpl_info_in_ph_flag'),
+      ('u(1)', 'pps_sao_info_in_ph_flag'),
+      ('u(1)', 'pps_alf_info_in_ph_flag'),
+      ('if', '(pps_weighted_pred_flag or pps_weighted_bipred_flag) and pps_rpl_info_in_ph_flag', [
+         ('u(1)', 'pps_wp_info_in_ph_flag')]),
+      ('u(1)', 'pps_qp_delta_info_in_ph_flag')]),
+   ('u(1)', 'pps_picture_header_extension_present_flag'),
+   ('u(1)', 'pps_slice_header_extension_present_flag'),
+   ('u(1)', 'pps_extension_flag'),
+   ('if', 'pps_extension_flag', [
+      ('while', 's.more_rbsp_data()', [
+         ('u(1)', None)])]),   # pps_extension_data_flag
+   ('do', 's.rbsp_trailing_bits()'),
+]
+
+# structure name, parameters after the BitReader, table
+SYNTAX_TABLES = (
+   ('general_constraints_info', (), GENERAL_CONSTRAINTS_INFO_SYNTAX),
+   ('profile_tier_level', ('profileTierPresentFlag', 'MaxNumSubLayersMinus1'), PROFILE_TIER_LEVEL_SYNTAX),
+   ('dpb_parameters', ('MaxSubLayersMinus1', 'subLayerInfoFlag'), DPB_PARAMETERS_SYNTAX),
+   ('general_timing_hrd_parameters', (), GENERAL_TIMING_HRD_PARAMETERS_SYNTAX),
+   ('sublayer_hrd_parameters', ('hrd',), SUBLAYER_HRD_PARAMETERS_SYNTAX),
+   ('ols_timing_hrd_parameters', ('firstSubLayer', 'MaxSubLayersMinus1', 'hrd'), OLS_TIMING_HRD_PARAMETERS_SYNTAX),
+   ('ref_pic_list_struct', ('listIdx', 'rplsIdx', 'sps'), REF_PIC_LIST_STRUCT_SYNTAX),
+   ('video_parameter_set_rbsp', (), VPS_SYNTAX),
+   ('seq_parameter_set_rbsp', (), SPS_SYNTAX),
+   ('pic_parameter_set_rbsp', (), PPS_SYNTAX),
+)
+
+# bump when SyntaxCompiler output changes, to invalidate cached code
+SYNTAX_COMPILER_VERSION = 11
+
+
+def syntax_cache_dir():
+   """
+   Where compile_syntax_tables() caches compiled code by default: 266 in
+   $XDG_CACHE_HOME, or in ~/.cache when that is not set
+   """
+   base = os.environ.get('XDG_CACHE_HOME', '')
+   if not os.path.isabs(base):
+      base = os.path.join(os.path.expanduser('~'), '.cache')
+   return os.path.join(base, '266')
+
+
+def compile_syntax_tables(tables=SYNTAX_TABLES, cache_dir=None):
+   """
+   Parser functions for tables, by structure name, and for the stages of
+   those without parameters by structure name, '_' and stage name. The
+   compiled code is cached in cache_dir (default: syntax_cache_dir())
+   under a digest of the tables, so later runs skip code generation and
+   compile. A cache file that does not load, or lacks a parser, is
+   compiled again and replaced.
+   """
+   if cache_dir is None:
+      cache_dir = syntax_cache_dir()
+   h = hashlib.blake2b(digest_size=16)
+   h.update(repr((SYNTAX_COMPILER_VERSION, SyntaxCompiler.MARGIN, tables)).encode())
+   path = os.path.join(cache_dir, 'syntax.{0}.{1}.bin'.format(h.hexdigest(), sys.implementation.cache_tag))
+   names = [name for name, params, table in tables]
+   names += ['{0}_{1}'.format(name, stage) for name, params, table in tables if not params
+             for stage, entries in SyntaxCompiler.stages(table)]
+
+   def load(code):
+      namespace = dict(globals())
+      exec(code, namespace)
+      return dict((name, namespace['parse_' + name]) for name in names)
+
+   try:
+      with open(path, 'rb') as f:
+         code = marshal.load(f)
+      return load(code)
+   except Exception:
+      # missing, corrupt or from other tables: compile again below
+      pass
+   code = compile(syntax_source(tables), '<syntax tables>', 'exec')
+   parsers = load(code)
+   try:
+      os.makedirs(cache_dir, exist_ok=True)
+      # a name of its own, as other processes may be compiling too
+      with tempfile.NamedTemporaryFile(dir=cache_dir, prefix='syntax.', suffix='.tmp', delete=False) as f:
+         marshal.dump(code, f)
+      try:
+         os.replace(f.name, path)
+      except OSError:
+         os.unlink(f.name)
+   except OSError:
+      pass
+   return parsers
+
+
+def syntax_source(tables=SYNTAX_TABLES):
+   """
+   The Python source compile_syntax_tables() generates for tables: a
+   parser for each, and for those without parameters, as LazyParameterSet
+   takes them, one for each of their stages
+   """
+   namespace = globals()
+   compiled = [name for name, params, table in tables]
+   sources = []
+   for name, params, table in tables:
+      sources.append(SyntaxCompiler(name, params, table, namespace[name], namespace, compiled).source())
+      earlier = []
+      for stage, entries in (SyntaxCompiler.stages(table) if not params else ()):
+         compiler = SyntaxCompiler('{0}_{1}'.format(name, stage), (), entries, namespace[name], namespace,
+                                   compiled, earlier)
+         sources.append(compiler.source())
+         earlier = earlier + [f for f in compiler.fields if f not in earlier]
+   return '\n\n'.join(sources)
+
+
+_syntax_parsers = None
+
+
+def syntax_parser(name):
+   """
+   The compiled parser function for the syntax structure name
+   """
+   global _syntax_parsers
+   if _syntax_parsers is None:
+      _syntax_parsers = compile_syntax_tables()
+   return _syntax_parsers[name]
+
+
+_syntax_stages = {}
+
+
+def syntax_stages(name):
+   """
+   The generated parsers of the stages of the syntax structure name, a
+   new list in table order: each takes the BitReader and the structure
+   and parses its stage into it
+   """
+   stages = _syntax_stages.get(name)
+   if stages is None:
+      table = dict((n, t) for n, params, t in SYNTAX_TABLES)[name]
+      stages = _syntax_stages[name] = tuple(syntax_parser('{0}_{1}'.format(name, stage))
+                                            for stage, entries in SyntaxCompiler.stages(table))
+   return list(stages)
+
+
+class _RecordView(object):
+   """
+   self for the entries SyntaxWriter runs: the variables in scope as
+   attributes, and the methods of the structure class bound to them
+   """
+   __slots__ = ('_env', '_cls')
+
+   def __init__(self, env, cls):
+      object.__setattr__(self, '_env', env)
+      object.__setattr__(self, '_cls', cls)
+
+   def __getattr__(self, name):
+      try:
+         return self._env[name]
+      except KeyError:
+         return getattr(self._cls, name).__get__(self)
+
+   def __setattr__(self, name, value):
+      self._env[name] = value
+
+
+class SyntaxWriter(object):
+   """
+   Writes a syntax structure to a BitWriter by running the tables
+   SyntaxCompiler compiles the other way. Entries see the elements of
+   the record being written and the structure's parameters as variables,
+   s is the BitWriter and self a view of them:
+
+      descriptors write their target, or zero bits when it has none
+      '=' is skipped for elements the record has and evaluated for those
+          it lacks; a call to another structure writes the record's one
+          instead, and [ue() for ...] writes each element of the list
+      'let', 'if', 'for' and 'while' run as they do when parsing
+      'stage' does nothing
+      'do' runs with self.parse_...(s) made self.write_...(s), unless
+          the record has every variable it names
+
+   A record can be a parsed structure, compact or lazy, or a dict of the
+   elements. Only what the tables read is written: a VUI payload comes
+   out as zero bytes and extension data is left out.
+   """
+   APPEND = re.compile(r'(.+)\.append\((.+)\)$')
+   READ_LIST = re.compile(r'\[(ue|se)\(\) for \w+ in .+\]$')
+
+   def __init__(self, tables=SYNTAX_TABLES):
+      self.tables = dict((name, (params, table)) for name, params, table in tables)
+      self.call = re.compile(r'(?<![.\w])({0})(?=\s*\()'.format('|'.join(self.tables)))
+      self.namespace = dict(globals())
+      self.namespace['_args'] = lambda *args: args
+      self.code = {}
+
+   def compile(self, text, mode='eval'):
+      code = self.code.get((text, mode))
+      if code is None:
+         code = self.code[text, mode] = compile(text, '<syntax tables>', mode)
+      return code
+
+   def write(self, name, record, s=None, args=()):
+      """
+      record, a name structure, written to the BitWriter s, a new one by
+      default, which is returned. args are the parameters after s.
+      """
+      if s is None:
+         s = BitWriter()
+      if isinstance(record, LazyParameterSet):
+         record = record.parse()
+      if isinstance(record, dict):
+         fields = record
+      elif isinstance(record, CompactRecord):
+         fields = dict((n, getattr(record, n)) for n in record.__slots__)
+      else:
+         fields = vars(record)
+      params, table = self.tables[name]
+      env = dict(self.namespace)
+      env.update(zip(params, args))
+      env.update(fields)
+      env['s'] = s
+      env['self'] = _RecordView(env, self.namespace[name])
+      self.run(name, table, env, fields, {})
+      return s
+
+   def nested(self, text, record, env):
+      # text calls a structure: write record with the arguments it passes
+      args = eval(self.compile(self.call.sub('_args', text, 1)), env)
+      self.write(self.call.match(text).group(1), record, args[0], args[1:])
+
+   def run(self, name, table, env, fields, appended):
+      s = env['s']
+      for entry in table:
+         kind = entry[0]
+         if kind == 'stage':
+            pass
+         elif kind == 'let':
+            env[entry[1]] = eval(self.compile(entry[2]), env)
+         elif kind == '=':
+            target, text = entry[1:]
+            call = self.call.match(text)
+            read = self.READ_LIST.match(text)
+            if target.split('[')[0].strip() not in fields:
+               if call or read:
+                  raise ValueError('{0}: no {1} to write'.format(name, target))
+               exec(self.compile('{0} = {1}'.format(target, text), 'exec'), env)
+            elif call:
+               self.nested(text, eval(self.compile(target), env), env)
+            elif read:
+               write = getattr(s, read.group(1))
+               for value in eval(self.compile(target), env):
+                  write(value)
+         elif kind == 'if':
+            if eval(self.compile(entry[1]), env):
+               self.run(name, entry[2], env, fields, appended)
+            elif len(entry) > 3:
+               self.run(name, entry[3], env, fields, appended)
+         elif kind == 'for':
+            for env[entry[1]] in eval(self.compile(entry[2]), env):
+               self.run(name, entry[3], env, fields, appended)
+         elif kind == 'while':
+            while eval(self.compile(entry[1]), env):
+               self.run(name, entry[2], env, fields, appended)
+         elif kind == 'do':
+            m = self.APPEND.match(entry[1])
+            if m and self.call.match(m.group(2)):
+               # the k-th structure appended to a list is the k-th written
+               values = eval(self.compile(m.group(1)), env)
+               k = appended.get(id(values), 0)
+               appended[id(values)] = k + 1
+               self.nested(m.group(2), values[k], env)
+            elif len(entry) < 3 or not all(n in fields for n in entry[2]):
+               exec(self.compile(entry[1].replace('self.parse_', 'self.write_'), 'exec'), env)
+         else:
+            m = SyntaxCompiler.DESCRIPTOR.match(kind)
+            if not m:
+               raise ValueError('{0}: unknown syntax table entry {1!r}'.format(name, entry))
+            descriptor, n = m.groups()
+            n = eval(self.compile(entry[2]), env) if n == 'v' and descriptor in ('u', 'f') else n
+            if entry[1] is None:
+               s.skip(int(n))
+            elif descriptor in ('ue', 'se'):
+               getattr(s, descriptor)(eval(self.compile(entry[1]), env))
+            else:
+               s.u(int(n), eval(self.compile(entry[1]), env))
+
+
+_syntax_writer = None
+
+
+def write_syntax(name, record, s=None, *args):
+   """
+   record, a syntax structure of one of the SYNTAX_TABLES, written to the
+   BitWriter s (a new one by default), which is returned
+   """
+   global _syntax_writer
+   if _syntax_writer is None:
+      _syntax_writer = SyntaxWriter()
+   return _syntax_writer.write(name, record, s, args)
+
+
+class SliceType:
+   """
+   Table 9 - Name association to sh_slice_type
+   """
+   B = 0
+   P = 1
+   I = 2
+
+
+class MissingParameterSet(LookupError):
+   """
+   A picture or slice header refers to a PPS, SPS or picture header that
+   has not been received
+   """
+
+
+class HeaderPlan(object):
+   """
+   What picture_header_structure( ) and slice_header( ) need from one
+   SPS/PPS pair, worked out once: every presence condition that depends
+   only on the parameter sets is a plain flag or bit count here, and the
+   6.5.1 slice layout is reduced to the tables NumEntryPoints is read
+   from; picture_layout is the PictureLayout they come from, made here
+   when not given. ParameterSetStore.plan() keeps one per PPS, made from
+   its layout().
+   """
+
+   def __init__(self, sps, pps, picture_layout=None):
+      self.sps = sps
+      self.pps = pps
+      chroma = sps.sps_chroma_format_idc != 0
+      self.chroma = chroma
+
+      # picture_header_structure( )
+      self.poc_lsb_bits = sps.sps_log2_max_pic_order_cnt_lsb_minus4 + 4
+      self.MaxPicOrderCntLsb = 1 << self.poc_lsb_bits
+      self.NumExtraPhBits = sum(sps.sps_extra_ph_bit_present_flag)
+      self.poc_msb_cycle_bits = sps.sps_poc_msb_cycle_len_minus1 + 1 if sps.sps_poc_msb_cycle_flag else 0
+      self.ph_alf = sps.sps_alf_enabled_flag and pps.pps_alf_info_in_ph_flag
+      self.ccalf = sps.sps_ccalf_enabled_flag
+      self.lmcs = sps.sps_lmcs_enabled_flag
+      self.scaling_list = sps.sps_explicit_scaling_list_enabled_flag
+      self.ph_virtual_boundaries = sps.sps_virtual_boundaries_enabled_flag and \
+         not sps.sps_virtual_boundaries_present_flag
+      self.output_flag = pps.pps_output_flag_present_flag
+      self.rpl_in_ph = pps.pps_rpl_info_in_ph_flag
+      self.partition_override = sps.sps_partition_constraints_override_enabled_flag
+      self.dual_tree = sps.sps_qtbtt_dual_tree_intra_flag
+      self.cu_qp_delta = pps.pps_cu_qp_delta_enabled_flag
+      self.cu_chroma_qp_offset = pps.pps_cu_chroma_qp_offset_list_enabled_flag
+      self.temporal_mvp = sps.sps_temporal_mvp_enabled_flag
+      self.mmvd_fullpel = getattr(sps, 'sps_mmvd_fullpel_only_enabled_flag', 0)
+      self.bdof_control = sps.sps_bdof_control_present_in_ph_flag
+      self.dmvr_control = sps.sps_dmvr_control_present_in_ph_flag
+      self.prof_control = sps.sps_prof_control_present_in_ph_flag
+      self.weighted_pred = pps.pps_weighted_pred_flag
+      self.weighted_bipred = pps.pps_weighted_bipred_flag
+      self.wp_in_ph = pps.pps_wp_info_in_ph_flag
+      self.qp_delta_in_ph = pps.pps_qp_delta_info_in_ph_flag
+      self.joint_cbcr = sps.sps_joint_cbcr_enabled_flag
+      self.ph_sao = sps.sps_sao_enabled_flag and pps.pps_sao_info_in_ph_flag
+      self.dbf_in_ph = pps.pps_dbf_info_in_ph_flag
+      self.dbf_disabled = pps.pps_deblocking_filter_disabled_flag
+      self.chroma_tool_offsets = pps.pps_chroma_tool_offsets_present_flag
+      self.ph_extension = pps.pps_picture_header_extension_present_flag
+
+      # ref_pic_lists( ) and pred_weight_table( )
+      self.num_ref_pic_lists = sps.sps_num_ref_pic_lists
+      self.rpl_idx_bits = [ceil_log2(n) for n in sps.sps_num_ref_pic_lists]
+      self.rpl1_idx_present = pps.pps_rpl1_idx_present_flag
+      self.num_ref_idx_default = [n + 1 for n in pps.pps_num_ref_idx_default_active_minus1]
+
+      # slice_header( )
+      self.subpic_id_bits = sps.sps_subpic_id_len_minus1 + 1 if sps.sps_subpic_info_present_flag else 0
+      self.rect_slice = pps.pps_rect_slice_flag
+      self.NumTilesInPic = pps.NumTilesInPic
+      self.NumExtraShBits = sum(sps.sps_extra_sh_bit_present_flag)
+      self.sh_alf = sps.sps_alf_enabled_flag and not pps.pps_alf_info_in_ph_flag
+      self.idr_rpl = sps.sps_idr_rpl_present_flag
+      self.cabac_init = pps.pps_cabac_init_present_flag
+      self.init_qp = 26 + pps.pps_init_qp_minus26
+      self.slice_chroma_qp_offsets = pps.pps_slice_chroma_qp_offsets_present_flag
+      self.sh_sao = sps.sps_sao_enabled_flag and not pps.pps_sao_info_in_ph_flag
+      self.sh_dbf_override = pps.pps_deblocking_filter_override_enabled_flag and not pps.pps_dbf_info_in_ph_flag
+      self.dep_quant = sps.sps_dep_quant_enabled_flag
+      self.sign_data_hiding = sps.sps_sign_data_hiding_enabled_flag
+      self.transform_skip = sps.sps_transform_skip_enabled_flag
+      self.sh_extension = pps.pps_slice_header_extension_present_flag
+      self.layout(sps, pps, picture_layout or PictureLayout(sps, pps))
+
+   def layout(self, sps, pps, picture_layout):
+      """
+      6.5.1 reduced from the PictureLayout: slices per subpicture,
+      sh_slice_address lengths and the number of entry points of each
+      slice
+      """
+      self.picture_layout = layout = picture_layout
+      wpp = sps.sps_entropy_coding_sync_enabled_flag
+      entry_points = sps.sps_entry_point_offsets_present_flag
+      if pps.pps_subpic_id_mapping_present_flag:
+         SubpicIdVal = pps.pps_subpic_id
+      else:
+         SubpicIdVal = sps.sps_subpic_id
+      self.subpic_index = dict((v, i) for i, v in enumerate(SubpicIdVal))
+
+      if not self.rect_slice:
+         # raster scan slices: entry points of a run of whole tiles
+         self.slice_address_bits = [ceil_log2(layout.NumTilesInPic) if layout.NumTilesInPic > 1 else 0]
+         self.tile_entry_points = [0]
+         for tileIdx in range(layout.NumTilesInPic):
+            n = layout.RowHeightVal[ tileIdx // layout.NumTileColumns ] if wpp else 1
+            self.tile_entry_points.append(self.tile_entry_points[-1] + (n if entry_points else 0))
+         return
+
+      self.subpic_slices = layout.slices_per_subpic()
+      self.slice_address_bits = [ceil_log2(len(slices)) for slices in self.subpic_slices]
+      if entry_points:
+         self.slice_entry_points = layout.entry_points_per_slice(wpp)
+      else:
+         self.slice_entry_points = [0] * len(layout.CtbAddrInSlice)
+
+   def entry_points(self, CurrSubpicIdx, sh_slice_address, sh_num_tiles_in_slice_minus1):
+      """
+      NumEntryPoints of a slice
+      """
+      if self.rect_slice:
+         return self.slice_entry_points[ self.subpic_slices[ CurrSubpicIdx ][ sh_slice_address ] ]
+      prefix = self.tile_entry_points
+      n = prefix[ sh_slice_address + sh_num_tiles_in_slice_minus1 + 1 ] - prefix[ sh_slice_address ] - 1
+      return max(n, 0)
+
+
+class ref_pic_lists(syntax_structure):
+   def __init__(self, s, plan):
+      """
+      7.3.9 Reference picture lists syntax
+      """
+      sps = plan.sps
+      self.rpl_sps_flag = [0, 0]
+      self.rpl_idx = [0, 0]
+      self.ref_pic_list_struct = [None, None]
+      self.poc_lsb_lt = [[], []]
+      self.delta_poc_msb_cycle_present_flag = [[], []]
+      self.delta_poc_msb_cycle_lt = [[], []]
+      self.RplsIdx = [0, 0]
+      for i in range(2):
+         num_ref_pic_lists = plan.num_ref_pic_lists[ i ]
+         signalled = i == 0 or plan.rpl1_idx_present
+         if num_ref_pic_lists > 0 and signalled:
+            self.rpl_sps_flag[ i ] = s.u(1)
+         elif num_ref_pic_lists > 0:
+            self.rpl_sps_flag[ i ] = self.rpl_sps_flag[ 0 ]
+         if self.rpl_sps_flag[ i ]:
+            if num_ref_pic_lists > 1 and signalled:
+               self.rpl_idx[ i ] = s.u(plan.rpl_idx_bits[ i ])
+            elif num_ref_pic_lists > 1:
+               self.rpl_idx[ i ] = self.rpl_idx[ 0 ]
+            self.RplsIdx[ i ] = self.rpl_idx[ i ]
+            self.ref_pic_list_struct[ i ] = sps.ref_pic_list_struct[ i ][ self.rpl_idx[ i ] ]
+         else:
+            self.RplsIdx[ i ] = num_ref_pic_lists
+            self.ref_pic_list_struct[ i ] = ref_pic_list_struct(s, i, num_ref_pic_lists, sps)
+         rpls = self.ref_pic_list_struct[ i ]
+         for j in range(rpls.NumLtrpEntries):
+            if rpls.ltrp_in_header_flag:
+               self.poc_lsb_lt[ i ].append(s.u(plan.poc_lsb_bits))
+            self.delta_poc_msb_cycle_present_flag[ i ].append(s.u(1))
+            self.delta_poc_msb_cycle_lt[ i ].append(s.ue() if self.delta_poc_msb_cycle_present_flag[ i ][ j ] else 0)
+      # num_ref_entries[ i ][ RplsIdx[ i ] ]
+      self.NumRefEntries = [self.ref_pic_list_struct[ 0 ].num_ref_entries,
+                            self.ref_pic_list_struct[ 1 ].num_ref_entries]
+
+
+class pred_weight_table(syntax_structure):
+   def __init__(self, s, plan, NumRefEntries, NumRefIdxActive):
+      """
+      7.3.8 Weighted prediction parameters syntax
+      """
+      self.luma_log2_weight_denom = s.ue()
+      if plan.chroma:
+         self.delta_chroma_log2_weight_denom = s.se()
+      if plan.wp_in_ph:
+         self.num_l0_weights = s.ue()
+         NumWeightsL0 = self.num_l0_weights
+      else:
+         NumWeightsL0 = NumRefIdxActive[ 0 ]
+      self.parse_list(s, plan, 0, NumWeightsL0)
+      if not plan.weighted_bipred or (plan.wp_in_ph and NumRefEntries[ 1 ] == 0):
+         NumWeightsL1 = 0
+      elif plan.wp_in_ph:
+         self.num_l1_weights = s.ue()
+         NumWeightsL1 = self.num_l1_weights
+      else:
+         NumWeightsL1 = NumRefIdxActive[ 1 ]
+      self.parse_list(s, plan, 1, NumWeightsL1)
+
+   def parse_list(self, s, plan, X, n):
+      luma_weight_flag = [s.u(1) for i in range(n)]
+      chroma_weight_flag = [s.u(1) for i in range(n)] if plan.chroma else [0] * n
+      delta_luma_weight = [0] * n
+      luma_offset = [0] * n
+      delta_chroma_weight = [[0, 0] for i in range(n)]
+      delta_chroma_offset = [[0, 0] for i in range(n)]
+      for i in range(n):
+         if luma_weight_flag[ i ]:
+            delta_luma_weight[ i ] = s.se()
+            luma_offset[ i ] = s.se()
+         if chroma_weight_flag[ i ]:
+            for j in range(2):
+               delta_chroma_weight[ i ][ j ] = s.se()
+               delta_chroma_offset[ i ][ j ] = s.se()
+      lx = 'l{0:d}'.format(X)
+      setattr(self, 'luma_weight_' + lx + '_flag', luma_weight_flag)
+      setattr(self, 'chroma_weight_' + lx + '_flag', chroma_weight_flag)
+      setattr(self, 'delta_luma_weight_' + lx, delta_luma_weight)
+      setattr(self, 'luma_offset_' + lx, luma_offset)
+      setattr(self, 'delta_chroma_weight_' + lx, delta_chroma_weight)
+      setattr(self, 'delta_chroma_offset_' + lx, delta_chroma_offset)
+
+
+class picture_header_structure(syntax_structure):
+   def __init__(self, s, active):
+      """
+      7.3.2.8 Picture header structure syntax
+
+      active is the ParameterSetStore the PPS and SPS come from.
+      """
+      self.ph_gdr_or_irap_pic_flag = s.u(1)
+      self.ph_non_ref_pic_flag = s.u(1)
+      self.ph_gdr_pic_flag = 0
+      if self.ph_gdr_or_irap_pic_flag:
+         self.ph_gdr_pic_flag = s.u(1)
+      self.ph_inter_slice_allowed_flag = s.u(1)
+      self.ph_intra_slice_allowed_flag = 1
+      if self.ph_inter_slice_allowed_flag:
+         self.ph_intra_slice_allowed_flag = s.u(1)
+      self.ph_pic_parameter_set_id = s.ue()
+      plan = active.plan(self.ph_pic_parameter_set_id)
+      self.MaxPicOrderCntLsb = plan.MaxPicOrderCntLsb
+      self.ph_pic_order_cnt_lsb = s.u(plan.poc_lsb_bits)
+      if self.ph_gdr_pic_flag:
+         self.ph_recovery_poc_cnt = s.ue()
+      self.ph_extra_bit = [s.u(1) for i in range(plan.NumExtraPhBits)]
+      self.ph_poc_msb_cycle_present_flag = 0
+      if plan.poc_msb_cycle_bits:
+         self.ph_poc_msb_cycle_present_flag = s.u(1)
+         if self.ph_poc_msb_cycle_present_flag:
+            self.ph_poc_msb_cycle_val = s.u(plan.poc_msb_cycle_bits)
+      self.ph_alf_enabled_flag = 0
+      if plan.ph_alf:
+         self.ph_alf_enabled_flag = s.u(1)
+         if self.ph_alf_enabled_flag:
+            self.ph_num_alf_aps_ids_luma = s.u(3)
+            self.ph_alf_aps_id_luma = [s.u(3) for i in range(self.ph_num_alf_aps_ids_luma)]
+            self.ph_alf_cb_enabled_flag = 0
+            self.ph_alf_cr_enabled_flag = 0
+            if plan.chroma:
+               self.ph_alf_cb_enabled_flag = s.u(1)
+               self.ph_alf_cr_enabled_flag = s.u(1)
+            if self.ph_alf_cb_enabled_flag or self.ph_alf_cr_enabled_flag:
+               self.ph_alf_aps_id_chroma = s.u(3)
+            if plan.ccalf:
+               self.ph_alf_cc_cb_enabled_flag = s.u(1)
+               if self.ph_alf_cc_cb_enabled_flag:
+                  self.ph_alf_cc_cb_aps_id = s.u(3)
+               self.ph_alf_cc_cr_enabled_flag = s.u(1)
+               if self.ph_alf_cc_cr_enabled_flag:
+                  self.ph_alf_cc_cr_aps_id = s.u(3)
+      self.ph_lmcs_enabled_flag = 0
+      if plan.lmcs:
+         self.ph_lmcs_enabled_flag = s.u(1)
+         if self.ph_lmcs_enabled_flag:
+            self.ph_lmcs_aps_id = s.u(2)
+            if plan.chroma:
+               self.ph_chroma_residual_scale_flag = s.u(1)
+      self.ph_explicit_scaling_list_enabled_flag = 0
+      if plan.scaling_list:
+         self.ph_explicit_scaling_list_enabled_flag = s.u(1)
+         if self.ph_explicit_scaling_list_enabled_flag:
+            self.ph_scaling_list_aps_id = s.u(3)
+      if plan.ph_virtual_boundaries:
+         self.ph_virtual_boundaries_present_flag = s.u(1)
+         if self.ph_virtual_boundaries_present_flag:
+            self.ph_num_ver_virtual_boundaries = s.ue()
+            self.ph_virtual_boundary_pos_x_minus1 = [s.ue() for i in range(self.ph_num_ver_virtual_boundaries)]
+            self.ph_num_hor_virtual_boundaries = s.ue()
+            self.ph_virtual_boundary_pos_y_minus1 = [s.ue() for i in range(self.ph_num_hor_virtual_boundaries)]
+      self.ph_pic_output_flag = 1
+      if plan.output_flag and not self.ph_non_ref_pic_flag:
+         self.ph_pic_output_flag = s.u(1)
+      if plan.rpl_in_ph:
+         self.ref_pic_lists = ref_pic_lists(s, plan)
+      self.ph_partition_constraints_override_flag = 0
+      if plan.partition_override:
+         self.ph_partition_constraints_override_flag = s.u(1)
+      if self.ph_intra_slice_allowed_flag:
+         if self.ph_partition_constraints_override_flag:
+            self.ph_log2_diff_min_qt_min_cb_intra_slice_luma = s.ue()
+            self.ph_max_mtt_hierarchy_depth_intra_slice_luma = s.ue()
+            if self.ph_max_mtt_hierarchy_depth_intra_slice_luma != 0:
+               self.ph_log2_diff_max_bt_min_qt_intra_slice_luma = s.ue()
+               self.ph_log2_diff_max_tt_min_qt_intra_slice_luma = s.ue()
+            if plan.dual_tree:
+               self.ph_log2_diff_min_qt_min_cb_intra_slice_chroma = s.ue()
+               self.ph_max_mtt_hierarchy_depth_intra_slice_chroma = s.ue()
+               if self.ph_max_mtt_hierarchy_depth_intra_slice_chroma != 0:
+                  self.ph_log2_diff_max_bt_min_qt_intra_slice_chroma = s.ue()
+                  self.ph_log2_diff_max_tt_min_qt_intra_slice_chroma = s.ue()
+         if plan.cu_qp_delta:
+            self.ph_cu_qp_delta_subdiv_intra_slice = s.ue()
+         if plan.cu_chroma_qp_offset:
+            self.ph_cu_chroma_qp_offset_subdiv_intra_slice = s.ue()
+      self.ph_temporal_mvp_enabled_flag = 0
+      if self.ph_inter_slice_allowed_flag:
+         if self.ph_partition_constraints_override_flag:
+            self.ph_log2_diff_min_qt_min_cb_inter_slice = s.ue()
+            self.ph_max_mtt_hierarchy_depth_inter_slice = s.ue()
+            if self.ph_max_mtt_hierarchy_depth_inter_slice != 0:
+               self.ph_log2_diff_max_bt_min_qt_inter_slice = s.ue()
+               self.ph_log2_diff_max_tt_min_qt_inter_slice = s.ue()
+         if plan.cu_qp_delta:
+            self.ph_cu_qp_delta_subdiv_inter_slice = s.ue()
+         if plan.cu_chroma_qp_offset:
+            self.ph_cu_chroma_qp_offset_subdiv_inter_slice = s.ue()
+         NumRefEntries = self.ref_pic_lists.NumRefEntries if plan.rpl_in_ph else None
+         if plan.temporal_mvp:
+            self.ph_temporal_mvp_enabled_flag = s.u(1)
+            if self.ph_temporal_mvp_enabled_flag and plan.rpl_in_ph:
+               self.ph_collocated_from_l0_flag = 1
+               if NumRefEntries[ 1 ] > 0:
+                  self.ph_collocated_from_l0_flag = s.u(1)
+               if (self.ph_collocated_from_l0_flag and NumRefEntries[ 0 ] > 1) or \
+                  (not self.ph_collocated_from_l0_flag and NumRefEntries[ 1 ] > 1):
+                  self.ph_collocated_ref_idx = s.ue()
+         if plan.mmvd_fullpel:
+            self.ph_mmvd_fullpel_only_flag = s.u(1)
+         if not plan.rpl_in_ph or NumRefEntries[ 1 ] > 0:
+            self.ph_mvd_l1_zero_flag = s.u(1)
+            if plan.bdof_control:
+               self.ph_bdof_disabled_flag = s.u(1)
+            if plan.dmvr_control:
+               self.ph_dmvr_disabled_flag = s.u(1)
+         if plan.prof_control:
+            self.ph_prof_disabled_flag = s.u(1)
+         if (plan.weighted_pred or plan.weighted_bipred) and plan.wp_in_ph:
+            self.pred_weight_table = pred_weight_table(s, plan, NumRefEntries, None)
+      self.ph_qp_delta = 0
+      if plan.qp_delta_in_ph:
+         self.ph_qp_delta = s.se()
+      if plan.joint_cbcr:
+         self.ph_joint_cbcr_sign_flag = s.u(1)
+      if plan.ph_sao:
+         self.ph_sao_luma_enabled_flag = s.u(1)
+         if plan.chroma:
+            self.ph_sao_chroma_enabled_flag = s.u(1)
+      self.ph_deblocking_filter_disabled_flag = plan.dbf_disabled
+      if plan.dbf_in_ph:
+         self.ph_deblocking_params_present_flag = s.u(1)
+         if self.ph_deblocking_params_present_flag:
+            if plan.dbf_disabled:
+               self.ph_deblocking_filter_disabled_flag = 0
+            else:
+               self.ph_deblocking_filter_disabled_flag = s.u(1)
+            if not self.ph_deblocking_filter_disabled_flag:
+               self.ph_luma_beta_offset_div2 = s.se()
+               self.ph_luma_tc_offset_div2 = s.se()
+               if plan.chroma_tool_offsets:
+                  self.ph_cb_beta_offset_div2 = s.se()
+                  self.ph_cb_tc_offset_div2 = s.se()
+                  self.ph_cr_beta_offset_div2 = s.se()
+                  self.ph_cr_tc_offset_div2 = s.se()
+      if plan.ph_extension:
+         self.ph_extension_length = s.ue()
+         s.skip(self.ph_extension_length * 8)   # ph_extension_data_byte[ i ]
+
+
+class picture_order_count_header(object):
+   """
+   picture_header_structure( ) up to ph_poc_msb_cycle_val: all that
+   PictureOrderCounter.picture() reads, for where the rest of the picture
+   header is not wanted
+   """
+   __slots__ = ('MaxPicOrderCntLsb', 'ph_pic_order_cnt_lsb', 'ph_poc_msb_cycle_present_flag',
+                'ph_poc_msb_cycle_val')
+
+   def __init__(self, s, active):
+      ph_gdr_or_irap_pic_flag = s.u(1)
+      s.skip(1)   # ph_non_ref_pic_flag
+      ph_gdr_pic_flag = 0
+      if ph_gdr_or_irap_pic_flag:
+         ph_gdr_pic_flag = s.u(1)
+      if s.u(1):   # ph_inter_slice_allowed_flag
+         s.skip(1)   # ph_intra_slice_allowed_flag
+      plan = active.plan(s.ue())
+      self.MaxPicOrderCntLsb = plan.MaxPicOrderCntLsb
+      self.ph_pic_order_cnt_lsb = s.u(plan.poc_lsb_bits)
+      if ph_gdr_pic_flag:
+         s.ue()   # ph_recovery_poc_cnt
+      s.skip(plan.NumExtraPhBits)
+      self.ph_poc_msb_cycle_present_flag = 0
+      if plan.poc_msb_cycle_bits:
+         self.ph_poc_msb_cycle_present_flag = s.u(1)
+         if self.ph_poc_msb_cycle_present_flag:
+            self.ph_poc_msb_cycle_val = s.u(plan.poc_msb_cycle_bits)
+
+
+class picture_header_rbsp(syntax_structure):
+   def __init__(self, s, active):
+      """
+      7.3.2.7 Picture header RBSP syntax
+      """
+      self.picture_header_structure = picture_header_structure(s, active)
+      s.rbsp_trailing_bits()
+
+
+class slice_header(syntax_structure):
+   def __init__(self, s, nal_unit_type, active):
+      """
+      7.3.7.1 General slice header syntax
+
+      The picture header is the one in the slice header, or else the last
+      one parsed into active, the ParameterSetStore.
+      """
+      self.sh_picture_header_in_slice_header_flag = s.u(1)
+      if self.sh_picture_header_in_slice_header_flag:
+         self.picture_header_structure = ph = picture_header_structure(s, active)
+      else:
+         ph = active.picture_header
+         if ph is None:
+            raise MissingParameterSet('slice without a picture header')
+      plan = active.plan(ph.ph_pic_parameter_set_id)
+      CurrSubpicIdx = 0
+      if plan.subpic_id_bits:
+         self.sh_subpic_id = s.u(plan.subpic_id_bits)
+         CurrSubpicIdx = plan.subpic_index.get(self.sh_subpic_id, 0)
+      self.sh_slice_address = 0
+      if plan.slice_address_bits[ CurrSubpicIdx ]:
+         self.sh_slice_address = s.u(plan.slice_address_bits[ CurrSubpicIdx ])
+      self.sh_extra_bit = [s.u(1) for i in range(plan.NumExtraShBits)]
+      self.sh_num_tiles_in_slice_minus1 = 0
+      if not plan.rect_slice and plan.NumTilesInPic - self.sh_slice_address > 1:
+         self.sh_num_tiles_in_slice_minus1 = s.ue()
+      self.sh_slice_type = SliceType.I
+      if ph.ph_inter_slice_allowed_flag:
+         self.sh_slice_type = s.ue()
+      slice_type = self.sh_slice_type
+      if nal_unit_type in IRAP_NAL_UNIT_TYPES:
+         self.sh_no_output_of_prior_pics_flag = s.u(1)
+      if plan.sh_alf:
+         self.sh_alf_enabled_flag = s.u(1)
+         if self.sh_alf_enabled_flag:
+            self.sh_num_alf_aps_ids_luma = s.u(3)
+            self.sh_alf_aps_id_luma = [s.u(3) for i in range(self.sh_num_alf_aps_ids_luma)]
+            self.sh_alf_cb_enabled_flag = 0
+            self.sh_alf_cr_enabled_flag = 0
+            if plan.chroma:
+               self.sh_alf_cb_enabled_flag = s.u(1)
+               self.sh_alf_cr_enabled_flag = s.u(1)
+            if self.sh_alf_cb_enabled_flag or self.sh_alf_cr_enabled_flag:
+               self.sh_alf_aps_id_chroma = s.u(3)
+            if plan.ccalf:
+               self.sh_alf_cc_cb_enabled_flag = s.u(1)
+               if self.sh_alf_cc_cb_enabled_flag:
+                  self.sh_alf_cc_cb_aps_id = s.u(3)
+               self.sh_alf_cc_cr_enabled_flag = s.u(1)
+               if self.sh_alf_cc_cr_enabled_flag:
+                  self.sh_alf_cc_cr_aps_id = s.u(3)
+      if ph.ph_lmcs_enabled_flag and not self.sh_picture_header_in_slice_header_flag:
+         self.sh_lmcs_used_flag = s.u(1)
+      if ph.ph_explicit_scaling_list_enabled_flag and not self.sh_picture_header_in_slice_header_flag:
+         self.sh_explicit_scaling_list_used_flag = s.u(1)
+      if plan.rpl_in_ph:
+         NumRefEntries = ph.ref_pic_lists.NumRefEntries
+      elif (nal_unit_type != NalUnitType.NAL_UNIT_IDR_W_RADL and nal_unit_type != NalUnitType.NAL_UNIT_N_LP) or \
+         plan.idr_rpl:
+         self.ref_pic_lists = ref_pic_lists(s, plan)
+         NumRefEntries = self.ref_pic_lists.NumRefEntries
+      else:
+         NumRefEntries = [0, 0]
+      self.sh_num_ref_idx_active_override_flag = 1
+      self.sh_num_ref_idx_active_minus1 = [0, 0]
+      if (slice_type != SliceType.I and NumRefEntries[ 0 ] > 1) or \
+         (slice_type == SliceType.B and NumRefEntries[ 1 ] > 1):
+         self.sh_num_ref_idx_active_override_flag = s.u(1)
+         if self.sh_num_ref_idx_active_override_flag:
+            for i in range(2 if slice_type == SliceType.B else 1):
+               if NumRefEntries[ i ] > 1:
+                  self.sh_num_ref_idx_active_minus1[ i ] = s.ue()
+      # (7-141)
+      self.NumRefIdxActive = [0, 0]
+      for i in range(2):
+         if slice_type == SliceType.B or (slice_type == SliceType.P and i == 0):
+            if self.sh_num_ref_idx_active_override_flag:
+               self.NumRefIdxActive[ i ] = self.sh_num_ref_idx_active_minus1[ i ] + 1
+            else:
+               self.NumRefIdxActive[ i ] = min(NumRefEntries[ i ], plan.num_ref_idx_default[ i ])
+      NumRefIdxActive = self.NumRefIdxActive
+      if slice_type != SliceType.I:
+         self.sh_cabac_init_flag = 0
+         if plan.cabac_init:
+            self.sh_cabac_init_flag = s.u(1)
+         if ph.ph_temporal_mvp_enabled_flag and not plan.rpl_in_ph:
+            self.sh_collocated_from_l0_flag = 1
+            if slice_type == SliceType.B:
+               self.sh_collocated_from_l0_flag = s.u(1)
+            if (self.sh_collocated_from_l0_flag and NumRefIdxActive[ 0 ] > 1) or \
+               (not self.sh_collocated_from_l0_flag and NumRefIdxActive[ 1 ] > 1):
+               self.sh_collocated_ref_idx = s.ue()
+         if not plan.wp_in_ph and ((plan.weighted_pred and slice_type == SliceType.P) or
+                                   (plan.weighted_bipred and slice_type == SliceType.B)):
+            self.pred_weight_table = pred_weight_table(s, plan, NumRefEntries, NumRefIdxActive)
+      self.sh_qp_delta = 0
+      if not plan.qp_delta_in_ph:
+         self.sh_qp_delta = s.se()
+      # (7-142)
+      self.SliceQpY = plan.init_qp + (ph.ph_qp_delta if plan.qp_delta_in_ph else self.sh_qp_delta)
+      if plan.slice_chroma_qp_offsets:
+         self.sh_cb_qp_offset = s.se()
+         self.sh_cr_qp_offset = s.se()
+         if plan.joint_cbcr:
+            self.sh_joint_cbcr_qp_offset = s.se()
+      if plan.cu_chroma_qp_offset:
+         self.sh_cu_chroma_qp_offset_enabled_flag = s.u(1)
+      if plan.sh_sao:
+         self.sh_sao_luma_used_flag = s.u(1)
+         if plan.chroma:
+            self.sh_sao_chroma_used_flag = s.u(1)
+      self.sh_deblocking_params_present_flag = 0
+      if plan.sh_dbf_override:
+         self.sh_deblocking_params_present_flag = s.u(1)
+      self.sh_deblocking_filter_disabled_flag = ph.ph_deblocking_filter_disabled_flag
+      if self.sh_deblocking_params_present_flag:
+         if plan.dbf_disabled:
+            self.sh_deblocking_filter_disabled_flag = 0
+         else:
+            self.sh_deblocking_filter_disabled_flag = s.u(1)
+         if not self.sh_deblocking_filter_disabled_flag:
+            self.sh_luma_beta_offset_div2 = s.se()
+            self.sh_luma_tc_offset_div2 = s.se()
+            if plan.chroma_tool_offsets:
+               self.sh_cb_beta_offset_div2 = s.se()
+               self.sh_cb_tc_offset_div2 = s.se()
+               self.sh_cr_beta_offset_div2 = s.se()
+               self.sh_cr_tc_offset_div2 = s.se()
+      self.sh_dep_quant_used_flag = 0
+      if plan.dep_quant:
+         self.sh_dep_quant_used_flag = s.u(1)
+      self.sh_sign_data_hiding_used_flag = 0
+      if plan.sign_data_hiding and not self.sh_dep_quant_used_flag:
+         self.sh_sign_data_hiding_used_flag = s.u(1)
+      if plan.transform_skip and not self.sh_dep_quant_used_flag and not self.sh_sign_data_hiding_used_flag:
+         self.sh_ts_residual_coding_disabled_flag = s.u(1)
+      if plan.sh_extension:
+         self.sh_slice_header_extension_length = s.ue()
+         s.skip(self.sh_slice_header_extension_length * 8)   # sh_slice_header_extension_data_byte[ i ]
+      self.NumEntryPoints = plan.entry_points(CurrSubpicIdx, self.sh_slice_address, self.sh_num_tiles_in_slice_minus1)
+      if self.NumEntryPoints > 0:
+         self.sh_entry_offset_len_minus1 = s.ue()
+         n = self.sh_entry_offset_len_minus1 + 1
+         self.sh_entry_point_offset_minus1 = [s.u(n) for i in range(self.NumEntryPoints)]
+      s.byte_alignment()
+
+
+class slice_layer_rbsp(syntax_structure):
+   def __init__(self, s, nal_unit_type, active):
+      """
+      7.3.2.14 Slice layer RBSP syntax, up to slice_data( )
+      """
+      self.slice_header = slice_header(s, nal_unit_type, active)
+
+
+class PictureOrderCounter(object):
+   """
+   8.3.1 Decoding process for picture order count. Call with each parsed
+   (nal_unit_header, rbsp) in decoding order; sets PicOrderCntVal on the
+   slice_header of every slice.
+   """
+
+   def __init__(self):
+      self.prev = {}   # nuh_layer_id -> (ph_pic_order_cnt_lsb, PicOrderCntMsb) of prevTid0Pic
+      self.ph = None
+      self.new_picture = False
+      self.PicOrderCntVal = 0
+      self.clvs = -1   # number of the CLVS of the last picture
+
+   def update(self, n, rbsp):
+      nal_unit_type = n.nal_unit_type
+      if nal_unit_type == NalUnitType.NAL_UNIT_EOS_NUT:
+         # the next picture of the layer starts a new CLVS
+         self.prev.pop(n.nuh_layer_id, None)
+      elif rbsp is None:
+         pass
+      elif nal_unit_type == NalUnitType.NAL_UNIT_PH_NUT:
+         self.picture_header(rbsp.picture_header_structure)
+      elif nal_unit_type < NalUnitType.NAL_UNIT_OPI_NUT:
+         sh = rbsp.slice_header
+         sh.PicOrderCntVal = self.slice(
+            n, sh.picture_header_structure if sh.sh_picture_header_in_slice_header_flag else None)
+
+   def picture_header(self, ph):
+      """
+      ph, of a picture header NAL unit, is that of the slices that follow;
+      None when they are known not to need it
+      """
+      self.ph = ph
+      self.new_picture = ph is not None
+
+   def slice(self, n, ph=None):
+      """
+      PicOrderCntVal of a slice of n, whose slice header holds the picture
+      header ph if it has one
+      """
+      if ph is not None:
+         self.picture(n, ph)
+      elif self.new_picture:
+         self.picture(n, self.ph)
+      return self.PicOrderCntVal
+
+   def picture(self, n, ph):
+      nal_unit_type = n.nal_unit_type
+      prev = self.prev.get(n.nuh_layer_id)
+      MaxPicOrderCntLsb = ph.MaxPicOrderCntLsb
+      lsb = ph.ph_pic_order_cnt_lsb
+      # CLVSS picture: IDR, or CRA/GDR first in the layer or after an EOS
+      clvss = nal_unit_type in (NalUnitType.NAL_UNIT_IDR_W_RADL, NalUnitType.NAL_UNIT_N_LP) or \
+         (nal_unit_type in IRAP_NAL_UNIT_TYPES and prev is None)
+      if clvss or prev is None:
+         self.clvs += 1
+      if ph.ph_poc_msb_cycle_present_flag:
+         PicOrderCntMsb = ph.ph_poc_msb_cycle_val * MaxPicOrderCntLsb
+      elif clvss or prev is None:
+         PicOrderCntMsb = 0
+      else:
+         prevPicOrderCntLsb, prevPicOrderCntMsb = prev
+         if lsb < prevPicOrderCntLsb and prevPicOrderCntLsb - lsb >= MaxPicOrderCntLsb // 2:
+            PicOrderCntMsb = prevPicOrderCntMsb + MaxPicOrderCntLsb
+         elif lsb > prevPicOrderCntLsb and lsb - prevPicOrderCntLsb > MaxPicOrderCntLsb // 2:
+            PicOrderCntMsb = prevPicOrderCntMsb - MaxPicOrderCntLsb
+         else:
+            PicOrderCntMsb = prevPicOrderCntMsb
+      if n.nuh_temporal_id_plus1 == 1 and nal_unit_type not in (NalUnitType.NAL_UNIT_RADL_NUT,
+                                                                 NalUnitType.NAL_UNIT_RASL_NUT):
+         self.prev[n.nuh_layer_id] = (lsb, PicOrderCntMsb)
+      self.new_picture = False
+      self.PicOrderCntVal = PicOrderCntMsb + lsb
+
+
+class SeiPayloadType:
+   """
+   payloadType values of the SEI messages decoded below
+   """
+   BUFFERING_PERIOD = 0
+   PIC_TIMING = 1
+   DECODED_PICTURE_HASH = 132
+   MASTERING_DISPLAY_COLOUR_VOLUME = 137
+   CONTENT_LIGHT_LEVEL_INFO = 144
+   ALTERNATIVE_TRANSFER_CHARACTERISTICS = 147
+   AMBIENT_VIEWING_ENVIRONMENT = 148
+
+
+class buffering_period(syntax_structure):
+   def __init__(self, s, payloadSize):
+      """
+      D.2.2 Buffering period SEI message syntax
+      """
+      self.bp_nal_hrd_params_present_flag = s.u(1)
+      self.bp_vcl_hrd_params_present_flag = s.u(1)
+      self.bp_cpb_initial_removal_delay_length_minus1 = s.u(5)
+      self.bp_cpb_removal_delay_length_minus1 = s.u(5)
+      self.bp_dpb_output_delay_length_minus1 = s.u(5)
+      self.bp_du_hrd_params_present_flag = s.u(1)
+      self.bp_du_cpb_params_in_pic_timing_sei_flag = 0
+      self.bp_du_dpb_params_in_pic_timing_sei_flag = 0
+      if self.bp_du_hrd_params_present_flag:
+         self.bp_du_cpb_removal_delay_increment_length_minus1 = s.u(5)
+         self.bp_dpb_output_delay_du_length_minus1 = s.u(5)
+         self.bp_du_cpb_params_in_pic_timing_sei_flag = s.u(1)
+         self.bp_du_dpb_params_in_pic_timing_sei_flag = s.u(1)
+      self.bp_concatenation_flag = s.u(1)
+      self.bp_additional_concatenation_info_present_flag = s.u(1)
+      if self.bp_additional_concatenation_info_present_flag:
+         self.bp_max_initial_removal_delay_for_concatenation = s.u(self.bp_cpb_initial_removal_delay_length_minus1 + 1)
+      self.bp_cpb_removal_delay_delta_minus1 = s.u(self.bp_cpb_removal_delay_length_minus1 + 1)
+      self.bp_max_sublayers_minus1 = s.u(3)
+      self.bp_cpb_removal_delay_deltas_present_flag = 0
+      if self.bp_max_sublayers_minus1 > 0:
+         self.bp_cpb_removal_delay_deltas_present_flag = s.u(1)
+      self.bp_num_cpb_removal_delay_deltas_minus1 = 0
+      if self.bp_cpb_removal_delay_deltas_present_flag:
+         self.bp_num_cpb_removal_delay_deltas_minus1 = s.ue()
+         self.bp_cpb_removal_delay_delta_val = [s.u(self.bp_cpb_removal_delay_length_minus1 + 1)
+                                                for i in range(self.bp_num_cpb_removal_delay_deltas_minus1 + 1)]
+      self.bp_cpb_cnt_minus1 = s.ue()
+      self.bp_sublayer_initial_cpb_removal_delay_present_flag = 0
+      if self.bp_max_sublayers_minus1 > 0:
+         self.bp_sublayer_initial_cpb_removal_delay_present_flag = s.u(1)
+      n = self.bp_max_sublayers_minus1 + 1
+      length = self.bp_cpb_initial_removal_delay_length_minus1 + 1
+      # the NAL and then the VCL HRD values of each sublayer in turn
+      hrds = [hrd for hrd in ('nal', 'vcl') if getattr(self, 'bp_{0}_hrd_params_present_flag'.format(hrd))]
+      names = ['initial_cpb_removal_delay', 'initial_cpb_removal_offset']
+      if self.bp_du_hrd_params_present_flag:
+         names += ['initial_alt_cpb_removal_delay', 'initial_alt_cpb_removal_offset']
+      for hrd in hrds:
+         for name in names:
+            setattr(self, 'bp_{0}_{1}'.format(hrd, name), [[0] * (self.bp_cpb_cnt_minus1 + 1) for i in range(n)])
+      for i in range(0 if self.bp_sublayer_initial_cpb_removal_delay_present_flag else n - 1, n):
+         for hrd in hrds:
+            values = [getattr(self, 'bp_{0}_{1}'.format(hrd, name)) for name in names]
+            for j in range(self.bp_cpb_cnt_minus1 + 1):
+               for v in values:
+                  v[ i ][ j ] = s.u(length)
+      self.bp_sublayer_dpb_output_offsets_present_flag = 0
+      if self.bp_max_sublayers_minus1 > 0:
+         self.bp_sublayer_dpb_output_offsets_present_flag = s.u(1)
+      if self.bp_sublayer_dpb_output_offsets_present_flag:
+         self.bp_dpb_output_tid_offset = [s.ue() for i in range(self.bp_max_sublayers_minus1)]
+      self.bp_alt_cpb_params_present_flag = s.u(1)
+      if self.bp_alt_cpb_params_present_flag:
+         self.bp_use_alt_cpb_params_flag = s.u(1)
+
+
+class pic_timing(syntax_structure):
+   def __init__(self, s, payloadSize, bp, TemporalId):
+      """
+      D.2.3 Picture timing SEI message syntax, with bp the buffering_period
+      in force
+      """
+      M = bp.bp_max_sublayers_minus1
+      cpb_removal_delay_length = bp.bp_cpb_removal_delay_length_minus1 + 1
+      self.pt_cpb_removal_delay_minus1 = [0] * (M + 1)
+      self.pt_cpb_removal_delay_minus1[ M ] = s.u(cpb_removal_delay_length)
+      # inferred 1 for the highest sublayer
+      self.pt_sublayer_delays_present_flag = [0] * M + [1]
+      self.pt_cpb_removal_delay_delta_enabled_flag = [0] * (M + 1)
+      self.pt_cpb_removal_delay_delta_idx = [0] * (M + 1)
+      for i in range(TemporalId, M):
+         self.pt_sublayer_delays_present_flag[ i ] = s.u(1)
+         if self.pt_sublayer_delays_present_flag[ i ]:
+            if bp.bp_cpb_removal_delay_deltas_present_flag:
+               self.pt_cpb_removal_delay_delta_enabled_flag[ i ] = s.u(1)
+            if self.pt_cpb_removal_delay_delta_enabled_flag[ i ]:
+               if bp.bp_num_cpb_removal_delay_deltas_minus1 > 0:
+                  self.pt_cpb_removal_delay_delta_idx[ i ] = s.u(ceil_log2(bp.bp_num_cpb_removal_delay_deltas_minus1 + 1))
+            else:
+               self.pt_cpb_removal_delay_minus1[ i ] = s.u(cpb_removal_delay_length)
+      self.pt_dpb_output_delay = s.u(bp.bp_dpb_output_delay_length_minus1 + 1)
+      if bp.bp_alt_cpb_params_present_flag:
+         self.pt_cpb_alt_timing_info_present_flag = s.u(1)
+         if self.pt_cpb_alt_timing_info_present_flag:
+            length = bp.bp_cpb_initial_removal_delay_length_minus1 + 1
+            first = 0 if bp.bp_sublayer_initial_cpb_removal_delay_present_flag else M
+            for hrd in ('nal', 'vcl'):
+               if getattr(bp, 'bp_{0}_hrd_params_present_flag'.format(hrd)):
+                  delay = [[0] * (bp.bp_cpb_cnt_minus1 + 1) for i in range(M + 1)]
+                  offset = [[0] * (bp.bp_cpb_cnt_minus1 + 1) for i in range(M + 1)]
+                  cpb_delay_offset = [0] * (M + 1)
+                  dpb_delay_offset = [0] * (M + 1)
+                  for i in range(first, M + 1):
+                     for j in range(bp.bp_cpb_cnt_minus1 + 1):
+                        delay[ i ][ j ] = s.u(length)
+                        offset[ i ][ j ] = s.u(length)
+                     cpb_delay_offset[ i ] = s.u(cpb_removal_delay_length)
+                     dpb_delay_offset[ i ] = s.u(bp.bp_dpb_output_delay_length_minus1 + 1)
+                  setattr(self, 'pt_{0}_cpb_alt_initial_removal_delay_delta'.format(hrd), delay)
+                  setattr(self, 'pt_{0}_cpb_alt_initial_removal_offset_delta'.format(hrd), offset)
+                  setattr(self, 'pt_{0}_cpb_delay_offset'.format(hrd), cpb_delay_offset)
+                  setattr(self, 'pt_{0}_dpb_delay_offset'.format(hrd), dpb_delay_offset)
+      if bp.bp_du_hrd_params_present_flag and bp.bp_du_dpb_params_in_pic_timing_sei_flag:
+         self.pt_dpb_output_du_delay = s.u(bp.bp_dpb_output_delay_du_length_minus1 + 1)
+      if bp.bp_du_hrd_params_present_flag and bp.bp_du_cpb_params_in_pic_timing_sei_flag:
+         increment_length = bp.bp_du_cpb_removal_delay_increment_length_minus1 + 1
+         self.pt_num_decoding_units_minus1 = s.ue()
+         if self.pt_num_decoding_units_minus1 > 0:
+            self.pt_du_common_cpb_removal_delay_flag = s.u(1)
+            if self.pt_du_common_cpb_removal_delay_flag:
+               self.pt_du_common_cpb_removal_delay_increment_minus1 = [0] * (M + 1)
+               for i in range(TemporalId, M + 1):
+                  if self.pt_sublayer_delays_present_flag[ i ]:
+                     self.pt_du_common_cpb_removal_delay_increment_minus1[ i ] = s.u(increment_length)
+            self.pt_num_nalus_in_du_minus1 = [0] * (self.pt_num_decoding_units_minus1 + 1)
+            self.pt_du_cpb_removal_delay_increment_minus1 = [[0] * (M + 1)
+                                                             for i in range(self.pt_num_decoding_units_minus1 + 1)]
+            for i in range(self.pt_num_decoding_units_minus1 + 1):
+               self.pt_num_nalus_in_du_minus1[ i ] = s.ue()
+               if not self.pt_du_common_cpb_removal_delay_flag and i < self.pt_num_decoding_units_minus1:
+                  for j in range(TemporalId, M + 1):
+                     if self.pt_sublayer_delays_present_flag[ j ]:
+                        self.pt_du_cpb_removal_delay_increment_minus1[ i ][ j ] = s.u(increment_length)
+      if bp.bp_additional_concatenation_info_present_flag:
+         self.pt_delay_for_concatenation_ensured_flag = s.u(1)
+      self.pt_display_elemental_periods_minus1 = s.u(8)
+
+
+class decoded_picture_hash(syntax_structure):
+   def __init__(self, s, payloadSize):
+      """
+      Decoded picture hash SEI message syntax (Rec. ITU-T H.274)
+      """
+      self.dph_sei_hash_type = s.u(8)
+      self.dph_sei_single_component_flag = s.u(1)
+      s.skip(7)   # dph_sei_reserved_zero_7bits
+      components = 1 if self.dph_sei_single_component_flag else 3
+      if self.dph_sei_hash_type == 0:
+         self.dph_sei_picture_md5 = [bytes(s.u(8) for i in range(16)).hex() for cIdx in range(components)]
+      elif self.dph_sei_hash_type == 1:
+         self.dph_sei_picture_crc = [s.u(16) for cIdx in range(components)]
+      elif self.dph_sei_hash_type == 2:
+         self.dph_sei_picture_checksum = [s.u(32) for cIdx in range(components)]
+
+
+class mastering_display_colour_volume(syntax_structure):
+   def __init__(self, s, payloadSize):
+      """
+      Mastering display colour volume SEI message syntax (Rec. ITU-T H.274)
+      """
+      self.mdcv_display_primaries_x = [0] * 3
+      self.mdcv_display_primaries_y = [0] * 3
+      for c in range(3):
+         self.mdcv_display_primaries_x[ c ] = s.u(16)
+         self.mdcv_display_primaries_y[ c ] = s.u(16)
+      self.mdcv_white_point_x = s.u(16)
+      self.mdcv_white_point_y = s.u(16)
+      self.mdcv_max_display_mastering_luminance = s.u(32)
+      self.mdcv_min_display_mastering_luminance = s.u(32)
+
+
+class content_light_level_info(syntax_structure):
+   def __init__(self, s, payloadSize):
+      """
+      Content light level information SEI message syntax (Rec. ITU-T H.274)
+      """
+      self.clli_max_content_light_level = s.u(16)
+      self.clli_max_pic_average_light_level = s.u(16)
+
+
+class alternative_transfer_characteristics(syntax_structure):
+   def __init__(self, s, payloadSize):
+      """
+      Alternative transfer characteristics SEI message syntax (Rec. ITU-T H.274)
+      """
+      self.preferred_transfer_characteristics = s.u(8)
+
+
+class ambient_viewing_environment(syntax_structure):
+   def __init__(self, s, payloadSize):
+      """
+      Ambient viewing environment SEI message syntax (Rec. ITU-T H.274)
+      """
+      self.ambient_illuminance = s.u(32)
+      self.ambient_light_x = s.u(16)
+      self.ambient_light_y = s.u(16)
+
+
+# sei_payload( ) structures by payloadType
+SEI_PAYLOADS = {
+   SeiPayloadType.BUFFERING_PERIOD: buffering_period,
+   SeiPayloadType.PIC_TIMING: pic_timing,
+   SeiPayloadType.DECODED_PICTURE_HASH: decoded_picture_hash,
+   SeiPayloadType.MASTERING_DISPLAY_COLOUR_VOLUME: mastering_display_colour_volume,
+   SeiPayloadType.CONTENT_LIGHT_LEVEL_INFO: content_light_level_info,
+   SeiPayloadType.ALTERNATIVE_TRANSFER_CHARACTERISTICS: alternative_transfer_characteristics,
+   SeiPayloadType.AMBIENT_VIEWING_ENVIRONMENT: ambient_viewing_environment,
+}
+
+_EMULATION_PREVENTION = re.compile(re.escape(EMULATION_PREVENTION))
+
+
+def sei_messages(nal):
+   """
+   7.3.6 Supplemental enhancement information message syntax
+
+   Yield (payloadType, payloadSize, start, end) for every sei_message( )
+   of the SEI NAL unit nal; nal[start:end] holds the sei_payload( ),
+   emulation prevention bytes included. Only the payloadType and
+   payloadSize bytes are read: payloads are jumped over, not copied.
+   """
+   # rbsp offset of the byte following each emulation_prevention_three_byte
+   epb = [m.start() + 2 for m in _EMULATION_PREVENTION.finditer(nal, 2)]
+   after = [e - k - 2 for k, e in enumerate(epb)]
+   end = len(nal)
+   while end > 2 and not nal[end - 1]:
+      end -= 1
+   # the last byte holds rbsp_stop_one_bit: more_rbsp_data( ) before it
+   last = end - 3 - len(epb)
+
+   def byte(pos):
+      return nal[pos + 2 + bisect.bisect_right(after, pos)]
+
+   pos = 0
+   while pos < last:
+      payloadType = 0
+      while True:
+         b = byte(pos)
+         pos += 1
+         payloadType += b
+         if b != 0xff:
+            break
+      payloadSize = 0
+      while True:
+         b = byte(pos)
+         pos += 1
+         payloadSize += b
+         if b != 0xff:
+            break
+      start = pos + 2 + bisect.bisect_right(after, pos)
+      pos += payloadSize
+      if pos > last:
+         raise EOFError('sei_message( ) payloadSize {0:d} past the end of the SEI RBSP'.format(payloadSize))
+      end = pos + 2 + bisect.bisect_right(after, pos - 1) if payloadSize else start
+      yield payloadType, payloadSize, start, end
+
+
+def sei_payload_rbsp(nal, start, end):
+   """
+   The sei_payload( ) bytes nal[start:end] of sei_messages(), without
+   emulation prevention bytes. Only this slice of the NAL unit is copied.
+   """
+   # a payload can start with the second zero byte of a 0x000003
+   epb = [m.start() + 2 for m in _EMULATION_PREVENTION.finditer(nal, max(start - 1, 2), end)]
+   if not epb:
+      return bytes(nal[start:end])
+   chunks = []
+   for e in epb:
+      chunks.append(nal[start:e])
+      start = e + 1
+   chunks.append(nal[start:end])
+   return b''.join(chunks)
+
+
+class sei_message(syntax_structure):
+   """
+   7.3.6 Supplemental enhancement information message syntax. The
+   sei_payload( ) structure is set, under its name, only for the payload
+   types decoded.
+   """
+
+   def __init__(self, payloadType, payloadSize):
+      self.payloadType = payloadType
+      self.payloadSize = payloadSize
+
+
+class sei_rbsp(syntax_structure):
+   def __init__(self, nal, sei, TemporalId=0):
+      """
+      7.3.2.8 Supplemental enhancement information RBSP syntax, with the
+      payloads sei, a SeiParser, subscribes to decoded
+      """
+      self.sei_message = []
+      for payloadType, payloadSize, start, end in sei_messages(nal):
+         message = sei_message(payloadType, payloadSize)
+         payload = sei.decode(payloadType, payloadSize, nal, start, end, TemporalId)
+         if payload is not None:
+            setattr(message, type(payload).__name__, payload)
+         self.sei_message.append(message)
+
+
+class SeiParser(object):
+   """
+   Decodes the sei_payload( )s of the payloadTypes subscribed to and
+   jumps over the others. It keeps the last buffering period, which
+   picture timing SEI messages need: subscribing to pic_timing also
+   decodes buffering_period. subscribe() can also register a callback,
+   called as callback(payloadType, payload, TemporalId).
+   """
+
+   def __init__(self, payload_types=()):
+      self.payload_types = set()
+      self.callbacks = collections.defaultdict(list)
+      self.buffering_period = None
+      for payloadType in payload_types:
+         self.subscribe(payloadType)
+
+   def subscribe(self, payloadType, callback=None):
+      if payloadType not in SEI_PAYLOADS:
+         raise ValueError('no sei_payload( ) parser for payloadType {0:d}'.format(payloadType))
+      self.payload_types.add(payloadType)
+      if payloadType == SeiPayloadType.PIC_TIMING:
+         self.payload_types.add(SeiPayloadType.BUFFERING_PERIOD)
+      if callback is not None:
+         self.callbacks[payloadType].append(callback)
+
+   def decode(self, payloadType, payloadSize, nal, start, end, TemporalId=0):
+      """
+      The sei_payload( ) in nal[start:end], or None when payloadType is
+      not subscribed to
+      """
+      if payloadType not in self.payload_types:
+         return None
+      s = BitReader(sei_payload_rbsp(nal, start, end))
+      if payloadType == SeiPayloadType.PIC_TIMING:
+         if self.buffering_period is None:
+            return None
+         payload = pic_timing(s, payloadSize, self.buffering_period, TemporalId)
+      else:
+         payload = SEI_PAYLOADS[payloadType](s, payloadSize)
+         if payloadType == SeiPayloadType.BUFFERING_PERIOD:
+            self.buffering_period = payload
+      for callback in self.callbacks.get(payloadType, ()):
+         callback(payloadType, payload, TemporalId)
+      return payload
+
+   def parse(self, nal, TemporalId=0):
+      return sei_rbsp(nal, self, TemporalId)
+
+
+def picture_planes(sps, pps=None, cropped=False):
+   """
+   (width, height) of each colour component of a decoded picture of sps
+   and the bytes per sample of a raw YUV file of it: one up to 8 bits,
+   two little-endian bytes above. The picture size is that of pps, which
+   with reference picture resampling may be below the SPS maximum. With
+   cropped, the size is that of the conformance cropping window.
+   """
+   if pps is None:
+      width = sps.sps_pic_width_max_in_luma_samples
+      height = sps.sps_pic_height_max_in_luma_samples
+   else:
+      width = pps.pps_pic_width_in_luma_samples
+      height = pps.pps_pic_height_in_luma_samples
+   sample_bytes = 2 if sps.sps_bitdepth_minus8 > 0 else 1
+   chroma_format_idc = sps.sps_chroma_format_idc
+   # Table 2: SubWidthC and SubHeightC
+   SubWidthC = 2 if chroma_format_idc in (1, 2) else 1
+   SubHeightC = 2 if chroma_format_idc == 1 else 1
+   if cropped:
+      # 7.4.3.5: without a window of its own, a PPS of the maximum picture
+      # size has that of the SPS
+      if pps is not None and pps.pps_conformance_window_flag:
+         ps, prefix = pps, 'pps'
+      elif pps is None or (width, height) == (sps.sps_pic_width_max_in_luma_samples,
+                                              sps.sps_pic_height_max_in_luma_samples):
+         ps, prefix = sps, 'sps'
+      else:
+         ps = None
+      if ps is not None:
+         window = [getattr(ps, '{0:s}_conf_win_{1:s}_offset'.format(prefix, side))
+                   for side in ('left', 'right', 'top', 'bottom')]
+         width -= SubWidthC * (window[0] + window[1])
+         height -= SubHeightC * (window[2] + window[3])
+   if chroma_format_idc == 0:
+      return [(width, height)], sample_bytes
+   chroma = (width // SubWidthC, height // SubHeightC)
+   return [(width, height), chroma, chroma], sample_bytes
+
+
+_XOR_BYTES = [bytes(i ^ c for i in range(256)) for c in range(256)]
+_checksum_masks = {}
+
+
+def _checksum_mask(width, height, sample_bytes):
+   key = width, height, sample_bytes
+   mask = _checksum_masks.get(key)
+   if mask is None:
+      # xorMask = ( x & 0xFF ) ^ ( y & 0xFF ) ^ ( x >> 8 ) ^ ( y >> 8 ), the
+      # y part applied to a row of the x part with a translation table
+      row = bytes(((x & 0xff) ^ (x >> 8)) for x in range(width) for i in range(sample_bytes))
+      mask = b''.join(row.translate(_XOR_BYTES[(y & 0xff) ^ (y >> 8)]) for y in range(height))
+      if len(_checksum_masks) >= 8:
+         _checksum_masks.clear()
+      _checksum_masks[key] = mask
+   return mask
+
+
+def picture_hash(plane, hash_type, width, height, sample_bytes):
+   """
+   The decoded picture hash of one colour component (Rec. ITU-T H.274),
+   plane holding its samples as in a raw YUV file. Returns the value as
+   decoded_picture_hash holds it: the MD5 as a hex string, the CRC or
+   the checksum as an int.
+   """
+   if hash_type == 0:
+      # pictureData is the plane as it is; hashlib releases the GIL
+      return hashlib.md5(plane).hexdigest()
+   if hash_type == 1:
+      # pictureData is the plane as it is, low byte first above 8 bits,
+      # each byte most significant bit first, then 16 zero bits: the
+      # CRC-CCITT of crc_hqx() with its initial value advanced past them
+      return binascii.crc_hqx(plane, 0x1d0f)
+   if hash_type == 2:
+      n = len(plane)
+      mask = _checksum_mask(width, height, sample_bytes)
+      data = (int.from_bytes(plane, 'little') ^ int.from_bytes(mask, 'little')).to_bytes(n, 'little')
+      return sum(data) & 0xffffffff
+   raise ValueError('dph_sei_hash_type {0:d} reserved'.format(hash_type))
+
+
+class DecodedPicture(object):
+   """
+   A picture as PictureHashCollector sees it: clvs and PicOrderCntVal
+   place it in output order, output is 0 for one that is not output, sps
+   and pps, when known, give its size and hash is its
+   decoded_picture_hash, if any.
+   """
+   __slots__ = ('clvs', 'PicOrderCntVal', 'output', 'sps', 'pps', 'hash')
+
+   def __init__(self, clvs, PicOrderCntVal, output, sps, pps=None):
+      self.clvs = clvs
+      self.PicOrderCntVal = PicOrderCntVal
+      self.output = output
+      self.sps = sps
+      self.pps = pps
+      self.hash = None
+
+
+class PictureHashCollector(object):
+   """
+   Call with each (nal_unit_header, rbsp) parse_nal_unit() returned, in
+   decoding order, and the ParameterSetStore it used. pictures collects a
+   DecodedPicture for every picture of the layer, with the decoded
+   picture hash SEI message that follows it.
+   """
+
+   def __init__(self, layer=0):
+      self.layer = layer
+      self.pictures = []
+      self.ph = None
+      self.clvs = None
+      self.skip_rasl = False
+
+   def add(self, n, rbsp, active):
+      if rbsp is None or n.nuh_layer_id != self.layer:
+         return
+      nal_unit_type = n.nal_unit_type
+      if nal_unit_type in SLICE_NAL_UNIT_TYPES:
+         sh = rbsp.slice_header
+         ph = sh.picture_header_structure if sh.sh_picture_header_in_slice_header_flag else active.picture_header
+         if ph is self.ph:
+            return
+         self.ph = ph
+         poc = active.poc
+         if nal_unit_type in IRAP_NAL_UNIT_TYPES:
+            # the RASL pictures of a CRA picture starting a CLVS are not output
+            self.skip_rasl = nal_unit_type == NalUnitType.NAL_UNIT_CRA_NUT and poc.clvs != self.clvs
+         self.clvs = poc.clvs
+         output = ph.ph_pic_output_flag and not (nal_unit_type == NalUnitType.NAL_UNIT_RASL_NUT and self.skip_rasl)
+         plan = active.plan(ph.ph_pic_parameter_set_id)
+         self.pictures.append(DecodedPicture(poc.clvs, sh.PicOrderCntVal, output, plan.sps, plan.pps))
+      elif nal_unit_type in SEI_NAL_UNIT_TYPES and self.pictures:
+         for message in rbsp.sei_message:
+            if message.payloadType == SeiPayloadType.DECODED_PICTURE_HASH and \
+               hasattr(message, 'decoded_picture_hash'):
+               self.pictures[-1].hash = message.decoded_picture_hash
+
+
+def verify_picture_hashes(pictures, filename, threads=None):
+   """
+   Check the decoded picture hashes of pictures, DecodedPicture records,
+   against filename, the raw planar YUV reconstruction of the layer
+   written in output order. The hashes cover the whole decoded picture,
+   so the reconstruction must not be cropped to the conformance window:
+   a file of the cropped size raises ValueError. The file is mapped and
+   each colour component hashed on a pool of threads.
+
+   Yields (frame, picture, cIdx, expected, actual) in output order for
+   every component a hash SEI message covers.
+   """
+   buf = map_bitstream(filename)
+   view = memoryview(buf)
+   output = sorted((p for p in pictures if p.output), key=lambda p: (p.clvs, p.PicOrderCntVal))
+
+   def file_size(cropped):
+      total = 0
+      for picture in output:
+         sizes, sample_bytes = picture_planes(picture.sps, picture.pps, cropped)
+         total += sum(width * height for width, height in sizes) * sample_bytes
+      return total
+   if len(buf) != file_size(False) and len(buf) == file_size(True):
+      raise ValueError('{0:s} is cropped to the conformance window; the decoded picture hashes '
+                       'cover the whole picture, write the reconstruction without cropping'.format(filename))
+   planes = []
+   offset = 0
+   for frame, picture in enumerate(output):
+      sizes, sample_bytes = picture_planes(picture.sps, picture.pps)
+      size = sum(width * height for width, height in sizes) * sample_bytes
+      if offset + size > len(buf):
+         raise EOFError('{0:s} ends in frame {1:d} of {2:d}'.format(filename, frame, len(output)))
+      dph = picture.hash
+      # reserved hash types carry no hash this parser knows
+      if dph is not None and dph.dph_sei_hash_type <= 2:
+         components = 1 if dph.dph_sei_single_component_flag else len(sizes)
+         start = offset
+         for cIdx, (width, height) in enumerate(sizes[:components]):
+            end = start + width * height * sample_bytes
+            planes.append((frame, picture, cIdx, view[start:end], width, height, sample_bytes))
+            start = end
+      offset += size
+
+   def check(plane):
+      frame, picture, cIdx, data, width, height, sample_bytes = plane
+      return picture_hash(data, picture.hash.dph_sei_hash_type, width, height, sample_bytes)
+
+   expected = ('dph_sei_picture_md5', 'dph_sei_picture_crc', 'dph_sei_picture_checksum')
+   with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+      for plane, actual in zip(planes, executor.map(check, planes)):
+         frame, picture, cIdx = plane[:3]
+         yield frame, picture, cIdx, getattr(picture.hash, expected[picture.hash.dph_sei_hash_type])[cIdx], actual
+
+
+
+
+def map_bitstream(filename):
+   """
+   Map filename read-only into memory. NAL units found by scan_nal_units()
+   are then memoryview slices of the page cache rather than copies.
+   """
+   with open(filename, 'rb') as f:
+      if os.fstat(f.fileno()).st_size == 0:
+         return b''
+      return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def scan_nal_units(buf, pos=0, end=None):
+   """
+   B.2 Byte stream NAL unit syntax
+
+   Yield (offset, length, memoryview) for every NAL unit in buf, lazily.
+   offset is the byte offset of nal_unit_header( ) and length the
+   NumBytesInNalUnit; the start code prefix, the zero_byte of a 4-byte
+   start code and trailing_zero_8bits are not part of the NAL unit.
+   """
+   if end is None:
+      end = len(buf)
+   find = buf.find
+   view = memoryview(buf)
+   i = find(START_CODE, pos, end)
+   while i >= 0:
+      start = i + 3
+      j = find(START_CODE, start, end)
+      stop = end if j < 0 else j
+      # 7.4.2: the last byte of a NAL unit is never 0x00
+      while stop > start and view[stop - 1] == 0:
+         stop -= 1
+      if stop > start:
+         yield start, stop - start, view[start:stop]
+      i = j
+
+
+# ISO/IEC 14496-12 boxes a sample table is found under, from the top
+MP4_CONTAINER_BOXES = frozenset((b'moov', b'trak', b'mdia', b'minf', b'stbl'))
+# ISO/IEC 14496-15 sample entries of VVC tracks
+VVC_SAMPLE_ENTRIES = frozenset((b'vvc1', b'vvi1'))
+# box types an MP4 file starts with
+MP4_FIRST_BOXES = frozenset((b'ftyp', b'styp', b'moov', b'mdat', b'free', b'skip', b'wide'))
+
+
+def is_mp4(buf):
+   """
+   True if buf starts with an ISO/IEC 14496-12 box rather than a start code
+   """
+   return len(buf) >= 8 and bytes(buf[4:8]) in MP4_FIRST_BOXES
+
+
+def iter_boxes(buf, pos=0, end=None):
+   """
+   ISO/IEC 14496-12 4.2 Object structure: yield (type, start, payload, end)
+   for each box between pos and end, payload being the offset of what
+   follows the box header. Only the headers are read.
+   """
+   if end is None:
+      end = len(buf)
+   while pos + 8 <= end:
+      size, box_type = struct.unpack_from('>I4s', buf, pos)
+      payload = pos + 8
+      if size == 1:
+         size, = struct.unpack_from('>Q', buf, payload)
+         payload += 8
+      elif size == 0:
+         size = end - pos
+      if box_type == b'uuid':
+         payload += 16
+      if size < payload - pos or pos + size > end:
+         raise EOFError('{0!r} box at {1:d} of {2:d} bytes runs past {3:d}'.format(box_type, pos, size, end))
+      yield box_type, pos, payload, pos + size
+      pos += size
+
+
+class vvc_ptl_record(syntax_structure):
+   def __init__(self, s, num_sublayers):
+      """
+      ISO/IEC 14496-15 11.2.4.2 VvcPTLRecord
+      """
+      s.skip(2)
+      self.num_bytes_constraint_info = s.u(6)
+      self.general_profile_idc = s.u(7)
+      self.general_tier_flag = s.u(1)
+      self.general_level_idc = s.u(8)
+      self.ptl_frame_only_constraint_flag = s.u(1)
+      self.ptl_multilayer_enabled_flag = s.u(1)
+      # general_constraint_info( ) as raw bits
+      self.general_constraint_info = s.u(max(8 * self.num_bytes_constraint_info - 2, 0))
+      self.ptl_sublayer_level_present_flag = [0] * max(num_sublayers - 1, 0)
+      for i in range(num_sublayers - 2, -1, -1):
+         self.ptl_sublayer_level_present_flag[ i ] = s.u(1)
+      if num_sublayers > 1:
+         s.skip(9 - num_sublayers)   # ptl_reserved_zero_bit
+      self.sublayer_level_idc = [0] * max(num_sublayers - 1, 0)
+      for i in range(num_sublayers - 2, -1, -1):
+         if self.ptl_sublayer_level_present_flag[ i ]:
+            self.sublayer_level_idc[ i ] = s.u(8)
+      self.ptl_num_sub_profiles = s.u(8)
+      self.general_sub_profile_idc = [s.u(32) for j in range(self.ptl_num_sub_profiles)]
+
+
+class vvc_decoder_configuration_record(syntax_structure):
+   def __init__(self, s, offset=0):
+      """
+      ISO/IEC 14496-15 11.2.4.2 VvcDecoderConfigurationRecord. The NAL
+      units of its arrays are not parsed here: nal_units holds the
+      (offset, length) of each, offset counted from offset, where the
+      record starts.
+      """
+      s.skip(5)
+      self.LengthSizeMinusOne = s.u(2)
+      self.ptl_present_flag = s.u(1)
+      if self.ptl_present_flag:
+         self.ols_idx = s.u(9)
+         self.num_sublayers = s.u(3)
+         self.constant_frame_rate = s.u(2)
+         self.chroma_format_idc = s.u(2)
+         self.bit_depth_minus8 = s.u(3)
+         s.skip(5)
+         self.native_ptl = vvc_ptl_record(s, self.num_sublayers)
+         self.max_picture_width = s.u(16)
+         self.max_picture_height = s.u(16)
+         self.avg_frame_rate = s.u(16)
+      self.num_of_arrays = s.u(8)
+      self.array_completeness = []
+      self.NAL_unit_type = []
+      self.nal_units = []
+      for j in range(self.num_of_arrays):
+         self.array_completeness.append(s.u(1))
+         s.skip(2)
+         NAL_unit_type = s.u(5)
+         self.NAL_unit_type.append(NAL_unit_type)
+         num_nalus = 1
+         if NAL_unit_type not in (NalUnitType.NAL_UNIT_DCI_NUT, NalUnitType.NAL_UNIT_OPI_NUT):
+            num_nalus = s.u(16)
+         for i in range(num_nalus):
+            nal_unit_length = s.u(16)
+            self.nal_units.append((offset + (s.pos >> 3), nal_unit_length))
+            s.skip(8 * nal_unit_length)
+      if s.pos > s.end:
+         raise EOFError('VvcDecoderConfigurationRecord NAL units past the end of the vvcC box')
+
+
+def _table(buf, pos, count, typecode='I'):
+   """
+   count big-endian unsigned 32-bit ('I') or 64-bit ('Q') integers at pos
+   of buf, as an array
+   """
+   table = array.array(typecode)
+   table.frombytes(buf[pos:pos + count * table.itemsize])
+   if sys.byteorder == 'little':
+      table.byteswap()
+   return table
+
+
+class Mp4Track(object):
+   """
+   The VVC track of an MP4 file: the vvcC record config of its sample
+   entry, and the sample sizes and chunk layout of its sample table.
+   samples() yields the (offset, size) of each sample in decoding order.
+   """
+
+   def __init__(self, buf, stbl_payload, stbl_end):
+      self.config = None
+      self.sample_entry = None
+      self.sizes = None
+      self.chunk_offsets = None
+      self.sample_to_chunk = []
+      for box_type, start, payload, end in iter_boxes(buf, stbl_payload, stbl_end):
+         if box_type == b'stsd':
+            # FullBox header, entry_count, then the sample entries
+            for entry_type, entry_start, entry_payload, entry_end in iter_boxes(buf, payload + 8, end):
+               if entry_type in VVC_SAMPLE_ENTRIES:
+                  self.sample_entry = entry_type
+                  # SampleEntry and VisualSampleEntry fields come before the boxes
+                  for child, child_start, child_payload, child_end in iter_boxes(buf, entry_payload + 78, entry_end):
+                     if child == b'vvcC':
+                        record = child_payload + 4
+                        self.config = vvc_decoder_configuration_record(
+                           BitReader(buf[record:child_end]), record)
+                  break
+         elif box_type == b'stsz':
+            sample_size, sample_count = struct.unpack_from('>II', buf, payload + 4)
+            if sample_size:
+               self.sizes = array.array('I', [sample_size]) * sample_count
+            else:
+               self.sizes = _table(buf, payload + 12, sample_count)
+         elif box_type == b'stco':
+            entry_count, = struct.unpack_from('>I', buf, payload + 4)
+            self.chunk_offsets = _table(buf, payload + 8, entry_count)
+         elif box_type == b'co64':
+            entry_count, = struct.unpack_from('>I', buf, payload + 4)
+            self.chunk_offsets = _table(buf, payload + 8, entry_count, 'Q')
+         elif box_type == b'stsc':
+            entry_count, = struct.unpack_from('>I', buf, payload + 4)
+            self.sample_to_chunk = list(struct.iter_unpack('>III', buf[payload + 8:payload + 8 + 12 * entry_count]))
+
+   def samples(self):
+      sizes = self.sizes
+      chunk_offsets = self.chunk_offsets
+      runs = self.sample_to_chunk
+      sample = 0
+      for k, (first_chunk, samples_per_chunk, sample_description_index) in enumerate(runs):
+         last_chunk = runs[k + 1][0] if k + 1 < len(runs) else len(chunk_offsets) + 1
+         for chunk in range(first_chunk - 1, last_chunk - 1):
+            offset = chunk_offsets[chunk]
+            for i in range(samples_per_chunk):
+               if sample >= len(sizes):
+                  return
+               size = sizes[sample]
+               yield offset, size
+               offset += size
+               sample += 1
+
+
+def find_vvc_track(buf):
+   """
+   The Mp4Track of the first vvc1/vvi1 track of the MP4 file in buf,
+   found by walking moov/trak/mdia/minf/stbl; mdat is skipped over
+   """
+   def walk(pos, end):
+      for box_type, start, payload, box_end in iter_boxes(buf, pos, end):
+         if box_type == b'stbl':
+            track = Mp4Track(buf, payload, box_end)
+            if track.sample_entry is not None:
+               return track
+         elif box_type in MP4_CONTAINER_BOXES:
+            track = walk(payload, box_end)
+            if track is not None:
+               return track
+      return None
+
+   track = walk(0, len(buf))
+   if track is None:
+      raise ValueError('no vvc1 or vvi1 track')
+   if track.config is None or track.sizes is None or track.chunk_offsets is None:
+      raise ValueError('VVC track without vvcC, stsz or stco/co64')
+   return track
+
+
+def scan_mp4_nal_units(buf, track=None):
+   """
+   ISO/IEC 14496-15 length-prefixed NAL units of the VVC track of the
+   MP4 file in buf, with the same (offset, length, memoryview) results
+   as scan_nal_units(): the NAL units of the vvcC record first, then
+   those of every sample in decoding order, as slices of buf.
+   """
+   if track is None:
+      track = find_vvc_track(buf)
+   view = memoryview(buf)
+   for offset, length in track.config.nal_units:
+      yield offset, length, view[offset:offset + length]
+   size_bytes = track.config.LengthSizeMinusOne + 1
+   for offset, size in track.samples():
+      end = offset + size
+      while offset + size_bytes <= end:
+         length = int.from_bytes(view[offset:offset + size_bytes], 'big')
+         offset += size_bytes
+         if offset + length > end:
+            raise EOFError('NAL unit of {0:d} bytes at {1:d} runs past its sample'.format(length, offset))
+         yield offset, length, view[offset:offset + length]
+         offset += length
+
+
+def scan_input(buf):
+   """
+   scan_nal_units() of an Annex-B buffer, scan_mp4_nal_units() of an MP4 one
+   """
+   return scan_mp4_nal_units(buf) if is_mp4(buf) else scan_nal_units(buf)
+
+
+def nal_unit_rbsp(nal):
+   """
+   7.3.1.1 General NAL unit syntax
+
+   Return (rbsp, epb): the rbsp_byte[ ] following the 2-byte
+   nal_unit_header( ) as bytes, and the offsets within nal of every
+   emulation_prevention_three_byte that was removed.
+   """
+   data = bytes(nal)
+   epb = []
+   i = data.find(EMULATION_PREVENTION, 2)
+   if i < 0:
+      return data[2:], epb
+   chunks = []
+   start = 2
+   while i >= 0:
+      chunks.append(data[start:i + 2])
+      epb.append(i + 2)
+      start = i + 3
+      i = data.find(EMULATION_PREVENTION, start)
+   chunks.append(data[start:])
+   return b''.join(chunks), epb
+
+
+def rbsp_to_nal_pos(pos, epb):
+   """
+   Map bit position pos within the rbsp returned by nal_unit_rbsp() back to
+   the bit position within the NAL unit, nal_unit_header( ) included.
+   """
+   byte = pos >> 3
+   # epb[k] - k - 2 is the rbsp offset of the byte following the k-th
+   # emulation_prevention_three_byte
+   lo, hi = 0, len(epb)
+   while lo < hi:
+      mid = (lo + hi) // 2
+      if epb[mid] - mid - 2 <= byte:
+         lo = mid + 1
+      else:
+         hi = mid
+   return pos + (2 + lo) * 8
+
+
+def parse_nal_unit(nal, active=None):
+   """
+   Parse one NAL unit. Returns (nal_unit_header, rbsp) where rbsp is the
+   parsed RBSP syntax structure, or None for NAL unit types not parsed.
+   When active, a ParameterSetStore, is given, parameter sets go through
+   it: a repeat of one already parsed is returned from the store as is.
+   Picture headers and slice headers are only parsed with active, and
+   slice headers get PicOrderCntVal from its PictureOrderCounter.
+   """
+   n = nal_unit_header(BitReader(nal[:2]))
+   rbsp = None
+
+   if active is not None and n.nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES:
+      rbsp = active.lookup(nal)
+      if rbsp is not None:
+         return n, rbsp
+
+   nal_unit_type = n.nal_unit_type
+
+   # slice data is nearly all of a stream: only copy and unescape the
+   # payload of NAL units that are parsed below
+   if nal_unit_type in PARSED_NAL_UNIT_TYPES and nal_unit_type not in SLICE_NAL_UNIT_TYPES and \
+      nal_unit_type not in SEI_NAL_UNIT_TYPES:
+      data, epb = nal_unit_rbsp(nal)
+      NumBytesInRbsp = len(data)
+      s = BitReader(data)
+
+   if nal_unit_type in SLICE_NAL_UNIT_TYPES:
+      # slice and picture headers need the parameter sets of active
+      if active is not None:
+         rbsp = parse_slice_layer(nal, nal_unit_type, active)
+   elif nal_unit_type == NalUnitType.NAL_UNIT_VCL_4 or \
+      nal_unit_type == NalUnitType.NAL_UNIT_VCL_5 or \
+      nal_unit_type == NalUnitType.NAL_UNIT_VCL_6 :
+         pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_RSV_IRAP_11:
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_OPI_NUT:
+      #operating_point_information_rbsp()
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_DCI_NUT:
+      #decoding_capability_information_rbsp()
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_VPS_NUT:
+      rbsp = syntax_parser('video_parameter_set_rbsp')(s)
+      if active is not None:
+         rbsp = active.add(nal, rbsp)
+   elif nal_unit_type == NalUnitType.NAL_UNIT_SPS_NUT:
+      rbsp = syntax_parser('seq_parameter_set_rbsp')(s)
+      if active is not None:
+         rbsp = active.add(nal, rbsp)
+   elif nal_unit_type == NalUnitType.NAL_UNIT_PPS_NUT:
+      rbsp = syntax_parser('pic_parameter_set_rbsp')(s)
+      if active is not None:
+         rbsp = active.add(nal, rbsp)
+   elif nal_unit_type == NalUnitType.NAL_UNIT_PREFIX_APS_NUT or \
+      nal_unit_type == NalUnitType.NAL_UNIT_SUFFIX_APS_NUT:
+         pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_PH_NUT:
+      if active is not None:
+         try:
+            rbsp = picture_header_rbsp(s, active)
+         except MissingParameterSet:
+            rbsp = None
+         active.picture_header = rbsp.picture_header_structure if rbsp is not None else None
+   elif nal_unit_type == NalUnitType.NAL_UNIT_AUD_NUT:
+      # access_unit_delimiter_rbsp()
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_EOS_NUT:
+      # end_of_seq_rbsp()
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_EOB_NUT:
+      # end_of_bitstream_rbsp()
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_PREFIX_SEI_NUT or \
+      nal_unit_type == NalUnitType.NAL_UNIT_SUFFIX_SEI_NUT:
+      # payloads are unescaped one at a time, and only when decoded
+      if active is not None:
+         rbsp = active.sei.parse(nal, n.nuh_temporal_id_plus1 - 1)
+   elif nal_unit_type == NalUnitType.NAL_UNIT_FD_NUT:
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_RSV_NVCL_26 or \
+      nal_unit_type == NalUnitType.NAL_UNIT_NVCL_27:
+      pass
+   elif nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_28 or \
+      nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_29 or \
+      nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_30 or \
+      nal_unit_type == NalUnitType.NAL_UNIT_UNSPEC_31:
+      pass
+
+   if active is not None:
+      active.poc.update(n, rbsp)
+   return n, rbsp
+
+
+def parse_slice_layer(nal, nal_unit_type, active):
+   """
+   slice_layer_rbsp( ) of a VCL NAL unit, or None without the parameter
+   sets or picture header it refers to. Only a prefix of the NAL unit is
+   unescaped, grown until the slice header fits in it.
+   """
+   size = 64
+   while True:
+      data, epb = nal_unit_rbsp(nal[:size])
+      try:
+         return slice_layer_rbsp(BitReader(data), nal_unit_type, active)
+      except MissingParameterSet:
+         return None
+      except (EOFError, ValueError):
+         if size >= len(nal):
+            raise
+         size *= 4
+
+
+def read_nal_unit(nal):
+   n, rbsp = parse_nal_unit(nal)
+   n.show()
+   if rbsp is not None:
+      rbsp.show()
+   return n, rbsp
+
+
+# VCL NAL unit types that hold a slice_layer_rbsp( )
+SLICE_NAL_UNIT_TYPES = frozenset((
+   NalUnitType.NAL_UNIT_TRAIL_NUT,
+   NalUnitType.NAL_UNIT_STSA_NUT,
+   NalUnitType.NAL_UNIT_RADL_NUT,
+   NalUnitType.NAL_UNIT_RASL_NUT,
+   NalUnitType.NAL_UNIT_IDR_W_RADL,
+   NalUnitType.NAL_UNIT_N_LP,
+   NalUnitType.NAL_UNIT_CRA_NUT,
+   NalUnitType.NAL_UNIT_GDR_NUT,
+))
+
+SEI_NAL_UNIT_TYPES = frozenset((
+   NalUnitType.NAL_UNIT_PREFIX_SEI_NUT,
+   NalUnitType.NAL_UNIT_SUFFIX_SEI_NUT,
+))
+
+# NAL unit types whose payload parse_nal_unit() reads. iter_nal_units()
+# drops the payload of any other NAL unit while it is still arriving.
+PARSED_NAL_UNIT_TYPES = frozenset((
+   NalUnitType.NAL_UNIT_VPS_NUT,
+   NalUnitType.NAL_UNIT_SPS_NUT,
+   NalUnitType.NAL_UNIT_PPS_NUT,
+   NalUnitType.NAL_UNIT_PH_NUT,
+   NalUnitType.NAL_UNIT_PREFIX_SEI_NUT,
+   NalUnitType.NAL_UNIT_SUFFIX_SEI_NUT,
+)) | SLICE_NAL_UNIT_TYPES
+
+
+def scan_headers(buf, types=(), active=None, pos=0, end=None):
+   """
+   Header-only scan of an Annex-B buffer, or a whole MP4 one. Yields
+   (offset, length, nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, rbsp)
+   where only the 2-byte nal_unit_header( ) is decoded; rbsp is parsed as
+   by parse_nal_unit() for NAL unit types in types and None otherwise.
+   """
+   types = frozenset(types)
+   nals = scan_mp4_nal_units(buf) if pos == 0 and end is None and is_mp4(buf) else scan_nal_units(buf, pos, end)
+   for offset, length, nal in nals:
+      nal_unit_type = nal[1] >> 3
+      rbsp = None
+      if nal_unit_type in types:
+         rbsp = parse_nal_unit(nal, active)[1]
+      yield offset, length, nal_unit_type, nal[0] & 0x3f, nal[1] & 7, rbsp
+
+
+def layer_id_in_ols(vps, olsIdx):
+   """
+   7.4.3.3 LayerIdInOls[ olsIdx ]: the nuh_layer_id values of the layers
+   of output layer set olsIdx of vps
+   """
+   if olsIdx >= vps.TotalNumOlss:
+      raise ValueError('OLS {0:d} not in the VPS, which has {1:d}'.format(olsIdx, vps.TotalNumOlss))
+   L = vps.vps_max_layers_minus1 + 1
+   if olsIdx == 0 or vps.vps_each_layer_is_an_ols_flag:
+      return [vps.vps_layer_id[ olsIdx ]]
+   if vps.vps_ols_mode_idc in (0, 1):
+      return vps.vps_layer_id[:olsIdx + 1]
+   dependencyFlag = [row[:] for row in vps.vps_direct_ref_layer_flag]
+   for i in range(L):
+      for j in range(L):
+         for k in range(i):
+            if vps.vps_direct_ref_layer_flag[ i ][ k ] and dependencyFlag[ k ][ j ]:
+               dependencyFlag[ i ][ j ] = 1
+   included = [0] * L
+   for k in range(L):
+      if vps.vps_ols_output_layer_flag[ olsIdx ][ k ]:
+         included[ k ] = 1
+         for j in range(L):
+            if dependencyFlag[ k ][ j ]:
+               included[ j ] = 1
+   return [vps.vps_layer_id[ k ] for k in range(L) if included[ k ]]
+
+
+def emulation_prevention(rbsp):
+   """
+   7.4.2 The NAL unit payload of rbsp: an emulation_prevention_three_byte
+   after every two zero bytes followed by a byte of 0x03 or less
+   """
+   return re.sub(b'\x00\x00(?=[\x00-\x03])', b'\x00\x00\x03', rbsp)
+
+
+def nal_unit_bytes(nal_unit_type, rbsp, nuh_layer_id=0, TemporalId=0):
+   """
+   A NAL unit, start code included, carrying rbsp with emulation
+   prevention bytes inserted
+   """
+   header = bytes((nuh_layer_id, (nal_unit_type << 3) | (TemporalId + 1)))
+   payload = emulation_prevention(rbsp)
+   if payload.endswith(b'\x00'):
+      # 7.4.2: a payload ending in zero is followed by an emulation_prevention_three_byte
+      payload += b'\x03'
+   return b'\x00\x00\x00\x01' + header + payload
+
+
+PARAMETER_SET_NAL_UNIT_TYPE = {
+   'video_parameter_set_rbsp': NalUnitType.NAL_UNIT_VPS_NUT,
+   'seq_parameter_set_rbsp': NalUnitType.NAL_UNIT_SPS_NUT,
+   'pic_parameter_set_rbsp': NalUnitType.NAL_UNIT_PPS_NUT,
+}
+
+
+def parameter_set_nal(ps, nuh_layer_id=0):
+   """
+   The NAL unit of the VPS, SPS or PPS ps, written by write_syntax( )
+   """
+   if isinstance(ps, LazyParameterSet):
+      ps = ps.parse()
+   name = (ps.structure if isinstance(ps, CompactRecord) else type(ps)).__name__
+   rbsp = write_syntax(name, ps).getvalue()
+   return nal_unit_bytes(PARAMETER_SET_NAL_UNIT_TYPE[name], rbsp, nuh_layer_id)
+
+
+def operating_point_information_nal(targetOlsIdx, tIdTarget, nuh_layer_id=0):
+   """
+   An OPI NAL unit, start code included, with the 7.3.2.2
+   operating_point_information_rbsp( ) signalling targetOlsIdx, if not
+   None, and tIdTarget
+   """
+   bits = '1' if targetOlsIdx is not None else '0'   # opi_ols_info_present_flag
+   bits += '1'                                          # opi_htid_info_present_flag
+   if targetOlsIdx is not None:
+      code = bin(targetOlsIdx + 1)[2:]
+      bits += '0' * (len(code) - 1) + code              # opi_ols_idx
+   bits += format(tIdTarget + 1, '03b')                 # opi_htid_plus1
+   bits += '0'                                          # opi_extension_flag
+   bits += '1'                                          # rbsp_stop_one_bit
+   bits += '0' * (-len(bits) % 8)
+   rbsp = int(bits, 2).to_bytes(len(bits) // 8, 'big')
+   header = bytes((nuh_layer_id, (NalUnitType.NAL_UNIT_OPI_NUT << 3) | 1))
+   return b'\x00\x00\x00\x01' + header + emulation_prevention(rbsp)
+
+
+def extract_sub_bitstream(buf, tIdTarget=6, layers=None, targetOlsIdx=None):
+   """
+   C.6.1 Sub-bitstream extraction without re-encoding. NAL units with a
+   TemporalId above tIdTarget are dropped, and so are those whose
+   nuh_layer_id is not in layers or, with targetOlsIdx, not in
+   LayerIdInOls[ targetOlsIdx ] of the VPS in force.
+
+   Yields the output in pieces: (offset, length) ranges of buf to copy as
+   they are, start codes included, with consecutive kept NAL units merged
+   into one range, and bytes for the NAL units that are rewritten. Only
+   OPI NAL units are: they are replaced by one signalling the target
+   operating point. Nothing else needs rewriting, so only the headers of
+   the NAL units and the VPS are read.
+   """
+   types = (NalUnitType.NAL_UNIT_VPS_NUT,) if targetOlsIdx is not None else ()
+   keep_layers = None if layers is None else frozenset(layers)
+   start = end = None
+   for offset, length, nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, rbsp in scan_headers(buf, types):
+      if rbsp is not None:
+         keep_layers = frozenset(layer_id_in_ols(rbsp, targetOlsIdx))
+         if layers is not None:
+            keep_layers &= frozenset(layers)
+      if nuh_temporal_id_plus1 - 1 > tIdTarget or \
+         keep_layers is not None and nuh_layer_id not in keep_layers:
+         keep = False
+      elif nal_unit_type == NalUnitType.NAL_UNIT_OPI_NUT and (targetOlsIdx is not None or tIdTarget < 6):
+         if start is not None:
+            yield start, end - start
+            start = None
+         yield operating_point_information_nal(targetOlsIdx, tIdTarget, nuh_layer_id)
+         continue
+      else:
+         keep = True
+      if not keep:
+         if start is not None:
+            yield start, end - start
+            start = None
+         continue
+      if start is None:
+         # the start code, with the zero_byte of a 4-byte one
+         start = offset - 4 if offset >= 4 and buf[offset - 4] == 0 else offset - 3
+      end = offset + length
+   if start is not None:
+      yield start, end - start
+
+
+def write_sub_bitstream(filename, out, tIdTarget=6, layers=None, targetOlsIdx=None):
+   """
+   Write the extract_sub_bitstream() of the Annex-B file filename to out,
+   a binary file. Ranges go from file to file with os.sendfile() where
+   the OS allows it, else as memoryview slices of the mapped input, so
+   the payloads never pass through Python objects. Returns the number of
+   bytes written.
+   """
+   buf = map_bitstream(filename)
+   view = memoryview(buf)
+   written = 0
+   with open(filename, 'rb') as src:
+      try:
+         out_fd = out.fileno()
+      except (AttributeError, io.UnsupportedOperation):
+         out_fd = None
+      for piece in extract_sub_bitstream(buf, tIdTarget, layers, targetOlsIdx):
+         if isinstance(piece, bytes):
+            out.write(piece)
+            written += len(piece)
+            continue
+         offset, length = piece
+         written += length
+         if out_fd is not None:
+            out.flush()
+            try:
+               while length:
+                  sent = os.sendfile(out_fd, src.fileno(), offset, length)
+                  if sent == 0:
+                     break
+                  offset += sent
+                  length -= sent
+            except OSError:
+               # no sendfile() to this kind of file: write from the mapping
+               out_fd = None
+         if length:
+            out.write(view[offset:offset + length])
+   return written
+
+
+def common_prefix(a, b, block=1 << 20):
+   """
+   Number of leading bytes a and b have in common, compared a block at a
+   time in C before the differing block is narrowed down
+   """
+   a = memoryview(a)
+   b = memoryview(b)
+   n = min(len(a), len(b))
+   pos = 0
+   while pos < n:
+      size = min(block, n - pos)
+      if a[pos:pos + size] != b[pos:pos + size]:
+         if size <= 64:
+            while a[pos] == b[pos]:
+               pos += 1
+            return pos
+         block = size // 64
+         continue
+      pos += size
+   return n
+
+
+def common_suffix(a, b, limit, block=1 << 20):
+   """
+   Number of trailing bytes a and b have in common, at most limit
+   """
+   a = memoryview(a)
+   b = memoryview(b)
+   n = 0
+   while n < limit:
+      size = min(block, limit - n)
+      if a[len(a) - n - size:len(a) - n] != b[len(b) - n - size:len(b) - n]:
+         if size <= 64:
+            while n < limit and a[len(a) - n - 1] == b[len(b) - n - 1]:
+               n += 1
+            return n
+         block = size // 64
+         continue
+      n += size
+   return n
+
+
+def align_sequences(a, b, small=256):
+   """
+   difflib-style opcodes aligning the lists a and b, by patience diff:
+   the elements found exactly once in each are matched up along their
+   longest increasing run, and only the gaps between these anchors go
+   through difflib.SequenceMatcher, which is quadratic on the repeated
+   NAL units of a stream. Gaps larger than small by small elements are
+   aligned at their common ends and replaced in the middle.
+   """
+   count_a = collections.Counter(a)
+   count_b = collections.Counter(b)
+   where_b = dict((key, j) for j, key in enumerate(b) if count_b[key] == 1)
+   pairs = [(i, where_b[key]) for i, key in enumerate(a) if count_a[key] == 1 and key in where_b]
+   # longest increasing subsequence of the b positions
+   tails = []
+   tail_index = []
+   back = [None] * len(pairs)
+   for k, (i, j) in enumerate(pairs):
+      n = bisect.bisect_left(tails, j)
+      if n == len(tails):
+         tails.append(j)
+         tail_index.append(k)
+      else:
+         tails[n] = j
+         tail_index[n] = k
+      back[k] = tail_index[n - 1] if n else None
+   anchors = []
+   k = tail_index[-1] if tail_index else None
+   while k is not None:
+      anchors.append(pairs[k])
+      k = back[k]
+   anchors.reverse()
+
+   opcodes = []
+
+   def add(tag, i1, i2, j1, j2):
+      if i1 == i2 and j1 == j2:
+         return
+      if opcodes and opcodes[-1][0] == tag:
+         opcodes[-1] = (tag, opcodes[-1][1], i2, opcodes[-1][3], j2)
+      else:
+         opcodes.append((tag, i1, i2, j1, j2))
+
+   def gap(i1, i2, j1, j2):
+      if (i2 - i1) * (j2 - j1) <= small * small:
+         for tag, x1, x2, y1, y2 in difflib.SequenceMatcher(None, a[i1:i2], b[j1:j2], autojunk=False).get_opcodes():
+            add(tag, i1 + x1, i1 + x2, j1 + y1, j1 + y2)
+         return
+      head = 0
+      while i1 + head < i2 and j1 + head < j2 and a[i1 + head] == b[j1 + head]:
+         head += 1
+      tail = 0
+      while i2 - tail > i1 + head and j2 - tail > j1 + head and a[i2 - tail - 1] == b[j2 - tail - 1]:
+         tail += 1
+      add('equal', i1, i1 + head, j1, j1 + head)
+      add('replace', i1 + head, i2 - tail, j1 + head, j2 - tail)
+      add('equal', i2 - tail, i2, j2 - tail, j2)
+
+   i = j = 0
+   for ai, bj in anchors:
+      gap(i, ai, j, bj)
+      add('equal', ai, ai + 1, bj, bj + 1)
+      i, j = ai + 1, bj + 1
+   gap(i, len(a), j, len(b))
+   return opcodes
+
+
+def _stream_digest(filename, pos, end):
+   """
+   The NAL units of filename between pos and end as (keys, offsets) for
+   diff_streams(), keys being (nal_unit_type, nuh_layer_id, TemporalId,
+   digest), and the distinct parameter sets among them as
+   ((nal_unit_type, id), digest, as_dict()) in stream order
+   """
+   buf = map_bitstream(filename)
+   keys = []
+   offsets = []
+   parameter_sets = []
+   seen = set()
+   for offset, length, nal in scan_nal_units(buf, pos, end):
+      nal_unit_type = nal[1] >> 3
+      digest = hashlib.blake2b(nal, digest_size=16).digest()
+      keys.append((nal_unit_type, nal[0] & 0x3f, (nal[1] & 7) - 1, digest))
+      offsets.append(offset)
+      if nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES and digest not in seen:
+         seen.add(digest)
+         parameter_sets.append(((nal_unit_type, parameter_set_id(nal)), digest, parse_nal_unit(nal)[1].as_dict()))
+   return keys, offsets, parameter_sets
+
+
+def diff_records(a, b, path=''):
+   """
+   Yield (path, value in a, value in b) for every syntax element that
+   differs between the as_dict() records a and b; a missing element is
+   None
+   """
+   if isinstance(a, dict) and isinstance(b, dict):
+      for name in list(a) + [name for name in b if name not in a]:
+         for d in diff_records(a.get(name), b.get(name), path + '.' + name if path else name):
+            yield d
+   elif isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+      for i, (x, y) in enumerate(zip(a, b)):
+         for d in diff_records(x, y, '{0:s}[ {1:d} ]'.format(path, i)):
+            yield d
+   elif a != b:
+      yield path, a, b
+
+
+class StreamDiff(object):
+   """
+   What diff_streams() found: prefix and suffix are the identical bytes
+   skipped at either end; opcodes the align_sequences() of the NAL units
+   in between, with keys and offsets of each stream; parameter_sets
+   (name, [(path, a, b)]) for every parameter set that differs, with no
+   differences listed for one found in only one of the streams.
+   """
+
+   def __init__(self, prefix, suffix, a, b, opcodes, parameter_sets):
+      self.prefix = prefix
+      self.suffix = suffix
+      self.keys_a, self.offsets_a = a
+      self.keys_b, self.offsets_b = b
+      self.opcodes = opcodes
+      self.parameter_sets = parameter_sets
+
+   def identical(self):
+      return all(tag == 'equal' for tag, i1, i2, j1, j2 in self.opcodes) and not self.parameter_sets
+
+   def first_divergence(self):
+      """
+      (index in a, index in b) of the first NAL units that differ, counted
+      from the first NAL unit compared, or None
+      """
+      for tag, i1, i2, j1, j2 in self.opcodes:
+         if tag != 'equal':
+            return i1, j1
+      return None
+
+
+def diff_streams(filename_a, filename_b, jobs=2):
+   """
+   Compare two Annex-B files. The identical bytes at either end are found
+   by comparing the mapped files and skipped; the NAL units in between
+   are hashed and parameter sets parsed in jobs processes, one stream
+   each, then aligned by align_sequences() on (nal_unit_type,
+   nuh_layer_id, TemporalId, digest). Of the distinct versions of each
+   VPS, SPS and PPS id, those with the same bytes in both streams match;
+   the others are compared field by field, nth left in a against nth left
+   in b. Returns a StreamDiff.
+   """
+   a = map_bitstream(filename_a)
+   b = map_bitstream(filename_b)
+   prefix = common_prefix(a, b)
+   if prefix == len(a) == len(b):
+      return StreamDiff(prefix, 0, ([], []), ([], []), [], [])
+   suffix = common_suffix(a, b, min(len(a), len(b)) - prefix)
+   # whole NAL units only: back to the last start code before the first
+   # difference, on to the first one after the last
+   start = max(a.rfind(START_CODE, 0, prefix), 0)
+   end_a = a.find(START_CODE, max(len(a) - suffix, start + 3))
+   end_b = b.find(START_CODE, max(len(b) - suffix, start + 3))
+   end_a = len(a) if end_a < 0 else end_a
+   end_b = len(b) if end_b < 0 else end_b
+   with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+      fa = executor.submit(_stream_digest, filename_a, start, end_a)
+      fb = executor.submit(_stream_digest, filename_b, start, end_b)
+      keys_a, offsets_a, sets_a = fa.result()
+      keys_b, offsets_b, sets_b = fb.result()
+   opcodes = align_sequences(keys_a, keys_b)
+
+   names = {NalUnitType.NAL_UNIT_VPS_NUT: 'VPS', NalUnitType.NAL_UNIT_SPS_NUT: 'SPS',
+            NalUnitType.NAL_UNIT_PPS_NUT: 'PPS'}
+   # (version, digest, record) of each parameter set id
+   versions_a = collections.defaultdict(list)
+   versions_b = collections.defaultdict(list)
+   for versions, sets in ((versions_a, sets_a), (versions_b, sets_b)):
+      for key, digest, record in sets:
+         versions[key].append((len(versions[key]), digest, record))
+   parameter_sets = []
+
+   def version_name(key, version):
+      name = '{0:s} {1:d}'.format(names[key[0]], key[1])
+      if version:
+         name += ' version {0:d}'.format(version + 1)
+      return name
+
+   for key in sorted(set(versions_a) | set(versions_b)):
+      digests_a = set(digest for version, digest, record in versions_a.get(key, []))
+      digests_b = set(digest for version, digest, record in versions_b.get(key, []))
+      va = [v for v in versions_a.get(key, []) if v[1] not in digests_b]
+      vb = [v for v in versions_b.get(key, []) if v[1] not in digests_a]
+      for (version, digest, record), other in zip(va, vb):
+         differences = list(diff_records(record, other[2]))
+         if differences:
+            parameter_sets.append((version_name(key, version), differences))
+      for version, digest, record in va[len(vb):]:
+         parameter_sets.append((version_name(key, version) + ' only in a', []))
+      for version, digest, record in vb[len(va):]:
+         parameter_sets.append((version_name(key, version) + ' only in b', []))
+   return StreamDiff(prefix, suffix, (keys_a, offsets_a), (keys_b, offsets_b), opcodes, parameter_sets)
+
+
+class NalStatistics(object):
+   """
+   NAL unit count and bytes per nal_unit_type, and bytes per
+   (nuh_layer_id, TemporalId)
+   """
+
+   def __init__(self):
+      self.count = [0] * 32
+      self.bytes = [0] * 32
+      self.layer_bytes = {}
+
+   def add(self, nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, length):
+      self.count[nal_unit_type] += 1
+      self.bytes[nal_unit_type] += length
+      key = nuh_layer_id, nuh_temporal_id_plus1 - 1
+      self.layer_bytes[key] = self.layer_bytes.get(key, 0) + length
+
+   def show(self):
+      names = dict((v, k) for k, v in vars(NalUnitType).items() if k.startswith('NAL_UNIT_'))
+      total = sum(self.bytes) or 1
+      print('  {0:<26s} {1:>10s} {2:>14s} {3:>7s}'.format('nal_unit_type', 'count', 'bytes', '%'))
+      for t in range(32):
+         if self.count[t]:
+            print('  {0:2d} {1:<23s} {2:10d} {3:14d} {4:7.2f}'.format(
+               t, names[t], self.count[t], self.bytes[t], 100.0 * self.bytes[t] / total))
+      print('  {0:<26s} {1:>10s} {2:>14s} {3:>7s}'.format('nuh_layer_id TemporalId', '', 'bytes', '%'))
+      for (layer, tid), nbytes in sorted(self.layer_bytes.items()):
+         print('  {0:12d} {1:10d} {2:>10s} {3:14d} {4:7.2f}'.format(
+            layer, tid, '', nbytes, 100.0 * nbytes / total))
+
+
+class ParseProfiler(object):
+   """
+   Per-stage timers and per nal_unit_type counters of a parse, all in
+   nanoseconds: scan() and parse() time the start code scan and
+   parse_nal_unit(), add() any other stage, such as 'show'. While
+   enabled, the emulation prevention byte removal of nal_unit_rbsp() and
+   sei_payload_rbsp() is timed as 'unescape', which 'parse' includes.
+   Nothing is timed unless a ParseProfiler is used: the parse functions
+   themselves carry no instrumentation. counters() returns it all for a
+   metrics exporter.
+   """
+   STAGES = ('scan', 'unescape', 'parse', 'show')
+   UNESCAPE = ('nal_unit_rbsp', 'sei_payload_rbsp')
+
+   def __init__(self):
+      self.stage_ns = dict.fromkeys(self.STAGES, 0)
+      self.stage_calls = dict.fromkeys(self.STAGES, 0)
+      self.count = [0] * 32
+      self.bytes = [0] * 32
+      self.ns = [0] * 32
+      self.saved = {}
+
+   def enable(self):
+      module = globals()
+      for name in self.UNESCAPE:
+         if name not in self.saved:
+            self.saved[name] = module[name]
+            module[name] = self._timed(module[name], 'unescape')
+      return self
+
+   def disable(self):
+      globals().update(self.saved)
+      self.saved.clear()
+
+   def __enter__(self):
+      return self.enable()
+
+   def __exit__(self, *exc):
+      self.disable()
+
+   def _timed(self, fn, stage):
+      def timed(*args):
+         t0 = time.perf_counter_ns()
+         try:
+            return fn(*args)
+         finally:
+            self.add(stage, time.perf_counter_ns() - t0)
+      return timed
+
+   def add(self, stage, ns, calls=1):
+      self.stage_ns[stage] = self.stage_ns.get(stage, 0) + ns
+      self.stage_calls[stage] = self.stage_calls.get(stage, 0) + calls
+
+   def scan(self, nals):
+      """
+      Pass the (offset, length, nal) of nals through, timing each step of
+      the scan as 'scan'
+      """
+      nals = iter(nals)
+      clock = time.perf_counter_ns
+      while True:
+         t0 = clock()
+         nal = next(nals, None)
+         self.add('scan', clock() - t0)
+         if nal is None:
+            return
+         yield nal
+
+   def parse(self, nal, active=None):
+      """
+      parse_nal_unit(nal, active), timed as 'parse' and counted under
+      its nal_unit_type
+      """
+      t0 = time.perf_counter_ns()
+      n, rbsp = parse_nal_unit(nal, active)
+      ns = time.perf_counter_ns() - t0
+      self.add('parse', ns)
+      t = n.nal_unit_type
+      self.count[t] += 1
+      self.bytes[t] += len(nal)
+      self.ns[t] += ns
+      return n, rbsp
+
+   def counters(self):
+      return {
+         'stages': dict((stage, {'ns': self.stage_ns[stage], 'calls': self.stage_calls[stage]})
+                        for stage in self.stage_ns),
+         'nal_unit_types': dict((t, {'count': self.count[t], 'bytes': self.bytes[t], 'ns': self.ns[t]})
+                                for t in range(32) if self.count[t]),
+      }
+
+   def show(self, f=None):
+      f = f or sys.stdout
+      names = dict((v, k) for k, v in vars(NalUnitType).items() if k.startswith('NAL_UNIT_'))
+      f.write('  {0:<26s} {1:>10s} {2:>14s} {3:>10s}\n'.format('stage', 'calls', 'ms', 'us/call'))
+      for stage in self.stage_ns:
+         calls = self.stage_calls[stage]
+         if calls:
+            f.write('  {0:<26s} {1:10d} {2:14.3f} {3:10.3f}\n'.format(
+               stage, calls, self.stage_ns[stage] / 1e6, self.stage_ns[stage] / calls / 1e3))
+      f.write('  {0:<26s} {1:>10s} {2:>14s} {3:>10s} {4:>10s}\n'.format(
+         'nal_unit_type', 'count', 'bytes', 'ms', 'MB/s'))
+      for t in range(32):
+         if self.count[t]:
+            f.write('  {0:2d} {1:<23s} {2:10d} {3:14d} {4:10.3f} {5:10.1f}\n'.format(
+               t, names[t], self.count[t], self.bytes[t], self.ns[t] / 1e6,
+               self.bytes[t] * 1e3 / self.ns[t] if self.ns[t] else 0.0))
+
+
+def iter_nal_units(reader, chunk_size=1 << 16, active=None):
+   """
+   Incremental B.2 byte stream parser for input that arrives in pieces:
+   a pipe, stdin, or a TCP/UDP socket. reader is anything with read1(),
+   read() or recv().
+
+   Yields (offset, length, nal_unit_header, rbsp) as soon as the start
+   code following a NAL unit has been seen, rbsp as from parse_nal_unit()
+   with the ParameterSetStore active.
+   """
+   for offset, length, nal in iter_nal_bytes(reader, chunk_size):
+      n, rbsp = parse_nal_unit(nal, active)
+      yield offset, length, n, rbsp
+
+
+def iter_nal_bytes(reader, chunk_size=1 << 16, keep=PARSED_NAL_UNIT_TYPES):
+   """
+   The byte stream splitting of iter_nal_units(): yields (offset, length,
+   nal) for each NAL unit of reader, as NalSplitter does.
+   """
+   read = getattr(reader, 'read1', None) or getattr(reader, 'read', None) or reader.recv
+   splitter = NalSplitter(keep)
+   while True:
+      chunk = read(chunk_size)
+      for nal in splitter.feed(chunk):
+         yield nal
+      if not chunk:
+         return
+
+
+class NalSplitter(object):
+   """
+   B.2 byte stream splitting for input pushed in pieces, shared by
+   iter_nal_bytes() and aiter_nal_units(). feed() takes the next chunk,
+   b'' at the end of the stream, and returns (offset, length, nal) for
+   each NAL unit completed. Only the NAL unit in progress is buffered,
+   and for NAL unit types not in keep nal is cut down to the
+   nal_unit_header( ), the first payload byte and the last few bytes, so
+   memory does not grow with the length of the stream; length is the
+   full length all the same.
+   """
+
+   def __init__(self, keep=PARSED_NAL_UNIT_TYPES):
+      self.keep = keep
+      self.buf = bytearray()
+      self.base = 0        # stream offset of buf[ 0 ], not counting skipped
+      self.start = -1      # buf offset of the NAL unit in progress, -1 before the first start code
+      self.offset = 0      # stream offset of the NAL unit in progress
+      self.skipped = 0     # payload bytes of the NAL unit in progress dropped from buf
+      self.search = 0
+
+   def feed(self, chunk):
+      buf = self.buf
+      start = self.start
+      nals = []
+      buf += chunk
+      i = buf.find(START_CODE, self.search)
+      while i >= 0 or not chunk:
+         stop = i if i >= 0 else len(buf)
+         if start >= 0:
+            end = stop
+            while end > start + 2 and buf[end - 1] == 0:
+               end -= 1
+            if end > start:
+               nals.append((self.offset, end - start + self.skipped, bytes(buf[start:end])))
+         if i < 0:
+            del buf[:]
+            self.start = -1
+            return nals
+         self.base += self.skipped
+         self.skipped = 0
+         start = i + 3
+         self.offset = self.base + start
+         i = buf.find(START_CODE, start)
+
+      if start < 0:
+         consumed = max(len(buf) - 2, 0)
+      else:
+         consumed = start
+         start = 0
+      del buf[:consumed]
+      self.base += consumed
+      self.start = start
+      if len(buf) > 3 and buf[1] >> 3 not in self.keep:
+         # keep nal_unit_header( ), the first payload byte, which holds
+         # sh_picture_header_in_slice_header_flag for AccessUnitCounter,
+         # and everything from the last nonzero byte on, which may still
+         # turn out to be trailing_zero_8bits in front of the next start code
+         j = len(buf) - 1
+         while j > 3 and buf[j] == 0:
+            j -= 1
+         if j > 3:
+            del buf[3:j]
+            self.skipped += j - 3
+      self.search = max(len(buf) - 2, 0)
+      return nals
+
+
+async def aiter_nal_units(reader, chunk_size=1 << 16, active=None):
+   """
+   asyncio counterpart of iter_nal_units(): reader is an
+   asyncio.StreamReader, or anything with a coroutine read(n). Yields
+   (offset, length, nal_unit_header, rbsp) with the ParameterSetStore
+   active, a new one by default, so that every stream has its own.
+
+   Nothing is read ahead of the consumer: a slow consumer fills the
+   StreamReader buffer and the transport stops reading the input.
+   """
+   if active is None:
+      active = ParameterSetStore()
+   splitter = NalSplitter()
+   while True:
+      chunk = await reader.read(chunk_size)
+      for offset, length, nal in splitter.feed(chunk):
+         n, rbsp = parse_nal_unit(nal, active)
+         yield offset, length, n, rbsp
+      if not chunk:
+         return
+
+
+class _AsyncFileReader(object):
+   """
+   A regular file behind the read(n) coroutine of aiter_nal_units(); disk
+   reads are short enough not to need a thread
+   """
+
+   def __init__(self, f):
+      self.f = f
+
+   async def read(self, n):
+      return self.f.read(n)
+
+
+async def open_async_stream(name):
+   """
+   (reader, writer) for one input of watch_streams(): '-' is stdin,
+   tcp://host:port connects to a TCP server, a FIFO is read as a pipe and
+   any other name as a file. writer is the StreamWriter of a TCP
+   connection, which closes it, else None.
+   """
+   loop = asyncio.get_running_loop()
+   m = re.match(r'tcp://(.*):(\d+)$', name)
+   if m is not None:
+      return await asyncio.open_connection(m.group(1), int(m.group(2)))
+   if name.startswith(('udp://', 'rtp://')):
+      raise ValueError('{0:s}: UDP input needs a datagram endpoint, not a stream reader'.format(name))
+   f = sys.stdin.buffer if name == '-' else open(name, 'rb')
+   if not stat.S_ISFIFO(os.fstat(f.fileno()).st_mode) and name != '-':
+      return _AsyncFileReader(f), None
+   reader = asyncio.StreamReader()
+   await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), f)
+   return reader, None
+
+
+async def watch_streams(names, show=None):
+   """
+   Parse every input of names concurrently in one event loop, each with
+   its own ParameterSetStore. show(name, offset, length, nal_unit_header,
+   rbsp, active) is called for every NAL unit; returns the
+   ParameterSetStore of each input by name.
+   """
+   stores = dict((name, ParameterSetStore()) for name in names)
+
+   async def watch(name):
+      reader, writer = await open_async_stream(name)
+      active = stores[name]
+      try:
+         async for offset, length, n, rbsp in aiter_nal_units(reader, active=active):
+            if show is not None:
+               show(name, offset, length, n, rbsp, active)
+      finally:
+         if writer is not None:
+            writer.close()
+
+   await asyncio.gather(*[watch(name) for name in names])
+   return stores
+
+
+# RFC 9328 payload header types of the packets that do not carry exactly
+# one NAL unit
+RTP_AP = 28
+RTP_FU = 29
+
+
+class RtpDepacketizer(object):
+   """
+   RFC 9328 depacketizer for VVC over RTP: single NAL unit packets,
+   aggregation packets (AP) and fragmentation units (FU). Packets of the
+   first SSRC seen are put back in sequence number order within a jitter
+   window of window packets. A gap that is still open when the window is
+   full counts as loss, and the fragmented NAL unit it falls in is
+   dropped.
+
+   Packets are copied into a pool of window + 1 buffers of mtu bytes, and
+   fragments into one reassembly buffer of max_nal_size bytes, all
+   allocated up front. The NAL units yielded by feed(), receive() and
+   flush() are memoryviews into these buffers, only valid until the next
+   one is yielded, and all of them must be consumed before the next call.
+   Set donl for streams with sprop-max-don-diff > 0, whose packets carry
+   a decoding order number; it is skipped, as packets are only reordered
+   by sequence number.
+   """
+
+   def __init__(self, window=64, mtu=1500, max_nal_size=1 << 20, donl=False):
+      self.window = window
+      self.mtu = mtu
+      self.donl = donl
+      self.pool = [bytearray(mtu) for i in range(window + 1)]
+      self.views = [memoryview(b) for b in self.pool]
+      self.free = list(range(window + 1))
+      self.held = {}          # sequence number -> (pool slot, packet length)
+      self.expected = None    # sequence number of the next packet to depacketize
+      self.ssrc = None
+      self.fu = memoryview(bytearray(max_nal_size))
+      self.fu_length = -1     # bytes in fu, -1 when no fragmented NAL unit is in progress
+      self.offset = 0
+      self.packets = 0
+      self.lost = 0
+      self.late = 0
+      self.dropped = 0
+
+   def feed(self, packet):
+      """
+      Take one RTP packet; yields (offset, length, nal) for each NAL unit
+      it completes, as iter_nal_bytes() does. offset is where the NAL unit
+      would be in an Annex-B stream of the NAL units so far, each after a
+      four byte start code.
+      """
+      n = len(packet)
+      if n > self.mtu:
+         raise ValueError('RTP packet of {0:d} bytes over the mtu of {1:d}'.format(n, self.mtu))
+      slot = self.free[-1]
+      self.views[slot][:n] = packet
+      return self._push(slot, n)
+
+   def receive(self, sock):
+      """
+      feed() the next datagram of sock, received straight into the pool
+      """
+      slot = self.free[-1]
+      return self._push(slot, sock.recv_into(self.pool[slot]))
+
+   def flush(self):
+      """
+      The NAL units of the packets still held, at the end of the stream
+      """
+      return self._release(0)
+
+   def _push(self, slot, n):
+      view = self.views[slot]
+      if n < 12 or view[0] >> 6 != 2:
+         # not RTP version 2
+         self.dropped += 1
+         return ()
+      seq = view[2] << 8 | view[3]
+      ssrc = view[8] << 24 | view[9] << 16 | view[10] << 8 | view[11]
+      if self.ssrc is None:
+         self.ssrc = ssrc
+         self.expected = seq
+      elif ssrc != self.ssrc:
+         self.dropped += 1
+         return ()
+      if (seq - self.expected) & 0xffff >= 0x8000 or seq in self.held:
+         # behind the window or a duplicate
+         self.late += 1
+         return ()
+      self.packets += 1
+      self.free.pop()
+      self.held[seq] = slot, n
+      return self._release(self.window)
+
+   def _release(self, window):
+      held = self.held
+      while held:
+         if self.expected not in held:
+            if len(held) <= window:
+               return
+            # the packets missing in front of the oldest one held are lost
+            oldest = min(held, key=lambda seq: (seq - self.expected) & 0xffff)
+            self.lost += (oldest - self.expected) & 0xffff
+            self.expected = oldest
+            self.fu_length = -1
+         slot, n = held.pop(self.expected)
+         self.expected = (self.expected + 1) & 0xffff
+         for nal in self._payload(self.views[slot], n):
+            yield nal
+         self.free.append(slot)
+
+   def _nal(self, nal):
+      self.offset += 4 + len(nal)
+      return self.offset - len(nal), len(nal), nal
+
+   def _payload(self, view, n):
+      # skip the CSRC list, header extension and padding
+      b = view[0]
+      pos = 12 + (b & 0x0f) * 4
+      if b & 0x10 and pos + 4 <= n:
+         pos += 4 + (view[pos + 2] << 8 | view[pos + 3]) * 4
+      end = n - view[n - 1] if b & 0x20 else n
+      if end - pos < 3:
+         self.dropped += 1
+         return
+      payload_type = view[pos + 1] >> 3
+      donl = 2 if self.donl else 0
+
+      if payload_type == RTP_AP:
+         pos += 2 + donl
+         # an 8-bit DOND comes before every aggregation unit but the first
+         dond = 0
+         while pos + dond + 2 < end:
+            pos += dond
+            size = view[pos] << 8 | view[pos + 1]
+            pos += 2
+            if size < 2 or pos + size > end:
+               self.dropped += 1
+               return
+            yield self._nal(view[pos:pos + size])
+            pos += size
+            dond = 1 if self.donl else 0
+      elif payload_type == RTP_FU:
+         fu_header = view[pos + 2]
+         data = pos + 3
+         fu = self.fu
+         if fu_header & 0x80:
+            # the NAL unit header is the payload header with FuType as nal_unit_type
+            data += donl
+            fu[0] = view[pos]
+            fu[1] = (fu_header & 0x1f) << 3 | view[pos + 1] & 0x07
+            self.fu_length = 2
+         elif self.fu_length < 0:
+            self.dropped += 1
+            return
+         size = end - data
+         if self.fu_length + size > len(fu):
+            self.fu_length = -1
+            self.dropped += 1
+            return
+         fu[self.fu_length:self.fu_length + size] = view[data:end]
+         self.fu_length += size
+         if fu_header & 0x40:
+            nal = fu[:self.fu_length]
+            self.fu_length = -1
+            yield self._nal(nal)
+      else:
+         if donl:
+            # move the NAL unit header over the DONL in place
+            view[pos + 2:pos + 4] = view[pos:pos + 2]
+            pos += 2
+         yield self._nal(view[pos:end])
+
+
+def iter_rtp_nal_bytes(sock, depacketizer=None):
+   """
+   (offset, length, nal) for each NAL unit of the RTP stream received on
+   sock, a bound UDP socket, as RtpDepacketizer yields them. Ends when
+   sock times out, if it has a timeout, with what the jitter window still
+   holds.
+   """
+   if depacketizer is None:
+      depacketizer = RtpDepacketizer()
+   while True:
+      try:
+         nals = depacketizer.receive(sock)
+      except socket.timeout:
+         break
+      for nal in nals:
+         yield nal
+   for nal in depacketizer.flush():
+      yield nal
+
+
+IRAP_NAL_UNIT_TYPES = frozenset((
+   NalUnitType.NAL_UNIT_IDR_W_RADL,
+   NalUnitType.NAL_UNIT_N_LP,
+   NalUnitType.NAL_UNIT_CRA_NUT,
+   NalUnitType.NAL_UNIT_GDR_NUT,
+))
+
+PARAMETER_SET_NAL_UNIT_TYPES = frozenset((
+   NalUnitType.NAL_UNIT_VPS_NUT,
+   NalUnitType.NAL_UNIT_SPS_NUT,
+   NalUnitType.NAL_UNIT_PPS_NUT,
+))
+
+
+def parameter_set_id(nal):
+   """
+   vps_video_parameter_set_id, sps_seq_parameter_set_id or
+   pps_pic_parameter_set_id straight from the first payload byte, which
+   can never be preceded by an emulation_prevention_three_byte
+   """
+   if nal[1] >> 3 == NalUnitType.NAL_UNIT_PPS_NUT:
+      return nal[2] >> 2
+   return nal[2] >> 4
+
+
+class ParameterSetStore(dict):
+   """
+   The VPS, SPS and PPS in force, by (nal_unit_type, parameter set id).
+
+   Every parsed version is also cached under its id and payload bytes, so
+   the copies an encoder repeats in front of each IRAP picture cost one
+   dict lookup instead of a parse. on_change(nal_unit_type, id, old, new)
+   is called when a set replaces one with the same id but other content.
+
+   It also holds the rest of the decoding state slice headers need: the
+   last picture header, a HeaderPlan and a PictureLayout per PPS and the
+   PictureOrderCounter.
+   Parameter sets are kept as compact() records. sei is the SeiParser SEI
+   NAL units go through; it decodes every payload type it knows unless
+   one is given.
+   """
+
+   def __init__(self, on_change=None, maxsize=256, sei=None):
+      dict.__init__(self)
+      self.cache = {}
+      self.payload = {}
+      self.maxsize = maxsize
+      self.on_change = on_change
+      self.hits = 0
+      self.misses = 0
+      self.changes = 0
+      self.picture_header = None
+      self.plans = {}
+      self.layouts = {}
+      self.poc = PictureOrderCounter()
+      self.sei = sei if sei is not None else SeiParser(SEI_PAYLOADS)
+
+   @staticmethod
+   def key(nal):
+      # the payload is hashed as it is in the NAL unit: the same RBSP
+      # always gets the same emulation prevention bytes
+      return nal[1] >> 3, parameter_set_id(nal), bytes(nal[2:])
+
+   def lookup(self, nal):
+      """
+      The parsed parameter set for nal if an identical one was seen, made
+      the one in force, else None
+      """
+      key = self.key(nal)
+      rbsp = self.cache.get(key)
+      if rbsp is None:
+         self.misses += 1
+         return None
+      self.hits += 1
+      self._activate(key, rbsp)
+      return rbsp
+
+   def add(self, nal, rbsp):
+      """
+      Cache rbsp, parsed from nal, and make it the one in force. Returns
+      the compact record kept.
+      """
+      rbsp = compact(rbsp)
+      key = self.key(nal)
+      if len(self.cache) >= self.maxsize:
+         # a stream cycling through ever new content must not grow the cache
+         del self.cache[next(iter(self.cache))]
+      self.cache[key] = rbsp
+      self._activate(key, rbsp)
+      return rbsp
+
+   def _activate(self, key, rbsp):
+      nal_unit_type, ps_id, payload = key
+      old = self.payload.get((nal_unit_type, ps_id))
+      if old is not None and old != payload:
+         self.changes += 1
+         if self.on_change is not None:
+            self.on_change(nal_unit_type, ps_id, self[nal_unit_type, ps_id], rbsp)
+      self.payload[nal_unit_type, ps_id] = payload
+      self[nal_unit_type, ps_id] = rbsp
+
+   def parameter_sets(self, pps_id):
+      """
+      The SPS and PPS in force for the PPS pps_id
+      """
+      pps = self.get((NalUnitType.NAL_UNIT_PPS_NUT, pps_id))
+      if pps is None:
+         raise MissingParameterSet('PPS {0:d} not received'.format(pps_id))
+      sps = self.get((NalUnitType.NAL_UNIT_SPS_NUT, pps.pps_seq_parameter_set_id))
+      if sps is None:
+         raise MissingParameterSet('SPS {0:d} not received'.format(pps.pps_seq_parameter_set_id))
+      return sps, pps
+
+   def plan(self, pps_id):
+      """
+      The HeaderPlan for the PPS pps_id and its SPS, rebuilt only when
+      either of them was replaced since the last call
+      """
+      sps, pps = self.parameter_sets(pps_id)
+      plan = self.plans.get(pps_id)
+      if plan is None or plan.pps is not pps or plan.sps is not sps:
+         plan = self.plans[pps_id] = HeaderPlan(sps, pps, self.layout(pps_id))
+      return plan
+
+   def layout(self, pps_id):
+      """
+      The PictureLayout for the PPS pps_id and its SPS, cached like plan()
+      """
+      sps, pps = self.parameter_sets(pps_id)
+      cached = self.layouts.get(pps_id)
+      if cached is None or cached[0] is not sps or cached[1] is not pps:
+         cached = self.layouts[pps_id] = sps, pps, PictureLayout(sps, pps)
+      return cached[2]
+
+
+class SegmentContext(object):
+   """
+   The decoding state at the start of a segment of split_at_irap(): the
+   keys of the parameter sets cached in a ParameterSetStore, in the order
+   they were added, those of the ones in force, and prev and clvs of its
+   PictureOrderCounter. store() makes that ParameterSetStore again in a
+   worker.
+   """
+   __slots__ = ('parameter_sets', 'in_force', 'prev', 'clvs', 'version')
+
+   def __init__(self, active, last=None):
+      """
+      The context of active as it is now. The keys are shared with last
+      when the parameter sets did not change since.
+      """
+      self.version = (active.misses, active.changes)
+      if last is not None and last.version == self.version:
+         self.parameter_sets = last.parameter_sets
+         self.in_force = last.in_force
+      else:
+         self.parameter_sets = list(active.cache)
+         self.in_force = [key + (payload,) for key, payload in active.payload.items()]
+      self.prev = dict(active.poc.prev)
+      self.clvs = active.poc.clvs
+
+   def store(self):
+      active = ParameterSetStore()
+      for keys in (self.parameter_sets, self.in_force):
+         for nal_unit_type, ps_id, payload in keys:
+            parse_nal_unit(bytes((0, nal_unit_type << 3 | 1)) + payload, active)
+      active.misses = active.hits = active.changes = 0
+      active.poc.prev.update(self.prev)
+      active.poc.clvs = self.clvs
+      return active
+
+
+def picture_order_count_of(nal, active):
+   """
+   The picture_order_count_header of a picture header NAL unit, or of the
+   picture header in the slice header of a VCL NAL unit; None without the
+   parameter sets it refers to
+   """
+   s = BitReader(nal_unit_rbsp(nal[:64])[0])
+   if nal[1] >> 3 != NalUnitType.NAL_UNIT_PH_NUT:
+      s.skip(1)   # sh_picture_header_in_slice_header_flag
+   try:
+      return picture_order_count_header(s, active)
+   except MissingParameterSet:
+      return None
+
+
+def split_at_irap(buf, segment_size):
+   """
+   Cut buf into segments of at least segment_size bytes, each starting at
+   the first NAL unit of an access unit holding an IRAP picture.
+
+   Yields (start, end, context): byte offsets for scan_nal_units() and the
+   SegmentContext at start, which a segment needs to be parsed as in a
+   sequential run: a segment may refer to parameter sets it does not
+   repeat, and a CRA picture carries on the picture order count of the
+   pictures before it. Only parameter sets and the start of picture
+   headers are parsed to follow that state, and of the pictures with a
+   TemporalId above 0 only the first of a layer.
+   """
+   active = ParameterSetStore()
+   poc = active.poc
+   seg_start = 0
+   context = SegmentContext(active)
+   cut = 0             # start code of the first NAL unit after the last VCL NAL unit
+   cut_context = context
+   last_vcl = None     # nal_unit_type of the previous NAL unit if it was a VCL NAL unit
+   for offset, length, nal in scan_nal_units(buf):
+      nal_unit_type = nal[1] >> 3
+      # only a picture with TemporalId 0 can be prevTid0Pic or start a CLVS
+      # of a layer already seen
+      poc_wanted = nal[1] & 7 == 1 or nal[0] & 0x3f not in poc.prev
+      if nal_unit_type >= NalUnitType.NAL_UNIT_OPI_NUT:
+         if last_vcl is not None:
+            cut = offset - 3
+            cut_context = SegmentContext(active, cut_context)
+         last_vcl = None
+         if nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES:
+            parse_nal_unit(nal, active)
+         elif nal_unit_type == NalUnitType.NAL_UNIT_PH_NUT:
+            if not poc_wanted:
+               poc.picture_header(None)
+            else:
+               ph = picture_order_count_of(nal, active)
+               if ph is not None:
+                  poc.picture_header(ph)
+         elif nal_unit_type == NalUnitType.NAL_UNIT_EOS_NUT:
+            poc.update(nal_unit_header(BitReader(nal[:2])), None)
+         continue
+      if nal_unit_type in IRAP_NAL_UNIT_TYPES:
+         if last_vcl is not None and last_vcl not in IRAP_NAL_UNIT_TYPES:
+            # IRAP picture right after a slice with nothing in between
+            cut = offset - 3
+            cut_context = SegmentContext(active, cut_context)
+         if last_vcl not in IRAP_NAL_UNIT_TYPES and cut - seg_start >= segment_size:
+            yield seg_start, cut, context
+            seg_start = cut
+            context = cut_context
+      if len(nal) > 2 and nal[2] >> 7:
+         # sh_picture_header_in_slice_header_flag
+         if poc_wanted:
+            ph = picture_order_count_of(nal, active)
+            if ph is not None:
+               poc.slice(nal_unit_header(BitReader(nal[:2])), ph)
+      elif poc.new_picture:
+         poc.slice(nal_unit_header(BitReader(nal[:2])))
+      last_vcl = nal_unit_type
+   yield seg_start, len(buf), context
+
+
+_segment_buf = None
+_segment_render = None
+
+
+def _init_segment_worker(filename, render):
+   global _segment_buf, _segment_render
+   _segment_buf = map_bitstream(filename)
+   _segment_render = render
+
+
+def _parse_segment(segment):
+   start, end, context = segment
+   active = context.store()
+   nals = ((offset, length) + parse_nal_unit(nal, active)
+           for offset, length, nal in scan_nal_units(_segment_buf, start, end))
+   if _segment_render is None:
+      results = list(nals)
+   else:
+      results = _segment_render(nals, active)
+   return results, (active.misses, active.hits, active.changes)
+
+
+def parse_parallel(filename, jobs, segment_size=None, active=None, render=None):
+   """
+   Parse filename with jobs worker processes. The stream is cut with
+   split_at_irap() while the workers parse, every worker maps the file
+   itself and parses whole segments from their SegmentContext; results
+   come back in stream order as (offset, length, nal_unit_header, rbsp),
+   the same as those of a sequential parse.
+
+   Sending parsed syntax structures back costs the parent about as much
+   as parsing them. With render, a module-level function, the worker
+   calls render(nals, active) on the results of its segment and its
+   ParameterSetStore, and the items of the list it returns are yielded
+   instead. The parameter set counts of the workers are added to those
+   of active.
+   """
+   buf = map_bitstream(filename)
+   if segment_size is None:
+      segment_size = max(len(buf) // (jobs * 4), 1 << 20)
+   segments = split_at_irap(buf, segment_size)
+   pending = collections.deque()
+   with concurrent.futures.ProcessPoolExecutor(
+         jobs, initializer=_init_segment_worker, initargs=(filename, render)) as executor:
+      while True:
+         # keep a few segments per worker queued
+         for segment in segments:
+            pending.append(executor.submit(_parse_segment, segment))
+            if len(pending) > 2 * jobs:
+               break
+         if not pending:
+            break
+         results, (misses, hits, changes) = pending.popleft().result()
+         if active is not None:
+            active.misses += misses
+            active.hits += hits
+            active.changes += changes
+         for result in results:
+            yield result
+
+
+# 7.4.2.4.3: NAL unit types that, after the last VCL NAL unit of a picture,
+# start the next picture unit
+PU_START_NAL_UNIT_TYPES = frozenset((
+   NalUnitType.NAL_UNIT_AUD_NUT,
+   NalUnitType.NAL_UNIT_OPI_NUT,
+   NalUnitType.NAL_UNIT_DCI_NUT,
+   NalUnitType.NAL_UNIT_VPS_NUT,
+   NalUnitType.NAL_UNIT_SPS_NUT,
+   NalUnitType.NAL_UNIT_PPS_NUT,
+   NalUnitType.NAL_UNIT_PREFIX_APS_NUT,
+   NalUnitType.NAL_UNIT_PH_NUT,
+   NalUnitType.NAL_UNIT_PREFIX_SEI_NUT,
+   NalUnitType.NAL_UNIT_RSV_NVCL_26,
+   NalUnitType.NAL_UNIT_UNSPEC_28,
+   NalUnitType.NAL_UNIT_UNSPEC_29,
+))
+
+
+class AccessUnitCounter(object):
+   """
+   7.4.2.4.3 Order of PUs and their association to AUs, decided from NAL
+   unit headers and the first slice header bit alone. Call with each NAL
+   unit in decoding order; returns the number of its access unit.
+   """
+   __slots__ = ('au', 'vcl_seen', 'layer')
+
+   def __init__(self):
+      self.au = -1
+      self.vcl_seen = True   # the NAL unit before the first starts nothing
+      self.layer = 64
+
+   def __call__(self, nal):
+      nal_unit_type = nal[1] >> 3
+      nuh_layer_id = nal[0] & 0x3f
+      if nal_unit_type < NalUnitType.NAL_UNIT_OPI_NUT:
+         # sh_picture_header_in_slice_header_flag: the slice is a picture of its own
+         new_pu = self.vcl_seen and (len(nal) < 3 or nal[2] >> 7)
+         vcl = True
+      else:
+         new_pu = self.vcl_seen and nal_unit_type in PU_START_NAL_UNIT_TYPES
+         vcl = False
+      if new_pu:
+         if nal_unit_type == NalUnitType.NAL_UNIT_AUD_NUT or nuh_layer_id <= self.layer:
+            self.au += 1
+         self.layer = nuh_layer_id
+         self.vcl_seen = False
+      if vcl:
+         self.vcl_seen = True
+      return self.au
+
+
+class AccessUnit(object):
+   """
+   Summary of one access unit: index, offset of its first NAL unit,
+   nbytes in its NAL units, nal_count, and irap when it has an IRAP
+   picture
+   """
+   __slots__ = ('index', 'offset', 'nbytes', 'nal_count', 'irap')
+
+   def __init__(self, index, offset):
+      self.index = index
+      self.offset = offset
+      self.nbytes = 0
+      self.nal_count = 0
+      self.irap = False
+
+
+def iter_access_units(nals, active=None):
+   """
+   Group (offset, length, nal) from scan_nal_units() into AccessUnits
+   with AccessUnitCounter, yielding each once the next one starts.
+   Parameter sets are parsed into the ParameterSetStore active, when
+   given, before the access unit holding them is yielded.
+   """
+   counter = AccessUnitCounter()
+   au = None
+   for offset, length, nal in nals:
+      index = counter(nal)
+      if au is None or index != au.index:
+         if au is not None:
+            yield au
+         au = AccessUnit(index, offset)
+      nal_unit_type = nal[1] >> 3
+      au.nbytes += length
+      au.nal_count += 1
+      if nal_unit_type in IRAP_NAL_UNIT_TYPES:
+         au.irap = True
+      elif active is not None and nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES:
+         parse_nal_unit(nal, active)
+   if au is not None:
+      yield au
+
+
+def hrd_timing(ps, ols=0):
+   """
+   (picture_duration, bit_rate, cpb_size, cbr) from the timing and HRD
+   parameters of an SPS or of output layer set ols of a VPS, for the
+   highest sublayer and SchedSelIdx 0, NAL HRD preferred over VCL HRD.
+   Entries are None when the parameter set does not signal them, as a
+   VPS does not for a single-layer OLS: the SPS of its layer does.
+   """
+   hrd = getattr(ps, 'general_timing_hrd_parameters', None)
+   if hrd is None:
+      return None, None, None, None
+   if isinstance(ps.ols_timing_hrd_parameters, list):
+      if ps.NumLayersInOls[ ols ] < 2:
+         return None, None, None, None
+      # vps_ols_timing_hrd_idx is indexed by MultiLayerOlsIdx[ ols ] (7.4.3.3)
+      MultiLayerOlsIdx = sum(1 for n in ps.NumLayersInOls[:ols] if n > 1)
+      i = ps.vps_ols_timing_hrd_idx[ MultiLayerOlsIdx ]
+      ols_hrd = ps.ols_timing_hrd_parameters[ i ]
+      Htid = ps.vps_hrd_max_tid[ i ]
+   else:
+      ols_hrd = ps.ols_timing_hrd_parameters
+      Htid = ps.sps_max_sublayers_minus1
+   picture_duration = None
+   if ols_hrd.fixed_pic_rate_within_cvs_flag[ Htid ] and hrd.time_scale:
+      # 7.4.6.2: ClockTick times elemental_duration_in_tc_minus1 + 1
+      picture_duration = hrd.num_units_in_tick * (ols_hrd.elemental_duration_in_tc_minus1[ Htid ] + 1) / \
+         hrd.time_scale
+   sub = ols_hrd.nal_sublayer_hrd_parameters[ Htid ] or ols_hrd.vcl_sublayer_hrd_parameters[ Htid ]
+   if sub is None:
+      return picture_duration, None, None, None
+   # 7.4.6.3 (7-35), (7-37)
+   bit_rate = (sub.bit_rate_value_minus1[ 0 ] + 1) << (6 + hrd.bit_rate_scale)
+   cpb_size = (sub.cpb_size_value_minus1[ 0 ] + 1) << (4 + hrd.cpb_size_scale)
+   return picture_duration, bit_rate, cpb_size, bool(sub.cbr_flag[ 0 ])
+
+
+class BitrateMonitor(object):
+   """
+   Rolling bitrate over the last windows[ i ] seconds of access units
+   arriving every picture_duration seconds, with the peak of each window.
+   Memory is one deque of AU sizes per window.
+   """
+
+   def __init__(self, picture_duration, windows=(1.0,)):
+      self.picture_duration = picture_duration
+      self.windows = tuple(windows)
+      self.sizes = [collections.deque(maxlen=max(int(round(w / picture_duration)), 1)) for w in self.windows]
+      self.sums = [0] * len(self.windows)
+      self.peak = [0.0] * len(self.windows)
+      self.peak_au = [None] * len(self.windows)
+      self.count = 0
+
+   def add(self, nbytes):
+      """
+      Account for the next access unit; returns the bitrate in bit/s of
+      each window ending with it
+      """
+      bits = nbytes * 8
+      rates = []
+      for i, sizes in enumerate(self.sizes):
+         if len(sizes) == sizes.maxlen:
+            self.sums[i] -= sizes[0]
+         sizes.append(bits)
+         self.sums[i] += bits
+         rate = self.sums[i] / (len(sizes) * self.picture_duration)
+         # only a full window can set the peak
+         if len(sizes) == sizes.maxlen and rate > self.peak[i]:
+            self.peak[i] = rate
+            self.peak_au[i] = self.count
+         rates.append(rate)
+      self.count += 1
+      return rates
+
+
+class CpbSimulator(object):
+   """
+   Annex C leaky bucket: access units enter the CPB at bit_rate bit/s and
+   AU n is removed at initial_delay + n * picture_duration. With cbr the
+   bits arrive back to back; otherwise an AU does not start to arrive
+   before its removal time minus initial_delay (C.2.2). Only the access
+   units still in the CPB are kept.
+   """
+
+   def __init__(self, bit_rate, cpb_size, picture_duration, cbr=False, initial_delay=None):
+      self.bit_rate = bit_rate
+      self.cpb_size = cpb_size
+      self.picture_duration = picture_duration
+      self.cbr = cbr
+      # without a buffering period SEI: the time to fill the CPB
+      self.initial_delay = cpb_size / bit_rate if initial_delay is None else initial_delay
+      self.n = 0
+      self.final_arrival = 0.0
+      self.pending = collections.deque()   # (au, bits, removal time, underflow) in the CPB
+      self.level = 0                       # bits of the AUs in pending
+      self.underflows = 0
+      self.overflows = 0
+      self.max_level = 0
+
+   def removal_time(self, n):
+      return self.initial_delay + n * self.picture_duration
+
+   def add(self, nbytes):
+      """
+      Feed the next access unit. Returns (au, level, underflow, overflow)
+      for each access unit removed meanwhile, level being the CPB
+      fullness in bits just before its removal.
+      """
+      n = self.n
+      bits = nbytes * 8
+      t_r = self.removal_time(n)
+      t_start = self.final_arrival
+      if not self.cbr:
+         t_start = max(t_start, t_r - self.initial_delay)
+      t_final = t_start + bits / self.bit_rate
+      removed = self._remove_until(t_final, t_start)
+      underflow = t_final > t_r
+      if underflow:
+         # C.4: the AU is removed once it is complete
+         self.underflows += 1
+         t_r = t_final
+      self.pending.append((n, bits, t_r, underflow))
+      self.level += bits
+      self.final_arrival = t_final
+      self.n += 1
+      return removed
+
+   def flush(self):
+      """
+      Remove the access units left at the end of the stream
+      """
+      return self._remove_until(float('inf'), float('inf'))
+
+   def _remove_until(self, t, t_start):
+      # AUs due by t, while the AU arriving from t_start on is partly in
+      removed = []
+      while self.pending and self.pending[0][2] <= t:
+         au, bits, t_r, underflow = self.pending.popleft()
+         level = self.level + max(t_r - t_start, 0) * self.bit_rate
+         overflow = level > self.cpb_size
+         if overflow:
+            self.overflows += 1
+         self.max_level = max(self.max_level, level)
+         removed.append((au, level, underflow, overflow))
+         self.level -= bits
+      return removed
+
+
+class NalIndex(object):
+   """
+   Sidecar index of an Annex-B file: offset, length, nal_unit_type,
+   nuh_layer_id, nuh_temporal_id_plus1 and access unit number of every NAL
+   unit, kept as array columns and stored as <file>.idx. NAL units are
+   also listed by type, so queries by AU or type are binary searches or
+   slices instead of a scan of the stream.
+   """
+   MAGIC = b'VVCIDX\x00\x02'
+   HEADER = struct.Struct('<8sQqQ32s')   # magic, file size, st_mtime_ns, count, digest
+   COLUMNS = (('offset', 'Q'), ('length', 'I'), ('nal_unit_type', 'B'), ('nuh_layer_id', 'B'),
+              ('nuh_temporal_id_plus1', 'B'), ('au', 'I'), ('by_type', 'I'))
+
+   def __init__(self):
+      for name, typecode in self.COLUMNS:
+         setattr(self, name, array.array(typecode))
+      self.type_start = array.array('Q', [0] * 33)
+
+   def __len__(self):
+      return len(self.offset)
+
+   @classmethod
+   def build(cls, buf):
+      idx = cls()
+      counter = AccessUnitCounter()
+      for offset, length, nal in scan_nal_units(buf):
+         idx.offset.append(offset)
+         idx.length.append(length)
+         idx.nal_unit_type.append(nal[1] >> 3)
+         idx.nuh_layer_id.append(nal[0] & 0x3f)
+         idx.nuh_temporal_id_plus1.append(nal[1] & 7)
+         idx.au.append(counter(nal))
+      idx.sort_by_type()
+      return idx
+
+   def sort_by_type(self):
+      count = [0] * 32
+      for t in self.nal_unit_type:
+         count[t] += 1
+      for t in range(32):
+         self.type_start[t + 1] = self.type_start[t] + count[t]
+      fill = list(self.type_start[:32])
+      self.by_type = array.array('I', [0] * len(self))
+      for i, t in enumerate(self.nal_unit_type):
+         self.by_type[fill[t]] = i
+         fill[t] += 1
+
+   @staticmethod
+   def digest(filename):
+      """
+      blake2b of the whole of filename, checked when its mtime changed
+      """
+      h = hashlib.blake2b(digest_size=32)
+      h.update(map_bitstream(filename))
+      return h.digest()
+
+   def save(self, path, filename):
+      st = os.stat(filename)
+      with open(path + '.tmp', 'wb') as f:
+         f.write(self.HEADER.pack(self.MAGIC, st.st_size, st.st_mtime_ns, len(self), self.digest(filename)))
+         for name, typecode in self.COLUMNS + (('type_start', 'Q'),):
+            column = getattr(self, name)
+            if sys.byteorder == 'big':
+               column = array.array(typecode, column)
+               column.byteswap()
+            column.tofile(f)
+      os.replace(path + '.tmp', path)
+
+   @classmethod
+   def load(cls, path, filename):
+      """
+      Read path, or return None if it is missing or was built for a
+      different version of filename
+      """
+      try:
+         f = open(path, 'rb')
+      except OSError:
+         return None
+      with f:
+         header = f.read(cls.HEADER.size)
+         if len(header) != cls.HEADER.size:
+            return None
+         magic, size, mtime_ns, count, digest = cls.HEADER.unpack(header)
+         st = os.stat(filename)
+         if magic != cls.MAGIC or size != st.st_size:
+            return None
+         if mtime_ns != st.st_mtime_ns and digest != cls.digest(filename):
+            return None
+         idx = cls()
+         try:
+            for name, typecode in cls.COLUMNS + (('type_start', 'Q'),):
+               column = array.array(typecode)
+               column.fromfile(f, 33 if name == 'type_start' else count)
+               if sys.byteorder == 'big':
+                  column.byteswap()
+               setattr(idx, name, column)
+         except EOFError:
+            return None
+      return idx
+
+   @classmethod
+   def open(cls, filename, buf=None):
+      """
+      The index of filename from <filename>.idx, built and saved first if
+      that is missing or stale
+      """
+      path = filename + '.idx'
+      idx = cls.load(path, filename)
+      if idx is None:
+         idx = cls.build(map_bitstream(filename) if buf is None else buf)
+         try:
+            idx.save(path, filename)
+         except OSError:
+            pass
+      return idx
+
+   def access_unit(self, au):
+      """
+      range of the NAL unit indices of access unit au
+      """
+      return range(bisect.bisect_left(self.au, au), bisect.bisect_right(self.au, au))
+
+   def of_type(self, nal_unit_type):
+      """
+      NAL unit indices of the given nal_unit_type, in stream order
+      """
+      return self.by_type[self.type_start[nal_unit_type]:self.type_start[nal_unit_type + 1]]
+
+   def at(self, offset):
+      """
+      index of the NAL unit containing byte offset
+      """
+      return bisect.bisect_right(self.offset, offset) - 1
+
+   def parameter_sets(self, buf, start, stop):
+      """
+      indices of the last VPS, SPS and PPS of each layer and id among NAL
+      units start to stop - 1, in stream order
+      """
+      last = {}
+      for nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES:
+         of_type = self.of_type(nal_unit_type)
+         for k in range(bisect.bisect_left(of_type, stop) - 1, bisect.bisect_left(of_type, start) - 1, -1):
+            i = of_type[k]
+            key = nal_unit_type, self.nuh_layer_id[i], parameter_set_id(self.nal(buf, i)[2])
+            if key not in last:
+               last[key] = i
+      return sorted(last.values())
+
+   def select(self, buf, selected, active):
+      """
+      (offset, length, memoryview) of the NAL units of indices selected,
+      in stream order. The parameter sets in force for each are parsed
+      into the ParameterSetStore active first, without being yielded.
+      """
+      start = 0
+      for i in sorted(selected):
+         for j in self.parameter_sets(buf, start, i):
+            parse_nal_unit(self.nal(buf, j)[2], active)
+         start = i + 1
+         yield self.nal(buf, i)
+
+   def nal(self, buf, i):
+      """
+      (offset, length, memoryview) of NAL unit i, as from scan_nal_units()
+      """
+      offset = self.offset[i]
+      return offset, self.length[i], memoryview(buf)[offset:offset + self.length[i]]
+
+
+def nal_record(offset, length, n, rbsp):
+   """
+   One NAL unit as a dict for the record writers below
+   """
+   return {
+      'offset': offset,
+      'length': length,
+      'nal_unit_header': n.as_dict(),
+      'rbsp': None if rbsp is None else rbsp.as_dict(),
+   }
+
+
+def flatten_record(record, prefix=''):
+   """
+   Yield (name, value) for every syntax element of record with a dotted
+   name such as rbsp.profile_tier_level.general_level_idc. Lists of syntax
+   structures are expanded as name[ i ]; lists of values stay lists.
+   """
+   for name, value in record.items():
+      name = prefix + name
+      if isinstance(value, dict):
+         for item in flatten_record(value, name + '.'):
+            yield item
+      elif isinstance(value, list) and any(isinstance(v, dict) for v in _flatten(value)):
+         for item in _flatten_list(value, name):
+            yield item
+      else:
+         yield name, value
+
+
+def _flatten_list(value, name):
+   for i, v in enumerate(value):
+      item = '{0}[{1:d}]'.format(name, i)
+      if isinstance(v, dict):
+         for x in flatten_record(v, item + '.'):
+            yield x
+      elif isinstance(v, list):
+         for x in _flatten_list(v, item):
+            yield x
+      else:
+         yield item, v
+
+
+class RecordWriter(object):
+   """
+   Collects records from nal_record() and writes them to the text file f
+   in batches of batch_size, one f.write() per batch
+   """
+
+   def __init__(self, f, batch_size=1024):
+      self.f = f
+      self.batch_size = batch_size
+      self.batch = []
+
+   def write(self, record):
+      self.batch.append(record)
+      if len(self.batch) >= self.batch_size:
+         self.flush()
+
+   def flush(self):
+      if self.batch:
+         self.f.write(self.encode(self.batch))
+         self.batch = []
+      self.f.flush()
+
+   def close(self):
+      self.flush()
+
+   def encode(self, records):
+      raise NotImplementedError
+
+
+class TextWriter(RecordWriter):
+   """
+   The format of show()
+   """
+
+   def encode(self, records):
+      out = []
+      for record in records:
+         out.append('\n!! Found NAL @ offset {0:d} ({0:#x})\n'.format(record['offset']))
+         out.append(format_record(record['nal_unit_header'], '', '  '))
+         if record['rbsp'] is not None:
+            out.append(format_record(record['rbsp']))
+      return ''.join(out)
+
+
+class JsonLinesWriter(RecordWriter):
+   """
+   One JSON object per NAL unit and line
+   """
+
+   def encode(self, records):
+      dumps = json.JSONEncoder(separators=(',', ':')).encode
+      return ''.join([dumps(record) + '\n' for record in records])
+
+
+class CsvWriter(RecordWriter):
+   """
+   Long format CSV, one row per syntax element:
+   offset,nal_unit_type,name,value. List values are written as JSON.
+   """
+
+   def __init__(self, f, batch_size=1024):
+      RecordWriter.__init__(self, f, batch_size)
+      self.f.write('offset,nal_unit_type,name,value\r\n')
+
+   def encode(self, records):
+      out = io.StringIO()
+      writer = csv.writer(out)
+      for record in records:
+         offset = record['offset']
+         nal_unit_type = record['nal_unit_header']['nal_unit_type']
+         writer.writerows((offset, nal_unit_type, name, json.dumps(value) if isinstance(value, list) else value)
+                          for name, value in flatten_record(record))
+      return out.getvalue()
+
+
+class ColumnarWriter(RecordWriter):
+   """
+   Wide table, one row per NAL unit and one column per flattened syntax
+   element, null where a NAL unit does not have it. close() writes it to
+   path as Parquet, or as an Arrow IPC file when path ends in .arrow;
+   both need pyarrow.
+   """
+
+   def __init__(self, path, batch_size=1024):
+      RecordWriter.__init__(self, None, batch_size)
+      self.path = path
+      self.columns = {}
+      self.rows = 0
+
+   def flush(self):
+      for record in self.batch:
+         for name, value in flatten_record(record):
+            column = self.columns.get(name)
+            if column is None:
+               column = self.columns[name] = [None] * self.rows
+            column.append(value)
+         self.rows += 1
+         for column in self.columns.values():
+            if len(column) < self.rows:
+               column.append(None)
+      self.batch = []
+
+   def table(self):
+      import pyarrow
+      self.flush()
+      return pyarrow.table(self.columns)
+
+   def close(self):
+      table = self.table()
+      if self.path.endswith('.arrow'):
+         import pyarrow.ipc
+         with pyarrow.ipc.new_file(self.path, table.schema) as f:
+            f.write_table(table)
+      else:
+         import pyarrow.parquet
+         pyarrow.parquet.write_table(table, self.path)
+
+
+OUTPUT_FORMATS = {
+   'text': TextWriter,
+   'jsonl': JsonLinesWriter,
+   'csv': CsvWriter,
+   'parquet': ColumnarWriter,
+   'arrow': ColumnarWriter,
+}
+
+
+# file name extensions catalog_tree() picks up
+CATALOG_EXTENSIONS = ('.vvc', '.266', '.h266', '.mp4')
+
+CATALOG_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+   path TEXT PRIMARY KEY,
+   size INTEGER,
+   mtime_ns INTEGER,
+   nal_units INTEGER,
+   width INTEGER,
+   height INTEGER,
+   bit_depth INTEGER,
+   chroma_format_idc INTEGER,
+   error TEXT
+);
+CREATE TABLE IF NOT EXISTS nal_counts (
+   path TEXT,
+   nal_unit_type INTEGER,
+   count INTEGER,
+   bytes INTEGER,
+   PRIMARY KEY (path, nal_unit_type)
+);
+CREATE TABLE IF NOT EXISTS parameter_sets (
+   path TEXT,
+   nal_unit_type INTEGER,
+   id INTEGER,
+   fields TEXT
+);
+CREATE INDEX IF NOT EXISTS parameter_sets_path ON parameter_sets (path);
+'''
+
+
+def catalog_file(path):
+   """
+   The catalog entry of one file, made in a worker process of
+   catalog_tree(): the files row (path, size, mtime_ns, nal_units, width,
+   height, bit_depth, chroma_format_idc, error), (nal_unit_type, count,
+   bytes) per NAL unit type and (nal_unit_type, id, fields) for every
+   distinct parameter set, fields its as_dict() in JSON. Resolution, bit
+   depth and chroma format are those of the last SPS in the file. A file
+   that cannot be read or parsed, or is gone, gets its error instead.
+   """
+   size = mtime_ns = sps = error = None
+   stats = NalStatistics()
+   active = ParameterSetStore()
+   try:
+      st = os.stat(path)
+      size, mtime_ns = st.st_size, st.st_mtime_ns
+      for offset, length, nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, rbsp in \
+            scan_headers(map_bitstream(path), PARAMETER_SET_NAL_UNIT_TYPES, active):
+         stats.add(nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, length)
+         if nal_unit_type == NalUnitType.NAL_UNIT_SPS_NUT and rbsp is not None:
+            sps = rbsp
+   except (OSError, EOFError, ValueError, LookupError, TypeError) as e:
+      error = '{0:s}: {1:s}'.format(type(e).__name__, str(e))
+   entry = (path, size, mtime_ns, sum(stats.count),
+            None if sps is None else sps.sps_pic_width_max_in_luma_samples,
+            None if sps is None else sps.sps_pic_height_max_in_luma_samples,
+            None if sps is None else sps.BitDepth,
+            None if sps is None else sps.sps_chroma_format_idc,
+            error)
+   counts = [(t, stats.count[t], stats.bytes[t]) for t in range(32) if stats.count[t]]
+   dumps = json.JSONEncoder(separators=(',', ':')).encode
+   parameter_sets = [(nal_unit_type, ps_id, dumps(rbsp.as_dict()))
+                     for (nal_unit_type, ps_id, payload), rbsp in active.cache.items()]
+   return entry, counts, parameter_sets
+
+
+def catalog_tree(roots, database, jobs=None, batch=256):
+   """
+   Catalog every file with a CATALOG_EXTENSIONS name under the
+   directories roots, or the files themselves, into the SQLite database
+   with jobs worker processes, all CPUs by default. Files whose size
+   and mtime match their row are skipped, and rows of files gone from
+   under roots are deleted. Returns the counts of files (scanned,
+   unchanged, removed, with errors).
+   """
+   db = sqlite3.connect(database)
+   try:
+      db.execute('PRAGMA journal_mode=WAL')
+      db.executescript(CATALOG_SCHEMA)
+      known = dict((path, (size, mtime_ns)) for path, size, mtime_ns in
+                   db.execute('SELECT path, size, mtime_ns FROM files'))
+      todo = []
+      seen = set()
+      prefixes = []
+      for root in roots:
+         root = os.path.abspath(root)
+         if os.path.isfile(root):
+            walk = [(os.path.dirname(root), [], [os.path.basename(root)])]
+            prefixes.append(root)
+         else:
+            walk = os.walk(root)
+            prefixes.append(os.path.join(root, ''))
+         for dirpath, dirnames, filenames in walk:
+            dirnames.sort()
+            for name in sorted(filenames):
+               if not name.lower().endswith(CATALOG_EXTENSIONS):
+                  continue
+               path = os.path.join(dirpath, name)
+               try:
+                  st = os.stat(path)
+               except OSError:
+                  continue
+               seen.add(path)
+               if known.get(path) != (st.st_size, st.st_mtime_ns):
+                  todo.append(path)
+
+      removed = [path for path in known if path not in seen and path.startswith(tuple(prefixes))]
+      for path in removed:
+         for table in ('files', 'nal_counts', 'parameter_sets'):
+            db.execute('DELETE FROM {0:s} WHERE path = ?'.format(table), (path,))
+
+      errors = 0
+      with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+         for i, (entry, counts, parameter_sets) in enumerate(executor.map(catalog_file, todo, chunksize=16)):
+            path = entry[0]
+            if entry[-1] is not None:
+               errors += 1
+            db.execute('DELETE FROM nal_counts WHERE path = ?', (path,))
+            db.execute('DELETE FROM parameter_sets WHERE path = ?', (path,))
+            db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', entry)
+            db.executemany('INSERT INTO nal_counts VALUES (?, ?, ?, ?)',
+                           [(path, ) + c for c in counts])
+            db.executemany('INSERT INTO parameter_sets VALUES (?, ?, ?, ?)',
+                           [(path, ) + p for p in parameter_sets])
+            # an interrupted run keeps what it has done so far
+            if i % batch == batch - 1:
+               db.commit()
+      db.commit()
+   finally:
+      db.close()
+   return len(todo), len(seen) - len(todo), len(removed), errors
+
+
+def nal_unit_type_arg(name):
+   """
+   nal_unit_type from a number or a NalUnitType name with or without the
+   NAL_UNIT_ prefix and _NUT suffix: 15, SPS, SPS_NUT, NAL_UNIT_IDR_W_RADL
+   """
+   if name.isdigit():
+      return int(name)
+   name = name.upper()
+   for candidate in (name, 'NAL_UNIT_' + name, 'NAL_UNIT_' + name + '_NUT'):
+      value = getattr(NalUnitType, candidate, None)
+      if isinstance(value, int):
+         return value
+   raise argparse.ArgumentTypeError('unknown NAL unit type ' + name)
+
+
+def open_stream(name):
+   """
+   Reader for a live input: '-' is stdin, tcp://host:port connects to a
+   TCP server and udp://host:port receives datagrams on that address, as
+   does rtp://host:port for iter_rtp_nal_bytes(). Returns None when name
+   is a plain file name.
+   """
+   if name == '-':
+      return sys.stdin.buffer
+   m = re.match(r'(tcp|udp|rtp)://(.*):(\d+)$', name)
+   if m is None:
+      return None
+   host, port = m.group(2), int(m.group(3))
+   if m.group(1) == 'tcp':
+      return socket.create_connection((host, port))
+   sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+   sock.bind((host, port))
+   return sock
+
+
+def report_bitrate(nals, active, windows, fps=None):
+   """
+   Print each access unit of nals with the rolling bitrate of every
+   window, then the peaks and the CPB simulation when the stream has HRD
+   parameters. fps overrides the picture rate of the stream.
+   """
+   monitor = None
+   cpb = None
+   print('{0:>8s} {1:>12s} {2:>10s} {3:>5s} {4:s}'.format(
+      'AU', 'offset', 'bytes', 'NALs', ' '.join('{0:>10s}'.format('kbit/s@{0:g}s'.format(w)) for w in windows)))
+   for au in iter_access_units(nals, active):
+      if monitor is None:
+         timing = None, None, None, None
+         for ps in sorted(active.items()):
+            if ps[0][0] != NalUnitType.NAL_UNIT_PPS_NUT and hrd_timing(ps[1])[0] is not None:
+               timing = hrd_timing(ps[1])
+         picture_duration, bit_rate, cpb_size, cbr = timing
+         if fps is not None:
+            picture_duration = 1.0 / fps
+         if picture_duration is None:
+            sys.exit('no picture rate in the stream, give one with --fps')
+         monitor = BitrateMonitor(picture_duration, windows)
+         if bit_rate is not None:
+            cpb = CpbSimulator(bit_rate, cpb_size, picture_duration, cbr)
+      rates = monitor.add(au.nbytes)
+      print('{0:8d} {1:#12x} {2:10d} {3:5d} {4:s}{5:s}'.format(
+         au.index, au.offset, au.nbytes, au.nal_count,
+         ' '.join('{0:10.1f}'.format(r / 1000) for r in rates), ' IRAP' if au.irap else ''))
+      if cpb is not None:
+         _report_cpb(cpb.add(au.nbytes))
+   if monitor is None:
+      return
+   if cpb is not None:
+      _report_cpb(cpb.flush())
+   print()
+   for w, peak, peak_au in zip(windows, monitor.peak, monitor.peak_au):
+      if peak_au is None:
+         print('!! peak over {0:g} s: stream shorter than the window'.format(w))
+      else:
+         print('!! peak over {0:g} s: {1:.1f} kbit/s at AU {2:d}'.format(w, peak / 1000, peak_au))
+   if cpb is not None:
+      print('!! CPB {0:d} bit at {1:d} bit/s{2:s}: max fullness {3:.0f} bit, {4:d} underflows, {5:d} overflows'.format(
+         cpb.cpb_size, cpb.bit_rate, ' CBR' if cpb.cbr else '', cpb.max_level, cpb.underflows, cpb.overflows))
+
+
+def _report_cpb(removed):
+   for au, level, underflow, overflow in removed:
+      if underflow:
+         print('!! CPB underflow: AU {0:d} not complete at its removal time'.format(au))
+      if overflow:
+         print('!! CPB overflow: {0:.0f} bit before removing AU {1:d}'.format(level, au))
+
+
+def report_picture_hashes(nals, active, filename, threads=None):
+   """
+   Parse nals, then check their decoded picture hash SEI messages against
+   the reconstruction filename. Prints every mismatch and a summary;
+   returns the number of mismatches.
+   """
+   collector = PictureHashCollector()
+   for offset, length, n, rbsp in nals:
+      collector.add(n, rbsp, active)
+   checked = set()
+   mismatches = 0
+   for frame, picture, cIdx, expected, actual in verify_picture_hashes(collector.pictures, filename, threads):
+      checked.add(frame)
+      if actual != expected:
+         mismatches += 1
+         print('!! frame {0:d} POC {1:d} cIdx {2:d}: decoded picture hash {3!s}, reconstruction {4!s}'.format(
+            frame, picture.PicOrderCntVal, cIdx, expected, actual))
+   output = sum(1 for p in collector.pictures if p.output)
+   print('!! decoded picture hash: {0:d} of {1:d} output pictures checked, {2:d} mismatches'.format(
+      len(checked), output, mismatches))
+   return mismatches
+
+
+def report_diff(filename_a, filename_b, jobs=2):
+   """
+   Print how filename_b differs from filename_a: the bytes skipped as
+   identical, the first NAL unit that differs, the alignment counts and
+   every parameter set field that changed. Returns True when the streams
+   differ.
+   """
+   names = dict((v, k) for k, v in vars(NalUnitType).items() if k.startswith('NAL_UNIT_'))
+   d = diff_streams(filename_a, filename_b, jobs)
+   print('!! identical: first {0:d} bytes, last {1:d} bytes'.format(d.prefix, d.suffix))
+   first = d.first_divergence()
+   if first is not None:
+      i, j = first
+      for label, k, keys, offsets in (('a', i, d.keys_a, d.offsets_a), ('b', j, d.keys_b, d.offsets_b)):
+         if k < len(keys):
+            print('!! first divergence in {0:s}: NAL @ offset {1:d} ({1:#x}) {2:s} layer {3:d} TemporalId {4:d}'.format(
+               label, offsets[k], names[keys[k][0]], keys[k][1], keys[k][2]))
+         else:
+            print('!! first divergence in {0:s}: end of stream'.format(label))
+   counts = collections.Counter()
+   for tag, i1, i2, j1, j2 in d.opcodes:
+      counts[tag] += max(i2 - i1, j2 - j1) if tag == 'replace' else (i2 - i1 if tag != 'insert' else j2 - j1)
+   print('!! NAL units compared: {0:d} in a, {1:d} in b: {2:d} equal, {3:d} replaced, {4:d} deleted, {5:d} inserted'.format(
+      len(d.keys_a), len(d.keys_b), counts['equal'], counts['replace'], counts['delete'], counts['insert']))
+   for name, differences in d.parameter_sets:
+      print()
+      print('!! {0:s}'.format(name))
+      for path, a, b in differences:
+         print('\t{0:s}: {1!s} -> {2!s}'.format(path, a, b))
+   return not d.identical()
+
+
+def watch_inputs(names):
+   """
+   Show the NAL units of all of names as they arrive, tagged with the
+   input they come from, then the parameter set counts of each input
+   """
+   shown = set()
+
+   def show(name, offset, length, n, rbsp, active):
+      print()
+      print("!! {0:s}: Found NAL @ offset {1:d} ({1:#x})".format(name, offset))
+      n.show()
+      if rbsp is None:
+         pass
+      elif id(rbsp) in shown:
+         print('   repeated parameter set, unchanged')
+      else:
+         rbsp.show()
+         if n.nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES:
+            shown.add(id(rbsp))
+
+   stores = asyncio.run(watch_streams(names, show))
+   print()
+   for name in names:
+      active = stores[name]
+      print("!! {0:s}: parameter sets: {1:d} parsed, {2:d} repeats, {3:d} changed".format(
+         name, active.misses, active.hits, active.changes))
+
+
+def main():
+   
+   parser = argparse.ArgumentParser(description='show VVC/H.266 high level syntax')
+   parser.add_argument('input', nargs='*', default=['out.vvc'],
+                       help="Annex-B or MP4 file, '-' for stdin, tcp://host:port, udp://host:port or rtp://host:port; "
+                            "several files, pipes or TCP inputs are parsed concurrently")
+   parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='parse a file with this many processes, split at IRAP pictures')
+   parser.add_argument('--au', type=int, action='append',
+                       help='only show access unit AU (repeatable), located via the <input>.idx index')
+   parser.add_argument('--type', action='append', type=nal_unit_type_arg,
+                       help='only show NAL units of this type, e.g. SPS or 15 (repeatable), via the index')
+   parser.add_argument('--headers-only', action='store_true',
+                       help='only decode nal_unit_header( )s and print NAL unit statistics; '
+                            'NAL units of the --type types are still shown in full')
+   parser.add_argument('--bitrate', action='store_true',
+                       help='print access unit sizes, rolling bitrates and a CPB simulation')
+   parser.add_argument('--window', type=float, action='append',
+                       help='rolling bitrate window in seconds for --bitrate (repeatable, default 1)')
+   parser.add_argument('--fps', type=float, help='picture rate for --bitrate when the stream has none')
+   parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='text',
+                       help='output format (default: text); parquet and arrow need pyarrow and -o')
+   parser.add_argument('-o', '--output', help='write to this file instead of stdout')
+   parser.add_argument('--verify-yuv', metavar='YUV',
+                       help='check the decoded picture hash SEI messages against this raw YUV '
+                            'reconstruction of layer 0, written in output order and not cropped '
+                            'to the conformance window')
+   parser.add_argument('--threads', type=int, help='hashing threads for --verify-yuv')
+   parser.add_argument('--extract', metavar='OUT',
+                       help='write the sub-bitstream of --tid, --layer and --ols to OUT instead of showing it')
+   parser.add_argument('--tid', type=int, default=6, help='highest TemporalId kept by --extract')
+   parser.add_argument('--layer', type=int, action='append', help='nuh_layer_id kept by --extract (repeatable)')
+   parser.add_argument('--ols', type=int, help='output layer set of the VPS whose layers --extract keeps')
+   parser.add_argument('--diff', metavar='OTHER',
+                       help='compare the parameter sets and NAL units of OTHER against the input')
+   parser.add_argument('--catalog', metavar='DB',
+                       help='catalog the files under the input directories into the SQLite database DB, '
+                            'skipping files unchanged since the last run; -j sets the processes, all CPUs by default')
+   parser.add_argument('--profile', action='store_true',
+                       help='print time per stage and per nal_unit_type of a sequential parse')
+   parser.add_argument('--profile-dump', metavar='FILE',
+                       help='write cProfile statistics of the run to FILE, for pstats')
+   args = parser.parse_args()
+   if args.format in ('parquet', 'arrow') and not args.output:
+      parser.error('--format {0:s} needs -o'.format(args.format))
+
+   profiler = ParseProfiler().enable() if args.profile else None
+   if args.profile_dump:
+      import cProfile
+      cprofile = cProfile.Profile()
+      cprofile.enable()
+   try:
+      run(args, profiler)
+   finally:
+      if args.profile_dump:
+         cprofile.disable()
+         cprofile.dump_stats(args.profile_dump)
+      if profiler is not None:
+         profiler.disable()
+         f = sys.stdout if args.format == 'text' and not args.output else sys.stderr
+         f.write('\n')
+         profiler.show(f)
+
+
+def change_note(nal_unit_type, ps_id):
+   """
+   The note of the text output on a parameter set replaced by one with
+   other content
+   """
+   name = {NalUnitType.NAL_UNIT_VPS_NUT: 'VPS', NalUnitType.NAL_UNIT_SPS_NUT: 'SPS',
+           NalUnitType.NAL_UNIT_PPS_NUT: 'PPS'}[nal_unit_type]
+   return "\n!! {0:s} {1:d} changed content\n".format(name, ps_id)
+
+
+def show_nal_unit(nal, shown):
+   """
+   Print nal, an (offset, length, nal_unit_header, rbsp) of a parse, as
+   the text output does. shown holds the parameter sets already printed
+   by id, which are not printed again.
+   """
+   offset, length, n, rbsp = nal
+   print()
+   print("!! Found NAL @ offset {0:d} ({0:#x})".format(offset))
+   n.show()
+   if rbsp is None:
+      pass
+   elif id(rbsp) in shown:
+      print('   repeated parameter set, unchanged')
+   else:
+      rbsp.show()
+      if n.nal_unit_type in PARAMETER_SET_NAL_UNIT_TYPES:
+         shown[id(rbsp)] = rbsp
+
+
+def _show_segment(nals, active):
+   """
+   render of parse_parallel() for the text output: the NAL units of a
+   segment as one string. The parameter sets of the context were printed
+   with an earlier segment.
+   """
+   shown = dict((id(rbsp), rbsp) for rbsp in active.cache.values())
+   out = io.StringIO()
+   stdout = sys.stdout
+   sys.stdout = out
+   try:
+      active.on_change = lambda nal_unit_type, ps_id, old, new: out.write(change_note(nal_unit_type, ps_id))
+      for nal in nals:
+         show_nal_unit(nal, shown)
+   finally:
+      sys.stdout = stdout
+   return [out.getvalue()]
+
+
+def _record_segment(nals, active):
+   """
+   render of parse_parallel() for the record writers: the nal_record()s of
+   a segment
+   """
+   active.on_change = lambda nal_unit_type, ps_id, old, new: sys.stderr.write(change_note(nal_unit_type, ps_id))
+   return [nal_record(*nal) for nal in nals]
+
+
+def run(args, profiler=None):
+   """
+   The work of main() once args are parsed; profiler, a ParseProfiler,
+   times the sequential parse and the output of the NAL units
+   """
+   if args.catalog:
+      scanned, unchanged, removed, errors = catalog_tree(args.input, args.catalog, args.jobs if args.jobs > 1 else None)
+      print('!! {0:s}: {1:d} files scanned, {2:d} unchanged, {3:d} removed, {4:d} with errors'.format(
+         args.catalog, scanned, unchanged, removed, errors))
+      return
+
+   if len(args.input) > 1:
+      watch_inputs(args.input)
+      return
+
+   F = args.input[0]
+   # an MP4 file is read through its sample tables, which the tools that
+   # work on start codes and byte ranges cannot use
+   if F != '-' and '://' not in F and is_mp4(map_bitstream(F)) and \
+      (args.diff or args.extract or args.jobs > 1 or args.au or args.type and not args.headers_only):
+      sys.exit('{0:s}: --diff, --extract, -j, --au and --type need an Annex-B input'.format(F))
+
+   if args.diff:
+      if report_diff(F, args.diff, max(args.jobs, 2)):
+         sys.exit(1)
+      return
+
+   if args.extract:
+      with open(args.extract, 'wb') as out:
+         written = write_sub_bitstream(F, out, args.tid, args.layer, args.ols)
+      print('!! {0:d} of {1:d} bytes written to {2:s}'.format(written, os.path.getsize(F), args.extract))
+      return
+
+   reader = open_stream(F)
+   if reader is None:
+      live = None
+   elif F.startswith('rtp://'):
+      live = iter_rtp_nal_bytes(reader)
+   else:
+      live = iter_nal_bytes(reader)
+
+   # keep notes out of structured output
+   notes = sys.stdout if args.format == 'text' and not args.output else sys.stderr
+
+   def report_change(nal_unit_type, ps_id, old, new):
+      notes.write(change_note(nal_unit_type, ps_id))
+   active = ParameterSetStore(on_change=report_change)
+
+   if args.bitrate:
+      if reader is None:
+         nals = scan_input(map_bitstream(F))
+      else:
+         nals = live
+      report_bitrate(nals, active, args.window or [1.0], args.fps)
+      return
+
+   if args.verify_yuv:
+      # only the hash SEI messages need decoding
+      active.sei = SeiParser((SeiPayloadType.DECODED_PICTURE_HASH,))
+      if reader is None:
+         nals = ((offset, length) + parse_nal_unit(nal, active)
+                 for offset, length, nal in scan_input(map_bitstream(F)))
+      else:
+         nals = ((offset, length) + parse_nal_unit(nal, active) for offset, length, nal in live)
+      try:
+         if report_picture_hashes(nals, active, args.verify_yuv, args.threads):
+            sys.exit(1)
+      except ValueError as e:
+         sys.exit(str(e))
+      return
+
+   if args.headers_only:
+      types = frozenset(args.type or ())
+      if reader is None:
+         headers = scan_headers(map_bitstream(F), types, active)
+      else:
+         headers = ((offset, length, n.nal_unit_type, n.nuh_layer_id, n.nuh_temporal_id_plus1,
+                     rbsp if n.nal_unit_type in types else None)
+                    for offset, length, n, rbsp in
+                    ((offset, length) + parse_nal_unit(nal, active) for offset, length, nal in live))
+      stats = NalStatistics()
+      for offset, length, nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, rbsp in headers:
+         stats.add(nal_unit_type, nuh_layer_id, nuh_temporal_id_plus1, length)
+         if rbsp is not None:
+            print()
+            print("!! Found NAL @ offset {0:d} ({0:#x})".format(offset))
+            rbsp.show()
+      print()
+      stats.show()
+      return
+
+   if reader is None and (args.au or args.type):
+      buf = map_bitstream(F)
+      idx = NalIndex.open(F, buf)
+      selected = set()
+      for au in args.au or ():
+         selected.update(idx.access_unit(au))
+      for nal_unit_type in args.type or ():
+         selected.update(idx.of_type(nal_unit_type))
+      nals = ((offset, length) + parse_nal_unit(nal, active)
+              for offset, length, nal in idx.select(buf, selected, active))
+   elif reader is None and args.jobs > 1 and profiler is None:
+      # the workers write the output too, which is all that comes back
+      if args.format != 'text' or args.output:
+         nals = parse_parallel(F, args.jobs, active=active, render=_record_segment)
+      else:
+         nals = parse_parallel(F, args.jobs, active=active, render=_show_segment)
+   elif reader is None and args.jobs > 1:
+      nals = parse_parallel(F, args.jobs, active=active)
+   elif reader is None or profiler is not None:
+      nals = scan_input(map_bitstream(F)) if reader is None else live
+      parse = parse_nal_unit
+      if profiler is not None:
+         nals = profiler.scan(nals)
+         parse = profiler.parse
+      nals = ((offset, length) + parse(nal, active) for offset, length, nal in nals)
+   else:
+      nals = ((offset, length) + parse_nal_unit(nal, active) for offset, length, nal in live)
+   clock = time.perf_counter_ns
+
+   if args.format != 'text' or args.output:
+      if args.format in ('parquet', 'arrow'):
+         writer = ColumnarWriter(args.output)
+      else:
+         f = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+         writer = OUTPUT_FORMATS[args.format](f)
+      for nal in nals:
+         t0 = clock()
+         writer.write(nal if isinstance(nal, dict) else nal_record(*nal))
+         if profiler is not None:
+            profiler.add('show', clock() - t0)
+      writer.close()
+      return
+
+   shown = {}
+   for nal in nals:
+      t0 = clock()
+      if isinstance(nal, str):
+         sys.stdout.write(nal)
+      else:
+         show_nal_unit(nal, shown)
+      if profiler is not None:
+         profiler.add('show', clock() - t0)
+
+   if active.hits or active.misses:
+      print()
+      print("!! parameter sets: {0:d} parsed, {1:d} repeats, {2:d} changed".format(
+         active.misses, active.hits, active.changes))
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
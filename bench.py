@@ -0,0 +1,1295 @@
+#!/usr/bin/env python
+
+
+"""
+Benchmarks for 266.py.
+
+   python bench.py                 run every benchmark on a synthetic stream
+   python bench.py scan            run only the named benchmark(s)
+   python bench.py scan -f x.vvc   use an existing Annex-B file instead
+   python bench.py --save-baseline store the results in bench_baseline.json
+   python bench.py --compare       exit 1 on a line 25% slower than there,
+                                   after scaling by the machine speed
+   python bench.py --generate x.vvc --size 4000000000
+                                   write a 4 GB stream for -f and 266.py
+"""
+
+import argparse
+import asyncio
+import importlib
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+vvc = importlib.import_module('266')
+
+
+def synthetic_stream(size, nal_size=4096, seed=266):
+   """
+   Annex-B byte stream of roughly size bytes made of nal_size-byte NAL
+   units. Payload bytes are never 0x00, so no start code emulation occurs.
+   """
+   rnd = random.Random(seed)
+   payload = bytes(rnd.randrange(1, 256) for i in range(nal_size))
+   out = bytearray()
+   n = 0
+   while len(out) < size:
+      # mix 4-byte and 3-byte start codes as an encoder would
+      out += b'\x00\x00\x00\x01' if n % 8 == 0 else b'\x00\x00\x01'
+      out += payload
+      n += 1
+   return bytes(out)
+
+
+def best_of(fn, repeat=3):
+   best = None
+   for i in range(repeat):
+      t0 = time.perf_counter()
+      result = fn()
+      dt = time.perf_counter() - t0
+      if best is None or dt < best:
+         best = dt
+   return best, result
+
+
+# count per second of every report( ) line, by benchmark, for
+# --save-baseline and --compare
+results = {}
+
+
+def report(name, seconds, nbytes, count, unit='NAL'):
+   print('  {0:<24s} {1:9.4f} s {2:9.1f} MB/s {3:12.0f} {4}/s'.format(
+      name, seconds, nbytes / seconds / 1e6, count / seconds, unit))
+   if results:
+      results[list(results)[-1]][name] = count / seconds
+
+
+def bench_scan(filename, size):
+   """
+   BitStream.findall('0x000001') against scan_nal_units() over mmap
+   """
+   def findall():
+      from bitstring import BitStream
+      s = BitStream(filename=filename)
+      return len(list(s.findall('0x000001', bytealigned=True)))
+
+   def scan():
+      buf = vvc.map_bitstream(filename)
+      n = 0
+      for offset, length, nal in vvc.scan_nal_units(buf):
+         n += 1
+      return n
+
+   t, n = best_of(scan)
+   report('scan_nal_units', t, size, n)
+   try:
+      t, n = best_of(findall, repeat=1)
+   except ImportError:
+      print('  BitStream.findall        skipped (bitstring not installed)')
+   else:
+      report('BitStream.findall', t, size, n)
+
+
+def bench_epb(filename, size):
+   """
+   per-byte BitStream.peek(24) loop against nal_unit_rbsp()
+   """
+   # one large NAL unit with an emulation_prevention_three_byte every ~64 bytes
+   rnd = random.Random(266)
+   nal = bytearray(b'\x02\x01')
+   while len(nal) < (1 << 16):
+      nal += bytes(rnd.randrange(1, 256) for i in range(61))
+      nal += vvc.EMULATION_PREVENTION
+   nal = bytes(nal)
+
+   def peek_loop():
+      from bitstring import BitStream
+      s = BitStream(bytes=nal)
+      s.pos = 16
+      rbsp_byte = BitStream()
+      i = 2
+      while i < len(nal):
+         if i + 2 < len(nal) and s.peek(24) == '0x000003':
+            rbsp_byte.append(s.read('bits:16'))
+            s.pos += 8
+            i += 3
+         else:
+            rbsp_byte.append(s.read('bits:8'))
+            i += 1
+      return rbsp_byte.bytes
+
+   t, rbsp = best_of(lambda: vvc.nal_unit_rbsp(nal)[0])
+   report('nal_unit_rbsp', t, len(nal), len(nal), unit='byte')
+   try:
+      t, ref = best_of(peek_loop, repeat=1)
+   except ImportError:
+      print('  BitStream.peek loop      skipped (bitstring not installed)')
+   else:
+      assert ref == rbsp
+      report('BitStream.peek loop', t, len(nal), len(nal), unit='byte')
+
+
+# RBSPs of a 2-layer VPS, a 1080p main10 SPS with HRD and a tiled PPS
+VPS_RBSP = bytes.fromhex('1040004a0002338000d400f020043959')
+SPS_RBSP = bytes.fromhex(
+   '00ad02338000004007810021cf94d407a56e424a598dd11bb6d221564ec1342c83081142c83083d0b20c'
+   '2781935726aec9ab93577fdd775f4c4800001f48000753050158004e2000138804')
+PPS_RBSP = bytes.fromhex('040007810021cf9425291e655602f4e4a7e020')
+# picture headers and slice headers (up to byte_alignment( )) for the
+# SPS/PPS above: an IRAP picture with I slices and a picture with B slices
+PH_IRAP_RBSP = bytes.fromhex('840024')
+PH_INTER_RBSP = bytes.fromhex('34022728')
+SH_IDR = bytes.fromhex('09540e9928400fa2')
+SH_B = bytes.fromhex('19543a6474c942007d10')
+# buffering period (NAL HRD, 90000 initial removal delay) and picture timing
+# SEI payloads
+BP_PAYLOAD = bytes.fromhex('aef2000001015f9000000040')
+PT_PAYLOAD = bytes.fromhex('00071804')
+
+
+def exp_golomb_bits(k):
+   k += 1
+   return '0' * (k.bit_length() - 1) + format(k, 'b')
+
+
+def bench_bitreader(filename, size):
+   """
+   BitReader u(n)/ue()/se() against BitStream.read('uint:n')/read('ue'),
+   then whole parameter sets per second
+   """
+   rnd = random.Random(266)
+   elements = []
+   bits = []
+   for i in range(100000):
+      r = rnd.random()
+      if r < 0.5:
+         v = rnd.getrandbits(1)
+         elements.append(('u', 1))
+         bits.append(str(v))
+      elif r < 0.7:
+         n = rnd.randrange(2, 17)
+         elements.append(('u', n))
+         bits.append(format(rnd.getrandbits(n), '0{0:d}b'.format(n)))
+      elif r < 0.9:
+         elements.append(('ue', 0))
+         bits.append(exp_golomb_bits(min(int(rnd.expovariate(0.2)), 5000)))
+      else:
+         elements.append(('se', 0))
+         bits.append(exp_golomb_bits(rnd.randrange(0, 64)))
+   bits = ''.join(bits)
+   bits += '0' * (-len(bits) % 8)
+   data = int(bits, 2).to_bytes(len(bits) // 8, 'big')
+   formats = [('uint:{0:d}'.format(n) if kind == 'u' else kind) for kind, n in elements]
+
+   def bitreader():
+      s = vvc.BitReader(data)
+      u, ue, se = s.u, s.ue, s.se
+      for kind, n in elements:
+         if kind == 'u':
+            u(n)
+         elif kind == 'ue':
+            ue()
+         else:
+            se()
+      return len(elements)
+
+   def bitstring():
+      from bitstring import BitStream
+      s = BitStream(bytes=data)
+      read = s.read
+      for f in formats:
+         read(f)
+      return len(formats)
+
+   t, n = best_of(bitreader)
+   report('BitReader', t, len(data), n, unit='elem')
+   try:
+      t, n = best_of(bitstring, repeat=1)
+   except ImportError:
+      print('  BitStream.read           skipped (bitstring not installed)')
+   else:
+      report('BitStream.read', t, len(data), n, unit='elem')
+
+   for name, parse, rbsp in (('video_parameter_set_rbsp', vvc.video_parameter_set_rbsp, VPS_RBSP),
+                             ('seq_parameter_set_rbsp', vvc.seq_parameter_set_rbsp, SPS_RBSP),
+                             ('pic_parameter_set_rbsp', vvc.pic_parameter_set_rbsp, PPS_RBSP)):
+      def parse_many(parse=parse, rbsp=rbsp, n=2000):
+         for i in range(n):
+            parse(vvc.BitReader(rbsp))
+         return n
+      t, n = best_of(parse_many)
+      report(name, t, len(rbsp) * n, n, unit='set')
+
+
+def bench_lazy(filename, size):
+   """
+   full seq_parameter_set_rbsp / pic_parameter_set_rbsp parses against
+   LazyParameterSet reading the fields a monitoring job needs
+   """
+   n = 5000
+
+   def full():
+      for i in range(n):
+         sps = vvc.seq_parameter_set_rbsp(vvc.BitReader(SPS_RBSP))
+         sps.sps_pic_width_max_in_luma_samples, sps.sps_bitdepth_minus8
+         pps = vvc.pic_parameter_set_rbsp(vvc.BitReader(PPS_RBSP))
+         pps.pps_pic_parameter_set_id
+      return n
+
+   def lazy():
+      for i in range(n):
+         sps = vvc.LazyParameterSet(vvc.seq_parameter_set_rbsp, SPS_RBSP)
+         sps.sps_pic_width_max_in_luma_samples, sps.sps_bitdepth_minus8
+         pps = vvc.LazyParameterSet(vvc.pic_parameter_set_rbsp, PPS_RBSP)
+         pps.pps_pic_parameter_set_id
+      return n
+
+   nbytes = (len(SPS_RBSP) + len(PPS_RBSP)) * n
+   t, count = best_of(full)
+   report('full', t, nbytes, count, unit='SPS+PPS')
+   t, count = best_of(lazy)
+   report('LazyParameterSet', t, nbytes, count, unit='SPS+PPS')
+
+
+def nal_unit(nal_unit_type, rbsp, start_code=b'\x00\x00\x01'):
+   out = bytearray(start_code)
+   out += bytes((0, (nal_unit_type << 3) | 1))
+   zeros = 0
+   for b in rbsp:
+      if zeros >= 2 and b <= 3:
+         out.append(3)
+         zeros = 0
+      out.append(b)
+      zeros = zeros + 1 if b == 0 else 0
+   return bytes(out)
+
+
+# slice data after the slice header: random bytes get the occasional
+# emulation_prevention_three_byte, zero bytes one every two bytes, 0xff none
+FILLERS = {
+   'random': lambda rnd, n: rnd.randbytes(n),
+   'zero': lambda rnd, n: bytes(n),
+   'ff': lambda rnd, n: b'\xff' * n,
+}
+
+
+def parameter_set_nal_units():
+   """
+   VPS, SPS and PPS NAL units written by vvc.parameter_set_nal( ) from
+   the parsed VPS_RBSP, SPS_RBSP and PPS_RBSP
+   """
+   T = vvc.NalUnitType
+   out = b''
+   for nal_unit_type, rbsp in ((T.NAL_UNIT_VPS_NUT, VPS_RBSP), (T.NAL_UNIT_SPS_NUT, SPS_RBSP),
+                               (T.NAL_UNIT_PPS_NUT, PPS_RBSP)):
+      n, ps = vvc.parse_nal_unit(bytes((0, (nal_unit_type << 3) | 1)) + rbsp)
+      out += vvc.parameter_set_nal(ps)
+   return out
+
+
+def parameter_set_nal_unit(nal_unit_type, rbsp, **fields):
+   """
+   The NAL unit, start code included, of the VPS, SPS or PPS rbsp (one of
+   VPS_RBSP, SPS_RBSP and PPS_RBSP) with fields changed, written by
+   vvc.write_syntax( )
+   """
+   n, ps = vvc.parse_nal_unit(bytes((0, (nal_unit_type << 3) | 1)) + rbsp)
+   record = dict(vars(ps))
+   record.update(fields)
+   return vvc.nal_unit_bytes(nal_unit_type, vvc.write_syntax(type(ps).__name__, record).getvalue())
+
+
+def write_gop_stream(f, size, gop=32, filler='random', seed=266):
+   """
+   Writes VPS/SPS/PPS + IDR picture + gop - 1 trailing pictures to the
+   binary file f, repeated up to size bytes, a GOP at a time so streams
+   of gigabytes never sit in memory. Every picture has a picture header
+   NAL unit and one slice with a real slice header followed by filler
+   slice data, one of FILLERS or a function (rnd, n) -> n bytes.
+   Returns the number of bytes written.
+   """
+   rnd = random.Random(seed)
+   fill = FILLERS.get(filler, filler)
+   T = vvc.NalUnitType
+   aud = vvc.nal_unit_bytes(T.NAL_UNIT_AUD_NUT, b'\x10\x80')
+   head = aud + parameter_set_nal_units() + vvc.nal_unit_bytes(T.NAL_UNIT_PH_NUT, PH_IRAP_RBSP)
+   inter = aud + vvc.nal_unit_bytes(T.NAL_UNIT_PH_NUT, PH_INTER_RBSP)
+   written = 0
+   while written < size:
+      out = [head, vvc.nal_unit_bytes(T.NAL_UNIT_IDR_W_RADL, SH_IDR + fill(rnd, 60000))]
+      for i in range(gop - 1):
+         out.append(inter)
+         out.append(vvc.nal_unit_bytes(T.NAL_UNIT_TRAIL_NUT, SH_B + fill(rnd, rnd.randrange(2000, 12000))))
+      data = b''.join(out)
+      f.write(data)
+      written += len(data)
+   return written
+
+
+def synthetic_gop_stream(size, gop=32, seed=266, filler='random'):
+   """
+   write_gop_stream( ) of size bytes, in memory
+   """
+   f = io.BytesIO()
+   write_gop_stream(f, size, gop, filler, seed)
+   return f.getvalue()
+
+
+def bench_parallel(filename, size):
+   """
+   parse_nal_unit() over scan_nal_units() against parse_parallel() with 2,
+   4, ... jobs, returning the parsed NAL units and, as -j does, the text
+   output of the workers. The CPU time of the parent process is what
+   does not run in parallel: sequential / parent is the most speedup
+   more CPUs can give.
+   """
+   tmp = tempfile.NamedTemporaryFile(suffix='.vvc', delete=False)
+   tmp.write(synthetic_gop_stream(max(size, 64 << 20)))
+   tmp.close()
+   nbytes = os.path.getsize(tmp.name)
+   try:
+      def sequential():
+         active = vvc.ParameterSetStore()
+         n = 0
+         for offset, length, nal in vvc.scan_nal_units(vvc.map_bitstream(tmp.name)):
+            vvc.parse_nal_unit(nal, active)
+            n += 1
+         return n
+
+      def sequential_text():
+         active = vvc.ParameterSetStore()
+         shown = {}
+         n = 0
+         stdout = sys.stdout
+         sys.stdout = io.StringIO()
+         try:
+            for offset, length, nal in vvc.scan_nal_units(vvc.map_bitstream(tmp.name)):
+               vvc.show_nal_unit((offset, length) + vvc.parse_nal_unit(nal, active), shown)
+               if sys.stdout.tell() > 1 << 24:
+                  sys.stdout = io.StringIO()
+               n += 1
+         finally:
+            sys.stdout = stdout
+         return n
+
+      def parallel(jobs, render=None):
+         cpu = time.process_time()
+         n = sum(1 for r in vvc.parse_parallel(tmp.name, jobs, render=render))
+         return n, time.process_time() - cpu
+
+      for name, run, render in (('', sequential, None), ('text ', sequential_text, vvc._show_segment)):
+         t1, n = best_of(run, repeat=1)
+         report(name + 'jobs 1', t1, nbytes, n)
+         jobs = 2
+         while jobs <= max(os.cpu_count() or 1, 2):
+            t, (_, parent) = best_of(lambda: parallel(jobs, render), repeat=1)
+            report(name + 'jobs {0:d}'.format(jobs), t, nbytes, n)
+            print('  {0:<24s} {1:9.2f}x   parent CPU {2:.3f} s, at most {3:.1f}x'.format(
+               'speedup', t1 / t, parent, t1 / parent))
+            jobs *= 2
+   finally:
+      os.unlink(tmp.name)
+
+
+def bench_headers(filename, size):
+   """
+   parse_nal_unit() on every NAL unit against scan_headers() collecting
+   NalStatistics
+   """
+   tmp = tempfile.NamedTemporaryFile(suffix='.vvc', delete=False)
+   tmp.write(synthetic_gop_stream(max(size, 32 << 20)))
+   tmp.close()
+   nbytes = os.path.getsize(tmp.name)
+   try:
+      def parse_all():
+         active = vvc.ParameterSetStore()
+         n = 0
+         for offset, length, nal in vvc.scan_nal_units(vvc.map_bitstream(tmp.name)):
+            vvc.parse_nal_unit(nal, active)
+            n += 1
+         return n
+
+      def headers():
+         stats = vvc.NalStatistics()
+         for offset, length, t, layer, tid, rbsp in vvc.scan_headers(vvc.map_bitstream(tmp.name)):
+            stats.add(t, layer, tid, length)
+         return sum(stats.count)
+
+      t, n = best_of(headers)
+      report('scan_headers', t, nbytes, n)
+      t, n = best_of(parse_all, repeat=1)
+      report('parse_nal_unit', t, nbytes, n)
+   finally:
+      os.unlink(tmp.name)
+
+
+class _UncachedPlans(vvc.ParameterSetStore):
+   def plan(self, pps_id):
+      self.plans.clear()
+      return vvc.ParameterSetStore.plan(self, pps_id)
+
+
+def bench_slices(filename, size):
+   """
+   picture header and slice header parsing with the HeaderPlan cached per
+   PPS against one built for every header
+   """
+   buf = synthetic_gop_stream(4 << 20)
+   nals = list(vvc.scan_nal_units(buf))
+   nbytes = len(buf)
+
+   def parse(store):
+      def run():
+         active = store()
+         n = 0
+         for offset, length, nal in nals:
+            if vvc.parse_nal_unit(nal, active)[0].nal_unit_type in vvc.SLICE_NAL_UNIT_TYPES:
+               n += 1
+         return n
+      return run
+
+   t, n = best_of(parse(vvc.ParameterSetStore))
+   report('cached plan', t, nbytes, n, unit='slice')
+   t, n = best_of(parse(_UncachedPlans))
+   report('plan per header', t, nbytes, n, unit='slice')
+
+
+def syntax_elements(record):
+   """
+   number of syntax element values in record, an as_dict() result
+   """
+   n = 0
+   for value in record.values():
+      if isinstance(value, dict):
+         n += syntax_elements(value)
+      elif isinstance(value, list):
+         n += syntax_elements(dict(enumerate(value)))
+      elif value is not None:
+         n += 1
+   return n
+
+
+def rpl_sps_rbsp(lists=64, entries=28):
+   """
+   The SPS of this file with lists ref_pic_list_struct( )s of entries
+   short-term entries in each of both lists, as written by write_syntax( )
+   """
+   record = dict(vars(vvc.seq_parameter_set_rbsp(vvc.BitReader(SPS_RBSP))))
+
+   def rpl(k):
+      return dict(num_ref_entries=entries, ltrp_in_header_flag=0, inter_layer_ref_pic_flag=[0] * entries,
+                  st_ref_pic_flag=[1] * entries, abs_delta_poc_st=[(k + i) % 9 for i in range(entries)],
+                  strp_entry_sign_flag=[i & 1 for i in range(entries)], rpls_poc_lsb_lt=[0] * entries,
+                  ilrp_idx=[0] * entries, NumLtrpEntries=0)
+   record.update(sps_rpl1_same_as_rpl0_flag=0, sps_num_ref_pic_lists=[lists, lists],
+                 ref_pic_list_struct=[[rpl(k) for k in range(lists)], [rpl(k + 1) for k in range(lists)]])
+   return vvc.write_syntax('seq_parameter_set_rbsp', record).getvalue()
+
+
+def bench_syntax(filename, size):
+   """
+   the parsers compiled from the syntax tables, in syntax elements per
+   second: the VPS/SPS/PPS of this file, and an SPS with 128 reference
+   picture list structures, which should parse at about the same rate
+   """
+   def parse(parsers, n):
+      elements = sum(syntax_elements(parser(vvc.BitReader(rbsp)).as_dict()) for parser, rbsp in parsers)
+
+      def run():
+         for i in range(n):
+            for parser, rbsp in parsers:
+               parser(vvc.BitReader(rbsp))
+         return elements * n
+      return run, sum(len(rbsp) for parser, rbsp in parsers) * n
+
+   # an empty cache directory, so this includes generating the code
+   with tempfile.TemporaryDirectory() as cache_dir:
+      t0 = time.perf_counter()
+      parsers = vvc.compile_syntax_tables(cache_dir=cache_dir)
+      print('  {0:<24s} {1:9.4f} s'.format('compile tables', time.perf_counter() - t0))
+   run, nbytes = parse([(parsers['video_parameter_set_rbsp'], VPS_RBSP),
+                        (parsers['seq_parameter_set_rbsp'], SPS_RBSP),
+                        (parsers['pic_parameter_set_rbsp'], PPS_RBSP)], 2000)
+   t, count = best_of(run)
+   report('VPS+SPS+PPS', t, nbytes, count, unit='element')
+   run, nbytes = parse([(parsers['seq_parameter_set_rbsp'], rpl_sps_rbsp())], 50)
+   t, count = best_of(run)
+   report('SPS, 128 RPL structures', t, nbytes, count, unit='element')
+
+
+def sei_message(payloadType, payload):
+   out = bytearray()
+   for value in (payloadType, len(payload)):
+      while value >= 255:
+         out.append(255)
+         value -= 255
+      out.append(value)
+   return bytes(out + payload)
+
+
+def bench_sei(filename, size):
+   """
+   SEI NAL units parsed with every payload type decoded, with only the
+   decoded picture hash and with none, in sei_message( )s per second
+   """
+   T = vvc.NalUnitType
+   P = vvc.SeiPayloadType
+   rnd = random.Random(266)
+   # prefix SEI as an HDR encoder writes it in front of every picture, with
+   # a 2 kB user_data_unregistered( ) to skip, and a suffix MD5 hash SEI
+   prefix = nal_unit(T.NAL_UNIT_PREFIX_SEI_NUT, sei_message(P.BUFFERING_PERIOD, BP_PAYLOAD) +
+                     sei_message(P.PIC_TIMING, PT_PAYLOAD) +
+                     sei_message(P.MASTERING_DISPLAY_COLOUR_VOLUME,
+                                 bytes.fromhex('33c2864417ba3d1334b63d883d1340ec0098968000000032')) +
+                     sei_message(P.CONTENT_LIGHT_LEVEL_INFO, bytes.fromhex('03e80190')) +
+                     sei_message(5, bytes(rnd.randrange(0, 256) for i in range(2048))) + b'\x80')
+   suffix = nal_unit(T.NAL_UNIT_SUFFIX_SEI_NUT, sei_message(
+      P.DECODED_PICTURE_HASH, b'\x00\x00' + bytes(rnd.randrange(0, 256) for i in range(48))) + b'\x80')
+   nals = [memoryview(prefix)[3:], memoryview(suffix)[3:]] * 2000
+   nbytes = sum(len(nal) for nal in nals)
+   count = sum(len(vvc.sei_rbsp(nal, vvc.SeiParser()).sei_message) for nal in nals)
+
+   def parse(payload_types):
+      def run():
+         sei = vvc.SeiParser(payload_types)
+         for nal in nals:
+            sei.parse(nal)
+         return count
+      return run
+
+   for name, payload_types in (('all payload types', vvc.SEI_PAYLOADS),
+                               ('decoded picture hash', (P.DECODED_PICTURE_HASH,)),
+                               ('headers only', ())):
+      t, n = best_of(parse(payload_types))
+      report(name, t, nbytes, n, unit='message')
+
+
+def bench_dph(filename, size):
+   """
+   verify_picture_hashes() over a raw YUV file of SPS_RBSP pictures with
+   one thread against the default pool, for each hash type
+   """
+   sps = vvc.seq_parameter_set_rbsp(vvc.BitReader(SPS_RBSP))
+   sizes, sample_bytes = vvc.picture_planes(sps)
+   frame_size = sum(w * h for w, h in sizes) * sample_bytes
+   frames = max(size // frame_size, 8)
+   rnd = random.Random(266)
+   frame = bytes(rnd.randrange(0, 256) for i in range(frame_size))
+   tmp = tempfile.NamedTemporaryFile(suffix='.yuv', delete=False)
+   for i in range(frames):
+      tmp.write(frame)
+   tmp.close()
+   nbytes = frame_size * frames
+   try:
+      for hash_type, name in enumerate(('MD5', 'CRC', 'checksum')):
+         dph = vvc.decoded_picture_hash(vvc.BitReader(bytes((hash_type, 0)) + bytes(48)), 50)
+         pictures = []
+         for i in range(frames):
+            picture = vvc.DecodedPicture(0, i, 1, sps)
+            picture.hash = dph
+            pictures.append(picture)
+         for threads in (1, None):
+            t, n = best_of(lambda: sum(1 for r in vvc.verify_picture_hashes(pictures, tmp.name, threads)), repeat=2)
+            report('{0:s} {1:s}'.format(name, 'threads 1' if threads == 1 else 'thread pool'),
+                   t, nbytes, frames, unit='picture')
+   finally:
+      os.unlink(tmp.name)
+
+
+def bench_async(filename, size):
+   """
+   aggregate throughput of aiter_nal_units() over N concurrent local TCP
+   streams of the synthetic GOP stream, each with its own
+   ParameterSetStore
+   """
+   data = synthetic_gop_stream(2 << 20)
+
+   async def send(reader, writer):
+      writer.write(data)
+      await writer.drain()
+      writer.close()
+
+   async def receive(port):
+      reader, writer = await asyncio.open_connection('127.0.0.1', port)
+      n = 0
+      async for offset, length, nal_unit_header, rbsp in vvc.aiter_nal_units(reader):
+         n += 1
+      writer.close()
+      return n
+
+   async def run(streams):
+      server = await asyncio.start_server(send, '127.0.0.1', 0)
+      port = server.sockets[0].getsockname()[1]
+      async with server:
+         return sum(await asyncio.gather(*[receive(port) for i in range(streams)]))
+
+   for streams in (1, 4, 16):
+      t, n = best_of(lambda: asyncio.run(run(streams)), repeat=2)
+      report('{0:d} streams'.format(streams), t, len(data) * streams, n)
+
+
+def bench_profile(filename, size):
+   """
+   parse_nal_unit() over scan_nal_units() as is and through an enabled
+   ParseProfiler, for the cost of the instrumentation
+   """
+   buf = synthetic_gop_stream(8 << 20)
+
+   def plain():
+      active = vvc.ParameterSetStore()
+      n = 0
+      for offset, length, nal in vvc.scan_nal_units(buf):
+         vvc.parse_nal_unit(nal, active)
+         n += 1
+      return n
+
+   def profiled():
+      active = vvc.ParameterSetStore()
+      n = 0
+      with vvc.ParseProfiler() as profiler:
+         for offset, length, nal in profiler.scan(vvc.scan_nal_units(buf)):
+            profiler.parse(nal, active)
+            n += 1
+      return n
+
+   t, n = best_of(plain)
+   report('disabled', t, len(buf), n)
+   t, n = best_of(profiled)
+   report('enabled', t, len(buf), n)
+
+
+def bench_extract(filename, size):
+   """
+   write_sub_bitstream() of the synthetic GOP stream, its pictures spread
+   over three temporal sublayers, at each highest TemporalId
+   """
+   T = vvc.NalUnitType
+   buf = bytearray(synthetic_gop_stream(max(size, 32 << 20)))
+   picture = -1
+   for offset, length, nal in list(vvc.scan_nal_units(bytes(buf))):
+      nal_unit_type = buf[offset + 1] >> 3
+      if nal_unit_type == T.NAL_UNIT_PH_NUT:
+         picture += 1
+      if nal_unit_type in (T.NAL_UNIT_PH_NUT, T.NAL_UNIT_TRAIL_NUT):
+         buf[offset + 1] = (nal_unit_type << 3) | (picture % 3 + 1)
+   tmp = tempfile.NamedTemporaryFile(suffix='.vvc', delete=False)
+   tmp.write(buf)
+   tmp.close()
+   out = tempfile.NamedTemporaryFile(suffix='.vvc', delete=False)
+   out.close()
+   try:
+      for tid in (0, 1, 2):
+         def extract():
+            with open(out.name, 'wb') as f:
+               return vvc.write_sub_bitstream(tmp.name, f, tid)
+         t, written = best_of(extract)
+         report('TemporalId <= {0:d}'.format(tid), t, len(buf), written, unit='byte')
+   finally:
+      os.unlink(tmp.name)
+      os.unlink(out.name)
+
+
+def bench_diff(filename, size):
+   """
+   diff_streams() of the synthetic GOP stream against a copy, a copy with
+   one byte changed in the middle and a stream with other slice data, in
+   bytes of both files per second
+   """
+   data = synthetic_gop_stream(max(size, 32 << 20))
+   changed = bytearray(data)
+   changed[len(data) // 2] ^= 0x55
+   others = [('identical', data), ('one byte changed', bytes(changed)),
+             ('other slice data', synthetic_gop_stream(len(data), seed=267))]
+   files = []
+   try:
+      for name, other in [('', data)] + others:
+         tmp = tempfile.NamedTemporaryFile(suffix='.vvc', delete=False)
+         tmp.write(other)
+         tmp.close()
+         files.append(tmp.name)
+      for (name, other), path in zip(others, files[1:]):
+         t, d = best_of(lambda: vvc.diff_streams(files[0], path), repeat=2)
+         report(name, t, len(data) + len(other), len(data) + len(other), unit='byte')
+   finally:
+      for path in files:
+         os.unlink(path)
+
+
+def mp4_box(box_type, payload):
+   return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def mp4_file(annexb, chunk_samples=8):
+   """
+   MP4 file of the Annex-B stream annexb with a vvi1 track: the first
+   VPS, SPS and PPS in its vvcC record, one sample per access unit with
+   4-byte NAL unit lengths, chunk_samples samples per chunk
+   """
+   counter = vvc.AccessUnitCounter()
+   arrays = {}
+   samples = []
+   for offset, length, nal in vvc.scan_nal_units(annexb):
+      nal_unit_type = nal[1] >> 3
+      if nal_unit_type in vvc.PARAMETER_SET_NAL_UNIT_TYPES:
+         arrays.setdefault(nal_unit_type, bytes(nal))
+      au = counter(nal)
+      while len(samples) <= au:
+         samples.append(bytearray())
+      samples[au] += struct.pack('>I', length) + nal
+   record = bytearray(b'\xfe')   # LengthSizeMinusOne 3, ptl_present_flag 0
+   record.append(len(arrays))
+   for nal_unit_type, nal in sorted(arrays.items()):
+      record += struct.pack('>BHH', 0x80 | nal_unit_type, 1, len(nal)) + nal
+   entry = bytes(6) + struct.pack('>H', 1) + bytes(16) + struct.pack('>HHIIIH', 1920, 1080, 0x480000, 0x480000, 0, 1)
+   entry += bytes(32) + struct.pack('>Hh', 0x18, -1) + mp4_box(b'vvcC', bytes(4) + record)
+   ftyp = mp4_box(b'ftyp', b'isom' + bytes(4) + b'isomvvi1')
+   offset = len(ftyp) + 8
+   chunk_offsets = []
+   for i, sample in enumerate(samples):
+      if i % chunk_samples == 0:
+         chunk_offsets.append(offset)
+      offset += len(sample)
+   stsc = [(1, chunk_samples, 1)]
+   if len(samples) % chunk_samples:
+      stsc.append((len(chunk_offsets), len(samples) % chunk_samples, 1))
+   stbl = mp4_box(b'stsd', bytes(4) + struct.pack('>I', 1) + mp4_box(b'vvi1', entry)) + \
+      mp4_box(b'stsz', bytes(4) + struct.pack('>II', 0, len(samples)) +
+              b''.join(struct.pack('>I', len(s)) for s in samples)) + \
+      mp4_box(b'stsc', bytes(4) + struct.pack('>I', len(stsc)) + b''.join(struct.pack('>III', *e) for e in stsc)) + \
+      mp4_box(b'stco', bytes(4) + struct.pack('>I', len(chunk_offsets)) +
+              b''.join(struct.pack('>I', o) for o in chunk_offsets))
+   moov = mp4_box(b'moov', mp4_box(b'trak', mp4_box(b'mdia', mp4_box(b'minf', mp4_box(b'stbl', stbl)))))
+   return ftyp + mp4_box(b'mdat', b''.join(samples)) + moov
+
+
+def bench_mp4(filename, size):
+   """
+   NAL units of the synthetic GOP stream read from Annex-B with
+   scan_nal_units() and from MP4 with scan_mp4_nal_units(), scanned and
+   parsed
+   """
+   annexb = synthetic_gop_stream(max(size, 32 << 20))
+   mp4 = mp4_file(annexb)
+
+   def scan(nals):
+      def run():
+         return sum(1 for nal in nals())
+      return run
+
+   def parse(nals):
+      def run():
+         active = vvc.ParameterSetStore()
+         n = 0
+         for offset, length, nal in nals():
+            vvc.parse_nal_unit(nal, active)
+            n += 1
+         return n
+      return run
+
+   for name, buf, nals in (('Annex-B', annexb, lambda: vvc.scan_nal_units(annexb)),
+                           ('MP4', mp4, lambda: vvc.scan_mp4_nal_units(mp4))):
+      t, n = best_of(scan(nals))
+      report(name + ' scan', t, len(buf), n)
+      t, n = best_of(parse(nals), repeat=1)
+      report(name + ' parse', t, len(buf), n)
+
+
+def rtp_packets(annexb, mtu=1400, ssrc=0x266, donl=False):
+   """
+   RFC 9328 packets of the NAL units of the Annex-B stream annexb, as a
+   sender would make them: NAL units that fit in mtu bytes are aggregated
+   into APs, larger ones are split into FUs. With donl, the packets carry
+   the decoding order number of each NAL unit, its index in annexb: a
+   DONL field in front of single NAL units, the first unit of an AP and
+   the first fragment, and a DOND field in front of the other AP units.
+   """
+   packets = []
+   aggregate = []
+   extra = 2 if donl else 0
+
+   def packet(payload):
+      packets.append(struct.pack('>BBHII', 0x80, 96, len(packets) & 0xffff, 0, ssrc) + payload)
+
+   def flush():
+      if len(aggregate) == 1:
+         don, nal = aggregate[0]
+         packet(nal[:2] + (struct.pack('>H', don & 0xffff) if donl else b'') + nal[2:])
+      elif aggregate:
+         layer = min(nal[0] for don, nal in aggregate)
+         tid = min(nal[1] & 0x07 for don, nal in aggregate)
+         payload = bytearray((layer, vvc.RTP_AP << 3 | tid))
+         for i, (don, nal) in enumerate(aggregate):
+            if donl:
+               # DOND is the DON difference minus 1, here always 0
+               payload += struct.pack('>H', don & 0xffff) if i == 0 else b'\x00'
+            payload += struct.pack('>H', len(nal)) + nal
+         packet(bytes(payload))
+      del aggregate[:]
+
+   used = 14 + extra
+   for don, (offset, length, nal) in enumerate(vvc.scan_nal_units(annexb)):
+      nal = bytes(nal)
+      if 12 + extra + len(nal) > mtu:
+         flush()
+         used = 14 + extra
+         data = nal[2:]
+         step = mtu - 15 - extra
+         for pos in range(0, len(data), step):
+            fu_header = (0x80 if pos == 0 else 0) | (0x40 if pos + step >= len(data) else 0) | nal[1] >> 3
+            packet(bytes((nal[0], vvc.RTP_FU << 3 | nal[1] & 0x07, fu_header)) +
+                   (struct.pack('>H', don & 0xffff) if donl and pos == 0 else b'') + data[pos:pos + step])
+         continue
+      if used + 2 + extra + len(nal) > mtu:
+         flush()
+         used = 14 + extra
+      aggregate.append((don, nal))
+      used += 2 + extra + len(nal)
+   flush()
+   return packets
+
+
+def send_rtp(packets, address, delay=0.0):
+   """
+   Local stand-in for an RTP sender: send packets as UDP datagrams to
+   address, sleeping delay seconds every 64 packets
+   """
+   sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+   try:
+      for i, packet in enumerate(packets):
+         sock.sendto(packet, address)
+         if delay and i % 64 == 63:
+            time.sleep(delay)
+   finally:
+      sock.close()
+
+
+def bench_rtp(filename, size):
+   """
+   RtpDepacketizer packets per second on the synthetic GOP stream sent
+   as RTP: in order, reordered within blocks of 16 packets after the
+   first, with 1% of the packets lost, parsed, and over a local UDP
+   socket
+   """
+   annexb = synthetic_gop_stream(max(size // 4, 8 << 20))
+   packets = rtp_packets(annexb)
+   rnd = random.Random(266)
+   reordered = list(packets)
+   for i in range(16, len(reordered), 16):
+      block = reordered[i:i + 16]
+      rnd.shuffle(block)
+      reordered[i:i + 16] = block
+   lossy = [packet for packet in packets if rnd.random() >= 0.01]
+
+   def depacketize(packets, parse=False):
+      def run():
+         d = vvc.RtpDepacketizer()
+         active = vvc.ParameterSetStore()
+         n = 0
+         for packet in packets:
+            for offset, length, nal in d.feed(packet):
+               if parse:
+                  vvc.parse_nal_unit(nal, active)
+               n += 1
+         for offset, length, nal in d.flush():
+            n += 1
+         return n
+      return run
+
+   nbytes = sum(len(packet) for packet in packets)
+   for name, run in (('in order', depacketize(packets)),
+                     ('reordered', depacketize(reordered)),
+                     ('1% lost', depacketize(lossy)),
+                     ('in order, parsed', depacketize(packets, parse=True))):
+      t, n = best_of(run)
+      report(name, t, nbytes, len(packets), unit='packet')
+
+   receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+   receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 << 20)
+   receiver.bind(('127.0.0.1', 0))
+   receiver.settimeout(0.5)
+   sender = threading.Thread(target=send_rtp, args=(packets, receiver.getsockname(), 0.0005))
+   d = vvc.RtpDepacketizer()
+   t0 = time.perf_counter()
+   sender.start()
+   t1 = t0
+   for offset, length, nal in vvc.iter_rtp_nal_bytes(receiver, d):
+      t1 = time.perf_counter()
+   sender.join()
+   receiver.close()
+   report('UDP, {0:d} lost'.format(d.lost), t1 - t0, nbytes, d.packets, unit='packet')
+
+
+def rbsp_bytes(bits):
+   bits += '0' * (-len(bits) % 8)
+   return int(bits, 2).to_bytes(len(bits) // 8, 'big')
+
+
+def layout_parameter_sets(width, height, subpics=None, tiles=None, slices_per_tile=0):
+   """
+   The start of an SPS with 128x128 CTUs and a PPS, parsed as far as
+   PictureLayout needs. subpics is the subpicture size in CTUs of a
+   uniform grid, tiles the uniform tile size in CTUs; with tiles, there
+   is a rectangular slice per tile, or CTU-row slices of slices_per_tile
+   CTUs when given, or a slice per subpicture with subpics.
+   """
+   ue = exp_golomb_bits
+   sps = '0000' '0000' '000' '01' '10' '0' '0' '0' + ue(width) + ue(height) + '0'
+   if subpics is None:
+      sps += '0'
+   else:
+      bits = vvc.ceil_log2((width + 127) // 128), vvc.ceil_log2((height + 127) // 128)
+      n = ((width + 127) // 128 // subpics[0]) * ((height + 127) // 128 // subpics[1])
+      sps += '1' + ue(n - 1) + '11' + format(subpics[0] - 1, '0{0:d}b'.format(bits[0])) + \
+         format(subpics[1] - 1, '0{0:d}b'.format(bits[1])) + ue(0) + '0'
+   pps = '000000' '0000' '0' + ue(width) + ue(height) + '0' '0' '0'
+   if tiles is None:
+      pps += '1' '0'
+   else:
+      pps += '0' '0' '10' + ue(0) + ue(0) + ue(tiles[0] - 1) + ue(tiles[1] - 1) + '0' '1'
+      columns = -(-((width + 127) // 128) // tiles[0])
+      rows = -(-((height + 127) // 128) // tiles[1])
+      last_height = (height + 127) // 128 - (rows - 1) * tiles[1]
+      if subpics is not None:
+         pps += '1'
+      else:
+         per_tile = [-(-(tiles[1] if y < rows - 1 else last_height) // slices_per_tile) if slices_per_tile else 1
+                     for y in range(rows)]
+         pps += '0' + ue(sum(per_tile) * columns - 1) + '0'
+         for t in range(columns * rows):
+            x, y = t % columns, t // columns
+            if x != columns - 1:
+               pps += ue(0)
+            if y != rows - 1 and x == 0:
+               pps += ue(0)
+            if slices_per_tile:
+               pps += ue(1) + ue(slices_per_tile - 1)
+            elif (tiles[1] if y < rows - 1 else last_height) > 1:
+               pps += ue(0)
+      pps += '0'
+   return (vvc.LazyParameterSet(vvc.seq_parameter_set_rbsp, rbsp_bytes(sps)),
+           vvc.LazyParameterSet(vvc.pic_parameter_set_rbsp, rbsp_bytes(pps)))
+
+
+def bench_layout(filename, size):
+   """
+   PictureLayout of 8K pictures with 128x128 CTUs built from scratch,
+   fetched from the ParameterSetStore cache, and queried
+   """
+   T = vvc.NalUnitType
+   layouts = [
+      ('single tile', {}),
+      ('6x4 tiles', {'tiles': (10, 9)}),
+      ('2x2 subpictures', {'subpics': (30, 17), 'tiles': (10, 17)}),
+      ('CTU row slices', {'tiles': (10, 9), 'slices_per_tile': 3}),
+   ]
+   for name, options in layouts:
+      sps, pps = layout_parameter_sets(7680, 4320, **options)
+      active = vvc.ParameterSetStore()
+      active.add(bytes((0, T.NAL_UNIT_SPS_NUT << 3 | 1, 0)), sps)
+      active.add(bytes((0, T.NAL_UNIT_PPS_NUT << 3 | 1, 0)), pps)
+      n = 200
+
+      def build():
+         for i in range(n):
+            layout = vvc.PictureLayout(sps, pps)
+         return layout
+
+      def cached():
+         for i in range(n * 100):
+            active.layout(0)
+         return n * 100
+
+      def query():
+         layout = active.layout(0)
+         for i in range(n * 10):
+            layout.ctus_per_tile()
+            layout.tiles_per_subpic()
+            layout.slices_per_subpic()
+         return n * 10
+
+      t, layout = best_of(build)
+      print('  {0:<24s} {1:5d} CTUs {2:3d} tiles {3:3d} slices {4:2d} subpics'.format(
+         name, layout.PicSizeInCtbsY, layout.NumTilesInPic, len(layout.CtbAddrInSlice), len(layout.subpics)))
+      for what, seconds, count in (('build', t, n), ('cached', ) + best_of(cached), ('query', ) + best_of(query)):
+         print('    {0:<22s} {1:9.2f} us {2:12.0f} /s'.format(what, seconds / count * 1e6, count / seconds))
+
+
+def bench_catalog(filename, size):
+   """
+   catalog_tree() of a directory of 256 small streams into a new SQLite
+   database, then the incremental re-run that finds them all unchanged
+   """
+   data = synthetic_gop_stream(256 << 10)
+   tmp = tempfile.mkdtemp()
+   database = os.path.join(tmp, 'catalog.db')
+   try:
+      for i in range(256):
+         with open(os.path.join(tmp, '{0:03d}.vvc'.format(i)), 'wb') as f:
+            f.write(data)
+      for name in ('first run', 're-run'):
+         t0 = time.perf_counter()
+         scanned, unchanged, removed, errors = vvc.catalog_tree([tmp], database)
+         t = time.perf_counter() - t0
+         report('{0:s}, {1:d} scanned'.format(name, scanned), t, len(data) * 256, 256, unit='file')
+   finally:
+      shutil.rmtree(tmp)
+
+
+def bench_output(filename, size):
+   """
+   nal_record() of the parsed NAL units of a 4 MB stream written by each
+   of the OUTPUT_FORMATS, to memory or, columnar, to a file
+   """
+   active = vvc.ParameterSetStore()
+   nals = [(offset, length) + vvc.parse_nal_unit(nal, active)
+           for offset, length, nal in vvc.scan_nal_units(synthetic_gop_stream(4 << 20))]
+   tmp = tempfile.mkdtemp()
+   try:
+      for name, writer in vvc.OUTPUT_FORMATS.items():
+         def output(name=name, writer=writer):
+            # the columnar writers write a file of their own
+            path = os.path.join(tmp, 'out.' + name)
+            f = io.StringIO()
+            w = writer(path) if writer is vvc.ColumnarWriter else writer(f)
+            for offset, length, n, rbsp in nals:
+               w.write(vvc.nal_record(offset, length, n, rbsp))
+            w.close()
+            return os.path.getsize(path) if writer is vvc.ColumnarWriter else f.tell()
+         try:
+            t, nbytes = best_of(output)
+         except ImportError:
+            print('  {0:<24s} skipped (pyarrow not installed)'.format(name))
+         else:
+            report(name, t, nbytes, len(nals))
+   finally:
+      shutil.rmtree(tmp)
+
+
+def bench_writer(filename, size):
+   """
+   BitWriter u(n)/ue()/se(), whole parameter sets written from their
+   syntax tables, and write_gop_stream() with each filler
+   """
+   rnd = random.Random(266)
+   elements = [('u', 1, rnd.getrandbits(1)) if r < 0.5 else
+               ('u', n, rnd.getrandbits(n)) if r < 0.7 else
+               ('ue', 0, min(int(rnd.expovariate(0.2)), 5000)) if r < 0.9 else
+               ('se', 0, rnd.randrange(-32, 32))
+               for r, n in ((rnd.random(), rnd.randrange(2, 17)) for i in range(100000))]
+
+   def bitwriter():
+      s = vvc.BitWriter()
+      u, ue, se = s.u, s.ue, s.se
+      for kind, n, value in elements:
+         if kind == 'u':
+            u(n, value)
+         elif kind == 'ue':
+            ue(value)
+         else:
+            se(value)
+      s.rbsp_trailing_bits()
+      return s.getvalue()
+
+   t, data = best_of(bitwriter)
+   report('BitWriter', t, len(data), len(elements), unit='elem')
+
+   T = vvc.NalUnitType
+   for name, nal_unit_type, rbsp in (('video_parameter_set_rbsp', T.NAL_UNIT_VPS_NUT, VPS_RBSP),
+                                     ('seq_parameter_set_rbsp', T.NAL_UNIT_SPS_NUT, SPS_RBSP),
+                                     ('pic_parameter_set_rbsp', T.NAL_UNIT_PPS_NUT, PPS_RBSP)):
+      ps = vvc.parse_nal_unit(bytes((0, (nal_unit_type << 3) | 1)) + rbsp)[1]
+
+      def write_many(name=name, ps=ps, n=500):
+         for i in range(n):
+            vvc.write_syntax(name, ps)
+         return n
+      assert vvc.write_syntax(name, ps).getvalue() == rbsp
+      t, n = best_of(write_many)
+      report(name, t, len(rbsp) * n, n, unit='set')
+
+   nbytes = max(size, 32 << 20)
+   with open(os.devnull, 'wb') as f:
+      for filler in sorted(FILLERS):
+         t, n = best_of(lambda: write_gop_stream(f, nbytes, filler=filler))
+         report('write_gop_stream ' + filler, t, n, n, unit='byte')
+
+
+def bench_memory(filename, size):
+   """
+   bytes per parsed SPS, PPS and slice header kept in memory, as parsed
+   and as compact() records
+   """
+   T = vvc.NalUnitType
+   active = vvc.ParameterSetStore()
+   slices = []
+   for offset, length, nal in vvc.scan_nal_units(synthetic_gop_stream(1 << 20)):
+      vvc.parse_nal_unit(nal, active)
+      if nal[1] >> 3 in vvc.SLICE_NAL_UNIT_TYPES:
+         slices.append(nal)
+   n = 1000
+   structures = [
+      ('SPS', lambda: vvc.seq_parameter_set_rbsp(vvc.BitReader(SPS_RBSP))),
+      ('PPS', lambda: vvc.pic_parameter_set_rbsp(vvc.BitReader(PPS_RBSP))),
+      ('slice header', lambda: vvc.parse_slice_layer(slices[1], T.NAL_UNIT_TRAIL_NUT, active)),
+   ]
+
+   def measure(make):
+      tracemalloc.start()
+      kept = [make() for i in range(n)]
+      used = tracemalloc.get_traced_memory()[0]
+      tracemalloc.stop()
+      return used / len(kept)
+
+   for name, parse in structures:
+      parsed = measure(parse)
+      compacted = measure(lambda: vvc.compact(parse()))
+      print('  {0:<24s} {1:9.0f} B {2:9.0f} B compact {3:6.1f}%'.format(
+         name, parsed, compacted, 100.0 * compacted / parsed))
+
+
+BENCHMARKS = {
+   'scan': bench_scan,
+   'epb': bench_epb,
+   'bitreader': bench_bitreader,
+   'parallel': bench_parallel,
+   'headers': bench_headers,
+   'lazy': bench_lazy,
+   'slices': bench_slices,
+   'syntax': bench_syntax,
+   'memory': bench_memory,
+   'sei': bench_sei,
+   'dph': bench_dph,
+   'async': bench_async,
+   'profile': bench_profile,
+   'extract': bench_extract,
+   'diff': bench_diff,
+   'mp4': bench_mp4,
+   'rtp': bench_rtp,
+   'layout': bench_layout,
+   'catalog': bench_catalog,
+   'output': bench_output,
+   'writer': bench_writer,
+}
+
+
+# the baseline committed with the code, and the benchmarks quick enough to
+# compare against it on every test run (tests/test_bench.py)
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+QUICK = ('scan', 'headers', 'syntax', 'lazy', 'output')
+
+
+def calibrate():
+   """
+   Iterations per second of a fixed pure Python loop: the speed of this
+   machine and interpreter, which compare() divides out
+   """
+   def loop(n=500000):
+      total = 0
+      for i in range(n):
+         total = (total * 31 + i) & 0xffff
+      return n
+   t, n = best_of(loop, repeat=20)
+   return n / t
+
+
+def compare(baseline, tolerance):
+   """
+   Prints the results against those of the baseline file, scaled by the
+   calibrate() speed of both machines, and returns the lines more than
+   tolerance (a fraction) slower
+   """
+   with open(baseline) as f:
+      base = json.load(f)
+   speed = calibrate() / base['calibration']
+   slower = []
+   print('against {0:s}, this machine {1:.2f}x as fast'.format(baseline, speed))
+   for name, lines in results.items():
+      for line, rate in lines.items():
+         before = base['results'].get(name, {}).get(line)
+         if not before:
+            # not in the baseline, or a rate of nothing to compare against
+            continue
+         ratio = rate / before / speed
+         flag = ''
+         if ratio < 1 - tolerance:
+            slower.append('{0:s}: {1:s}'.format(name, line))
+            flag = '  SLOWER'
+         print('  {0:<34s} {1:7.2f}x{2:s}'.format(name + ': ' + line, ratio, flag))
+   return slower
+
+
+def main():
+   parser = argparse.ArgumentParser(description='benchmarks for 266.py')
+   parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+   parser.add_argument('-f', '--file', help='Annex-B input (default: synthetic)')
+   parser.add_argument('--size', type=int, default=32 << 20,
+                       help='size of the synthetic stream in bytes')
+   parser.add_argument('--generate', metavar='OUT',
+                       help='only write a stream of --size bytes to OUT')
+   parser.add_argument('--filler', choices=sorted(FILLERS), default='random',
+                       help='slice data of --generate')
+   parser.add_argument('--save-baseline', metavar='JSON', nargs='?', const=BASELINE,
+                       help='store the results of the benchmarks run in the baseline JSON '
+                            '(default: bench_baseline.json)')
+   parser.add_argument('--compare', metavar='JSON', nargs='?', const=BASELINE,
+                       help='compare the results with the baseline JSON (default: '
+                            'bench_baseline.json), exit 1 on a slowdown')
+   parser.add_argument('--tolerance', type=float, default=0.25,
+                       help='slowdown of --compare allowed, as a fraction')
+   args = parser.parse_args()
+
+   if args.generate:
+      with open(args.generate, 'wb') as f:
+         write_gop_stream(f, args.size, filler=args.filler)
+      return
+
+   names = args.names or list(BENCHMARKS)
+   tmp = None
+   filename = args.file
+   if filename is None:
+      tmp = tempfile.NamedTemporaryFile(suffix='.vvc', delete=False)
+      tmp.write(synthetic_stream(args.size))
+      tmp.close()
+      filename = tmp.name
+   size = os.path.getsize(filename)
+   try:
+      for name in names:
+         print(name)
+         results[name] = {}
+         BENCHMARKS[name](filename, size)
+   finally:
+      if tmp is not None:
+         os.unlink(tmp.name)
+
+   if args.save_baseline:
+      # benchmarks not run keep their baseline, and the rates of those run
+      # are stored at the calibrate() speed it was made at
+      calibration = calibrate()
+      try:
+         with open(args.save_baseline) as f:
+            base = json.load(f)
+      except OSError:
+         base = {'results': {}, 'calibration': calibration}
+      scale = base['calibration'] / calibration
+      for name, lines in results.items():
+         base['results'][name] = dict((line, rate * scale) for line, rate in lines.items())
+      base.update(python=sys.version.split()[0], size=size)
+      with open(args.save_baseline, 'w') as f:
+         json.dump(base, f, indent=1, sort_keys=True)
+   if args.compare:
+      slower = compare(args.compare, args.tolerance)
+      if slower:
+         sys.exit('slower than the baseline: ' + ', '.join(slower))
+
+
+if __name__ == "__main__":
+   main()
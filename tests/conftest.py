@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 266.py is a script, not a package: import it from the checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
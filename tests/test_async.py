@@ -0,0 +1,75 @@
+import asyncio
+import importlib
+import itertools
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+STREAM = bench.synthetic_gop_stream(300 << 10, gop=8)
+
+
+def with_sps(stream, **fields):
+   # the same stream with its SPS rewritten
+   return stream.replace(bench.parameter_set_nal_unit(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP),
+                         bench.parameter_set_nal_unit(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP, **fields))
+
+
+def chunks(data, sizes=(1, 7, 4093, 13, 65537)):
+   pos = 0
+   for size in itertools.cycle(sizes):
+      if pos >= len(data):
+         return
+      yield data[pos:pos + size]
+      pos += size
+
+
+def expected(stream):
+   return [(offset, length) for offset, length, nal in vvc.scan_nal_units(stream)]
+
+
+def test_odd_chunks_match_scan_nal_units():
+   async def run():
+      reader = asyncio.StreamReader()
+      for chunk in chunks(STREAM):
+         reader.feed_data(chunk)
+      reader.feed_eof()
+      return [(offset, length) async for offset, length, n, rbsp in vvc.aiter_nal_units(reader, chunk_size=1000)]
+   assert asyncio.run(run()) == expected(STREAM)
+
+
+def test_two_tcp_inputs_keep_their_own_parameter_sets():
+   other = with_sps(STREAM, sps_pic_width_max_in_luma_samples=1280, sps_pic_height_max_in_luma_samples=720)
+   assert other != STREAM
+
+   async def run():
+      def serve(data):
+         async def send(reader, writer):
+            for chunk in chunks(data):
+               writer.write(chunk)
+               await writer.drain()
+            writer.close()
+         return asyncio.start_server(send, '127.0.0.1', 0)
+
+      servers = [await serve(STREAM), await serve(other)]
+      names = ['tcp://127.0.0.1:{0:d}'.format(server.sockets[0].getsockname()[1]) for server in servers]
+      seen = dict((name, []) for name in names)
+
+      def show(name, offset, length, n, rbsp, active):
+         seen[name].append((offset, length))
+      try:
+         stores = await vvc.watch_streams(names, show)
+      finally:
+         for server in servers:
+            server.close()
+      return names, seen, stores
+
+   names, seen, stores = asyncio.run(run())
+   assert seen[names[0]] == expected(STREAM)
+   assert seen[names[1]] == expected(other)
+   a, b = stores[names[0]], stores[names[1]]
+   assert a is not b
+   sps = T.NAL_UNIT_SPS_NUT, 0
+   assert a[sps].sps_pic_width_max_in_luma_samples == 1920
+   assert b[sps].sps_pic_width_max_in_luma_samples == 1280
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import bench
+
+
+@pytest.mark.skipif('BENCH_TOLERANCE' not in os.environ,
+                    reason='timing against bench_baseline.json: set BENCH_TOLERANCE (e.g. 0.5) to run')
+def test_quick_benchmarks_against_the_baseline():
+   """
+   The quick benchmarks run within BENCH_TOLERANCE of bench_baseline.json.
+   They depend on the load of the machine, so only run when asked for.
+   """
+   run = subprocess.run([sys.executable, bench.__file__] + list(bench.QUICK) +
+                        ['--compare', '--tolerance', os.environ['BENCH_TOLERANCE']],
+                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+   assert run.returncode == 0, run.stdout
+
+
+def test_quick_benchmarks_exist():
+   assert set(bench.QUICK) <= set(bench.BENCHMARKS)
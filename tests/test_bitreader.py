@@ -0,0 +1,66 @@
+import importlib
+import random
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+ue_bits = bench.exp_golomb_bits
+
+
+def se_bits(v):
+   return ue_bits(2 * v - 1 if v > 0 else -2 * v)
+
+
+def reader(bits):
+   return vvc.BitReader(bench.rbsp_bytes(bits))
+
+
+@pytest.mark.parametrize('skew', range(8))
+def test_reads_across_byte_boundaries(skew):
+   rnd = random.Random(skew)
+   values = [('u', 32, 0xdeadbeef), ('u', 32, 1), ('u', 1, 1), ('u', 17, 0x1abcd), ('u', 9, 0)]
+   values += [('ue', None, v) for v in (0, 1, 2, 6, 7, 254, 255, 256, 1 << 20, (1 << 31) - 1, (1 << 32) - 2)]
+   values += [('se', None, v) for v in (0, 1, -1, 127, -128, 1 << 20, -(1 << 30))]
+   rnd.shuffle(values)
+   bits = '1' * skew
+   for kind, n, v in values:
+      bits += format(v, '0{0:d}b'.format(n)) if kind == 'u' else ue_bits(v) if kind == 'ue' else se_bits(v)
+   s = reader(bits)
+   s.skip(skew)
+   for kind, n, v in values:
+      assert (s.u(n) if kind == 'u' else s.ue() if kind == 'ue' else s.se()) == v
+   assert s.pos == len(bits)
+
+
+def test_peek_reads_zeros_past_the_end():
+   s = vvc.BitReader(b'\xa5')
+   s.skip(4)
+   assert s.peek(8) == 0x50
+   assert s.peek(32) == 0x50000000
+   assert s.pos == 4
+
+
+def test_read_past_the_end():
+   s = vvc.BitReader(b'\xff\xff')
+   s.skip(10)
+   with pytest.raises(EOFError):
+      s.u(7)
+   # a short codeword that would fit the table but not the RBSP
+   s = vvc.BitReader(b'\x01')
+   s.skip(6)
+   with pytest.raises(EOFError):
+      s.ue()
+   with pytest.raises(ValueError):
+      vvc.BitReader(bytes(5)).ue()
+
+
+def test_more_rbsp_data_and_trailing_bits():
+   s = reader('101' '1')
+   assert s.u(3) == 5 and not s.more_rbsp_data()
+   s.rbsp_trailing_bits()
+   assert s.pos == 8
+   s = reader('1' '0000000' '0000' '1')
+   assert s.u(1) == 1 and s.more_rbsp_data()
@@ -0,0 +1,43 @@
+import importlib
+import os
+import sqlite3
+
+import bench
+
+vvc = importlib.import_module('266')
+
+
+def sps_nal(**fields):
+   return bench.parameter_set_nal_unit(vvc.NalUnitType.NAL_UNIT_SPS_NUT, bench.SPS_RBSP, **fields)
+
+
+def test_resolution_is_that_of_the_last_sps(tmp_path):
+   path = str(tmp_path / 'a.vvc')
+   with open(path, 'wb') as f:
+      f.write(bench.synthetic_gop_stream(100 << 10, gop=4))
+      f.write(sps_nal(sps_seq_parameter_set_id=1, sps_pic_width_max_in_luma_samples=1280,
+                      sps_pic_height_max_in_luma_samples=720))
+   entry, counts, parameter_sets = vvc.catalog_file(path)
+   assert entry[4:6] == (1280, 720)
+   assert entry[-1] is None
+
+
+def test_file_gone_before_the_worker(tmp_path):
+   path = str(tmp_path / 'gone.vvc')
+   entry, counts, parameter_sets = vvc.catalog_file(path)
+   assert entry[0] == path and entry[1] is None
+   assert entry[-1].startswith('FileNotFoundError')
+
+
+def test_catalog_tree_is_incremental(tmp_path):
+   data = bench.synthetic_gop_stream(64 << 10, gop=4)
+   for i in range(3):
+      with open(str(tmp_path / '{0:d}.vvc'.format(i)), 'wb') as f:
+         f.write(data)
+   database = str(tmp_path / 'catalog.db')
+   assert vvc.catalog_tree([str(tmp_path)], database, jobs=2) == (3, 0, 0, 0)
+   os.unlink(str(tmp_path / '1.vvc'))
+   assert vvc.catalog_tree([str(tmp_path)], database, jobs=2) == (0, 2, 1, 0)
+   db = sqlite3.connect(database)
+   assert db.execute('SELECT COUNT(*) FROM files').fetchone() == (2,)
+   db.close()
@@ -0,0 +1,46 @@
+import array
+import importlib
+import pickle
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+
+
+def sps():
+   return vvc.parse_nal_unit(bytes((0, (T.NAL_UNIT_SPS_NUT << 3) | 1)) + bench.SPS_RBSP)[1]
+
+
+def test_compact_sps_keeps_every_element():
+   ps = sps()
+   record = vvc.compact(ps)
+   assert isinstance(record, vvc.CompactRecord) and record.structure is type(ps)
+   assert not hasattr(record, '__dict__')
+   assert record.as_dict() == ps.as_dict()
+   assert isinstance(record.profile_tier_level, vvc.CompactRecord)
+   assert vvc.compact(record) is record
+   # one record type per structure and set of elements
+   assert type(vvc.compact(sps())) is type(record)
+   assert vvc.parameter_set_nal(record) == vvc.parameter_set_nal(ps)
+
+
+def test_integer_lists_become_arrays():
+   assert vvc.compact([0, 1, 1]).typecode == 'b'
+   assert vvc.compact([0, 1000]).typecode == 'h'
+   assert vvc.compact([-1, 1 << 20]).typecode == 'i'
+   assert vvc.compact([0, (1 << 32) - 1]).typecode == 'q'
+   big = [0, 1 << 70]
+   assert vvc.compact(big) is big
+   # lists of lists and empty lists
+   nested = vvc.compact([[1, 2], [3]])
+   assert isinstance(nested, list) and all(isinstance(row, array.array) for row in nested)
+   assert vvc.compact([]) == []
+
+
+def test_compact_records_pickle():
+   record = vvc.compact(sps())
+   copy = pickle.loads(pickle.dumps(record))
+   assert type(copy) is type(record)
+   assert copy.as_dict() == record.as_dict()
@@ -0,0 +1,94 @@
+import importlib
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+STREAM = bench.synthetic_gop_stream(300 << 10, gop=4)
+SPS = bench.parameter_set_nal_unit(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP)
+OTHER_SPS = bench.parameter_set_nal_unit(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP, sps_pic_width_max_in_luma_samples=1280)
+AUD = vvc.nal_unit_bytes(T.NAL_UNIT_AUD_NUT, b'\x10\x80')
+
+
+def diff(tmp_path, a, b):
+   paths = [str(tmp_path / 'a.vvc'), str(tmp_path / 'b.vvc')]
+   for path, data in zip(paths, (a, b)):
+      with open(path, 'wb') as f:
+         f.write(data)
+   return vvc.diff_streams(*paths)
+
+
+def nal_starts(data):
+   # offsets of the start codes of the NAL units of data
+   return [offset - 4 if data[offset - 4] == 0 else offset - 3 for offset, length, nal in vvc.scan_nal_units(data)]
+
+
+def test_common_prefix_and_suffix():
+   a = bytes(range(256)) * 40
+   b = bytearray(a)
+   b[5000] ^= 1
+   for block in (1 << 20, 4096, 64, 1):
+      assert vvc.common_prefix(a, b, block) == 5000
+      assert vvc.common_suffix(a, b, len(a), block) == len(a) - 5001
+      assert vvc.common_prefix(a, a[:77], block) == 77
+      assert vvc.common_suffix(a, b, 100, block) == 100
+
+
+def test_align_sequences():
+   a = list('abcdefgh')
+   b = list('abXdefYgh')
+   assert vvc.align_sequences(a, b) == [('equal', 0, 2, 0, 2), ('replace', 2, 3, 2, 3), ('equal', 3, 6, 3, 6),
+                                        ('insert', 6, 6, 6, 7), ('equal', 6, 8, 7, 9)]
+   # repeated elements are aligned between the unique ones
+   a = ['x', 'p', 'p', 'y', 'p']
+   assert vvc.align_sequences(a, ['x', 'p', 'y', 'p']) == [('equal', 0, 2, 0, 2), ('delete', 2, 3, 2, 2),
+                                                           ('equal', 3, 5, 2, 4)]
+
+
+def test_identical_files(tmp_path):
+   d = diff(tmp_path, STREAM, STREAM)
+   assert d.identical()
+   assert d.prefix == len(STREAM) and d.first_divergence() is None
+
+
+def test_one_byte_changed(tmp_path):
+   changed = bytearray(STREAM)
+   changed[len(STREAM) // 2] ^= 0x55
+   d = diff(tmp_path, STREAM, bytes(changed))
+   assert not d.identical()
+   assert d.prefix == len(STREAM) // 2 and d.suffix == len(STREAM) - len(STREAM) // 2 - 1
+   assert [tag for tag, i1, i2, j1, j2 in d.opcodes] == ['replace']
+   i, j = d.first_divergence()
+   assert d.offsets_a[i] <= len(STREAM) // 2 < d.offsets_a[i] + 60000
+   assert d.parameter_sets == []
+
+
+@pytest.mark.parametrize('inserted', [True, False])
+def test_nal_unit_inserted_or_deleted(tmp_path, inserted):
+   at = nal_starts(STREAM)[len(nal_starts(STREAM)) // 2]
+   other = STREAM[:at] + AUD + STREAM[at:]
+   d = diff(tmp_path, STREAM, other) if inserted else diff(tmp_path, other, STREAM)
+   tags = [tag for tag, i1, i2, j1, j2 in d.opcodes if tag != 'equal']
+   assert tags == ['insert' if inserted else 'delete']
+   assert d.parameter_sets == []
+
+
+def test_changed_sps(tmp_path):
+   d = diff(tmp_path, STREAM, STREAM.replace(SPS, OTHER_SPS))
+   [(name, differences)] = d.parameter_sets
+   assert name == 'SPS 0'
+   assert ('sps_pic_width_max_in_luma_samples', 1920, 1280) in differences
+
+
+def test_sps_changed_and_restored(tmp_path):
+   # the first SPS differs and the later ones are those of a again, with
+   # an AUD at the end so that all of the stream is compared: only the
+   # version a does not have is reported
+   other = STREAM.replace(SPS, OTHER_SPS, 1) + AUD
+   d = diff(tmp_path, STREAM, other)
+   assert d.parameter_sets == [('SPS 0 only in b', [])]
+   d = diff(tmp_path, other, STREAM)
+   assert d.parameter_sets == [('SPS 0 only in a', [])]
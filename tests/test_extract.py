@@ -0,0 +1,89 @@
+import importlib
+import io
+import os
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+# TemporalId of the pictures of a hierarchical GOP of 4
+TIDS = [0, 2, 1, 2]
+
+
+def layered_nal_units():
+   """
+   (nal_unit_type, nuh_layer_id, TemporalId, NAL unit) of a 2-layer stream
+   with the bench VPS, whose OLS 0 is layer 0 and OLS 1 layers 0 and 1,
+   an OPI NAL unit and 8 pictures of both layers. Every other NAL unit
+   has a 3-byte start code.
+   """
+   nals = [(T.NAL_UNIT_VPS_NUT, 0, 0, bench.VPS_RBSP), (T.NAL_UNIT_OPI_NUT, 0, 0, b'\xd0'),
+           (T.NAL_UNIT_SPS_NUT, 0, 0, bench.SPS_RBSP), (T.NAL_UNIT_PPS_NUT, 0, 0, bench.PPS_RBSP)]
+   for i in range(8):
+      for layer in (0, 1):
+         nals.append((T.NAL_UNIT_TRAIL_NUT, layer, TIDS[i % 4], bytes([0x40 + 2 * i + layer]) * 30))
+   out = []
+   for k, (nal_unit_type, layer, tid, rbsp) in enumerate(nals):
+      nal = vvc.nal_unit_bytes(nal_unit_type, rbsp, layer, tid)
+      out.append((nal_unit_type, layer, tid, nal[1:] if k % 2 else nal))
+   return out
+
+
+@pytest.mark.parametrize('tIdTarget, layers, targetOlsIdx', [
+   (6, None, None),
+   (1, None, None),
+   (0, None, 0),
+   (2, None, 1),
+   (6, [1], None),
+   (1, [0], 1),
+])
+def test_extracted_nal_units(tIdTarget, layers, targetOlsIdx):
+   nals = layered_nal_units()
+   stream = b''.join(nal for t, layer, tid, nal in nals)
+   keep = [0, 1] if targetOlsIdx is None else [0, 1][:targetOlsIdx + 1]
+   if layers is not None:
+      keep = [layer for layer in keep if layer in layers]
+   expected = []
+   for nal_unit_type, layer, tid, nal in nals:
+      if tid > tIdTarget or layer not in keep:
+         continue
+      if nal_unit_type == T.NAL_UNIT_OPI_NUT and (targetOlsIdx is not None or tIdTarget < 6):
+         nal = vvc.operating_point_information_nal(targetOlsIdx, tIdTarget, layer)
+      expected.append(nal)
+   pieces = list(vvc.extract_sub_bitstream(stream, tIdTarget, layers, targetOlsIdx))
+   out = b''.join(piece if isinstance(piece, bytes) else stream[piece[0]:piece[0] + piece[1]] for piece in pieces)
+   assert out == b''.join(expected)
+   # kept NAL units next to each other are copied as one range
+   ranges = [piece for piece in pieces if not isinstance(piece, bytes)]
+   assert all(a[0] + a[1] < b[0] for a, b in zip(ranges, ranges[1:]))
+   if (tIdTarget, layers, targetOlsIdx) == (6, None, None):
+      assert pieces == [(0, len(stream))]
+
+
+@pytest.mark.parametrize('target', ['file', 'no sendfile', 'BytesIO'])
+def test_write_sub_bitstream(tmp_path, monkeypatch, target):
+   stream = b''.join(nal for t, layer, tid, nal in layered_nal_units())
+   path = str(tmp_path / 'in.vvc')
+   with open(path, 'wb') as f:
+      f.write(stream)
+   expected = b''.join(piece if isinstance(piece, bytes) else stream[piece[0]:piece[0] + piece[1]]
+                       for piece in vvc.extract_sub_bitstream(stream, 1, None, 0))
+   if target == 'no sendfile':
+      def sendfile(*args):
+         raise OSError('sendfile')
+      monkeypatch.setattr(os, 'sendfile', sendfile)
+   if target == 'BytesIO':
+      out = io.BytesIO()
+      assert vvc.write_sub_bitstream(path, out, 1, None, 0) == len(expected)
+      data = out.getvalue()
+   else:
+      with open(str(tmp_path / 'out.vvc'), 'wb') as out:
+         assert vvc.write_sub_bitstream(path, out, 1, None, 0) == len(expected)
+      with open(str(tmp_path / 'out.vvc'), 'rb') as f:
+         data = f.read()
+   assert data == expected
+   assert [nal[1] >> 3 for offset, length, nal in vvc.scan_nal_units(data)] == \
+      [T.NAL_UNIT_VPS_NUT, T.NAL_UNIT_OPI_NUT, T.NAL_UNIT_SPS_NUT, T.NAL_UNIT_PPS_NUT] + [T.NAL_UNIT_TRAIL_NUT] * 4
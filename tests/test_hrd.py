@@ -0,0 +1,81 @@
+import importlib
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+
+
+def nal(nal_unit_type, layer=0, first_byte=0):
+   # a NAL unit header and the first RBSP byte: 0x80 for a slice with
+   # sh_picture_header_in_slice_header_flag
+   return bytes((layer, nal_unit_type << 3 | 1, first_byte, 0x80))
+
+
+def test_access_unit_boundaries():
+   nals = [
+      (nal(T.NAL_UNIT_AUD_NUT), 0),
+      (nal(T.NAL_UNIT_PH_NUT), 0),
+      (nal(T.NAL_UNIT_TRAIL_NUT), 0),
+      (nal(T.NAL_UNIT_TRAIL_NUT), 0),                   # another slice of the picture
+      (nal(T.NAL_UNIT_PH_NUT, 1), 0),                   # a higher layer: same AU
+      (nal(T.NAL_UNIT_TRAIL_NUT, 1), 0),
+      (nal(T.NAL_UNIT_PREFIX_SEI_NUT), 1),              # back to layer 0
+      (nal(T.NAL_UNIT_TRAIL_NUT, 0, 0x80), 1),
+      (nal(T.NAL_UNIT_TRAIL_NUT, 0, 0x80), 2),          # picture header in the slice header
+      (nal(T.NAL_UNIT_TRAIL_NUT, 1, 0x80), 2),
+      (nal(T.NAL_UNIT_AUD_NUT, 1), 3),                  # an AUD always starts an AU
+      (nal(T.NAL_UNIT_PH_NUT, 1), 3),
+      (nal(T.NAL_UNIT_TRAIL_NUT, 1), 3),
+      (nal(T.NAL_UNIT_PH_NUT, 1), 4),                   # the same layer again
+      (nal(T.NAL_UNIT_SUFFIX_SEI_NUT, 1), 4),
+   ]
+   counter = vvc.AccessUnitCounter()
+   assert [counter(n) for n, au in nals] == [au for n, au in nals]
+
+
+def test_access_units_of_the_gop_stream():
+   stream = bench.synthetic_gop_stream(200 << 10, gop=4)
+   aus = list(vvc.iter_access_units(vvc.scan_nal_units(stream)))
+   pictures = sum(1 for offset, length, n in vvc.scan_nal_units(stream) if n[1] >> 3 == T.NAL_UNIT_PH_NUT)
+   assert len(aus) == pictures
+   assert [au.irap for au in aus[:5]] == [True, False, False, False, True]
+   assert sum(au.nbytes for au in aus) == sum(length for offset, length, n in vvc.scan_nal_units(stream))
+
+
+def test_vps_hrd_is_indexed_by_multi_layer_ols():
+   sps = vvc.seq_parameter_set_rbsp(vvc.BitReader(bench.SPS_RBSP))
+   vps = vvc.video_parameter_set_rbsp(vvc.BitReader(bench.VPS_RBSP))
+   # OLS 0 has layer 0 only, OLS 1 is the one multi-layer OLS; give it
+   # the HRD parameters of the SPS
+   assert vps.NumLayersInOls == [1, 2]
+   vps.general_timing_hrd_parameters = sps.general_timing_hrd_parameters
+   vps.ols_timing_hrd_parameters = [sps.ols_timing_hrd_parameters]
+   vps.vps_hrd_max_tid = [sps.sps_max_sublayers_minus1]
+   vps.vps_ols_timing_hrd_idx = [0]
+   assert vvc.hrd_timing(vps, 1) == vvc.hrd_timing(sps) == (1001 / 60000, 320000, 640000, False)
+   assert vvc.hrd_timing(vps, 0) == (None, None, None, None)
+
+
+def test_cpb_underflow():
+   # 8000 bit/s, a picture a second, removal 1 s after the first bit
+   cpb = vvc.CpbSimulator(8000, 16000, 1.0, initial_delay=1.0)
+   assert cpb.add(1000) == []
+   # 12000 bits from 1 s complete at 2.5 s, after their removal time of 2 s:
+   # removed when complete
+   assert cpb.add(1500) == [(0, 8000, False, False)]
+   assert cpb.add(500) == [(1, 12000, True, False)]
+   assert cpb.flush() == [(2, 4000, False, False)]
+   assert (cpb.underflows, cpb.overflows, cpb.max_level) == (1, 0, 12000)
+
+
+def test_cpb_overflow():
+   # constant bit rate: 1024-bit AUs arrive back to back, one every
+   # 0.125 s, while one is removed a second
+   cpb = vvc.CpbSimulator(8192, 4096, 1.0, cbr=True, initial_delay=1.0)
+   removed = [cpb.add(128) for i in range(8)]
+   assert removed[:7] == [[]] * 7
+   # AU 0 is removed at 1 s with AUs 1 to 6 and all of AU 7 in the CPB
+   assert removed[7] == [(0, 8192, False, True)]
+   assert (cpb.underflows, cpb.overflows) == (0, 1)
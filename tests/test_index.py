@@ -0,0 +1,48 @@
+import importlib
+import os
+
+import bench
+
+vvc = importlib.import_module('266')
+
+
+def full_parse(buf):
+   active = vvc.ParameterSetStore()
+   return [(offset,) + vvc.parse_nal_unit(nal, active) for offset, length, nal in vvc.scan_nal_units(buf)]
+
+
+def test_selected_access_unit_parses_like_the_whole_stream(tmp_path):
+   buf = bench.synthetic_gop_stream(600 << 10, gop=8)
+   idx = vvc.NalIndex.build(buf)
+   everything = dict((offset, (n, rbsp)) for offset, n, rbsp in full_parse(buf))
+   for au in (3, 9, 17):
+      active = vvc.ParameterSetStore()
+      selected = list(idx.access_unit(au))
+      nals = [(offset,) + vvc.parse_nal_unit(nal, active) for offset, length, nal in idx.select(buf, selected, active)]
+      assert [offset for offset, n, rbsp in nals] == [idx.offset[i] for i in selected]
+      for offset, n, rbsp in nals:
+         if n.nal_unit_type in (vvc.NalUnitType.NAL_UNIT_PH_NUT, vvc.NalUnitType.NAL_UNIT_TRAIL_NUT,
+                                vvc.NalUnitType.NAL_UNIT_IDR_W_RADL):
+            assert rbsp is not None
+            assert rbsp.as_dict() == everything[offset][1].as_dict()
+
+
+def test_index_of_an_edited_file_is_stale(tmp_path):
+   filename = str(tmp_path / 'x.vvc')
+   buf = bench.synthetic_gop_stream(600 << 10, gop=8)
+   with open(filename, 'wb') as f:
+      f.write(buf)
+   vvc.NalIndex.open(filename)
+   assert vvc.NalIndex.load(filename + '.idx', filename) is not None
+   # same size, same first and last 64 KiB, a start code turned into slice data
+   middle = buf.index(b'\x00\x00\x00\x01', len(buf) // 2)
+   with open(filename, 'r+b') as f:
+      f.seek(middle + 3)
+      f.write(b'\x02')
+   st = os.stat(filename)
+   os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+   assert vvc.NalIndex.load(filename + '.idx', filename) is None
+   assert len(vvc.NalIndex.open(filename)) == len(vvc.NalIndex.build(buf)) - 1
+   # touched but unchanged: the digest of the whole file still matches
+   os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 2000000))
+   assert vvc.NalIndex.load(filename + '.idx', filename) is not None
@@ -0,0 +1,36 @@
+import importlib
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+
+
+def parameter_set_nal(nal_unit_type, rbsp, **fields):
+   # the parameter set of rbsp with fields changed, without its start code
+   return bench.parameter_set_nal_unit(nal_unit_type, rbsp, **fields)[4:]
+
+
+@pytest.mark.parametrize('wpp, rect, expected', [
+   # 5+4, 4+2 and 5+4+4+2 CTU columns of tiles, 3 CTU rows each
+   (0, 1, [1, 1, 7]),
+   (1, 1, [5, 5, 23]),
+   (0, 0, [0, 1, 2, 3]),
+   (1, 0, [2, 5, 8, 11]),
+])
+def test_entry_points_come_from_the_picture_layout(wpp, rect, expected):
+   active = vvc.ParameterSetStore()
+   vvc.parse_nal_unit(parameter_set_nal(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP,
+                                        sps_entropy_coding_sync_enabled_flag=wpp), active)
+   n, pps = vvc.parse_nal_unit(parameter_set_nal(T.NAL_UNIT_PPS_NUT, bench.PPS_RBSP,
+                                                 pps_rect_slice_flag=rect), active)
+   plan = active.plan(pps.pps_pic_parameter_set_id)
+   assert plan.picture_layout is active.layout(pps.pps_pic_parameter_set_id)
+   if rect:
+      assert [plan.entry_points(0, i, 0) for i in range(3)] == expected
+   else:
+      # slices of 1 to 4 tiles from the first
+      assert [plan.entry_points(0, 0, i) for i in range(4)] == expected
@@ -0,0 +1,44 @@
+import importlib
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+
+
+def nal(nal_unit_type, rbsp):
+   return bytes((0, (nal_unit_type << 3) | 1)) + rbsp
+
+
+def test_sps_is_parsed_a_stage_at_a_time():
+   sps = vvc.LazyParameterSet.from_nal(nal(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP))
+   stages = len(sps.stages)
+   assert stages > 1 and sps.s.pos == 0
+   assert sps.sps_seq_parameter_set_id == 0
+   assert len(sps.stages) == stages - 1
+   pos = sps.s.pos
+   # fields of the stage already parsed do not read on
+   sps.sps_chroma_format_idc
+   assert sps.s.pos == pos and len(sps.stages) == stages - 1
+   # a field of a later stage parses up to it, and no further
+   sps.sps_bitdepth_minus8
+   assert sps.s.pos > pos and sps.stages
+   with pytest.raises(AttributeError):
+      sps.no_such_syntax_element
+   assert not sps.stages
+
+
+@pytest.mark.parametrize('nal_unit_type, rbsp', [
+   (T.NAL_UNIT_VPS_NUT, bench.VPS_RBSP),
+   (T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP),
+   (T.NAL_UNIT_PPS_NUT, bench.PPS_RBSP),
+])
+def test_lazy_matches_the_full_parse(nal_unit_type, rbsp):
+   n, ps = vvc.parse_nal_unit(nal(nal_unit_type, rbsp))
+   lazy = vvc.LazyParameterSet.from_nal(nal(nal_unit_type, rbsp))
+   assert lazy.as_dict() == ps.as_dict()
+   assert vvc.parameter_set_nal(vvc.LazyParameterSet.from_nal(nal(nal_unit_type, rbsp))) == \
+      vvc.parameter_set_nal(ps)
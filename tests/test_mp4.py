@@ -0,0 +1,41 @@
+import importlib
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+STREAM = bench.synthetic_gop_stream(200 << 10, gop=4)
+
+
+def nal_units(nals):
+   return [bytes(nal) for offset, length, nal in nals]
+
+
+@pytest.mark.parametrize('chunk_samples', [8, 3, 1])
+def test_mp4_samples_hold_the_annexb_nal_units(chunk_samples):
+   mp4 = bench.mp4_file(STREAM, chunk_samples)
+   assert vvc.is_mp4(mp4) and not vvc.is_mp4(STREAM)
+   nals = list(vvc.scan_mp4_nal_units(mp4))
+   for offset, length, nal in nals:
+      assert bytes(mp4[offset:offset + length]) == bytes(nal)
+   # the vvcC parameter sets first, then the samples
+   assert nal_units(nals[3:]) == nal_units(vvc.scan_nal_units(STREAM))
+   assert nal_units(vvc.scan_input(mp4)) == nal_units(nals)
+   types = [t for offset, length, t, layer, tid, rbsp in vvc.scan_headers(mp4)]
+   assert types == [nal[1] >> 3 for nal in nal_units(nals)]
+
+
+def test_vvcc_parameter_sets_are_read():
+   buf = bench.mp4_file(STREAM)
+   track = vvc.find_vvc_track(buf)
+   config = track.config
+   assert track.sample_entry == b'vvi1'
+   assert config.LengthSizeMinusOne == 3 and config.ptl_present_flag == 0
+   assert config.NAL_unit_type == [T.NAL_UNIT_VPS_NUT, T.NAL_UNIT_SPS_NUT, T.NAL_UNIT_PPS_NUT]
+   records = [vvc.parse_nal_unit(buf[offset:offset + length])[1] for offset, length in config.nal_units]
+   for record, rbsp in zip(records, (bench.VPS_RBSP, bench.SPS_RBSP, bench.PPS_RBSP)):
+      assert vvc.write_syntax(type(record).__name__, record).getvalue() == rbsp
+   assert records[1].sps_pic_width_max_in_luma_samples == 1920
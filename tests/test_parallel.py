@@ -0,0 +1,86 @@
+import importlib
+import subprocess
+import sys
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+# SH_IDR with the ref_pic_lists( ) of SH_B put in, as a CRA slice needs
+SH_CRA = bytes.fromhex('095433a64a1003e880')
+
+
+def with_poc_lsb(ph, lsb):
+   # ph_pic_order_cnt_lsb is bits 7 to 14 of both picture headers of bench
+   x = int.from_bytes(ph, 'big')
+   shift = len(ph) * 8 - 15
+   x = x & ~(0xff << shift) | lsb << shift
+   return x.to_bytes(len(ph), 'big')
+
+
+def cra_stream(periods=4, pictures=100, fill=3000):
+   """
+   An IDR picture and periods - 1 CRA pictures, each followed by pictures
+   trailing pictures: the picture order count runs on over the CRA
+   pictures and past MaxPicOrderCntLsb. The third period has an SPS with
+   other content, the fourth the first one again.
+   """
+   sps = bench.parameter_set_nal_unit(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP)
+   other = bench.parameter_set_nal_unit(T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP, sps_pic_width_max_in_luma_samples=1280,
+                                        sps_pic_height_max_in_luma_samples=720)
+   aud = vvc.nal_unit_bytes(T.NAL_UNIT_AUD_NUT, b'\x10\x80')
+   out = []
+   poc = 0
+   for k in range(periods):
+      parameter_sets = bench.parameter_set_nal_units()
+      if k == 2:
+         parameter_sets = parameter_sets.replace(sps, other)
+      out += [aud, parameter_sets,
+              vvc.nal_unit_bytes(T.NAL_UNIT_PH_NUT, with_poc_lsb(bench.PH_IRAP_RBSP, poc % 256)),
+              vvc.nal_unit_bytes(T.NAL_UNIT_CRA_NUT if k else T.NAL_UNIT_IDR_W_RADL,
+                                 (SH_CRA if k else bench.SH_IDR) + bytes(fill))]
+      for i in range(pictures):
+         poc += 1
+         out += [aud, vvc.nal_unit_bytes(T.NAL_UNIT_PH_NUT, with_poc_lsb(bench.PH_INTER_RBSP, poc % 256)),
+                 vvc.nal_unit_bytes(T.NAL_UNIT_TRAIL_NUT, bench.SH_B + bytes(fill))]
+      poc += 1
+   return b''.join(out)
+
+
+def test_segments_parse_as_the_whole_stream(tmp_path):
+   path = str(tmp_path / 'cra.vvc')
+   with open(path, 'wb') as f:
+      f.write(cra_stream())
+   segments = list(vvc.split_at_irap(vvc.map_bitstream(path), 100000))
+   assert len(segments) == 4
+   # the last segment starts at a CRA picture with PicOrderCntMsb 256
+   assert segments[3][2].prev == {0: (46, 256)}
+
+   active = vvc.ParameterSetStore()
+   expected = [(offset, length) + vvc.parse_nal_unit(nal, active)
+               for offset, length, nal in vvc.scan_nal_units(vvc.map_bitstream(path))]
+   pocs = [rbsp.slice_header.PicOrderCntVal for offset, length, n, rbsp in expected if n.nal_unit_type < 12]
+   assert pocs == list(range(404))
+   counted = vvc.ParameterSetStore()
+   results = list(vvc.parse_parallel(path, 2, segment_size=100000, active=counted))
+   assert [(offset, length, n.as_dict(), rbsp and rbsp.as_dict()) for offset, length, n, rbsp in results] == \
+      [(offset, length, n.as_dict(), rbsp and rbsp.as_dict()) for offset, length, n, rbsp in expected]
+   assert (counted.misses, counted.hits, counted.changes) == (active.misses, active.hits, active.changes)
+
+
+def test_output_matches_the_sequential_run(tmp_path):
+   path = str(tmp_path / 'cra.vvc')
+   with open(path, 'wb') as f:
+      f.write(cra_stream(fill=12000))
+   outputs = []
+   for args in ([], ['--format', 'jsonl']):
+      sequential, parallel = [subprocess.run([sys.executable, vvc.__file__, path] + jobs + args,
+                                             stdout=subprocess.PIPE, check=True).stdout
+                              for jobs in ([], ['-j', '3'])]
+      assert parallel == sequential
+      outputs.append(sequential.decode())
+   text = outputs[0]
+   assert text.count('SPS 0 changed content') == 2
+   assert text.count('repeated parameter set, unchanged') == 8
+   assert text.endswith('!! parameter sets: 4 parsed, 8 repeats, 2 changed\n')
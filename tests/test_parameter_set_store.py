@@ -0,0 +1,59 @@
+import importlib
+
+import bench
+
+vvc = importlib.import_module('266')
+
+SPS = vvc.NalUnitType.NAL_UNIT_SPS_NUT
+
+
+def sps_nal(**fields):
+   # without the start code
+   return bench.parameter_set_nal_unit(SPS, bench.SPS_RBSP, **fields)[4:]
+
+
+def test_repeats_hit_and_changes_are_reported():
+   changes = []
+   active = vvc.ParameterSetStore(on_change=lambda *args: changes.append(args))
+   a, b = sps_nal(), sps_nal(sps_pic_width_max_in_luma_samples=1280)
+   n, first = vvc.parse_nal_unit(a, active)
+   assert (active.misses, active.hits, active.changes) == (1, 0, 0)
+   # a repeat is the very record parsed before
+   assert vvc.parse_nal_unit(bytearray(a), active)[1] is first
+   assert (active.misses, active.hits, active.changes) == (1, 1, 0)
+   assert changes == []
+
+   n, second = vvc.parse_nal_unit(b, active)
+   assert second.sps_pic_width_max_in_luma_samples == 1280
+   assert active[SPS, 0] is second
+   assert (active.misses, active.hits, active.changes) == (2, 1, 1)
+   assert changes == [(SPS, 0, first, second)]
+
+   # back to the first version: a hit, but still a change
+   assert vvc.parse_nal_unit(a, active)[1] is first
+   assert active[SPS, 0] is first
+   assert (active.misses, active.hits, active.changes) == (2, 2, 2)
+   assert changes[-1] == (SPS, 0, second, first)
+
+
+def test_other_ids_are_not_changes():
+   changes = []
+   active = vvc.ParameterSetStore(on_change=lambda *args: changes.append(args))
+   vvc.parse_nal_unit(sps_nal(), active)
+   vvc.parse_nal_unit(sps_nal(sps_seq_parameter_set_id=1, sps_pic_width_max_in_luma_samples=1280), active)
+   assert active.changes == 0 and changes == []
+   assert active[SPS, 1].sps_pic_width_max_in_luma_samples == 1280
+   assert active[SPS, 0].sps_pic_width_max_in_luma_samples != 1280
+
+
+def test_cache_is_bounded():
+   active = vvc.ParameterSetStore(maxsize=2)
+   nals = [sps_nal(sps_pic_width_max_in_luma_samples=w) for w in (64, 128, 256)]
+   for nal in nals:
+      vvc.parse_nal_unit(nal, active)
+   assert len(active.cache) == 2
+   # the oldest version was dropped and is parsed again
+   vvc.parse_nal_unit(nals[0], active)
+   assert (active.misses, active.hits) == (4, 0)
+   vvc.parse_nal_unit(nals[2], active)
+   assert active.hits == 1
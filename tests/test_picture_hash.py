@@ -0,0 +1,101 @@
+import hashlib
+import importlib
+import random
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+
+def samples(width, height, bitDepth, seed=266):
+   rnd = random.Random(seed)
+   return [[rnd.randrange(1 << bitDepth) for x in range(width)] for y in range(height)]
+
+
+def picture_data(component, bitDepth):
+   # H.274 pictureData: low byte first above 8 bits
+   data = bytearray()
+   for row in component:
+      for sample in row:
+         data.append(sample & 0xff)
+         if bitDepth > 8:
+            data.append(sample >> 8)
+   return bytes(data)
+
+
+def h274_crc(component, bitDepth):
+   pictureData = picture_data(component, bitDepth) + bytes(2)
+   crc = 0xffff
+   for bitIdx in range(len(pictureData) * 8):
+      dataByte = pictureData[bitIdx >> 3]
+      crcMsb = (crc >> 15) & 1
+      bitVal = (dataByte >> (7 - (bitIdx & 7))) & 1
+      crc = (((crc << 1) + bitVal) & 0xffff) ^ (crcMsb * 0x1021)
+   return crc
+
+
+def h274_checksum(component, bitDepth):
+   total = 0
+   for y, row in enumerate(component):
+      for x, sample in enumerate(row):
+         xorMask = (x & 0xff) ^ (y & 0xff) ^ (x >> 8) ^ (y >> 8)
+         total = (total + ((sample & 0xff) ^ xorMask)) & 0xffffffff
+         if bitDepth > 8:
+            total = (total + ((sample >> 8) ^ xorMask)) & 0xffffffff
+   return total
+
+
+@pytest.mark.parametrize('width, height', [(8, 4), (300, 3)])
+@pytest.mark.parametrize('bitDepth', [8, 10])
+def test_picture_hash_matches_h274(width, height, bitDepth):
+   component = samples(width, height, bitDepth)
+   plane = picture_data(component, bitDepth)
+   sample_bytes = 2 if bitDepth > 8 else 1
+   assert vvc.picture_hash(plane, 0, width, height, sample_bytes) == hashlib.md5(plane).hexdigest()
+   assert vvc.picture_hash(plane, 1, width, height, sample_bytes) == h274_crc(component, bitDepth)
+   assert vvc.picture_hash(plane, 2, width, height, sample_bytes) == h274_checksum(component, bitDepth)
+
+
+def test_picture_planes_use_the_pps_size():
+   sps = vvc.seq_parameter_set_rbsp.__new__(vvc.seq_parameter_set_rbsp)
+   sps.sps_pic_width_max_in_luma_samples, sps.sps_pic_height_max_in_luma_samples = 1920, 1080
+   sps.sps_bitdepth_minus8, sps.sps_chroma_format_idc = 2, 1
+   pps = vvc.pic_parameter_set_rbsp.__new__(vvc.pic_parameter_set_rbsp)
+   pps.pps_pic_width_in_luma_samples, pps.pps_pic_height_in_luma_samples = 960, 544
+   assert vvc.picture_planes(sps) == ([(1920, 1080), (960, 540), (960, 540)], 2)
+   assert vvc.picture_planes(sps, pps) == ([(960, 544), (480, 272), (480, 272)], 2)
+
+
+def test_picture_planes_cropped_to_the_conformance_window():
+   sps = vvc.seq_parameter_set_rbsp(vvc.BitReader(bench.SPS_RBSP))
+   pps = vvc.pic_parameter_set_rbsp(vvc.BitReader(bench.PPS_RBSP))
+   assert sps.sps_conf_win_bottom_offset == 4
+   assert vvc.picture_planes(sps, pps) == ([(1920, 1080), (960, 540), (960, 540)], 2)
+   assert vvc.picture_planes(sps, pps, cropped=True) == ([(1920, 1072), (960, 536), (960, 536)], 2)
+   assert vvc.picture_planes(sps, cropped=True) == ([(1920, 1072), (960, 536), (960, 536)], 2)
+
+
+@pytest.mark.parametrize('cropped', [False, True])
+def test_verify_picture_hashes_needs_an_uncropped_reconstruction(tmp_path, cropped):
+   sps = vvc.seq_parameter_set_rbsp(vvc.BitReader(bench.SPS_RBSP))
+   sizes, sample_bytes = vvc.picture_planes(sps, cropped=cropped)
+   rnd = random.Random(266)
+   frames = [[rnd.randbytes(width * height * sample_bytes) for width, height in sizes] for i in range(3)]
+   pictures = []
+   for i, planes in enumerate(frames):
+      md5 = b''.join(hashlib.md5(plane).digest() for plane in planes)
+      picture = vvc.DecodedPicture(0, i, 1, sps)
+      picture.hash = vvc.decoded_picture_hash(vvc.BitReader(bytes((0, 0)) + md5), 50)
+      pictures.append(picture)
+   path = str(tmp_path / 'rec.yuv')
+   with open(path, 'wb') as f:
+      f.write(b''.join(b''.join(planes) for planes in frames))
+   if cropped:
+      with pytest.raises(ValueError, match='conformance window'):
+         list(vvc.verify_picture_hashes(pictures, path))
+   else:
+      results = list(vvc.verify_picture_hashes(pictures, path))
+      assert len(results) == 9
+      assert all(expected == actual for frame, picture, cIdx, expected, actual in results)
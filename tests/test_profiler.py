@@ -0,0 +1,54 @@
+import collections
+import importlib
+import io
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+STREAM = bench.synthetic_gop_stream(32 << 10, gop=4)
+
+
+def test_counters_per_stage_and_nal_unit_type():
+   nals = list(vvc.scan_nal_units(STREAM))
+   active = vvc.ParameterSetStore()
+   with vvc.ParseProfiler() as profiler:
+      assert vvc.nal_unit_rbsp is not profiler.saved['nal_unit_rbsp']
+      for offset, length, nal in profiler.scan(vvc.scan_nal_units(STREAM)):
+         profiler.parse(nal, active)
+   # the unescape timers are gone again
+   assert not profiler.saved and vvc.nal_unit_rbsp.__name__ == 'nal_unit_rbsp'
+
+   counters = profiler.counters()
+   stages = counters['stages']
+   assert stages['scan']['calls'] == len(nals) + 1
+   assert stages['parse']['calls'] == len(nals)
+   assert stages['show']['calls'] == 0
+   # parameter set repeats come from the store without being unescaped
+   assert 0 < stages['unescape']['calls'] < len(nals)
+   assert stages['unescape']['ns'] <= stages['parse']['ns']
+
+   count = collections.Counter(nal[1] >> 3 for offset, length, nal in nals)
+   size = collections.Counter()
+   for offset, length, nal in nals:
+      size[nal[1] >> 3] += length
+   types = counters['nal_unit_types']
+   assert dict((t, c['count']) for t, c in types.items()) == dict(count)
+   assert dict((t, c['bytes']) for t, c in types.items()) == dict(size)
+   assert sum(c['ns'] for c in types.values()) == stages['parse']['ns']
+
+   f = io.StringIO()
+   profiler.show(f)
+   lines = [line.split() for line in f.getvalue().splitlines()]
+   # stages never run are left out
+   assert [line[0] for line in lines[1:4]] == ['scan', 'unescape', 'parse']
+   assert [str(T.NAL_UNIT_SPS_NUT), 'NAL_UNIT_SPS_NUT', str(count[T.NAL_UNIT_SPS_NUT])] in [line[:3] for line in lines]
+
+
+def test_nothing_is_timed_unless_enabled():
+   profiler = vvc.ParseProfiler()
+   for offset, length, nal in vvc.scan_nal_units(STREAM):
+      profiler.parse(nal)
+   assert profiler.counters()['stages']['unescape']['calls'] == 0
+   assert profiler.counters()['stages']['parse']['calls'] > 0
@@ -0,0 +1,49 @@
+import importlib
+
+import pytest
+
+vvc = importlib.import_module('266')
+
+
+def unescape(nal):
+   # rbsp byte by byte as 7.3.1.1 reads it, and the NAL offset of each byte
+   rbsp = []
+   where = []
+   zeros = 0
+   i = 2
+   while i < len(nal):
+      if zeros >= 2 and nal[i] == 3:
+         zeros = 0
+         i += 1
+         continue
+      rbsp.append(nal[i])
+      where.append(i)
+      zeros = zeros + 1 if nal[i] == 0 else 0
+      i += 1
+   return bytes(rbsp), where
+
+
+@pytest.mark.parametrize('payload, epb', [
+   ('11 22 33', []),
+   ('00 00 03 01', [4]),
+   ('00 00 03 00 00 03 01', [4, 7]),                     # back to back
+   ('00 00 03 00 00 03 00 00 03 00', [4, 7, 10]),
+   ('00 00 03 03 00 00 03', [4, 8]),                     # a 03 after one is data
+   ('00 00 03', [4]),
+   ('ff 00 00 03 00 ff 00 00 03 02', [5, 10]),
+])
+def test_emulation_prevention_bytes_and_their_positions(payload, epb):
+   nal = b'\x02\x01' + bytes.fromhex(payload)
+   rbsp, where = vvc.nal_unit_rbsp(nal)
+   assert rbsp == unescape(nal)[0]
+   assert where == epb
+   assert vvc.nal_unit_rbsp(memoryview(nal)) == (rbsp, epb)
+
+
+def test_rbsp_positions_map_back_to_the_nal_unit():
+   nal = b'\x02\x01' + bytes.fromhex('00 00 03 00 00 03 01 ff 00 00 03 00 00 03 03 7f')
+   rbsp, epb = vvc.nal_unit_rbsp(nal)
+   rbsp_ref, where = unescape(nal)
+   assert rbsp == rbsp_ref
+   for pos in range(len(rbsp) * 8):
+      assert vvc.rbsp_to_nal_pos(pos, epb) == where[pos >> 3] * 8 + (pos & 7)
@@ -0,0 +1,95 @@
+import importlib
+import random
+import socket
+import threading
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+STREAM = bench.synthetic_gop_stream(200 << 10, gop=8)
+NALS = [bytes(nal) for offset, length, nal in vvc.scan_nal_units(STREAM)]
+
+
+def depacketize(packets, **options):
+   d = vvc.RtpDepacketizer(**options)
+   nals = []
+   for packet in packets:
+      nals.extend(bytes(nal) for offset, length, nal in d.feed(packet))
+   nals.extend(bytes(nal) for offset, length, nal in d.flush())
+   return d, nals
+
+
+def packet_types(packets):
+   return set(packet[13] >> 3 for packet in packets)
+
+
+@pytest.mark.parametrize('donl', [False, True])
+@pytest.mark.parametrize('mtu', [1400, 200])
+def test_single_ap_and_fu_packets(mtu, donl):
+   packets = bench.rtp_packets(STREAM, mtu=mtu, donl=donl)
+   assert {vvc.RTP_AP, vvc.RTP_FU} <= packet_types(packets)
+   d, nals = depacketize(packets, donl=donl)
+   assert nals == NALS
+   assert (d.packets, d.lost, d.late, d.dropped) == (len(packets), 0, 0, 0)
+
+
+def test_single_nal_unit_packets():
+   packets = bench.rtp_packets(b''.join(b'\x00\x00\x01' + nal for nal in NALS[:3]), mtu=40)
+   d, nals = depacketize(packets)
+   assert nals == NALS[:3]
+
+
+def test_ap_with_dond():
+   # two NAL units in one AP: a DOND comes before the second
+   packets = bench.rtp_packets(b''.join(b'\x00\x00\x01' + nal for nal in NALS[:2]), donl=True)
+   assert len(packets) == 1 and packets[0][13] >> 3 == vvc.RTP_AP
+   d, nals = depacketize(packets, donl=True)
+   assert nals == NALS[:2]
+   assert d.dropped == 0
+
+
+def test_reordered_within_window():
+   packets = bench.rtp_packets(STREAM, mtu=500)
+   rnd = random.Random(266)
+   # the first packet sets the expected sequence number, keep it first
+   reordered = packets[:1]
+   for i in range(1, len(packets), 16):
+      block = packets[i:i + 16]
+      rnd.shuffle(block)
+      reordered += block
+   d, nals = depacketize(reordered)
+   assert nals == NALS
+   assert d.lost == 0 and d.late == 0
+
+
+def test_loss_inside_fu_drops_that_nal_unit():
+   packets = bench.rtp_packets(STREAM, mtu=1400)
+   # a middle fragment of the first fragmented NAL unit
+   first = next(i for i, packet in enumerate(packets) if packet[13] >> 3 == vvc.RTP_FU)
+   assert not packets[first + 1][14] & 0xc0
+   d, nals = depacketize(packets[:first + 1] + packets[first + 2:], window=4)
+   assert d.lost == 1
+   fragmented = [nal for nal in NALS if len(nal) + 12 > 1400]
+   assert fragmented[0] not in nals
+   assert nals == [nal for nal in NALS if nal is not fragmented[0]]
+
+
+def test_local_udp_sender():
+   packets = bench.rtp_packets(STREAM, mtu=1400)
+   receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+   receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+   receiver.bind(('127.0.0.1', 0))
+   receiver.settimeout(0.5)
+   try:
+      sender = threading.Thread(target=bench.send_rtp, args=(packets, receiver.getsockname(), 0.001))
+      sender.start()
+      d = vvc.RtpDepacketizer()
+      nals = [bytes(nal) for offset, length, nal in vvc.iter_rtp_nal_bytes(receiver, d)]
+      sender.join()
+   finally:
+      receiver.close()
+   assert d.lost == 0
+   assert nals == NALS
@@ -0,0 +1,50 @@
+import importlib
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+AUD = bench.rbsp_bytes('0101' + '1')
+EOS = b''
+
+
+def units(buf, *args):
+   return [(offset, length, bytes(nal)) for offset, length, nal in vvc.scan_nal_units(buf, *args)]
+
+
+@pytest.mark.parametrize('zero_byte', (b'', b'\x00'))
+@pytest.mark.parametrize('trailing', (0, 1, 5))
+def test_start_codes_and_trailing_zeros(zero_byte, trailing):
+   nals = [
+      bench.nal_unit(vvc.NalUnitType.NAL_UNIT_AUD_NUT, AUD, start_code=zero_byte + b'\x00\x00\x01'),
+      bench.nal_unit(vvc.NalUnitType.NAL_UNIT_EOS_NUT, EOS, start_code=zero_byte + b'\x00\x00\x01'),
+      bench.nal_unit(vvc.NalUnitType.NAL_UNIT_AUD_NUT, bytes((0x00, 0x80)), start_code=zero_byte + b'\x00\x00\x01')]
+   buf = b'\x00' * trailing + b''.join(nal + b'\x00' * trailing for nal in nals)
+   found = units(buf)
+   assert [nal for offset, length, nal in found] == [nal[len(zero_byte) + 3:] for nal in nals]
+   for offset, length, nal in found:
+      assert buf[offset:offset + length] == nal
+      assert buf[offset - 3:offset] == b'\x00\x00\x01'
+
+
+def test_mixed_start_codes():
+   a = bench.nal_unit(vvc.NalUnitType.NAL_UNIT_AUD_NUT, AUD, start_code=b'\x00\x00\x00\x01')
+   b = bench.nal_unit(vvc.NalUnitType.NAL_UNIT_AUD_NUT, AUD)
+   buf = a + b + a
+   assert units(buf) == [(4, 3, a[4:]), (10, 3, b[3:]), (17, 3, a[4:])]
+
+
+def test_pos_and_end():
+   a = bench.nal_unit(vvc.NalUnitType.NAL_UNIT_AUD_NUT, AUD)
+   buf = a * 3
+   assert units(buf, len(a)) == [(len(a) + 3, 3, a[3:]), (2 * len(a) + 3, 3, a[3:])]
+   assert units(buf, 0, len(a) + 5) == [(3, 3, a[3:]), (len(a) + 3, 2, a[3:5])]
+
+
+def test_empty_and_missing_nal_units():
+   assert units(b'') == []
+   assert units(b'\x00\x00\x00\x00') == []
+   assert units(b'\x00\x00\x01\x00\x00\x00\x01') == []
+   assert units(b'\x12\x34\x00\x00\x01\x00\x29') == [(5, 2, b'\x00\x29')]
@@ -0,0 +1,48 @@
+import importlib
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+STREAM = bench.synthetic_gop_stream(100 << 10, gop=4)
+
+
+def test_headers_match_scan_nal_units():
+   nals = list(vvc.scan_nal_units(STREAM))
+   headers = list(vvc.scan_headers(STREAM))
+   assert [(offset, length) for offset, length, nal in nals] == [h[:2] for h in headers]
+   for (offset, length, nal), h in zip(nals, headers):
+      n = vvc.nal_unit_header(vvc.BitReader(nal[:2]))
+      assert h[2:] == (n.nal_unit_type, n.nuh_layer_id, n.nuh_temporal_id_plus1, None)
+
+
+def test_only_the_types_asked_for_are_unescaped(monkeypatch):
+   unescaped = []
+   nal_unit_rbsp = vvc.nal_unit_rbsp
+
+   def counting(nal):
+      unescaped.append(nal[1] >> 3)
+      return nal_unit_rbsp(nal)
+
+   monkeypatch.setattr(vvc, 'nal_unit_rbsp', counting)
+   headers = list(vvc.scan_headers(STREAM, types=(T.NAL_UNIT_SPS_NUT,)))
+   sps = [rbsp for offset, length, nal_unit_type, layer, tid, rbsp in headers if nal_unit_type == T.NAL_UNIT_SPS_NUT]
+   assert sps and all(rbsp.sps_seq_parameter_set_id == 0 for rbsp in sps)
+   assert all(h[-1] is None for h in headers if h[2] != T.NAL_UNIT_SPS_NUT)
+   assert unescaped == [T.NAL_UNIT_SPS_NUT] * len(sps)
+
+
+def test_repeated_parameter_sets_come_from_active():
+   active = vvc.ParameterSetStore()
+   types = (T.NAL_UNIT_VPS_NUT, T.NAL_UNIT_SPS_NUT, T.NAL_UNIT_PPS_NUT)
+   headers = [h for h in vvc.scan_headers(STREAM, types, active) if h[-1] is not None]
+   assert len(headers) > 3
+   assert active.misses == 3 and active.hits == len(headers) - 3
+
+
+def test_pos_and_end():
+   headers = list(vvc.scan_headers(STREAM))
+   offset, length = headers[3][:2]
+   start, end = headers[1][0] - 3, offset + length
+   assert list(vvc.scan_headers(STREAM, pos=start, end=end)) == headers[1:4]
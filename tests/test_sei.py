@@ -0,0 +1,50 @@
+import importlib
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+P = vvc.SeiPayloadType
+
+
+def sei_nal(*messages):
+   # an SEI NAL unit without its start code
+   return bench.nal_unit(T.NAL_UNIT_PREFIX_SEI_NUT, b''.join(bench.sei_message(*m) for m in messages) + b'\x80')[3:]
+
+
+def test_buffering_period_reads_nal_and_vcl_values_per_sublayer():
+   ue = bench.exp_golomb_bits
+   bits = '1' '1'                                       # bp_nal/vcl_hrd_params_present_flag
+   bits += format(23, '05b') + format(15, '05b') + format(4, '05b')
+   bits += '0' '0' '0'                                  # du, concatenation, additional concatenation info
+   bits += format(0, '016b')                            # bp_cpb_removal_delay_delta_minus1
+   bits += '001' '0' + ue(0) + '1'                      # 2 sublayers, no deltas, 1 CPB, sublayer delays
+   for i in range(2):
+      for hrd in (90000, 80000):
+         bits += format(hrd + i, '024b') + format(hrd // 1000 + i, '024b')
+   bits += '1' + ue(3)                                  # bp_dpb_output_tid_offset[ 0 ]
+   bits += '1' '1'                                      # bp_alt_cpb_params_present_flag, bp_use_alt_cpb_params_flag
+   rbsp = vvc.sei_rbsp(sei_nal((P.BUFFERING_PERIOD, bench.rbsp_bytes(bits + '1'))),
+                       vvc.SeiParser([P.BUFFERING_PERIOD]))
+   bp = rbsp.sei_message[0].buffering_period
+   assert bp.bp_nal_initial_cpb_removal_delay == [[90000], [90001]]
+   assert bp.bp_nal_initial_cpb_removal_offset == [[90], [91]]
+   assert bp.bp_vcl_initial_cpb_removal_delay == [[80000], [80001]]
+   assert bp.bp_vcl_initial_cpb_removal_offset == [[80], [81]]
+   assert bp.bp_sublayer_dpb_output_offsets_present_flag == 1
+   assert bp.bp_dpb_output_tid_offset == [3]
+   assert bp.bp_alt_cpb_params_present_flag == 1
+   assert bp.bp_use_alt_cpb_params_flag == 1
+
+
+def test_pic_timing_uses_the_last_buffering_period():
+   sei = vvc.SeiParser([P.PIC_TIMING])
+   rbsp = sei.parse(sei_nal((P.BUFFERING_PERIOD, bench.BP_PAYLOAD), (P.PIC_TIMING, bench.PT_PAYLOAD)))
+   bp = rbsp.sei_message[0].buffering_period
+   assert bp.bp_nal_initial_cpb_removal_delay == [[90000]]
+   assert not hasattr(bp, 'bp_vcl_initial_cpb_removal_delay')
+   assert sei.buffering_period is bp
+   pt = rbsp.sei_message[1].pic_timing
+   assert pt.pt_cpb_removal_delay_minus1 == [7]
+   assert pt.pt_dpb_output_delay == 3
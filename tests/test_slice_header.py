@@ -0,0 +1,119 @@
+import importlib
+import types
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+
+
+def se(v):
+   return bench.exp_golomb_bits(2 * v - 1 if v > 0 else -2 * v)
+
+
+def inter_store(**pps_fields):
+   # the bench parameter sets, PPS fields changed, and the B picture header
+   active = vvc.ParameterSetStore()
+   for nal_unit_type, rbsp, fields in ((T.NAL_UNIT_VPS_NUT, bench.VPS_RBSP, {}),
+                                       (T.NAL_UNIT_SPS_NUT, bench.SPS_RBSP, {}),
+                                       (T.NAL_UNIT_PPS_NUT, bench.PPS_RBSP, pps_fields)):
+      vvc.parse_nal_unit(bench.parameter_set_nal_unit(nal_unit_type, rbsp, **fields)[4:], active)
+   vvc.parse_nal_unit(bench.nal_unit(T.NAL_UNIT_PH_NUT, bench.PH_INTER_RBSP)[3:], active)
+   return active
+
+
+def slice_header(active, bits):
+   # the slice header of bits, byte_alignment( ) added
+   n, rbsp = vvc.parse_nal_unit(bench.nal_unit(T.NAL_UNIT_TRAIL_NUT, bench.rbsp_bytes(bits + '1'))[3:], active)
+   return rbsp.slice_header
+
+
+class Found(Exception):
+   pass
+
+
+def position(monkeypatch, active, name):
+   """
+   Bit position in SH_B at which slice_header( ) calls the structure name
+   """
+   def record(s, *args):
+      raise Found(s.pos)
+   monkeypatch.setattr(vvc, name, record)
+   with pytest.raises(Found) as found:
+      slice_header(active, SH_B_BITS)
+   monkeypatch.undo()
+   return found.value.args[0]
+
+
+# SH_B up to its byte_alignment( )
+SH_B_BITS = ''.join(format(b, '08b') for b in bench.SH_B).rstrip('0')[:-1]
+
+
+def test_list_1_is_inferred_from_list_0(monkeypatch):
+   active = inter_store()
+   sps = active.plan(1).sps
+   sh = slice_header(active, SH_B_BITS)
+   assert sh.ref_pic_lists.rpl_sps_flag == [1, 1]
+   assert sh.ref_pic_lists.rpl_idx == [1, 1]
+   # rpl_idx[ 0 ] follows rpl_sps_flag[ 0 ]
+   pos = position(monkeypatch, active, 'ref_pic_lists')
+   assert SH_B_BITS[pos:pos + 2] == '11'
+   sh = slice_header(active, SH_B_BITS[:pos + 1] + '0' + SH_B_BITS[pos + 2:])
+   assert sh.ref_pic_lists.rpl_idx == [0, 0] and sh.ref_pic_lists.RplsIdx == [0, 0]
+   assert sh.ref_pic_lists.ref_pic_list_struct[1] is sps.ref_pic_list_struct[1][0]
+   assert sh.sh_entry_point_offset_minus1 == [1000]
+
+
+def test_list_1_signalled(monkeypatch):
+   active = inter_store(pps_rpl1_idx_present_flag=1)
+   pos = position(monkeypatch, active, 'ref_pic_lists')
+   # rpl_sps_flag[ 1 ] 1, rpl_idx[ 1 ] 0 after list 0
+   sh = slice_header(active, SH_B_BITS[:pos + 2] + '10' + SH_B_BITS[pos + 2:])
+   assert sh.ref_pic_lists.rpl_sps_flag == [1, 1]
+   assert sh.ref_pic_lists.rpl_idx == [1, 0]
+   assert sh.sh_entry_point_offset_minus1 == [1000]
+
+
+def test_pred_weight_table(monkeypatch):
+   active = inter_store(pps_weighted_bipred_flag=1)
+   pos = position(monkeypatch, active, 'pred_weight_table')
+   ue = bench.exp_golomb_bits
+   bits = ue(6) + se(-1)                                # luma_log2_weight_denom, delta_chroma_log2_weight_denom
+   bits += '10' '01' + se(3) + se(-2) + se(1) + se(-1) + se(0) + se(2)   # 2 active in list 0
+   bits += '001' '000' + se(-4) + se(5)                 # 3 active in list 1
+   sh = slice_header(active, SH_B_BITS[:pos] + bits + SH_B_BITS[pos:])
+   assert sh.NumRefIdxActive == [2, 3]
+   pwt = sh.pred_weight_table
+   assert (pwt.luma_log2_weight_denom, pwt.delta_chroma_log2_weight_denom) == (6, -1)
+   assert pwt.luma_weight_l0_flag == [1, 0] and pwt.chroma_weight_l0_flag == [0, 1]
+   assert pwt.delta_luma_weight_l0 == [3, 0] and pwt.luma_offset_l0 == [-2, 0]
+   assert pwt.delta_chroma_weight_l0 == [[0, 0], [1, 0]] and pwt.delta_chroma_offset_l0 == [[0, 0], [-1, 2]]
+   assert pwt.luma_weight_l1_flag == [0, 0, 1] and pwt.chroma_weight_l1_flag == [0, 0, 0]
+   assert pwt.delta_luma_weight_l1 == [0, 0, -4] and pwt.luma_offset_l1 == [0, 0, 5]
+   # and the rest of the slice header where it was
+   assert (sh.sh_qp_delta, sh.sh_entry_point_offset_minus1) == (-3, [1000])
+
+
+def test_poc_msb_wraps():
+   counter = vvc.PictureOrderCounter()
+
+   def picture(nal_unit_type, lsb, tid=0):
+      n = types.SimpleNamespace(nal_unit_type=nal_unit_type, nuh_layer_id=0, nuh_temporal_id_plus1=tid + 1)
+      ph = types.SimpleNamespace(MaxPicOrderCntLsb=16, ph_pic_order_cnt_lsb=lsb, ph_poc_msb_cycle_present_flag=0)
+      return counter.slice(n, ph)
+
+   assert picture(T.NAL_UNIT_IDR_W_RADL, 0) == 0
+   assert picture(T.NAL_UNIT_TRAIL_NUT, 6) == 6
+   assert picture(T.NAL_UNIT_TRAIL_NUT, 12) == 12
+   # lsb wraps: PicOrderCntMsb goes up by MaxPicOrderCntLsb
+   assert picture(T.NAL_UNIT_TRAIL_NUT, 2) == 18
+   # a TemporalId 1 picture before it in output order, not prevTid0Pic
+   assert picture(T.NAL_UNIT_TRAIL_NUT, 14, tid=1) == 14
+   assert picture(T.NAL_UNIT_TRAIL_NUT, 15, tid=1) == 15
+   assert picture(T.NAL_UNIT_TRAIL_NUT, 8) == 24
+   # an IDR picture starts again from 0
+   assert picture(T.NAL_UNIT_IDR_W_RADL, 0) == 0
+   assert counter.clvs == 1
@@ -0,0 +1,59 @@
+import importlib
+import marshal
+import os
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+T = vvc.NalUnitType
+PARAMETER_SETS = [
+   (T.NAL_UNIT_VPS_NUT, 'video_parameter_set_rbsp', bench.VPS_RBSP),
+   (T.NAL_UNIT_SPS_NUT, 'seq_parameter_set_rbsp', bench.SPS_RBSP),
+   (T.NAL_UNIT_PPS_NUT, 'pic_parameter_set_rbsp', bench.PPS_RBSP),
+]
+
+
+@pytest.mark.parametrize('nal_unit_type, name, rbsp', PARAMETER_SETS)
+def test_parameter_sets_write_back_the_same_bytes(nal_unit_type, name, rbsp):
+   n, ps = vvc.parse_nal_unit(bytes((0, nal_unit_type << 3 | 1)) + rbsp)
+   assert type(ps).__name__ == name
+   assert vvc.write_syntax(name, ps).getvalue() == rbsp
+   lazy = vvc.LazyParameterSet(type(ps), rbsp)
+   assert lazy.parse().as_dict() == ps.as_dict()
+
+
+def test_large_sps_writes_back_the_same_bytes():
+   rbsp = bench.rpl_sps_rbsp(lists=8, entries=5)
+   sps = vvc.seq_parameter_set_rbsp(vvc.BitReader(rbsp))
+   assert sps.sps_num_ref_pic_lists == [8, 8]
+   assert vvc.write_syntax('seq_parameter_set_rbsp', sps).getvalue() == rbsp
+
+
+def cached(cache_dir):
+   return [name for name in os.listdir(cache_dir) if name.startswith('syntax.')]
+
+
+@pytest.mark.parametrize('content', [
+   b'\x00not marshal data',
+   marshal.dumps(compile('x = 1', '<other tables>', 'exec')),
+   marshal.dumps(266),
+])
+def test_bad_cache_file_is_compiled_again(tmp_path, content):
+   cache_dir = str(tmp_path)
+   parsers = vvc.compile_syntax_tables(cache_dir=cache_dir)
+   [name] = cached(cache_dir)
+   path = os.path.join(cache_dir, name)
+   with open(path, 'wb') as f:
+      f.write(content)
+   again = vvc.compile_syntax_tables(cache_dir=cache_dir)
+   assert sorted(again) == sorted(parsers)
+   sps = again['seq_parameter_set_rbsp'](vvc.BitReader(bench.SPS_RBSP))
+   assert vvc.write_syntax('seq_parameter_set_rbsp', sps).getvalue() == bench.SPS_RBSP
+   # replaced by the new code, and no temporary file left behind
+   assert cached(cache_dir) == [name]
+   with open(path, 'rb') as f:
+      assert f.read() != content
+   assert sorted(vvc.compile_syntax_tables(cache_dir=cache_dir)) == sorted(parsers)
@@ -0,0 +1,94 @@
+import csv
+import importlib
+import io
+import json
+
+import pytest
+
+import bench
+
+vvc = importlib.import_module('266')
+
+STREAM = bench.synthetic_gop_stream(32 << 10, gop=4)
+
+
+def parsed():
+   active = vvc.ParameterSetStore()
+   return [(offset, length) + vvc.parse_nal_unit(nal, active) for offset, length, nal in vvc.scan_nal_units(STREAM)]
+
+
+class CountingFile(io.StringIO):
+
+   def __init__(self):
+      io.StringIO.__init__(self)
+      self.writes = 0
+
+   def write(self, s):
+      self.writes += 1
+      return io.StringIO.write(self, s)
+
+
+def write_all(cls, records, batch_size=1024):
+   f = CountingFile()
+   writer = cls(f, batch_size)
+   for record in records:
+      writer.write(record)
+   writer.close()
+   return f
+
+
+def test_text_is_the_show_output(capsys):
+   nals = parsed()
+   for nal in nals:
+      vvc.show_nal_unit(nal, {})
+   f = write_all(vvc.TextWriter, [vvc.nal_record(*nal) for nal in nals])
+   assert f.getvalue() == capsys.readouterr().out
+
+
+def test_records_are_written_in_batches():
+   records = [vvc.nal_record(*nal) for nal in parsed()]
+   f = write_all(vvc.JsonLinesWriter, records, batch_size=10)
+   assert f.writes == (len(records) + 9) // 10
+   assert [json.loads(line) for line in f.getvalue().splitlines()] == json.loads(json.dumps(records))
+
+
+def test_csv_has_a_row_per_syntax_element():
+   records = [vvc.nal_record(*nal) for nal in parsed()]
+   rows = list(csv.reader(io.StringIO(write_all(vvc.CsvWriter, records).getvalue())))
+   assert rows[0] == ['offset', 'nal_unit_type', 'name', 'value']
+   assert len(rows) - 1 == sum(len(list(vvc.flatten_record(record))) for record in records)
+   SPS = vvc.NalUnitType.NAL_UNIT_SPS_NUT
+   sps = [record for record in records if record['nal_unit_header']['nal_unit_type'] == SPS][0]
+   values = dict((name, value) for offset, nal_unit_type, name, value in rows[1:] if offset == str(sps['offset']))
+   assert values['rbsp.sps_pic_width_max_in_luma_samples'] == str(sps['rbsp']['sps_pic_width_max_in_luma_samples'])
+
+
+def test_flatten_record():
+   record = {'a': 1, 'b': {'c': [1, 2], 'd': [{'e': 3}, {'e': 4, 'f': [[{'g': 5}]]}]}}
+   assert list(vvc.flatten_record(record)) == [
+      ('a', 1), ('b.c', [1, 2]), ('b.d[0].e', 3), ('b.d[1].e', 4), ('b.d[1].f[0][0].g', 5)]
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_columnar_has_a_row_per_nal_unit(tmp_path, extension):
+   pyarrow = pytest.importorskip('pyarrow')
+   records = [vvc.nal_record(*nal) for nal in parsed()]
+   path = str(tmp_path / ('out' + extension))
+   writer = vvc.ColumnarWriter(path, batch_size=7)
+   for record in records:
+      writer.write(record)
+   writer.close()
+   if extension == '.arrow':
+      import pyarrow.ipc
+      table = pyarrow.ipc.open_file(path).read_all()
+   else:
+      import pyarrow.parquet
+      table = pyarrow.parquet.read_table(path)
+   assert table.num_rows == len(records)
+   offsets = table.column('offset').to_pylist()
+   assert offsets == [record['offset'] for record in records]
+   # null where a NAL unit does not have the syntax element
+   width = table.column('rbsp.sps_pic_width_max_in_luma_samples').to_pylist()
+   SPS = vvc.NalUnitType.NAL_UNIT_SPS_NUT
+   assert [i for i, w in enumerate(width) if w is not None] == \
+      [i for i, record in enumerate(records) if record['nal_unit_header']['nal_unit_type'] == SPS]